@@ -3,6 +3,8 @@ xref_map = {
 'AAMAlgorithmResult': ('class', 'menpofit.aam.result.AAMAlgorithmResult'),
 'AAMResult': ('class', 'menpofit.aam.result.AAMResult'),
 'ActiveShapeModel': ('class', 'menpofit.clm.ActiveShapeModel'),
+'align_shape_with_bounding_box': ('function', 'menpofit.fitter.align_shape_with_bounding_box'),
+'align_shape_with_bounding_boxes': ('function', 'menpofit.fitter.align_shape_with_bounding_boxes'),
 'AlternatingForwardCompositional': ('class', 'menpofit.aam.AlternatingForwardCompositional'),
 'AlternatingInverseCompositional': ('class', 'menpofit.aam.AlternatingInverseCompositional'),
 'AlternatingRegularisedLandmarkMeanShift': ('class', 'menpofit.unified_aam_clm.AlternatingRegularisedLandmarkMeanShift'),
@@ -12,12 +14,20 @@ xref_map = {
 'APSResult': ('class', 'menpofit.aps.result.APSResult'),
 'ATM': ('class', 'menpofit.atm.base.ATM'),
 'ATMAlgorithmResult': ('class', 'menpofit.atm.result.ATMAlgorithmResult'),
+'barycentric_lookup': ('function', 'menpofit.transform.barycentric_lookup'),
+'batch_procrustes_alignment': ('function', 'menpofit.transform.batch_procrustes_alignment'),
+'BatchedPatchFeatures': ('class', 'menpofit.sdm.BatchedPatchFeatures'),
 'bb_area': ('class', 'menpofit.error.bb_area'),
 'bb_avg_edge_length': ('class', 'menpofit.error.bb_avg_edge_length'),
 'bb_diagonal': ('class', 'menpofit.error.bb_diagonal'),
 'bb_perimeter': ('class', 'menpofit.error.bb_perimeter'),
+'cached_barycentric_lookup': ('function', 'menpofit.transform.cached_barycentric_lookup'),
+'CachedFeatures': ('class', 'menpofit.cache.CachedFeatures'),
 'CLM': ('class', 'menpofit.clm.CLM'),
+'compare_fitting_precision': ('function', 'menpofit.fitter.compare_fitting_precision'),
+'compute_features': ('function', 'menpofit.builder.compute_features'),
 'CorrelationFilterExpertEnsemble': ('class', 'menpofit.clm.CorrelationFilterExpertEnsemble'),
+'Deadline': ('class', 'menpofit.base.Deadline'),
 'DifferentiableAffine': ('class', 'menpofit.transform.DifferentiableAffine'),
 'DifferentiableAlignmentAffine': ('class', 'menpofit.transform.DifferentiableAlignmentAffine'),
 'DifferentiableAlignmentSimilarity': ('class', 'menpofit.transform.DifferentiableAlignmentSimilarity'),
@@ -32,6 +42,8 @@ xref_map = {
 'DX': ('class', 'menpofit.differentiable.DX'),
 'ECC': ('class', 'menpofit.lk.ECC'),
 'ExpertEnsemble': ('class', 'menpofit.clm.expert.ExpertEnsemble'),
+'export_compact': ('function', 'menpofit.io.export_compact'),
+'extract_patches': ('function', 'menpofit.builder.extract_patches'),
 'Forward': ('class', 'menpofit.aps.Forward'),
 'ForwardCompositional': ('class', 'menpofit.atm.ForwardCompositional'),
 'FourierSSD': ('class', 'menpofit.lk.FourierSSD'),
@@ -48,10 +60,14 @@ xref_map = {
 'GradientCorrelation': ('class', 'menpofit.lk.GradientCorrelation'),
 'GradientDescentCLMFitter': ('class', 'menpofit.clm.GradientDescentCLMFitter'),
 'GradientImages': ('class', 'menpofit.lk.GradientImages'),
+'hash_arrays': ('function', 'menpofit.cache.hash_arrays'),
 'HolisticAAM': ('class', 'menpofit.aam.HolisticAAM'),
 'IIRLRegression': ('class', 'menpofit.math.IIRLRegression'),
+'images_to_matrix': ('function', 'menpofit.builder.images_to_matrix'),
 'imccf': ('function', 'menpofit.math.imccf'),
 'imosse': ('function', 'menpofit.math.imosse'),
+'import_compact': ('function', 'menpofit.io.import_compact'),
+'increment_pca_from_matrix': ('function', 'menpofit.math.increment_pca_from_matrix'),
 'IncrementalCorrelationFilterThinWrapper': ('class', 'menpofit.clm.IncrementalCorrelationFilterThinWrapper'),
 'Inverse': ('class', 'menpofit.aps.Inverse'),
 'InverseCompositional': ('class', 'menpofit.atm.InverseCompositional'),
@@ -61,6 +77,7 @@ xref_map = {
 'LucasKanadeATMFitter': ('class', 'menpofit.atm.LucasKanadeATMFitter'),
 'LucasKanadeFitter': ('class', 'menpofit.lk.LucasKanadeFitter'),
 'LucasKanadeResult': ('class', 'menpofit.lk.result.LucasKanadeResult'),
+'map_chunks': ('function', 'menpofit.parallel.map_chunks'),
 'mccf': ('function', 'menpofit.math.mccf'),
 'MeanTemplateGaussNewton': ('class', 'menpofit.aam.MeanTemplateGaussNewton'),
 'MeanTemplateNewton': ('class', 'menpofit.aam.MeanTemplateNewton'),
@@ -72,6 +89,10 @@ xref_map = {
 'MultiScaleNonParametricIterativeResult': ('class', 'menpofit.result.MultiScaleNonParametricIterativeResult'),
 'MultiScaleParametricFitter': ('class', 'menpofit.fitter.MultiScaleParametricFitter'),
 'MultiScaleParametricIterativeResult': ('class', 'menpofit.result.MultiScaleParametricIterativeResult'),
+'noisy_alignment_similarity_h_matrices': ('function', 'menpofit.fitter.noisy_alignment_similarity_h_matrices'),
+'noisy_alignment_similarity_transform': ('function', 'menpofit.fitter.noisy_alignment_similarity_transform'),
+'noisy_shape_from_bounding_box': ('function', 'menpofit.fitter.noisy_shape_from_bounding_box'),
+'noisy_shapes_from_bounding_boxes': ('function', 'menpofit.fitter.noisy_shapes_from_bounding_boxes'),
 'NonParametricGaussNewton': ('class', 'menpofit.sdm.NonParametricGaussNewton'),
 'NonParametricIterativeResult': ('class', 'menpofit.result.NonParametricIterativeResult'),
 'NonParametricNewton': ('class', 'menpofit.sdm.NonParametricNewton'),
@@ -82,6 +103,7 @@ xref_map = {
 'OptimalLinearRegression': ('class', 'menpofit.math.OptimalLinearRegression'),
 'OrthoMDTransform': ('class', 'menpofit.transform.OrthoMDTransform'),
 'OrthoPDM': ('class', 'menpofit.modelinstance.OrthoPDM'),
+'ParallelFitter': ('class', 'menpofit.parallel.ParallelFitter'),
 'ParametricAppearanceMeanTemplateGuassNewton': ('class', 'menpofit.sdm.ParametricAppearanceMeanTemplateGuassNewton'),
 'ParametricAppearanceMeanTemplateNewton': ('class', 'menpofit.sdm.ParametricAppearanceMeanTemplateNewton'),
 'ParametricAppearanceProjectOutGuassNewton': ('class', 'menpofit.sdm.ParametricAppearanceProjectOutGuassNewton'),
@@ -95,24 +117,32 @@ xref_map = {
 'ParametricShapeOptimalRegression': ('class', 'menpofit.sdm.ParametricShapeOptimalRegression'),
 'ParametricShapePCRRegression': ('class', 'menpofit.sdm.ParametricShapePCRRegression'),
 'PatchAAM': ('class', 'menpofit.aam.PatchAAM'),
+'pca_from_matrix': ('function', 'menpofit.math.pca_from_matrix'),
 'PCRRegression': ('class', 'menpofit.math.PCRRegression'),
 'PDM': ('class', 'menpofit.modelinstance.PDM'),
+'PrecomputationCache': ('class', 'menpofit.cache.PrecomputationCache'),
 'ProjectOutForwardCompositional': ('class', 'menpofit.aam.ProjectOutForwardCompositional'),
 'ProjectOutInverseCompositional': ('class', 'menpofit.aam.ProjectOutInverseCompositional'),
 'ProjectOutGaussNewton': ('class', 'menpofit.aam.ProjectOutGaussNewton'),
 'ProjectOutNewton': ('class', 'menpofit.aam.ProjectOutNewton'),
 'ProjectOutRegularisedLandmarkMeanShift': ('class', 'menpofit.unified_aam_clm.ProjectOutRegularisedLandmarkMeanShift'),
+'randomized_pca': ('function', 'menpofit.math.randomized_pca'),
 'RegularisedLandmarkMeanShift': ('class', 'menpofit.clm.RegularisedLandmarkMeanShift'),
 'Result': ('class', 'menpofit.result.Result'),
 'SimultaneousForwardCompositional': ('class', 'menpofit.aam.SimultaneousForwardCompositional'),
 'SimultaneousInverseCompositional': ('class', 'menpofit.aam.SimultaneousInverseCompositional'),
 'SSD': ('class', 'menpofit.lk.SSD'),
+'start_worker_pool': ('function', 'menpofit.parallel.start_worker_pool'),
 'SupervisedDescentAAMFitter': ('class', 'menpofit.aam.SupervisedDescentAAMFitter'),
 'SupervisedDescentFitter': ('class', 'menpofit.sdm.SupervisedDescentFitter'),
+'Tracker': ('class', 'menpofit.tracking.Tracker'),
 'UnifiedAAMCLM': ('class', 'menpofit.unified_aam_clm.base.UnifiedAAMCLM'),
 'UnifiedAAMCLMAlgorithmResult': ('class', 'menpofit.unified_aam_clm.result.UnifiedAAMCLMAlgorithmResult'),
 'UnifiedAAMCLMFitter': ('class', 'menpofit.unified_aam_clm.UnifiedAAMCLMFitter'),
 'UnifiedAAMCLMResult': ('class', 'menpofit.unified_aam_clm.result.UnifiedAAMCLMResult'),
+'warp_images': ('function', 'menpofit.builder.warp_images'),
+'warp_images_to_matrix': ('function', 'menpofit.builder.warp_images_to_matrix'),
 'WibergForwardCompositional': ('class', 'menpofit.aam.WibergForwardCompositional'),
-'WibergInverseCompositional': ('class', 'menpofit.aam.WibergInverseCompositional')
+'WibergInverseCompositional': ('class', 'menpofit.aam.WibergInverseCompositional'),
+'worker_state': ('function', 'menpofit.parallel.worker_state')
 }
@@ -1,4 +1,5 @@
 from . import builder
+from . import cache
 from . import differentiable
 from . import fitter
 from . import modelinstance
@@ -9,8 +10,10 @@ from . import clm
 from . import dlib
 from . import lk
 from . import math
+from . import parallel
 from . import result
 from . import sdm
+from . import tracking
 from . import transform
 from . import visualize
 
@@ -1,9 +1,14 @@
 from __future__ import division
 import numpy as np
+from scipy.ndimage import map_coordinates
 
+from menpo.base import name_of_callable
 from menpo.image import Image
 from menpo.feature import gradient as fast_gradient, no_op
 
+from menpofit.base import expired
+from menpofit.cache import hash_arrays
+
 from ..result import AAMAlgorithmResult
 
 
@@ -63,6 +68,11 @@ class LucasKanadeBaseInterface(object):
 
         sampling_mask[sampling] = 1
 
+        # indices of the template's true pixels that are selected by the
+        # sampling mask
+        self.sampling_indices = np.nonzero(sampling_mask)[0]
+        # and their locations on the template
+        self.sampled_true_indices = self.true_indices[self.sampling_indices]
         self.i_mask = np.nonzero(np.tile(
             sampling_mask[None, ...], (n_channels, 1)).flatten())[0]
         self.dW_dp_mask = np.nonzero(np.tile(
@@ -72,6 +82,17 @@ class LucasKanadeBaseInterface(object):
         self.nabla2_mask = np.nonzero(np.tile(
             sampling_mask[None, None, None, ...], (2, 2, n_channels, 1)))
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'sampled_true_indices' not in state:
+            # interfaces that were pickled before only the sampled pixels got
+            # warped have no sampling indices, but the first channel of their
+            # masked pixels holds them
+            self.sampling_indices = self.i_mask[
+                self.i_mask < self.template.n_true_pixels()]
+            self.sampled_true_indices = self.true_indices[
+                self.sampling_indices]
+
     @property
     def shape_model(self):
         r"""
@@ -121,10 +142,59 @@ class LucasKanadeBaseInterface(object):
         Returns
         -------
         warped_image : `menpo.image.Image` or subclass
-            The warped image.
+            The warped image. It has the same pixels dtype as `image`.
+        """
+        warped_image = image.warp_to_mask(self.template.mask, self.transform,
+                                          warp_landmarks=False)
+        # warp_to_mask allocates double precision pixels
+        if warped_image.pixels.dtype != image.pixels.dtype:
+            warped_image.pixels = warped_image.pixels.astype(
+                image.pixels.dtype)
+        return warped_image
+
+    def sampled_points(self):
+        r"""
+        Returns the locations on the image to be warped of the template's
+        pixels that are selected by the sampling mask, given the current
+        state of the transform.
+
+        :type: ``(n_sampled_pixels, n_dims)`` `ndarray`
+        """
+        return self.transform.apply(self.sampled_true_indices)
+
+    def warp_masked(self, image, out=None):
+        r"""
+        Warps an image into the template's mask and returns its vectorized
+        and masked version, i.e. it is equivalent to
+        ``self.warp(image).as_vector()[self.i_mask]``. However, only the
+        pixels that are selected by the sampling mask get interpolated.
+
+        Parameters
+        ----------
+        image : `menpo.image.Image` or subclass
+            The input image to be warped.
+        out : ``(n_channels * n_sampled_pixels,)`` `ndarray` or ``None``, optional
+            If provided, the result is written into this vector.
+
+        Returns
+        -------
+        i_m : ``(n_channels * n_sampled_pixels,)`` `ndarray`
+            The vectorized and masked warped image.
         """
-        return image.warp_to_mask(self.template.mask, self.transform,
-                                  warp_landmarks=False)
+        n_channels = image.n_channels
+        if out is None:
+            out = np.empty(n_channels * self.sampling_indices.shape[0],
+                           dtype=image.pixels.dtype)
+        # find the locations of the sampled pixels on the image
+        points = self.sampled_points().T
+        # interpolate each channel directly into the output vector
+        channels_out = out.reshape((n_channels, -1))
+        for c in range(n_channels):
+            map_coordinates(image.pixels[c], points, order=1, mode='constant',
+                            cval=0., output=channels_out[c])
+        # set any nan values to 0, as done by warp_to_mask
+        out[np.isnan(out)] = 0
+        return out
 
     def warped_images(self, image, shapes):
         r"""
@@ -169,7 +239,7 @@ class LucasKanadeBaseInterface(object):
         nabla = nabla.set_boundary_pixels()
         return nabla.as_vector().reshape((2, image.n_channels, -1))
 
-    def steepest_descent_images(self, nabla, dW_dp):
+    def steepest_descent_images(self, nabla, dW_dp, out=None):
         r"""
         Computes the steepest descent images, i.e. the product of the gradient
         and the warp jacobian.
@@ -180,6 +250,9 @@ class LucasKanadeBaseInterface(object):
             The image gradient in vectorized form.
         dW_dp : ``(n_dims, n_pixels, n_params)`` `ndarray`
             The warp jacobian.
+        out : ``(n_channels * n_pixels, n_params)`` `ndarray` or ``None``, optional
+            If provided, the steepest descent images are written into this
+            C-contiguous matrix.
 
         Returns
         -------
@@ -189,17 +262,20 @@ class LucasKanadeBaseInterface(object):
         # reshape gradient
         # nabla: n_dims x n_channels x n_pixels
         nabla = nabla[self.nabla_mask].reshape(nabla.shape[:2] + (-1,))
-        # compute steepest descent images
+        n_channels, n_pixels = nabla.shape[1:]
+        if out is None:
+            out = np.empty((n_channels * n_pixels, dW_dp.shape[2]),
+                           dtype=np.result_type(nabla, dW_dp))
+        # compute steepest descent images by summing the products over the
+        # dimensions, without storing the product of each dimension
         # nabla: n_dims x n_channels x n_pixels
         # warp_jacobian: n_dims x            x n_pixels x n_params
         # sdi:            n_channels x n_pixels x n_params
-        sdi = 0
-        a = nabla[..., None] * dW_dp[:, None, ...]
-        for d in a:
-            sdi += d
-        # reshape steepest descent images
+        np.einsum('dcp,dpn->cpn', nabla, dW_dp,
+                  out=out.reshape((n_channels, n_pixels, -1)))
+        # steepest descent images
         # sdi: (n_channels x n_pixels) x n_params
-        return sdi.reshape((-1, sdi.shape[2]))
+        return out
 
     @classmethod
     def solve_shape_map(cls, H, J, e, J_prior, p):
@@ -397,6 +473,18 @@ class LucasKanadeLinearInterface(LucasKanadeStandardInterface):
         """
         return self.transform.model
 
+    def sampled_points(self):
+        r"""
+        Returns the locations on the image to be warped of the template's
+        pixels that are selected by the sampling mask, given the current
+        state of the transform. Note that the dense target of the linear
+        transform already holds the location of every template pixel.
+
+        :type: ``(n_sampled_pixels, n_dims)`` `ndarray`
+        """
+        dense_points = self.transform.target.points[self.transform.n_landmarks:]
+        return dense_points[self.sampling_indices]
+
     def algorithm_result(self, image, shapes, shape_parameters,
                          appearance_parameters=None, initial_shape=None,
                          gt_shape=None, costs=None):
@@ -484,6 +572,11 @@ class LucasKanadePatchBaseInterface(LucasKanadeBaseInterface):
         self.gradient2_mask = np.nonzero(np.tile(
             image_mask[None, None, ...], (2, 2, 1, 1, 1, 1, 1)))
 
+    def __setstate__(self, state):
+        # the patches are extracted around the landmarks, thus there are no
+        # sampled pixels of the template to restore
+        self.__dict__.update(state)
+
     @property
     def shape_model(self):
         r"""
@@ -522,6 +615,32 @@ class LucasKanadePatchBaseInterface(LucasKanadeBaseInterface):
         parts = self.patch_normalisation(parts)
         return Image(parts, copy=False)
 
+    def warp_masked(self, image, out=None):
+        r"""
+        Extracts the patches from the given image and returns their vectorized
+        and masked version, i.e. it is equivalent to
+        ``self.warp(image).as_vector()[self.i_mask]``. Note that the patch
+        normalisation requires the full patches, thus all the pixels of the
+        patches are extracted.
+
+        Parameters
+        ----------
+        image : `menpo.image.Image` or subclass
+            The input image.
+        out : ``(n_sampled_pixels,)`` `ndarray` or ``None``, optional
+            If provided, the result is written into this vector.
+
+        Returns
+        -------
+        i_m : ``(n_sampled_pixels,)`` `ndarray`
+            The vectorized and masked patches.
+        """
+        i_m = self.warp(image).as_vector()[self.i_mask]
+        if out is None:
+            return i_m
+        out[:] = i_m
+        return out
+
     def warped_images(self, image, shapes):
         r"""
         Given an input test image and a list of shapes, it warps the image
@@ -567,7 +686,7 @@ class LucasKanadePatchBaseInterface(LucasKanadeBaseInterface):
         # between parts
         return nabla.reshape((2,) + pixels.shape)
 
-    def steepest_descent_images(self, nabla, dw_dp):
+    def steepest_descent_images(self, nabla, dw_dp, out=None):
         r"""
         Computes the steepest descent images, i.e. the product of the gradient
         and the warp jacobian.
@@ -578,6 +697,9 @@ class LucasKanadePatchBaseInterface(LucasKanadeBaseInterface):
             The image gradient in vectorized form.
         dW_dp : ``(2, n_patches, 1, patch_shape, n_params)`` `ndarray`
             The warp jacobian.
+        out : ``(n_channels * n_patches, n_params)`` `ndarray` or ``None``, optional
+            If provided, the steepest descent images are written into this
+            C-contiguous matrix.
 
         Returns
         -------
@@ -587,18 +709,21 @@ class LucasKanadePatchBaseInterface(LucasKanadeBaseInterface):
         # reshape nabla
         # nabla: dims x parts x off x ch x (h x w)
         nabla = nabla[self.gradient_mask].reshape(nabla.shape[:-2] + (-1,))
-        # compute steepest descent images
+        n_params = dw_dp.shape[-1]
+        if out is None:
+            out = np.empty((nabla[0].size, n_params),
+                           dtype=np.result_type(nabla, dw_dp))
+        # compute steepest descent images by summing the products over the
+        # dimensions, without storing the product of each dimension
         # nabla: dims x parts x off x ch x (h x w)
         # ds_dp:    dims x parts x                             x params
         # sdi:             parts x off x ch x (h x w) x params
-        sdi = 0
-        a = nabla[..., None] * dw_dp[..., None, None, None, :]
-        for d in a:
-            sdi += d
+        np.einsum('dpocx,dpn->pocxn', nabla, dw_dp,
+                  out=out.reshape(nabla.shape[1:] + (n_params,)))
 
-        # reshape steepest descent images
+        # steepest descent images
         # sdi: (parts x offsets x ch x w x h) x params
-        return sdi.reshape((-1, sdi.shape[-1]))
+        return out
 
 
 class LucasKanadePatchInterface(LucasKanadePatchBaseInterface):
@@ -712,11 +837,87 @@ class LucasKanade(object):
 
     eps : `float`, optional
         Value for checking the convergence of the optimization.
+    cache : :map:`PrecomputationCache` or ``None``, optional
+        If provided, the expensive precomputed products of the algorithm (e.g.
+        the pseudoinverse of the masked appearance components, the warp
+        Jacobian and, for the inverse compositional algorithms, the projected
+        out Jacobian and Hessian) are loaded from this cache, if they have been
+        stored with the same models, sampling and number of active components.
+        Otherwise, they are computed and stored in the cache. Whether the
+        products were found in the cache is recorded as `cache_hit`.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting computations. The precomputed
+        products are computed in double precision and then cast to `dtype`
+        once, thus with ``np.float32`` and images of the same type, all the
+        per-iteration computations are performed in single precision. If
+        ``None``, then double precision is used.
     """
-    def __init__(self, aam_interface, eps=10**-5):
+    # Whether the full warped image is needed at each iteration, e.g. for
+    # computing its gradient. If not, only the sampled pixels get warped.
+    _requires_warped_image = False
+
+    # The precomputed arrays that get cast to the algorithm's dtype
+    _cast_arrays = ('A_m', 'pinv_A_m', 'a_bar_m', 'dW_dp', 's2_inv_L',
+                    's2_inv_S', 'QJ_m', 'JQJ_m', 'pinv_QJ_m', 'AA_m_map')
+
+    # The workspace arrays that are written by the iterations. They are not
+    # pickled, but reallocated when the algorithm is unpickled.
+    _workspace_arrays = ('_i_m', '_e_m', '_r_m', '_Jdp_m', '_J_m', '_QJ_m',
+                         '_H_m')
+
+    def __init__(self, aam_interface, eps=10**-5, cache=None, dtype=None):
         self.eps = eps
         self.interface = aam_interface
-        self._precompute()
+        self.dtype = np.dtype(np.float64 if dtype is None else dtype)
+        self.cache_hit = None
+        if cache is None:
+            self._cached = None
+            self._precompute()
+        else:
+            key = self._cache_key()
+            self._cached = cache.load(key)
+            self.cache_hit = self._cached is not None
+            if self._cached is None:
+                self._cached = {}
+                self._precompute()
+                cache.save(key, self._cached)
+            else:
+                self._precompute()
+            # the cached products are referenced by the algorithm's attributes
+            self._cached = None
+        if self.dtype != np.float64:
+            self._cast(self.dtype)
+
+    def _cast(self, dtype):
+        r"""
+        Casts the precomputed arrays to the provided floating point type and
+        reallocates the workspace arrays with it.
+        """
+        for name in self._cast_arrays:
+            value = getattr(self, name, None)
+            if value is not None:
+                setattr(self, name, value.astype(dtype))
+        # the appearance instances are built from the cast mean and components
+        self.A = self.A.astype(dtype)
+        self.a_bar = self.a_bar.copy()
+        self.a_bar.pixels = self.a_bar.pixels.astype(dtype)
+        self._allocate_workspace()
+
+    def _shape_parameters(self):
+        r"""
+        Returns the current parameters of the transform with the algorithm's
+        dtype. They are the prior terms of the MAP solutions, thus the
+        increments have the algorithm's dtype too.
+        """
+        return self.transform.as_vector().astype(self.dtype, copy=False)
+
+    def _appearance_instance(self, c):
+        r"""
+        Returns the appearance model instance with the provided weights. It is
+        equivalent to ``self.appearance_model.instance(c)``, but it is computed
+        with the algorithm's dtype.
+        """
+        return self.a_bar.from_vector(self.a_bar.as_vector() + c.dot(self.A))
 
     @property
     def appearance_model(self):
@@ -748,6 +949,44 @@ class LucasKanade(object):
         """
         return self.interface.template
 
+    def _cache_key(self):
+        r"""
+        Returns the key of the algorithm's precomputations in a
+        :map:`PrecomputationCache`. It is a hash of the algorithm and
+        interface classes, the appearance and shape models (restricted to their
+        active components), the template's mask, the sampling and the warp
+        transform.
+        """
+        interface = self.interface
+        template = interface.template
+        mask = getattr(template, 'mask', None)
+        appearance_model = self.appearance_model
+        shape_model = interface.shape_model
+        return hash_arrays(
+            type(self).__module__, type(self).__name__,
+            type(interface).__name__, type(self.transform).__name__,
+            appearance_model.components, appearance_model.mean().as_vector(),
+            appearance_model.eigenvalues, appearance_model.noise_variance(),
+            shape_model.components, shape_model.mean().as_vector(),
+            shape_model.eigenvalues, shape_model.noise_variance(),
+            template.shape, None if mask is None else mask.pixels,
+            interface.i_mask, getattr(interface, 'patch_shape', None),
+            name_of_callable(getattr(interface, 'patch_normalisation', None)))
+
+    def _precomputed(self, name, compute):
+        r"""
+        Returns the precomputed product with the provided name. If the
+        algorithm was constructed with a cache, then the product is read from
+        the cache entry, or computed and added to the entry in case of a miss.
+        """
+        if self._cached is None:
+            return compute()
+        value = self._cached.get(name)
+        if value is None:
+            value = compute()
+            self._cached[name] = value
+        return value
+
     def _precompute(self):
         # grab number of shape and appearance parameters
         self.n = self.transform.n_parameters
@@ -758,7 +997,8 @@ class LucasKanade(object):
         # mask them
         self.A_m = self.A.T[self.interface.i_mask, :]
         # compute their pseudoinverse
-        self.pinv_A_m = np.linalg.pinv(self.A_m)
+        self.pinv_A_m = self._precomputed(
+            'pinv_A_m', lambda: np.linalg.pinv(self.A_m))
 
         # grab appearance model mean
         self.a_bar = self.appearance_model.mean()
@@ -766,7 +1006,7 @@ class LucasKanade(object):
         self.a_bar_m = self.a_bar.as_vector()[self.interface.i_mask]
 
         # compute warp jacobian
-        self.dW_dp = self.interface.warp_jacobian()
+        self.dW_dp = self._precomputed('dW_dp', self.interface.warp_jacobian)
 
         # compute shape model prior
         # TODO: Is this correct? It's like modelling no noise at all
@@ -778,22 +1018,80 @@ class LucasKanade(object):
         S = self.appearance_model.eigenvalues
         self.s2_inv_S = s2 / S
 
+        # allocate the arrays that are reused by the iterations
+        self._allocate_workspace()
+
+    def __getstate__(self):
+        # The workspace arrays are not part of the state of the algorithm.
+        # Pickling them would waste space and, for a read-only memory-mapped
+        # import (see import_compact), they would not be writable.
+        state = self.__dict__.copy()
+        for name in self._workspace_arrays:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # algorithms that were pickled before the dtype option have no dtype
+        # nor cache hit attributes
+        if 'dtype' not in state:
+            self.dtype = np.dtype(np.float64)
+        if 'cache_hit' not in state:
+            self.cache_hit = None
+        self._allocate_workspace()
+
+    def _allocate_workspace(self):
+        r"""
+        Allocates the arrays in which the per-iteration quantities (masked
+        warped image, masked error, Jacobian and Hessian) are written, so that
+        they are not reallocated at each iteration of `run`. Note that, as a
+        consequence, an algorithm object must not be used by multiple threads
+        simultaneously.
+        """
+        n_pixels = self.a_bar_m.shape[0]
+        dtype = self.a_bar_m.dtype
+        # masked warped image
+        self._i_m = np.empty(n_pixels, dtype=dtype)
+        # masked error, residual and Jacobian-increment product
+        self._e_m = np.empty(n_pixels, dtype=dtype)
+        self._r_m = np.empty(n_pixels, dtype=dtype)
+        self._Jdp_m = np.empty(n_pixels, dtype=dtype)
+        # masked Jacobian, its projected-out version and Hessian
+        self._J_m = np.empty((n_pixels, self.n), dtype=dtype)
+        self._QJ_m = np.empty((n_pixels, self.n), dtype=dtype)
+        self._H_m = np.empty((self.n, self.n), dtype=dtype)
+
+    def _warp(self, image):
+        r"""
+        Warps the image and returns its vectorized and masked version. The
+        full warped image is only computed (and stored as ``self.i``) if the
+        algorithm requires it.
+        """
+        if self._requires_warped_image:
+            self.i = self.interface.warp(image)
+            return self.i.as_vector()[self.interface.i_mask]
+        return self.interface.warp_masked(image, out=self._i_m)
+
 
 class ProjectOut(LucasKanade):
     r"""
     Abstract class for defining Project-out AAM optimization algorithms.
     """
-    def project_out(self, J):
+    def project_out(self, J, out=None):
         r"""
         Projects-out the appearance subspace from a given vector or matrix.
+        If `out` is provided, the result is written into it.
 
         :type: `ndarray`
         """
         # project-out appearance bases from a particular vector or matrix
-        return J - self.A_m.dot(self.pinv_A_m.dot(J))
+        if out is None:
+            return J - self.A_m.dot(self.pinv_A_m.dot(J))
+        np.dot(self.A_m, self.pinv_A_m.dot(J), out=out)
+        return np.subtract(J, out, out=out)
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, map_inference=False):
+            return_costs=False, map_inference=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -820,6 +1118,9 @@ class ProjectOut(LucasKanade):
         map_inference : `bool`, optional
             If ``True``, then the solution will be given after performing MAP
             inference.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -841,20 +1142,19 @@ class ProjectOut(LucasKanade):
 
         # Compositional Gauss-Newton loop -------------------------------------
 
-        # warp image
-        self.i = self.interface.warp(image)
-        # vectorize it and mask it
-        i_m = self.i.as_vector()[self.interface.i_mask]
+        # warp image, vectorize it and mask it
+        i_m = self._warp(image)
 
         # compute masked error
-        self.e_m = i_m - self.a_bar_m
+        self.e_m = np.subtract(i_m, self.a_bar_m, out=self._e_m)
 
         # update costs
         costs = None
         if return_costs:
             costs = [cost_closure(self.e_m, self.project_out)]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # solve for increments on the shape parameters
             self.dp = self._solve(map_inference)
 
@@ -864,13 +1164,11 @@ class ProjectOut(LucasKanade):
             p_list.append(self.transform.as_vector())
             shapes.append(self.transform.target)
 
-            # warp image
-            self.i = self.interface.warp(image)
-            # vectorize it and mask it
-            i_m = self.i.as_vector()[self.interface.i_mask]
+            # warp image, vectorize it and mask it
+            i_m = self._warp(image)
 
             # compute masked error
-            self.e_m = i_m - self.a_bar_m
+            self.e_m = np.subtract(i_m, self.a_bar_m, out=self._e_m)
 
             # update costs
             if return_costs:
@@ -892,20 +1190,24 @@ class ProjectOutForwardCompositional(ProjectOut):
     r"""
     Project-out Forward Compositional (POFC) Gauss-Newton algorithm.
     """
+    # the gradient of the warped image is needed at each iteration
+    _requires_warped_image = True
+
     def _solve(self, map_inference):
         # compute warped image gradient
         nabla_i = self.interface.gradient(self.i)
         # compute masked forward Jacobian
-        J_m = self.interface.steepest_descent_images(nabla_i, self.dW_dp)
+        J_m = self.interface.steepest_descent_images(nabla_i, self.dW_dp,
+                                                     out=self._J_m)
         # project out appearance model from it
-        QJ_m = self.project_out(J_m)
+        QJ_m = self.project_out(J_m, out=self._QJ_m)
         # compute masked forward Hessian
-        JQJ_m = QJ_m.T.dot(J_m)
+        JQJ_m = np.dot(QJ_m.T, J_m, out=self._H_m)
         # solve for increments on the shape parameters
         if map_inference:
             return self.interface.solve_shape_map(
                 JQJ_m, QJ_m, self.e_m,  self.s2_inv_L,
-                self.transform.as_vector())
+                self._shape_parameters())
         else:
             return self.interface.solve_shape_ml(JQJ_m, QJ_m, self.e_m)
 
@@ -925,23 +1227,33 @@ class ProjectOutInverseCompositional(ProjectOut):
     def _precompute(self):
         # call super method
         super(ProjectOutInverseCompositional, self)._precompute()
+        if self._cached is not None and 'pinv_QJ_m' in self._cached:
+            self.QJ_m = self._cached['QJ_m']
+            self.JQJ_m = self._cached['JQJ_m']
+            self.pinv_QJ_m = self._cached['pinv_QJ_m']
+            return
         # compute appearance model mean gradient
         nabla_a = self.interface.gradient(self.a_bar)
         # compute masked inverse Jacobian
         J_m = self.interface.steepest_descent_images(-nabla_a, self.dW_dp)
         # project out appearance model from it
-        self.QJ_m = self.project_out(J_m)
+        self.QJ_m = self._precomputed('QJ_m', lambda: self.project_out(J_m))
         # compute masked inverse Hessian
-        self.JQJ_m = self.QJ_m.T.dot(J_m)
+        self.JQJ_m = self._precomputed('JQJ_m', lambda: self.QJ_m.T.dot(J_m))
         # compute masked Jacobian pseudo-inverse
-        self.pinv_QJ_m = np.linalg.solve(self.JQJ_m, self.QJ_m.T)
+        self.pinv_QJ_m = self._precomputed(
+            'pinv_QJ_m', lambda: np.linalg.solve(self.JQJ_m, self.QJ_m.T))
 
     def _solve(self, map_inference):
         # solve for increments on the shape parameters
         if map_inference:
+            # the prior is added to the Hessian in place, thus a copy of the
+            # precomputed Hessian is passed
+            JQJ_m = self._H_m
+            JQJ_m[...] = self.JQJ_m
             return self.interface.solve_shape_map(
-                self.JQJ_m, self.QJ_m, self.e_m, self.s2_inv_L,
-                self.transform.as_vector())
+                JQJ_m, self.QJ_m, self.e_m, self.s2_inv_L,
+                self._shape_parameters())
         else:
             return -self.pinv_QJ_m.dot(self.e_m)
 
@@ -958,8 +1270,23 @@ class Simultaneous(LucasKanade):
     r"""
     Abstract class for defining Simultaneous AAM optimization algorithms.
     """
+    _workspace_arrays = LucasKanade._workspace_arrays + ('_J_sim_m',
+                                                          '_H_sim_m')
+
+    def _allocate_workspace(self):
+        # call super method
+        super(Simultaneous, self)._allocate_workspace()
+        # allocate the masked simultaneous Jacobian, the first m columns of
+        # which are the (constant) negated masked appearance components
+        self._J_sim_m = np.empty((self.A_m.shape[0], self.m + self.n),
+                                 dtype=self.A_m.dtype)
+        self._J_sim_m[:, :self.m] = -self.A_m
+        # allocate the masked simultaneous Hessian
+        self._H_sim_m = np.empty((self.m + self.n, self.m + self.n),
+                                 dtype=self.A_m.dtype)
+
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, map_inference=False):
+            return_costs=False, map_inference=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -986,6 +1313,9 @@ class Simultaneous(LucasKanade):
         map_inference : `bool`, optional
             If ``True``, then the solution will be given after performing MAP
             inference.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -1007,34 +1337,34 @@ class Simultaneous(LucasKanade):
 
         # Compositional Gauss-Newton loop -------------------------------------
 
-        # warp image
-        self.i = self.interface.warp(image)
-        # mask warped image
-        i_m = self.i.as_vector()[self.interface.i_mask]
+        # warp image, vectorize it and mask it
+        i_m = self._warp(image)
 
         # initialize appearance parameters by projecting masked image
         # onto masked appearance model
-        self.c = self.pinv_A_m.dot(i_m - self.a_bar_m)
-        self.a = self.appearance_model.instance(self.c)
+        self.c = self.pinv_A_m.dot(
+            np.subtract(i_m, self.a_bar_m, out=self._r_m))
+        self.a = self._appearance_instance(self.c)
         a_m = self.a.as_vector()[self.interface.i_mask]
         c_list = [self.c]
 
         # compute masked error
-        self.e_m = i_m - a_m
+        self.e_m = np.subtract(i_m, a_m, out=self._e_m)
 
         # update costs
         costs = None
         if return_costs:
             costs = [cost_closure(self.e_m)]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # solve for increments on the appearance and shape parameters
             # simultaneously
             dc, self.dp = self._solve(map_inference)
 
             # update appearance parameters
             self.c = self.c + dc
-            self.a = self.appearance_model.instance(self.c)
+            self.a = self._appearance_instance(self.c)
             a_m = self.a.as_vector()[self.interface.i_mask]
             c_list.append(self.c)
 
@@ -1044,13 +1374,11 @@ class Simultaneous(LucasKanade):
             p_list.append(self.transform.as_vector())
             shapes.append(self.transform.target)
 
-            # warp image
-            self.i = self.interface.warp(image)
-            # mask warped image
-            i_m = self.i.as_vector()[self.interface.i_mask]
+            # warp image, vectorize it and mask it
+            i_m = self._warp(image)
 
             # compute masked error
-            self.e_m = i_m - a_m
+            self.e_m = np.subtract(i_m, a_m, out=self._e_m)
 
             # update costs
             if return_costs:
@@ -1072,15 +1400,16 @@ class Simultaneous(LucasKanade):
         # compute masked Jacobian
         J_m = self._compute_jacobian()
         # assemble masked simultaneous Jacobian
-        J_sim_m = np.hstack((-self.A_m, J_m))
+        J_sim_m = self._J_sim_m
+        J_sim_m[:, self.m:] = J_m
         # compute masked Hessian
-        H_sim_m = J_sim_m.T.dot(J_sim_m)
+        H_sim_m = np.dot(J_sim_m.T, J_sim_m, out=self._H_sim_m)
         # solve for increments on the appearance and shape parameters
         # simultaneously
         if map_inference:
             return self.interface.solve_all_map(
                 H_sim_m, J_sim_m, self.e_m, self.s2_inv_S, self.c,
-                self.s2_inv_L, self.transform.as_vector())
+                self.s2_inv_L, self._shape_parameters())
         else:
             return self.interface.solve_all_ml(H_sim_m, J_sim_m, self.e_m)
 
@@ -1089,11 +1418,15 @@ class SimultaneousForwardCompositional(Simultaneous):
     r"""
     Simultaneous Forward Compositional (SFC) Gauss-Newton algorithm.
     """
+    # the gradient of the warped image is needed at each iteration
+    _requires_warped_image = True
+
     def _compute_jacobian(self):
         # compute warped image gradient
         nabla_i = self.interface.gradient(self.i)
         # return forward Jacobian
-        return self.interface.steepest_descent_images(nabla_i, self.dW_dp)
+        return self.interface.steepest_descent_images(nabla_i, self.dW_dp,
+                                                     out=self._J_m)
 
     def _update_warp(self):
         # update warp based on forward composition
@@ -1112,7 +1445,8 @@ class SimultaneousInverseCompositional(Simultaneous):
         # compute warped appearance model gradient
         nabla_a = self.interface.gradient(self.a)
         # return inverse Jacobian
-        return self.interface.steepest_descent_images(-nabla_a, self.dW_dp)
+        return self.interface.steepest_descent_images(-nabla_a, self.dW_dp,
+                                                     out=self._J_m)
 
     def _update_warp(self):
         # update warp based on inverse composition
@@ -1131,10 +1465,12 @@ class Alternating(LucasKanade):
         # call super method
         super(Alternating, self)._precompute()
         # compute MAP appearance Hessian
-        self.AA_m_map = self.A_m.T.dot(self.A_m) + np.diag(self.s2_inv_S)
+        self.AA_m_map = self._precomputed(
+            'AA_m_map',
+            lambda: self.A_m.T.dot(self.A_m) + np.diag(self.s2_inv_S))
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, map_inference=False):
+            return_costs=False, map_inference=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -1161,6 +1497,9 @@ class Alternating(LucasKanade):
         map_inference : `bool`, optional
             If ``True``, then the solution will be given after performing MAP
             inference.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -1182,51 +1521,52 @@ class Alternating(LucasKanade):
 
         # Compositional Gauss-Newton loop -------------------------------------
 
-        # warp image
-        self.i = self.interface.warp(image)
-        # mask warped image
-        i_m = self.i.as_vector()[self.interface.i_mask]
+        # warp image, vectorize it and mask it
+        i_m = self._warp(image)
 
         # initialize appearance parameters by projecting masked image
         # onto masked appearance model
-        c = self.pinv_A_m.dot(i_m - self.a_bar_m)
-        self.a = self.appearance_model.instance(c)
+        c = self.pinv_A_m.dot(np.subtract(i_m, self.a_bar_m, out=self._r_m))
+        self.a = self._appearance_instance(c)
         a_m = self.a.as_vector()[self.interface.i_mask]
         c_list = [c]
         Jdp = 0
 
         # compute masked error
-        e_m = i_m - a_m
+        e_m = np.subtract(i_m, a_m, out=self._e_m)
 
         # update costs
         costs = None
         if return_costs:
             costs = [cost_closure(e_m)]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # solve for increment on the appearance parameters
             if map_inference:
-                Ae_m_map = - self.s2_inv_S * c + self.A_m.dot(e_m + Jdp)
+                Ae_m_map = - self.s2_inv_S * c + self.A_m.T.dot(
+                    np.add(e_m, Jdp, out=self._r_m))
                 dc = np.linalg.solve(self.AA_m_map, Ae_m_map)
             else:
-                dc = self.pinv_A_m.dot(e_m + Jdp)
+                dc = self.pinv_A_m.dot(np.add(e_m, Jdp, out=self._r_m))
 
             # compute masked Jacobian
             J_m = self._compute_jacobian()
             # compute masked Hessian
-            H_m = J_m.T.dot(J_m)
+            H_m = np.dot(J_m.T, J_m, out=self._H_m)
+            # compute masked error given the appearance increment
+            r_m = np.dot(self.A_m, dc, out=self._r_m)
+            r_m = np.subtract(e_m, r_m, out=r_m)
             # solve for increments on the shape parameters
             if map_inference:
                 self.dp = self.interface.solve_shape_map(
-                    H_m, J_m, e_m - self.A_m.T.dot(dc), self.s2_inv_L,
-                    self.transform.as_vector())
+                    H_m, J_m, r_m, self.s2_inv_L, self._shape_parameters())
             else:
-                self.dp = self.interface.solve_shape_ml(H_m, J_m,
-                                                        e_m - self.A_m.dot(dc))
+                self.dp = self.interface.solve_shape_ml(H_m, J_m, r_m)
 
             # update appearance parameters
             c = c + dc
-            self.a = self.appearance_model.instance(c)
+            self.a = self._appearance_instance(c)
             a_m = self.a.as_vector()[self.interface.i_mask]
             c_list.append(c)
 
@@ -1236,16 +1576,14 @@ class Alternating(LucasKanade):
             p_list.append(self.transform.as_vector())
             shapes.append(self.transform.target)
 
-            # warp image
-            self.i = self.interface.warp(image)
-            # mask warped image
-            i_m = self.i.as_vector()[self.interface.i_mask]
+            # warp image, vectorize it and mask it
+            i_m = self._warp(image)
 
             # compute Jdp
-            Jdp = J_m.dot(self.dp)
+            Jdp = np.dot(J_m, self.dp, out=self._Jdp_m)
 
             # compute masked error
-            e_m = i_m - a_m
+            e_m = np.subtract(i_m, a_m, out=self._e_m)
 
             # update costs
             if return_costs:
@@ -1268,11 +1606,15 @@ class AlternatingForwardCompositional(Alternating):
     r"""
     Alternating Forward Compositional (AFC) Gauss-Newton algorithm.
     """
+    # the gradient of the warped image is needed at each iteration
+    _requires_warped_image = True
+
     def _compute_jacobian(self):
         # compute warped image gradient
         nabla_i = self.interface.gradient(self.i)
         # return forward Jacobian
-        return self.interface.steepest_descent_images(nabla_i, self.dW_dp)
+        return self.interface.steepest_descent_images(nabla_i, self.dW_dp,
+                                                     out=self._J_m)
 
     def _update_warp(self):
         # update warp based on forward composition
@@ -1291,7 +1633,8 @@ class AlternatingInverseCompositional(Alternating):
         # compute warped appearance model gradient
         nabla_a = self.interface.gradient(self.a)
         # return inverse Jacobian
-        return self.interface.steepest_descent_images(-nabla_a, self.dW_dp)
+        return self.interface.steepest_descent_images(-nabla_a, self.dW_dp,
+                                                     out=self._J_m)
 
     def _update_warp(self):
         # update warp based on inverse composition
@@ -1308,7 +1651,7 @@ class ModifiedAlternating(Alternating):
     algorithms.
     """
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, map_inference=False):
+            return_costs=False, map_inference=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -1335,6 +1678,9 @@ class ModifiedAlternating(Alternating):
         map_inference : `bool`, optional
             If ``True``, then the solution will be given after performing MAP
             inference.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -1358,35 +1704,34 @@ class ModifiedAlternating(Alternating):
 
         # Compositional Gauss-Newton loop -------------------------------------
 
-        # warp image
-        self.i = self.interface.warp(image)
-        # mask warped image
-        i_m = self.i.as_vector()[self.interface.i_mask]
+        # warp image, vectorize it and mask it
+        i_m = self._warp(image)
 
         # initialize appearance parameters by projecting masked image
         # onto masked appearance model
-        c = self.pinv_A_m.dot(i_m - a_m)
-        self.a = self.appearance_model.instance(c)
+        c = self.pinv_A_m.dot(np.subtract(i_m, a_m, out=self._r_m))
+        self.a = self._appearance_instance(c)
         a_m = self.a.as_vector()[self.interface.i_mask]
         c_list.append(c)
 
         # compute masked error
-        e_m = i_m - a_m
+        e_m = np.subtract(i_m, a_m, out=self._e_m)
 
         # update costs
         costs = None
         if return_costs:
             costs = [cost_closure(e_m)]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # compute masked Jacobian
             J_m = self._compute_jacobian()
             # compute masked Hessian
-            H_m = J_m.T.dot(J_m)
+            H_m = np.dot(J_m.T, J_m, out=self._H_m)
             # solve for increments on the shape parameters
             if map_inference:
                 self.dp = self.interface.solve_shape_map(
-                    H_m, J_m, e_m, self.s2_inv_L, self.transform.as_vector())
+                    H_m, J_m, e_m, self.s2_inv_L, self._shape_parameters())
             else:
                 self.dp = self.interface.solve_shape_ml(H_m, J_m, e_m)
 
@@ -1396,19 +1741,18 @@ class ModifiedAlternating(Alternating):
             p_list.append(self.transform.as_vector())
             shapes.append(self.transform.target)
 
-            # warp image
-            self.i = self.interface.warp(image)
-            # mask warped image
-            i_m = self.i.as_vector()[self.interface.i_mask]
+            # warp image, vectorize it and mask it
+            i_m = self._warp(image)
 
             # update appearance parameters
-            c = self.pinv_A_m.dot(i_m - self.a_bar_m)
-            self.a = self.appearance_model.instance(c)
+            c = self.pinv_A_m.dot(
+                np.subtract(i_m, self.a_bar_m, out=self._r_m))
+            self.a = self._appearance_instance(c)
             a_m = self.a.as_vector()[self.interface.i_mask]
             c_list.append(c)
 
             # compute masked error
-            e_m = i_m - a_m
+            e_m = np.subtract(i_m, a_m, out=self._e_m)
 
             # update costs
             if return_costs:
@@ -1431,11 +1775,15 @@ class ModifiedAlternatingForwardCompositional(ModifiedAlternating):
     r"""
     Modified Alternating Forward Compositional (MAFC) Gauss-Newton algorithm
     """
+    # the gradient of the warped image is needed at each iteration
+    _requires_warped_image = True
+
     def _compute_jacobian(self):
         # compute warped image gradient
         nabla_i = self.interface.gradient(self.i)
         # return forward Jacobian
-        return self.interface.steepest_descent_images(nabla_i, self.dW_dp)
+        return self.interface.steepest_descent_images(nabla_i, self.dW_dp,
+                                                     out=self._J_m)
 
     def _update_warp(self):
         # update warp based on forward composition
@@ -1454,7 +1802,8 @@ class ModifiedAlternatingInverseCompositional(ModifiedAlternating):
         # compute warped appearance model gradient
         nabla_a = self.interface.gradient(self.a)
         # return inverse Jacobian
-        return self.interface.steepest_descent_images(-nabla_a, self.dW_dp)
+        return self.interface.steepest_descent_images(-nabla_a, self.dW_dp,
+                                                     out=self._J_m)
 
     def _update_warp(self):
         # update warp based on inverse composition
@@ -1469,12 +1818,15 @@ class Wiberg(LucasKanade):
     r"""
     Abstract class for defining Wiberg AAM optimization algorithms.
     """
-    def project_out(self, J):
+    def project_out(self, J, out=None):
         # project-out appearance bases from a particular vector or matrix
-        return J - self.A_m.dot(self.pinv_A_m.dot(J))
+        if out is None:
+            return J - self.A_m.dot(self.pinv_A_m.dot(J))
+        np.dot(self.A_m, self.pinv_A_m.dot(J), out=out)
+        return np.subtract(J, out, out=out)
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, map_inference=False):
+            return_costs=False, map_inference=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -1501,6 +1853,9 @@ class Wiberg(LucasKanade):
         map_inference : `bool`, optional
             If ``True``, then the solution will be given after performing MAP
             inference.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -1522,38 +1877,37 @@ class Wiberg(LucasKanade):
 
         # Compositional Gauss-Newton loop -------------------------------------
 
-        # warp image
-        self.i = self.interface.warp(image)
-        # mask warped image
-        i_m = self.i.as_vector()[self.interface.i_mask]
+        # warp image, vectorize it and mask it
+        i_m = self._warp(image)
 
         # initialize appearance parameters by projecting masked image
         # onto masked appearance model
-        c = self.pinv_A_m.dot(i_m - self.a_bar_m)
-        self.a = self.appearance_model.instance(c)
+        c = self.pinv_A_m.dot(np.subtract(i_m, self.a_bar_m, out=self._r_m))
+        self.a = self._appearance_instance(c)
         a_m = self.a.as_vector()[self.interface.i_mask]
         c_list = [c]
 
         # compute masked error
-        e_m = i_m - self.a_bar_m
+        e_m = np.subtract(i_m, self.a_bar_m, out=self._e_m)
 
         # update costs
         costs = None
         if return_costs:
             costs = [cost_closure(e_m, self.project_out)]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # compute masked Jacobian
             J_m = self._compute_jacobian()
             # project out appearance models
-            QJ_m = self.project_out(J_m)
+            QJ_m = self.project_out(J_m, out=self._QJ_m)
             # compute masked Hessian
-            JQJ_m = QJ_m.T.dot(J_m)
+            JQJ_m = np.dot(QJ_m.T, J_m, out=self._H_m)
             # solve for increments on the shape parameters
             if map_inference:
                 self.dp = self.interface.solve_shape_map(
                     JQJ_m, QJ_m, e_m, self.s2_inv_L,
-                    self.transform.as_vector())
+                    self._shape_parameters())
             else:
                 self.dp = self.interface.solve_shape_ml(JQJ_m, QJ_m, e_m)
 
@@ -1563,20 +1917,20 @@ class Wiberg(LucasKanade):
             p_list.append(self.transform.as_vector())
             shapes.append(self.transform.target)
 
-            # warp image
-            self.i = self.interface.warp(image)
-            # mask warped image
-            i_m = self.i.as_vector()[self.interface.i_mask]
+            # warp image, vectorize it and mask it
+            i_m = self._warp(image)
 
             # update appearance parameters
-            dc = self.pinv_A_m.dot(i_m - a_m + J_m.dot(self.dp))
+            r_m = np.subtract(i_m, a_m, out=self._r_m)
+            r_m += np.dot(J_m, self.dp, out=self._Jdp_m)
+            dc = self.pinv_A_m.dot(r_m)
             c = c + dc
-            self.a = self.appearance_model.instance(c)
+            self.a = self._appearance_instance(c)
             a_m = self.a.as_vector()[self.interface.i_mask]
             c_list.append(c)
 
             # compute masked error
-            e_m = i_m - self.a_bar_m
+            e_m = np.subtract(i_m, self.a_bar_m, out=self._e_m)
 
             # update costs
             if return_costs:
@@ -1599,11 +1953,15 @@ class WibergForwardCompositional(Wiberg):
     r"""
     Wiberg Forward Compositional (WFC) Gauss-Newton algorithm.
     """
+    # the gradient of the warped image is needed at each iteration
+    _requires_warped_image = True
+
     def _compute_jacobian(self):
         # compute warped image gradient
         nabla_i = self.interface.gradient(self.i)
         # return forward Jacobian
-        return self.interface.steepest_descent_images(nabla_i, self.dW_dp)
+        return self.interface.steepest_descent_images(nabla_i, self.dW_dp,
+                                                     out=self._J_m)
 
     def _update_warp(self):
         # update warp based on forward composition
@@ -1622,7 +1980,8 @@ class WibergInverseCompositional(Wiberg):
         # compute warped appearance model gradient
         nabla_a = self.interface.gradient(self.a)
         # return inverse Jacobian
-        return self.interface.steepest_descent_images(-nabla_a, self.dW_dp)
+        return self.interface.steepest_descent_images(-nabla_a, self.dW_dp,
+                                                     out=self._J_m)
 
     def _update_warp(self):
         # update warp based on inverse composition
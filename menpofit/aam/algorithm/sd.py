@@ -2,6 +2,7 @@ from __future__ import division
 from functools import partial
 import numpy as np
 
+from menpofit.base import expired
 from menpofit.fitter import raise_costs_warning
 from menpofit.math import IRLRegression, IIRLRegression
 from menpofit.result import euclidean_bb_normalised_error
@@ -107,7 +108,7 @@ class ParametricSupervisedDescentAlgorithm(BaseSupervisedDescentAlgorithm):
                               self._compute_error, prefix=prefix)
 
     def run(self, image, initial_shape, gt_shape=None, return_costs=False,
-            **kwargs):
+            deadline=None, **kwargs):
         r"""
         Run the algorithm to an image given an initial shape.
 
@@ -126,6 +127,9 @@ class ParametricSupervisedDescentAlgorithm(BaseSupervisedDescentAlgorithm):
             argument currently has no effect and will raise a warning if set
             to ``True``. This is because it is not possible to evaluate the
             cost function of this algorithm.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            cascade stops once it has passed.
 
         Returns
         -------
@@ -143,6 +147,8 @@ class ParametricSupervisedDescentAlgorithm(BaseSupervisedDescentAlgorithm):
 
         # Cascaded Regression loop
         for r in self.regressors:
+            if expired(deadline):
+                break
             # Assumes that the transform is correctly set
             features = self._compute_test_features(image,
                                                    self.transform.target)
@@ -171,8 +177,7 @@ class MeanTemplate(ParametricSupervisedDescentAlgorithm):
     """
     def _compute_test_features(self, image, current_shape):
         self.transform.set_target(current_shape)
-        i = self.interface.warp(image)
-        i_m = i.as_vector()[self.interface.i_mask]
+        i_m = self.interface.warp_masked(image)
         return i_m - self.a_bar_m
 
 
@@ -279,8 +284,7 @@ class ProjectOut(ParametricSupervisedDescentAlgorithm):
 
     def _compute_test_features(self, image, current_shape):
         self.transform.set_target(current_shape)
-        i = self.interface.warp(image)
-        i_m = i.as_vector()[self.interface.i_mask]
+        i_m = self.interface.warp_masked(image)
         # TODO: This project out could actually be cached at test time -
         # but we need to think about the best way to implement this and still
         # allow incrementing
@@ -393,8 +397,7 @@ class AppearanceWeights(ParametricSupervisedDescentAlgorithm):
 
     def _compute_test_features(self, image, current_shape):
         self.transform.set_target(current_shape)
-        i = self.interface.warp(image)
-        i_m = i.as_vector()[self.interface.i_mask]
+        i_m = self.interface.warp_masked(image)
         # Project image onto the appearance model
         return self.project(i_m)
 
@@ -1,5 +1,6 @@
 from __future__ import division
 import warnings
+from multiprocessing.pool import ThreadPool
 import numpy as np
 
 from menpo.feature import no_op
@@ -18,11 +19,28 @@ from menpofit.transform import (DifferentiableThinPlateSplines,
                                 DifferentiablePiecewiseAffine, OrthoMDTransform,
                                 LinearOrthoMDTransform)
 from menpofit.base import batch
+from menpofit.math import pca_from_matrix, increment_pca_from_matrix
+from menpofit.parallel import start_worker_pool, worker_state
+from menpofit.visualize import print_progress
 from menpofit.builder import (
     build_reference_frame, build_patch_reference_frame,
-    compute_features, scale_images, warp_images,
+    compute_features, scale_images, warp_images, warp_images_to_matrix,
     align_shapes, rescale_images_to_reference_shape, densify_shapes,
-    extract_patches, MenpoFitBuilderWarning, compute_reference_shape)
+    extract_patches, extract_patches_to_matrix, allocate_matrix,
+    images_to_matrix, MenpoFitBuilderWarning, compute_reference_shape)
+
+
+def _train_chunk_task(args):
+    r"""
+    Function that is executed by a worker process in order to compute the
+    shapes and the warped images of a chunk of training images at all scales.
+    The model and the images are the state of the worker, thus only the
+    indices of the chunk are sent to it.
+    """
+    indices, group, warp, warp_states = args
+    aam, images = worker_state()
+    return aam._train_chunk([images[i] for i in indices], group, warp=warp,
+                            warp_states=warp_states)
 
 
 class AAM(object):
@@ -89,6 +107,40 @@ class AAM(object):
         incremental fashion on image batches of size equal to the provided
         value. If ``None``, then the training is performed directly on the
         all the images.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes that compute the features, the scaled
+        shapes and the warped images of the training images. The shape and
+        appearance models of the scales are then built concurrently. If
+        ``None``, then the number of CPUs is used. If ``1``, then the
+        training is sequential. Note that the parallel training keeps the
+        warped images of all scales in memory at once.
+    warp_to_matrix : `bool`, optional
+        If ``True``, then the training images are warped straight into the
+        rows of a preallocated ``float32`` data matrix per scale, on which
+        the PCA of the appearance model is computed. This roughly halves the
+        peak memory of the training, since the warped images are not
+        vectorized into a second copy, at the cost of computing the PCA in
+        single precision.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the data matrices of ``warp_to_matrix`` are stored in
+        temporary memory-mapped files within this directory, instead of in
+        memory. It implies ``warp_to_matrix=True``.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance models are built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`). It is faster and needs less memory than the
+        exact PCA, but the components are approximated.
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+        Larger values increase its accuracy at the cost of training time.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
 
     References
     ----------
@@ -107,14 +159,21 @@ class AAM(object):
         Zafeiriou. "Feature-Based Lucas-Kanade and Active Appearance Models",
         IEEE Transactions on Image Processing, 24(9): 2617-2632, 2015.
     """
+    # Whether the warps of a scale depend on its shape model
+    _shape_dependent_warp = False
+
     def __init__(self, images, group=None, holistic_features=no_op,
                  reference_shape=None, diagonal=None, scales=(0.5, 1.0),
                  transform=DifferentiablePiecewiseAffine,
                  shape_model_cls=OrthoPDM, max_shape_components=None,
                  max_appearance_components=None, verbose=False,
-                 batch_size=None):
+                 batch_size=None, n_jobs=1, warp_to_matrix=False,
+                 memmap_dir=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         # Check parameters
         checks.check_diagonal(diagonal)
+        n_jobs = checks.check_n_jobs(n_jobs)
         scales = checks.check_scales(scales)
         n_scales = len(scales)
         holistic_features = checks.check_callable(holistic_features, n_scales)
@@ -130,17 +189,24 @@ class AAM(object):
         self.scales = scales
         self.max_shape_components = max_shape_components
         self.max_appearance_components = max_appearance_components
+        self.randomized_pca = randomized_pca
+        self.pca_oversampling = pca_oversampling
+        self.pca_power_iterations = pca_power_iterations
+        self.pca_random_state = pca_random_state
         self.reference_shape = reference_shape
         self._shape_model_cls = shape_model_cls
         self.shape_models = []
         self.appearance_models = []
         # Train AAM
         self._train(images, increment=False, group=group, verbose=verbose,
-                    batch_size=batch_size)
+                    batch_size=batch_size, n_jobs=n_jobs,
+                    warp_to_matrix=warp_to_matrix, memmap_dir=memmap_dir)
 
     def _train(self, images, increment=False, group=None,
                shape_forgetting_factor=1.0, appearance_forgetting_factor=1.0,
-               verbose=False, batch_size=None):
+               verbose=False, batch_size=None, n_jobs=1, warp_to_matrix=False,
+               memmap_dir=None):
+        warp_to_matrix = warp_to_matrix or memmap_dir is not None
         # If batch_size is not None, then we may have a generator, else we
         # assume we have a list.
         if batch_size is not None:
@@ -176,15 +242,25 @@ class AAM(object):
                 print('Computing batch {}'.format(k))
 
             # Train each batch
-            self._train_batch(
-                image_batch, increment=increment, group=group,
-                shape_forgetting_factor=shape_forgetting_factor,
-                appearance_forgetting_factor=appearance_forgetting_factor,
-                verbose=verbose)
+            if n_jobs > 1:
+                self._train_batch_parallel(
+                    image_batch, n_jobs, increment=increment, group=group,
+                    shape_forgetting_factor=shape_forgetting_factor,
+                    appearance_forgetting_factor=appearance_forgetting_factor,
+                    verbose=verbose, warp_to_matrix=warp_to_matrix,
+                    memmap_dir=memmap_dir)
+            else:
+                self._train_batch(
+                    image_batch, increment=increment, group=group,
+                    shape_forgetting_factor=shape_forgetting_factor,
+                    appearance_forgetting_factor=appearance_forgetting_factor,
+                    verbose=verbose, warp_to_matrix=warp_to_matrix,
+                    memmap_dir=memmap_dir)
 
     def _train_batch(self, image_batch, increment=False, group=None,
                      verbose=False, shape_forgetting_factor=1.0,
-                     appearance_forgetting_factor=1.0):
+                     appearance_forgetting_factor=1.0, warp_to_matrix=False,
+                     memmap_dir=None):
         # Rescale to existing reference shape
         image_batch = rescale_images_to_reference_shape(
             image_batch, group, self.reference_shape, verbose=verbose)
@@ -204,26 +280,8 @@ class AAM(object):
             else:
                 scale_prefix = None
 
-            # Handle holistic features
-            if j == 0 and self.holistic_features[j] == no_op:
-                # Saves a lot of memory
-                feature_images = image_batch
-            elif j == 0 or self.holistic_features[j] is not self.holistic_features[j - 1]:
-                # Compute features only if this is the first pass through
-                # the loop or the features at this scale are different from
-                # the features at the previous scale
-                feature_images = compute_features(image_batch,
-                                                  self.holistic_features[j],
-                                                  prefix=scale_prefix,
-                                                  verbose=verbose)
-            # handle scales
-            if self.scales[j] != 1:
-                # Scale feature images only if scale is different than 1
-                scaled_images = scale_images(feature_images, self.scales[j],
-                                             prefix=scale_prefix,
-                                             verbose=verbose)
-            else:
-                scaled_images = feature_images
+            feature_images, scaled_images = self._scale_images(
+                image_batch, feature_images, j, scale_prefix, verbose)
 
             # Extract potentially rescaled shapes
             scale_shapes = [i.landmarks[group] for i in scaled_images]
@@ -245,39 +303,266 @@ class AAM(object):
             # reference frame.
             scaled_reference_shape = Scale(self.scales[j], n_dims=2).apply(
                 self.reference_shape)
-            warped_images = self._warp_images(scaled_images, scale_shapes,
-                                              scaled_reference_shape,
-                                              j, scale_prefix, verbose)
+            template = None
+            if warp_to_matrix:
+                warped_images, template = self._warp_images_to_matrix(
+                    scaled_images, scale_shapes, scaled_reference_shape, j,
+                    scale_prefix, verbose, memmap_dir)
+            else:
+                warped_images = self._warp_images(scaled_images, scale_shapes,
+                                                  scaled_reference_shape,
+                                                  j, scale_prefix, verbose)
 
             # obtain appearance model
             if verbose:
                 print_dynamic('{}Building appearance model'.format(
                     scale_prefix))
 
+            appearance_model = self._build_appearance_model(
+                warped_images, j, increment=increment,
+                forgetting_factor=appearance_forgetting_factor,
+                template=template)
             if not increment:
-                appearance_model = PCAModel(warped_images)
-                # trim appearance model if required
-                if self.max_appearance_components[j] is not None:
-                    appearance_model.trim_components(
-                        self.max_appearance_components[j])
                 # add appearance model to the list
                 self.appearance_models.append(appearance_model)
-            else:
-                # increment appearance model
-                self.appearance_models[j].increment(
-                    warped_images,
-                    forgetting_factor=appearance_forgetting_factor)
-                # trim appearance model if required
-                if self.max_appearance_components[j] is not None:
-                    self.appearance_models[j].trim_components(
-                        self.max_appearance_components[j])
 
             if verbose:
                 print_dynamic('{}Done\n'.format(scale_prefix))
 
+    def _scale_images(self, images, feature_images, scale_index, prefix,
+                      verbose):
+        r"""
+        Computes the features of the images at a scale, unless they are the
+        same as the `feature_images` of the previous scale, and rescales them.
+        Returns the feature images and the scaled images.
+        """
+        j = scale_index
+        # Handle holistic features
+        if j == 0 and self.holistic_features[j] == no_op:
+            # Saves a lot of memory
+            feature_images = images
+        elif j == 0 or self.holistic_features[j] is not self.holistic_features[j - 1]:
+            # Compute features only if this is the first pass through
+            # the loop or the features at this scale are different from
+            # the features at the previous scale
+            feature_images = compute_features(images,
+                                              self.holistic_features[j],
+                                              prefix=prefix,
+                                              verbose=verbose)
+        # handle scales
+        if self.scales[j] != 1:
+            # Scale feature images only if scale is different than 1
+            scaled_images = scale_images(feature_images, self.scales[j],
+                                         prefix=prefix,
+                                         verbose=verbose)
+        else:
+            scaled_images = feature_images
+        return feature_images, scaled_images
+
+    def _build_appearance_model(self, warped_images, scale_index,
+                                increment=False, forgetting_factor=1.0,
+                                template=None):
+        r"""
+        Builds the appearance model of a scale or increments the existing one.
+        If a `template` is provided, then `warped_images` is a data matrix
+        with a vectorized warped image per row.
+        """
+        j = scale_index
+        max_components = self.max_appearance_components[j]
+        if not increment:
+            if template is None and not (self.randomized_pca and
+                                         isinstance(max_components, int)):
+                appearance_model = PCAModel(warped_images)
+            else:
+                if template is None:
+                    # Only the capped components are computed, on a matrix
+                    warped_images, template = images_to_matrix(
+                        warped_images, len(warped_images), dtype=np.float64)
+                appearance_model = pca_from_matrix(
+                    warped_images, template, max_n_components=max_components,
+                    randomized=self.randomized_pca,
+                    n_oversamples=self.pca_oversampling,
+                    n_power_iterations=self.pca_power_iterations,
+                    random_state=self.pca_random_state)
+        else:
+            # increment appearance model
+            appearance_model = self.appearance_models[j]
+            if template is None:
+                appearance_model.increment(
+                    warped_images, forgetting_factor=forgetting_factor)
+            else:
+                increment_pca_from_matrix(appearance_model, warped_images,
+                                          forgetting_factor=forgetting_factor)
+        # trim appearance model if required
+        if max_components is not None:
+            appearance_model.trim_components(max_components)
+        return appearance_model
+
+    def _train_chunk(self, images, group, warp=True, warp_states=None):
+        r"""
+        Computes the shapes and, if `warp` is ``True``, the warped images of a
+        chunk of training images at all scales. If the warps depend on the
+        shape models (see :meth:`_warp_state`), then the state of each scale
+        must be provided in `warp_states`.
+        """
+        # Rescale to existing reference shape
+        images = rescale_images_to_reference_shape(images, group,
+                                                   self.reference_shape)
+        shapes = []
+        warped_images = []
+        feature_images = []
+        for j in range(self.n_scales):
+            feature_images, scaled_images = self._scale_images(
+                images, feature_images, j, None, False)
+            scale_shapes = [i.landmarks[group] for i in scaled_images]
+            shapes.append(scale_shapes)
+            if warp:
+                if warp_states is not None:
+                    self._set_warp_state(warp_states[j])
+                scaled_reference_shape = Scale(
+                    self.scales[j], n_dims=2).apply(self.reference_shape)
+                warped_images.append(self._warp_images(
+                    scaled_images, scale_shapes, scaled_reference_shape, j,
+                    None, False))
+        return shapes, warped_images
+
+    def _train_batch_parallel(self, image_batch, n_jobs, increment=False,
+                              group=None, verbose=False,
+                              shape_forgetting_factor=1.0,
+                              appearance_forgetting_factor=1.0,
+                              warp_to_matrix=False, memmap_dir=None):
+        r"""
+        Parallel version of :meth:`_train_batch`. The training images are
+        split in chunks that are processed by a pool of `n_jobs` worker
+        processes, which compute their features, scaled shapes and warped
+        images at all scales. Then, the shape and appearance models of the
+        scales are built concurrently by a pool of threads, since the
+        decompositions of the PCA release the GIL.
+
+        If the warps depend on the shape models, as in the linear AAMs, then
+        the shape models are built first and the workers compute the warped
+        images in a second pass. If `warp_to_matrix` is ``True``, then the
+        warped images that are returned by the workers are written into the
+        rows of a data matrix per scale as soon as they are received.
+        """
+        n_images = len(image_batch)
+        # A few chunks per worker balance the load and update the progress
+        chunk_size = max(n_images // (4 * n_jobs), 1)
+        chunks = [list(range(k, min(k + chunk_size, n_images)))
+                  for k in range(0, n_images, chunk_size)]
+        warp_first = not self._shape_dependent_warp
+
+        templates = [None] * self.n_scales
+
+        def process_chunks(pool, warp, warp_states, prefix):
+            tasks = [(c, group, warp, warp_states) for c in chunks]
+            results = print_progress(
+                pool.imap(_train_chunk_task, tasks), n_items=len(tasks),
+                prefix=prefix, verbose=verbose)
+            shapes = [[] for _ in range(self.n_scales)]
+            warped_images = [[] for _ in range(self.n_scales)]
+            for chunk, (chunk_shapes, chunk_warped_images) in zip(chunks,
+                                                                 results):
+                for j in range(self.n_scales):
+                    shapes[j] += chunk_shapes[j]
+                    if not warp:
+                        continue
+                    if not warp_to_matrix:
+                        warped_images[j] += chunk_warped_images[j]
+                        continue
+                    if templates[j] is None:
+                        templates[j] = chunk_warped_images[j][0]
+                        warped_images[j] = allocate_matrix(
+                            (n_images, templates[j].as_vector().size),
+                            memmap_dir=memmap_dir)
+                    for k, i in zip(chunk, chunk_warped_images[j]):
+                        warped_images[j][k] = i.as_vector()
+            return shapes, warped_images
+
+        if verbose:
+            print_dynamic('- Building models with {} workers\n'.format(n_jobs))
+        pool = start_worker_pool(n_jobs, (self, image_batch))
+        try:
+            shapes, warped_images = process_chunks(
+                pool, warp_first, None,
+                '  - Computing shapes and warped images' if warp_first else
+                '  - Computing shapes')
+            if not warp_first:
+                # The warps depend on the shape models, thus these are built
+                # sequentially before warping the images
+                warp_states = []
+                for j in range(self.n_scales):
+                    self._build_scale_shape_model(
+                        shapes[j], j, increment, shape_forgetting_factor)
+                    warp_states.append(self._warp_state())
+                _, warped_images = process_chunks(pool, True, warp_states,
+                                                  '  - Warping images')
+        finally:
+            pool.close()
+            pool.join()
+
+        if verbose:
+            print_dynamic('  - Building shape and appearance models')
+
+        def build_models(j):
+            shape_model = None
+            if warp_first:
+                shape_model = self._build_scale_shape_model(
+                    shapes[j], j, increment, shape_forgetting_factor,
+                    append=False)
+            appearance_model = self._build_appearance_model(
+                warped_images[j], j, increment=increment,
+                forgetting_factor=appearance_forgetting_factor,
+                template=templates[j])
+            return shape_model, appearance_model
+
+        thread_pool = ThreadPool(min(n_jobs, self.n_scales))
+        try:
+            models = thread_pool.map(build_models, range(self.n_scales))
+        finally:
+            thread_pool.close()
+            thread_pool.join()
+        if not increment:
+            if warp_first:
+                self.shape_models += [m[0] for m in models]
+            self.appearance_models += [m[1] for m in models]
+
+        if verbose:
+            print_dynamic('  - Done\n')
+
+    def _build_scale_shape_model(self, shapes, scale_index, increment,
+                                 forgetting_factor, append=True):
+        r"""
+        Builds the shape model of a scale, which is appended to the shape
+        models if `append` is ``True``, or increments the existing one.
+        """
+        if increment:
+            self._increment_shape_model(shapes, scale_index,
+                                        forgetting_factor=forgetting_factor)
+            return self.shape_models[scale_index]
+        shape_model = self._build_shape_model(shapes, scale_index)
+        if append:
+            self.shape_models.append(shape_model)
+        return shape_model
+
+    def _warp_state(self):
+        r"""
+        Returns the state that :meth:`_warp_images` reads from the AAM after
+        the shape model of a scale is built, if :attr:`_shape_dependent_warp`
+        is ``True``.
+        """
+        return None
+
+    def _set_warp_state(self, state):
+        r"""
+        Restores the state returned by :meth:`_warp_state`.
+        """
+        pass
+
     def increment(self, images, group=None, shape_forgetting_factor=1.0,
                   appearance_forgetting_factor=1.0, verbose=False,
-                  batch_size=None):
+                  batch_size=None, n_jobs=1, warp_to_matrix=False,
+                  memmap_dir=None):
         r"""
         Method to increment the trained AAM with a new set of training images.
 
@@ -310,12 +595,25 @@ class AAM(object):
             incremental fashion on image batches of size equal to the provided
             value. If ``None``, then the training is performed directly on the
             all the images.
+        n_jobs : `int` or ``None``, optional
+            The number of worker processes that are used for incrementing the
+            AAM. If ``None``, then the number of CPUs is used. If ``1``, then
+            the training is sequential.
+        warp_to_matrix : `bool`, optional
+            If ``True``, then the new training images are warped straight into
+            the rows of a ``float32`` data matrix per scale, with which the
+            appearance models are incremented.
+        memmap_dir : `str` or ``None``, optional
+            If `str`, then the data matrices of ``warp_to_matrix`` are stored
+            in temporary memory-mapped files within this directory. It implies
+            ``warp_to_matrix=True``.
         """
         return self._train(
                 images, increment=True, group=group, verbose=verbose,
                 shape_forgetting_factor=shape_forgetting_factor,
                 appearance_forgetting_factor=appearance_forgetting_factor,
-                batch_size=batch_size)
+                batch_size=batch_size, n_jobs=checks.check_n_jobs(n_jobs),
+                warp_to_matrix=warp_to_matrix, memmap_dir=memmap_dir)
 
     def _build_shape_model(self, shapes, scale_index):
         return self._shape_model_cls[scale_index](
@@ -333,6 +631,13 @@ class AAM(object):
         return warp_images(images, shapes, reference_frame, self.transform,
                            prefix=prefix, verbose=verbose)
 
+    def _warp_images_to_matrix(self, images, shapes, reference_shape,
+                               scale_index, prefix, verbose, memmap_dir):
+        reference_frame = build_reference_frame(reference_shape)
+        return warp_images_to_matrix(images, shapes, reference_frame,
+                                     self.transform, memmap_dir=memmap_dir,
+                                     prefix=prefix, verbose=verbose)
+
     @property
     def n_scales(self):
         """
@@ -666,12 +971,49 @@ class MaskedAAM(AAM):
         incremental fashion on image batches of size equal to the provided
         value. If ``None``, then the training is performed directly on the
         all the images.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes that compute the features, the scaled
+        shapes and the warped images of the training images. The shape and
+        appearance models of the scales are then built concurrently. If
+        ``None``, then the number of CPUs is used. If ``1``, then the
+        training is sequential. Note that the parallel training keeps the
+        warped images of all scales in memory at once.
+    warp_to_matrix : `bool`, optional
+        If ``True``, then the training images are warped straight into the
+        rows of a preallocated ``float32`` data matrix per scale, on which
+        the PCA of the appearance model is computed. This roughly halves the
+        peak memory of the training, since the warped images are not
+        vectorized into a second copy, at the cost of computing the PCA in
+        single precision.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the data matrices of ``warp_to_matrix`` are stored in
+        temporary memory-mapped files within this directory, instead of in
+        memory. It implies ``warp_to_matrix=True``.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance models are built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`). It is faster and needs less memory than the
+        exact PCA, but the components are approximated.
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+        Larger values increase its accuracy at the cost of training time.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, images, group=None, holistic_features=no_op,
                  reference_shape=None, diagonal=None, scales=(0.5, 1.0),
                  patch_shape=(17, 17), shape_model_cls=OrthoPDM,
                  max_shape_components=None, max_appearance_components=None,
-                 verbose=False, batch_size=None):
+                 verbose=False, batch_size=None, n_jobs=1,
+                 warp_to_matrix=False, memmap_dir=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         # Check arguments
         n_scales = len(checks.check_scales(scales))
         self.patch_shape = checks.check_patch_shape(patch_shape, n_scales)
@@ -683,7 +1025,13 @@ class MaskedAAM(AAM):
             transform=DifferentiableThinPlateSplines, diagonal=diagonal,
             scales=scales,  max_shape_components=max_shape_components,
             max_appearance_components=max_appearance_components,
-            shape_model_cls=shape_model_cls, batch_size=batch_size)
+            shape_model_cls=shape_model_cls, batch_size=batch_size,
+            n_jobs=n_jobs, warp_to_matrix=warp_to_matrix,
+            memmap_dir=memmap_dir,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
     def _warp_images(self, images, shapes, reference_shape, scale_index,
                      prefix, verbose):
@@ -692,6 +1040,14 @@ class MaskedAAM(AAM):
         return warp_images(images, shapes, reference_frame, self.transform,
                            prefix=prefix, verbose=verbose)
 
+    def _warp_images_to_matrix(self, images, shapes, reference_shape,
+                               scale_index, prefix, verbose, memmap_dir):
+        reference_frame = build_patch_reference_frame(
+            reference_shape, patch_shape=self.patch_shape[scale_index])
+        return warp_images_to_matrix(images, shapes, reference_frame,
+                                     self.transform, memmap_dir=memmap_dir,
+                                     prefix=prefix, verbose=verbose)
+
     @property
     def _str_title(self):
         return 'Masked Active Appearance Model'
@@ -776,13 +1132,52 @@ class LinearAAM(AAM):
         incremental fashion on image batches of size equal to the provided
         value. If ``None``, then the training is performed directly on the
         all the images.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes that compute the features, the scaled
+        shapes and the warped images of the training images. The shape and
+        appearance models of the scales are then built concurrently. If
+        ``None``, then the number of CPUs is used. If ``1``, then the
+        training is sequential. Note that the parallel training keeps the
+        warped images of all scales in memory at once.
+    warp_to_matrix : `bool`, optional
+        If ``True``, then the training images are warped straight into the
+        rows of a preallocated ``float32`` data matrix per scale, on which
+        the PCA of the appearance model is computed. This roughly halves the
+        peak memory of the training, since the warped images are not
+        vectorized into a second copy, at the cost of computing the PCA in
+        single precision.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the data matrices of ``warp_to_matrix`` are stored in
+        temporary memory-mapped files within this directory, instead of in
+        memory. It implies ``warp_to_matrix=True``.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance models are built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`). It is faster and needs less memory than the
+        exact PCA, but the components are approximated.
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+        Larger values increase its accuracy at the cost of training time.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
+    _shape_dependent_warp = True
+
     def __init__(self, images, group=None, holistic_features=no_op,
                  reference_shape=None, diagonal=None, scales=(0.5, 1.0),
                  transform=DifferentiableThinPlateSplines,
                  shape_model_cls=OrthoPDM,  max_shape_components=None,
                  max_appearance_components=None, verbose=False,
-                 batch_size=None):
+                 batch_size=None, n_jobs=1, warp_to_matrix=False,
+                 memmap_dir=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(LinearAAM, self).__init__(
             images, group=group, verbose=verbose,
             reference_shape=reference_shape,
@@ -790,7 +1185,13 @@ class LinearAAM(AAM):
             diagonal=diagonal, scales=scales,
             max_shape_components=max_shape_components,
             max_appearance_components=max_appearance_components,
-            shape_model_cls=shape_model_cls, batch_size=batch_size)
+            shape_model_cls=shape_model_cls, batch_size=batch_size,
+            n_jobs=n_jobs, warp_to_matrix=warp_to_matrix,
+            memmap_dir=memmap_dir,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
     @property
     def _str_title(self):
@@ -828,6 +1229,18 @@ class LinearAAM(AAM):
                            self.transform, prefix=prefix,
                            verbose=verbose)
 
+    def _warp_images_to_matrix(self, images, shapes, reference_shape,
+                               scale_index, prefix, verbose, memmap_dir):
+        return warp_images_to_matrix(images, shapes, self.reference_frame,
+                                     self.transform, memmap_dir=memmap_dir,
+                                     prefix=prefix, verbose=verbose)
+
+    def _warp_state(self):
+        return self.reference_frame
+
+    def _set_warp_state(self, state):
+        self.reference_frame = state
+
     # TODO: implement me!
     def _instance(self, scale_index, shape_instance, appearance_instance):
         raise NotImplementedError()
@@ -941,12 +1354,51 @@ class LinearMaskedAAM(AAM):
         incremental fashion on image batches of size equal to the provided
         value. If ``None``, then the training is performed directly on the
         all the images.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes that compute the features, the scaled
+        shapes and the warped images of the training images. The shape and
+        appearance models of the scales are then built concurrently. If
+        ``None``, then the number of CPUs is used. If ``1``, then the
+        training is sequential. Note that the parallel training keeps the
+        warped images of all scales in memory at once.
+    warp_to_matrix : `bool`, optional
+        If ``True``, then the training images are warped straight into the
+        rows of a preallocated ``float32`` data matrix per scale, on which
+        the PCA of the appearance model is computed. This roughly halves the
+        peak memory of the training, since the warped images are not
+        vectorized into a second copy, at the cost of computing the PCA in
+        single precision.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the data matrices of ``warp_to_matrix`` are stored in
+        temporary memory-mapped files within this directory, instead of in
+        memory. It implies ``warp_to_matrix=True``.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance models are built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`). It is faster and needs less memory than the
+        exact PCA, but the components are approximated.
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+        Larger values increase its accuracy at the cost of training time.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
+    _shape_dependent_warp = True
+
     def __init__(self, images, group=None, holistic_features=no_op,
                  reference_shape=None, diagonal=None, scales=(0.5, 1.0),
                  patch_shape=(17, 17), shape_model_cls=OrthoPDM,
                  max_shape_components=None, max_appearance_components=None,
-                 verbose=False, batch_size=None):
+                 verbose=False, batch_size=None, n_jobs=1,
+                 warp_to_matrix=False, memmap_dir=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         # Check arguments
         n_scales = len(checks.check_scales(scales))
         self.patch_shape = checks.check_patch_shape(patch_shape, n_scales)
@@ -958,7 +1410,13 @@ class LinearMaskedAAM(AAM):
             transform=DifferentiableThinPlateSplines, diagonal=diagonal,
             scales=scales,  max_shape_components=max_shape_components,
             max_appearance_components=max_appearance_components,
-            shape_model_cls=shape_model_cls, batch_size=batch_size)
+            shape_model_cls=shape_model_cls, batch_size=batch_size,
+            n_jobs=n_jobs, warp_to_matrix=warp_to_matrix,
+            memmap_dir=memmap_dir,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
     @property
     def _str_title(self):
@@ -996,6 +1454,18 @@ class LinearMaskedAAM(AAM):
                            self.transform, prefix=prefix,
                            verbose=verbose)
 
+    def _warp_images_to_matrix(self, images, shapes, reference_shape,
+                               scale_index, prefix, verbose, memmap_dir):
+        return warp_images_to_matrix(images, shapes, self.reference_frame,
+                                     self.transform, memmap_dir=memmap_dir,
+                                     prefix=prefix, verbose=verbose)
+
+    def _warp_state(self):
+        return self.reference_frame
+
+    def _set_warp_state(self, state):
+        self.reference_frame = state
+
     # TODO: implement me!
     def _instance(self, scale_index, shape_instance, appearance_instance):
         raise NotImplementedError()
@@ -1117,13 +1587,50 @@ class PatchAAM(AAM):
         incremental fashion on image batches of size equal to the provided
         value. If ``None``, then the training is performed directly on the
         all the images.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes that compute the features, the scaled
+        shapes and the warped images of the training images. The shape and
+        appearance models of the scales are then built concurrently. If
+        ``None``, then the number of CPUs is used. If ``1``, then the
+        training is sequential. Note that the parallel training keeps the
+        warped images of all scales in memory at once.
+    warp_to_matrix : `bool`, optional
+        If ``True``, then the training images are warped straight into the
+        rows of a preallocated ``float32`` data matrix per scale, on which
+        the PCA of the appearance model is computed. This roughly halves the
+        peak memory of the training, since the warped images are not
+        vectorized into a second copy, at the cost of computing the PCA in
+        single precision.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the data matrices of ``warp_to_matrix`` are stored in
+        temporary memory-mapped files within this directory, instead of in
+        memory. It implies ``warp_to_matrix=True``.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance models are built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`). It is faster and needs less memory than the
+        exact PCA, but the components are approximated.
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+        Larger values increase its accuracy at the cost of training time.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, images, group=None, holistic_features=no_op,
                  reference_shape=None, diagonal=None, scales=(0.5, 1.0),
                  patch_shape=(17, 17), patch_normalisation=no_op,
                  shape_model_cls=OrthoPDM, max_shape_components=None,
                  max_appearance_components=None, verbose=False,
-                 batch_size=None):
+                 batch_size=None, n_jobs=1, warp_to_matrix=False,
+                 memmap_dir=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         n_scales = len(checks.check_scales(scales))
         self.patch_shape = checks.check_patch_shape(patch_shape, n_scales)
         self.patch_normalisation = checks.check_callable(patch_normalisation,
@@ -1136,7 +1643,13 @@ class PatchAAM(AAM):
             diagonal=diagonal, scales=scales,
             max_shape_components=max_shape_components,
             max_appearance_components=max_appearance_components,
-            shape_model_cls=shape_model_cls, batch_size=batch_size)
+            shape_model_cls=shape_model_cls, batch_size=batch_size,
+            n_jobs=n_jobs, warp_to_matrix=warp_to_matrix,
+            memmap_dir=memmap_dir,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
     @property
     def _str_title(self):
@@ -1153,6 +1666,13 @@ class PatchAAM(AAM):
             normalise_function=self.patch_normalisation[scale_index],
             prefix=prefix, verbose=verbose)
 
+    def _warp_images_to_matrix(self, images, shapes, reference_shape,
+                               scale_index, prefix, verbose, memmap_dir):
+        return extract_patches_to_matrix(
+            images, shapes, self.patch_shape[scale_index],
+            normalise_function=self.patch_normalisation[scale_index],
+            memmap_dir=memmap_dir, prefix=prefix, verbose=verbose)
+
     def _instance(self, scale_index, shape_instance, appearance_instance):
         return shape_instance, appearance_instance
 
@@ -5,6 +5,7 @@ from menpo.base import name_of_callable
 from menpo.transform import AlignmentUniformScale
 from menpo.image import BooleanImage
 
+from menpofit.cache import PrecomputationCache
 from menpofit.fitter import (MultiScaleParametricFitter,
                              noisy_shape_from_bounding_box)
 from menpofit.sdm import SupervisedDescentFitter
@@ -33,13 +34,17 @@ class AAMFitter(MultiScaleParametricFitter):
         The trained AAM model.
     algorithms : `list` of `class`
         The list of algorithm objects that will perform the fitting per scale.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type to which the images are cast before fitting.
+        If ``None``, then the images are not cast.
     """
-    def __init__(self, aam, algorithms):
+    def __init__(self, aam, algorithms, dtype=None):
         self._model = aam
         # Call superclass
         super(AAMFitter, self).__init__(
             scales=aam.scales, reference_shape=aam.reference_shape,
-            holistic_features=aam.holistic_features, algorithms=algorithms)
+            holistic_features=aam.holistic_features, algorithms=algorithms,
+            dtype=dtype)
 
     @property
     def aam(self):
@@ -76,7 +81,8 @@ class AAMFitter(MultiScaleParametricFitter):
             The multi-scale fitting result containing the result of the fitting
             procedure.
         """
-        return AAMResult(results=algorithm_results, scales=self.scales,
+        return AAMResult(results=algorithm_results,
+                         scales=self._result_scales(algorithm_results),
                          affine_transforms=affine_transforms,
                          scale_transforms=scale_transforms, image=image,
                          gt_shape=gt_shape)
@@ -141,9 +147,28 @@ class LucasKanadeAAMFitter(AAMFitter):
         sub-sampling step of the sampling mask. If `ndarray`, then it
         explicitly defines the sampling mask. If ``None``, then no
         sub-sampling is applied.
+    precompute_cache : :map:`PrecomputationCache` or `str` or ``None``, optional
+        An on-disk cache of the precomputations of the algorithms (e.g. the
+        pseudoinverse of the appearance components, the warp Jacobian and the
+        projected-out Jacobian). If `str`, then it is the directory of the
+        cache. The precomputations are stored per scale, keyed by the models,
+        the algorithm, the sampling and the number of active components, thus
+        constructing the same fitter again only loads them. Whether each scale
+        was found in the cache is returned by `precompute_cache_hits`. If
+        ``None``, then no cache is used.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting, e.g. ``np.float32``. The
+        precomputations of the algorithms (appearance components, Jacobians,
+        Hessians and their inverses) are computed in double precision and cast
+        to `dtype` once, and the images are cast to `dtype` after feature
+        extraction, thus all the per-iteration computations are performed with
+        `dtype`. Single precision halves the memory of the precomputations and
+        the memory traffic of each iteration. If ``None``, then double
+        precision is used.
     """
     def __init__(self, aam, lk_algorithm_cls=WibergInverseCompositional,
-                 n_shape=None, n_appearance=None, sampling=None):
+                 n_shape=None, n_appearance=None, sampling=None,
+                 precompute_cache=None, dtype=None):
         # Check parameters
         checks.set_models_components(aam.shape_models, n_shape)
         checks.set_models_components(aam.appearance_models, n_appearance)
@@ -151,11 +176,31 @@ class LucasKanadeAAMFitter(AAMFitter):
 
         # Get list of algorithm objects per scale
         interfaces = aam.build_fitter_interfaces(self._sampling)
-        algorithms = [lk_algorithm_cls(interface) for interface in interfaces]
+        kwargs = {}
+        if precompute_cache is not None:
+            if not isinstance(precompute_cache, PrecomputationCache):
+                precompute_cache = PrecomputationCache(precompute_cache)
+            kwargs['cache'] = precompute_cache
+        if dtype is not None:
+            kwargs['dtype'] = dtype
+        algorithms = [lk_algorithm_cls(interface, **kwargs)
+                      for interface in interfaces]
 
         # Call superclass
         super(LucasKanadeAAMFitter, self).__init__(aam=aam,
-                                                   algorithms=algorithms)
+                                                   algorithms=algorithms,
+                                                   dtype=dtype)
+
+    @property
+    def precompute_cache_hits(self):
+        r"""
+        Returns per scale whether the precomputations of the algorithm were
+        loaded from the `precompute_cache`. The values are ``None`` if the
+        fitter was constructed without a cache.
+
+        :type: `list` of `bool` or ``None``
+        """
+        return [getattr(a, 'cache_hit', None) for a in self.algorithms]
 
     def appearance_reconstructions(self, appearance_parameters,
                                    n_iters_per_scale):
@@ -305,13 +350,18 @@ class SupervisedDescentAAMFitter(SupervisedDescentFitter):
         all the images.
     verbose : `bool`, optional
         If ``True``, then the progress of training will be printed.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting, e.g. ``np.float32``. The
+        regressors are trained in double precision and cast to `dtype` once
+        the training is finished, and the images are cast to `dtype` after
+        feature extraction. If ``None``, then double precision is used.
     """
     def __init__(self, images, aam, group=None, bounding_box_group_glob=None,
                  n_shape=None, n_appearance=None, sampling=None,
                  sd_algorithm_cls=ProjectOutNewton,
                  n_iterations=6, n_perturbations=30,
                  perturb_from_gt_bounding_box=noisy_shape_from_bounding_box,
-                 batch_size=None, verbose=False):
+                 batch_size=None, verbose=False, dtype=None):
         self.aam = aam
         # Check parameters
         checks.set_models_components(aam.shape_models, n_shape)
@@ -330,7 +380,7 @@ class SupervisedDescentAAMFitter(SupervisedDescentFitter):
             scales=self.aam.scales, n_iterations=n_iterations,
             n_perturbations=n_perturbations,
             perturb_from_gt_bounding_box=perturb_from_gt_bounding_box,
-            batch_size=batch_size, verbose=verbose)
+            batch_size=batch_size, verbose=verbose, dtype=dtype)
 
     def _setup_algorithms(self):
         interfaces = self.aam.build_fitter_interfaces(self._sampling)
@@ -365,7 +415,8 @@ class SupervisedDescentAAMFitter(SupervisedDescentFitter):
             procedure.
         """
         return MultiScaleParametricIterativeResult(
-            results=algorithm_results, scales=self.scales,
+            results=algorithm_results,
+            scales=self._result_scales(algorithm_results),
             affine_transforms=affine_transforms,
             scale_transforms=scale_transforms, image=image, gt_shape=gt_shape)
 
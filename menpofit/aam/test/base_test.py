@@ -0,0 +1,85 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+from menpo.feature import no_op
+
+from menpofit.aam import HolisticAAM, PatchAAM, MaskedAAM, LinearAAM
+from menpofit.test import helpers
+
+
+def setup_module():
+    global images
+    images = helpers.load_images()
+
+
+def assert_same_aams(aam, expected):
+    assert aam.n_scales == expected.n_scales
+    for i in range(aam.n_scales):
+        for model, expected_model in [
+                (aam.shape_models[i].model, expected.shape_models[i].model),
+                (aam.appearance_models[i], expected.appearance_models[i])]:
+            assert_allclose(model.mean().as_vector(),
+                            expected_model.mean().as_vector())
+            # The components are defined up to their sign
+            assert_allclose(np.abs(model.components),
+                            np.abs(expected_model.components), atol=1e-8)
+            assert_allclose(model.eigenvalues, expected_model.eigenvalues)
+
+
+def test_parallel_aam_training():
+    for aam_cls, kwargs in [(HolisticAAM, {}),
+                            (MaskedAAM, {'patch_shape': (5, 5)}),
+                            (PatchAAM, {'patch_shape': (5, 5)})]:
+        kwargs = dict(group='PTS', diagonal=40, holistic_features=no_op,
+                      verbose=False, **kwargs)
+        expected = aam_cls(images, **kwargs)
+        assert_same_aams(aam_cls(images, n_jobs=2, **kwargs), expected)
+        # Batches and increments
+        expected = aam_cls(images, batch_size=2, **kwargs)
+        assert_same_aams(aam_cls(images, batch_size=2, n_jobs=2, **kwargs),
+                         expected)
+        aam = aam_cls(images[:2], n_jobs=2, **kwargs)
+        aam.increment(images[2:], group='PTS', n_jobs=2)
+        assert_same_aams(aam, expected)
+
+
+def test_parallel_linear_aam_training():
+    kwargs = dict(group='PTS', diagonal=40, holistic_features=no_op,
+                  verbose=False)
+    assert_same_aams(LinearAAM(images, n_jobs=2, **kwargs),
+                     LinearAAM(images, **kwargs))
+
+
+def test_aam_warp_to_matrix():
+    for aam_cls, kwargs in [(HolisticAAM, {}),
+                            (PatchAAM, {'patch_shape': (5, 5)})]:
+        kwargs = dict(group='PTS', diagonal=40, holistic_features=no_op,
+                      verbose=False, max_appearance_components=0.99, **kwargs)
+        expected = aam_cls(images, **kwargs)
+        for n_jobs in [1, 2]:
+            aam = aam_cls(images, warp_to_matrix=True, n_jobs=n_jobs,
+                          **kwargs)
+            for model, expected_model in zip(aam.appearance_models,
+                                             expected.appearance_models):
+                # The samples are stored with single precision
+                assert model.n_components == expected_model.n_components
+                assert_allclose(model.mean().as_vector(),
+                                expected_model.mean().as_vector(), atol=1e-5)
+                assert_allclose(model.eigenvalues,
+                                expected_model.eigenvalues, rtol=1e-3)
+
+
+def test_aam_randomized_pca():
+    kwargs = dict(group='PTS', diagonal=40, holistic_features=no_op,
+                  verbose=False, max_appearance_components=2)
+    expected = HolisticAAM(images, **kwargs)
+    # The oversampling covers the whole range of the 4 training images
+    assert_same_aams(HolisticAAM(images, randomized_pca=True,
+                                 pca_random_state=0, **kwargs), expected)
+    # Without refinement, the models are approximated and the seed matters
+    kwargs.update(randomized_pca=True, pca_oversampling=0,
+                  pca_power_iterations=0)
+    aam = HolisticAAM(images, pca_random_state=0, **kwargs)
+    assert_same_aams(HolisticAAM(images, pca_random_state=0, **kwargs), aam)
+    assert not np.allclose(aam.appearance_models[0].eigenvalues,
+                           expected.appearance_models[0].eigenvalues)
@@ -0,0 +1,114 @@
+from copy import deepcopy
+import pickle
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+from menpofit.aam import (
+    LucasKanadeAAMFitter,
+    ProjectOutForwardCompositional, ProjectOutInverseCompositional,
+    SimultaneousForwardCompositional, SimultaneousInverseCompositional,
+    AlternatingForwardCompositional, AlternatingInverseCompositional,
+    ModifiedAlternatingForwardCompositional,
+    ModifiedAlternatingInverseCompositional,
+    WibergForwardCompositional, WibergInverseCompositional)
+from menpofit.test import helpers
+
+
+lk_algorithms = [
+    ProjectOutForwardCompositional, ProjectOutInverseCompositional,
+    SimultaneousForwardCompositional, SimultaneousInverseCompositional,
+    AlternatingForwardCompositional, AlternatingInverseCompositional,
+    ModifiedAlternatingForwardCompositional,
+    ModifiedAlternatingInverseCompositional,
+    WibergForwardCompositional, WibergInverseCompositional]
+
+
+def setup_module():
+    global images, holistic_aam, patch_aam
+    images = helpers.load_images()
+    holistic_aam = helpers.holistic_aam()
+    patch_aam = helpers.patch_aam()
+
+
+def test_warp_masked():
+    patch_sampling = np.zeros(patch_aam.patch_shape[0], dtype=np.bool)
+    patch_sampling[::2, ::2] = True
+    for aam, sampling in [(holistic_aam, 3), (patch_aam, patch_sampling)]:
+        fitter = LucasKanadeAAMFitter(
+            aam, lk_algorithm_cls=ProjectOutInverseCompositional, n_shape=3,
+            n_appearance=3, sampling=sampling)
+        interface = fitter.algorithms[-1].interface
+        interface.transform.set_target(images[0].landmarks['PTS'])
+        expected = interface.warp(images[0]).as_vector()[interface.i_mask]
+        assert_allclose(interface.warp_masked(images[0]), expected)
+        out = np.empty_like(expected)
+        assert interface.warp_masked(images[0], out=out) is out
+        assert_allclose(out, expected)
+
+
+def test_lk_algorithms_reuse_workspace():
+    bb = images[1].landmarks['PTS'].bounding_box()
+    for aam in [holistic_aam, patch_aam]:
+        for lk_algorithm in lk_algorithms:
+            fitter = LucasKanadeAAMFitter(aam, lk_algorithm_cls=lk_algorithm,
+                                          n_shape=3, n_appearance=3)
+            for map_inference in [False, True]:
+                results = [fitter.fit_from_bb(im, bb, max_iters=4,
+                                              map_inference=map_inference)
+                           for im in [images[1], images[2], images[1]]]
+                # The workspace of the previous fittings does not leak
+                assert_allclose(results[2].final_shape.points,
+                                results[0].final_shape.points)
+                assert np.all(np.isfinite(results[0].final_shape.points))
+
+
+def test_poic_map_inference_keeps_hessian():
+    fitter = LucasKanadeAAMFitter(
+        holistic_aam, lk_algorithm_cls=ProjectOutInverseCompositional,
+        n_shape=3, n_appearance=3)
+    algorithm = fitter.algorithms[-1]
+    JQJ_m = algorithm.JQJ_m.copy()
+    fitter.fit_from_bb(images[0], images[0].landmarks['PTS'].bounding_box(),
+                       max_iters=4, map_inference=True)
+    assert_allclose(algorithm.JQJ_m, JQJ_m)
+
+
+def test_lk_algorithms_float32_map_inference():
+    bb = images[1].landmarks['PTS'].bounding_box()
+    for aam in [holistic_aam, patch_aam]:
+        for lk_algorithm in lk_algorithms:
+            fitter = LucasKanadeAAMFitter(aam, lk_algorithm_cls=lk_algorithm,
+                                          n_shape=3, n_appearance=3,
+                                          dtype=np.float32)
+            expected = LucasKanadeAAMFitter(
+                aam, lk_algorithm_cls=lk_algorithm, n_shape=3,
+                n_appearance=3).fit_from_bb(images[1], bb, max_iters=4,
+                                            map_inference=True)
+            result = fitter.fit_from_bb(images[1], bb, max_iters=4,
+                                        map_inference=True)
+            # The increments do not get promoted to double precision
+            assert fitter.algorithms[-1].dp.dtype == np.float32
+            assert_allclose(result.final_shape.points,
+                            expected.final_shape.points, atol=1e-2)
+
+
+def test_lk_algorithms_pickled_before_sampled_warps():
+    bb = images[1].landmarks['PTS'].bounding_box()
+    fitter = LucasKanadeAAMFitter(holistic_aam, n_shape=3, n_appearance=3,
+                                  sampling=3)
+    expected = fitter.fit_from_bb(images[1], bb, max_iters=4)
+    # Drop the attributes that did not exist in older versions
+    legacy_fitter = deepcopy(fitter)
+    for algorithm in legacy_fitter.algorithms:
+        del algorithm.dtype, algorithm.cache_hit
+        del (algorithm.interface.sampling_indices,
+             algorithm.interface.sampled_true_indices)
+    legacy_fitter = pickle.loads(pickle.dumps(legacy_fitter))
+    for algorithm, legacy_algorithm in zip(fitter.algorithms,
+                                           legacy_fitter.algorithms):
+        assert legacy_algorithm.dtype == np.float64
+        assert_allclose(legacy_algorithm.interface.sampling_indices,
+                        algorithm.interface.sampling_indices)
+    result = legacy_fitter.fit_from_bb(images[1], bb, max_iters=4)
+    assert_allclose(result.final_shape.points, expected.final_shape.points)
@@ -4,6 +4,8 @@ import numpy as np
 from menpo.feature import gradient as fast_gradient
 from menpo.image import Image
 
+from menpofit.base import expired
+
 from ..result import APSAlgorithmResult
 
 
@@ -391,7 +393,7 @@ class Inverse(GaussNewton):
         return 'Inverse Gauss-Newton'
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False):
+            return_costs=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -415,6 +417,9 @@ class Inverse(GaussNewton):
             computation increases the computational cost of the fitting. The
             additional computation cost depends on the fitting method. Only
             use this option for research purposes.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -461,7 +466,8 @@ class Inverse(GaussNewton):
             deformation_costs = [deformation_cost_closure(shapes[-1])]
             costs = [appearance_costs[-1] + deformation_costs[-1]]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # compute gauss-newton parameter updates
             b = self._J_a_T_Q_a.dot(self.e_m)
             p = p_list[-1].copy()
@@ -529,7 +535,7 @@ class Forward(GaussNewton):
         return 'Forward Gauss-Newton'
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False):
+            return_costs=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -553,6 +559,9 @@ class Forward(GaussNewton):
             computation increases the computational cost of the fitting. The
             additional computation cost depends on the fitting method. Only
             use this option for research purposes.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -599,7 +608,8 @@ class Forward(GaussNewton):
             deformation_costs = [deformation_cost_closure(shapes[-1])]
             costs = [appearance_costs[-1] + deformation_costs[-1]]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # compute image gradient
             nabla_i = self.interface.gradient(i)
 
@@ -111,6 +111,10 @@ class GenerativeAPS(object):
         incremental fashion on image batches of size equal to the provided
         value. If ``None``, then the training is performed directly on the
         all the images.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes that rescale the training images,
+        compute their features and extract their patches. If ``None``, then
+        the number of CPUs is used. If ``1``, then the training is sequential.
 
     References
     ----------
@@ -126,7 +130,7 @@ class GenerativeAPS(object):
                  patch_normalisation=no_op, use_procrustes=True,
                  precision_dtype=np.float32, max_shape_components=None,
                  n_appearance_components=None, can_be_incremented=False,
-                 verbose=False, batch_size=None):
+                 verbose=False, batch_size=None, n_jobs=1):
         # Check parameters
         checks.check_diagonal(diagonal)
         scales = checks.check_scales(scales)
@@ -169,10 +173,10 @@ class GenerativeAPS(object):
 
         # Train APS
         self._train(images, increment=False, group=group, batch_size=batch_size,
-                    verbose=verbose)
+                    verbose=verbose, n_jobs=checks.check_n_jobs(n_jobs))
 
     def _train(self, images, increment=False, group=None, batch_size=None,
-               verbose=False):
+               verbose=False, n_jobs=1):
         # If batch_size is not None, then we may have a generator, else we
         # assume we have a list.
         if batch_size is not None:
@@ -207,13 +211,15 @@ class GenerativeAPS(object):
 
             # Train each batch
             self._train_batch(
-                image_batch, increment=increment, group=group, verbose=verbose)
+                image_batch, increment=increment, group=group, verbose=verbose,
+                n_jobs=n_jobs)
 
     def _train_batch(self, image_batch, increment=False, group=None,
-                     verbose=False):
+                     verbose=False, n_jobs=1):
         # Rescale to existing reference shape
         image_batch = rescale_images_to_reference_shape(
-            image_batch, group, self.reference_shape, verbose=verbose)
+            image_batch, group, self.reference_shape, verbose=verbose,
+            n_jobs=n_jobs)
 
         # If the deformation graph was not provided (None given), then compute
         # the MST
@@ -251,13 +257,14 @@ class GenerativeAPS(object):
                 feature_images = compute_features(image_batch,
                                                   self.holistic_features[j],
                                                   prefix=scale_prefix,
-                                                  verbose=verbose)
+                                                  verbose=verbose,
+                                                  n_jobs=n_jobs)
             # handle scales
             if self.scales[j] != 1:
                 # Scale feature images only if scale is different than 1
                 scaled_images = scale_images(feature_images, self.scales[j],
                                              prefix=scale_prefix,
-                                             verbose=verbose)
+                                             verbose=verbose, n_jobs=n_jobs)
             else:
                 scaled_images = feature_images
 
@@ -298,7 +305,8 @@ class GenerativeAPS(object):
 
             # Obtain warped images
             warped_images = self._warp_images(scaled_images, scale_shapes,
-                                              j, scale_prefix, verbose)
+                                              j, scale_prefix, verbose,
+                                              n_jobs=n_jobs)
 
             # Build the appearance model
             if verbose:
@@ -317,7 +325,8 @@ class GenerativeAPS(object):
             if verbose:
                 print_dynamic('{}Done\n'.format(scale_prefix))
 
-    def increment(self, images, group=None, batch_size=None, verbose=False):
+    def increment(self, images, group=None, batch_size=None, verbose=False,
+                  n_jobs=1):
         r"""
         Method that incrementally updates the APS model with a new batch of
         training images.
@@ -338,9 +347,15 @@ class GenerativeAPS(object):
             all the images.
         verbose : `bool`, optional
             If ``True``, then the progress of building the APS will be printed.
+        n_jobs : `int` or ``None``, optional
+            The number of worker processes that rescale the training images,
+            compute their features and extract their patches. If ``None``,
+            then the number of CPUs is used. If ``1``, then the training is
+            sequential.
         """
         return self._train(images, increment=True, group=group,
-                           verbose=verbose, batch_size=batch_size)
+                           verbose=verbose, batch_size=batch_size,
+                           n_jobs=checks.check_n_jobs(n_jobs))
 
     def _build_shape_model(self, shapes, shape_graph, max_shape_components,
                            verbose=False):
@@ -379,11 +394,12 @@ class GenerativeAPS(object):
             raise NotImplementedError('The full appearance model is not '
                                       'implemented yet.')
 
-    def _warp_images(self, images, shapes, scale_index, prefix, verbose):
+    def _warp_images(self, images, shapes, scale_index, prefix, verbose,
+                     n_jobs=1):
         return extract_patches(
             images, shapes, self.patch_shape[scale_index],
             normalise_function=self.patch_normalisation[scale_index],
-            prefix=prefix, verbose=verbose)
+            prefix=prefix, verbose=verbose, n_jobs=n_jobs)
 
     @property
     def n_scales(self):
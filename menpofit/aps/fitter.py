@@ -87,7 +87,8 @@ class APSFitter(MultiScaleParametricFitter):
             The multi-scale fitting result containing the result of the fitting
             procedure.
         """
-        return APSResult(results=algorithm_results, scales=self.scales,
+        return APSResult(results=algorithm_results,
+                         scales=self._result_scales(algorithm_results),
                          affine_transforms=affine_transforms,
                          scale_transforms=scale_transforms, image=image,
                          gt_shape=gt_shape)
@@ -1,6 +1,7 @@
 from __future__ import division
 import numpy as np
 
+from menpofit.base import expired
 from menpofit.result import ParametricIterativeResult
 from menpofit.aam.algorithm.lk import (LucasKanadeBaseInterface,
                                        LucasKanadePatchBaseInterface)
@@ -77,6 +78,18 @@ class ATMLucasKanadeLinearInterface(ATMLucasKanadeStandardInterface):
         """
         return self.transform.model
 
+    def sampled_points(self):
+        r"""
+        Returns the locations on the image to be warped of the template's
+        pixels that are selected by the sampling mask, given the current
+        state of the transform. Note that the dense target of the linear
+        transform already holds the location of every template pixel.
+
+        :type: ``(n_sampled_pixels, n_dims)`` `ndarray`
+        """
+        dense_points = self.transform.target.points[self.transform.n_landmarks:]
+        return dense_points[self.sampling_indices]
+
     def algorithm_result(self, image, shapes, shape_parameters,
                          initial_shape=None, costs=None, gt_shape=None):
         r"""
@@ -221,7 +234,7 @@ class Compositional(LucasKanade):
     Abstract class for defining Compositional ATM optimization algorithms.
     """
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, map_inference=False):
+            return_costs=False, map_inference=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -248,6 +261,9 @@ class Compositional(LucasKanade):
         map_inference : `bool`, optional
             If ``True``, then the solution will be given after performing MAP
             inference.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -282,7 +298,8 @@ class Compositional(LucasKanade):
         if return_costs:
             costs = [cost_closure(self.e_m)]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # solve for increments on the shape parameters
             self.dp = self._solve(map_inference)
 
@@ -1,6 +1,7 @@
 from __future__ import division
 import itertools
 import os
+import time
 import numpy as np
 
 
@@ -25,6 +26,86 @@ def build_grid(shape):
     return np.rollaxis(sampling_grid, 0, 3)
 
 
+# The clock of the deadlines. time.perf_counter is monotonic, but it is not
+# available on Python 2.
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class Deadline(object):
+    r"""
+    Class that represents a wall-clock deadline of a fitting procedure. The
+    iterative algorithms check it at the beginning of each iteration and stop
+    iterating once it has passed.
+
+    Parameters
+    ----------
+    time_budget : `float`
+        The number of seconds from now until the deadline.
+    """
+    def __init__(self, time_budget):
+        self.time = _clock() + time_budget
+        self.expired = False
+
+    @property
+    def remaining(self):
+        r"""
+        The number of seconds until the deadline. It is zero after the
+        deadline has passed.
+
+        :type: `float`
+        """
+        return max(self.time - _clock(), 0.)
+
+    def check(self):
+        r"""
+        Checks whether the deadline has passed. Once it has passed, the
+        `expired` attribute is ``True``.
+
+        Returns
+        -------
+        expired : `bool`
+            Whether the deadline has passed.
+        """
+        if not self.expired:
+            self.expired = _clock() >= self.time
+        return self.expired
+
+    def share(self, n):
+        r"""
+        Returns a deadline for an equal share of the remaining time among `n`
+        consecutive tasks. Time that is not used by a task is thus shared by
+        the following ones.
+
+        Parameters
+        ----------
+        n : `int`
+            The number of remaining tasks.
+
+        Returns
+        -------
+        deadline : :map:`Deadline`
+            The deadline of the first task.
+        """
+        return Deadline(self.remaining / n)
+
+
+def expired(deadline):
+    r"""
+    Returns whether a deadline has passed. A ``None`` deadline never passes.
+
+    Parameters
+    ----------
+    deadline : :map:`Deadline` or ``None``
+        The deadline.
+
+    Returns
+    -------
+    expired : `bool`
+        Whether the deadline has passed.
+    """
+    return deadline is not None and deadline.check()
+
+
 class MenpoFitCostsWarning(Warning):
     r"""
     A warning that the costs cannot be computed for the selected fitting
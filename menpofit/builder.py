@@ -1,5 +1,6 @@
 from __future__ import division
 from functools import partial
+import tempfile
 import warnings
 import numpy as np
 
@@ -10,6 +11,8 @@ from menpo.transform import Scale, Translation, GeneralizedProcrustesAnalysis
 from menpo.visualize import print_dynamic
 
 from menpofit.visualize import print_progress
+from menpofit.parallel import map_chunks
+from menpofit.cache import CachedFeatures
 
 
 class MenpoFitModelBuilderWarning(Warning):
@@ -56,8 +59,52 @@ def compute_reference_shape(shapes, diagonal, verbose=False):
     return reference_shape
 
 
+def _n_items(*iterables):
+    r"""
+    Returns the number of items of the first sized iterable or ``None`` if
+    all of them are generators.
+    """
+    for iterable in iterables:
+        if hasattr(iterable, '__len__'):
+            return len(iterable)
+    return None
+
+
+def _count_progress(results, prefix, end_with_newline):
+    r"""
+    Prints the number of items that have been processed so far, for the
+    inputs whose number of items is not known in advance.
+    """
+    n_done = 0
+    for result in results:
+        yield result
+        n_done += 1
+        print_dynamic('{}: ({} done)'.format(prefix, n_done))
+    print_dynamic('{}: ({} done) - done.'.format(prefix, n_done))
+    if end_with_newline:
+        print('')
+
+
+def _progress(results, n_items, prefix, end_with_newline, verbose):
+    r"""
+    Wraps the results of a builder function with `print_progress`. If the
+    number of items is not known, e.g. the inputs are generators, then only
+    the number of processed items is printed.
+    """
+    if verbose and n_items is None:
+        return _count_progress(results, prefix, end_with_newline)
+    return print_progress(results, prefix=prefix, n_items=n_items,
+                          end_with_newline=end_with_newline, verbose=verbose)
+
+
+def _rescale_to_pointcloud(reference_shape, group, images):
+    for i in images:
+        yield i.rescale_to_pointcloud(reference_shape, group=group)
+
+
 def rescale_images_to_reference_shape(images, group, reference_shape,
-                                      verbose=False):
+                                      verbose=False, n_jobs=1, executor=None,
+                                      chunk_size=None):
     r"""
     Function that normalizes the images' sizes with respect to the size of the
     provided reference shape. In other words, the function rescales the provided
@@ -66,7 +113,7 @@ def rescale_images_to_reference_shape(images, group, reference_shape,
 
     Parameters
     ----------
-    images : `list` of `menpo.image.Image`
+    images : `iterable` of `menpo.image.Image`
         The set of images that will be rescaled.
     group : `str` or ``None``
         If `str`, then it specifies the group of the images's shapes. If
@@ -75,19 +122,28 @@ def rescale_images_to_reference_shape(images, group, reference_shape,
         The reference shape.
     verbose : `bool`, optional
         If ``True``, then progress information is printed.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes. If ``None``, then the number of CPUs
+        is used. If ``1``, then the images are processed sequentially. See
+        :map:`map_chunks`.
+    executor : `concurrent.futures.Executor` or ``None``, optional
+        An existing executor that processes the chunks of images instead of a
+        pool of `n_jobs` processes.
+    chunk_size : `int` or ``None``, optional
+        The number of images that are sent to a worker at once.
 
     Returns
     -------
     normalized_images : `list` of `menpo.image.Image`
         The rescaled images.
     """
-    wrap = partial(print_progress, prefix='- Normalizing images size',
-                   end_with_newline=False, verbose=verbose)
-
     # Normalize the scaling of all images wrt the reference_shape size
-    normalized_images = [i.rescale_to_pointcloud(reference_shape, group=group)
-                         for i in wrap(images)]
-    return normalized_images
+    results = map_chunks(partial(_rescale_to_pointcloud, reference_shape,
+                                 group),
+                         images, n_jobs=n_jobs, executor=executor,
+                         chunk_size=chunk_size)
+    return list(_progress(results, _n_items(images),
+                          '- Normalizing images size', False, verbose))
 
 
 def normalization_wrt_reference_shape(images, group, diagonal, verbose=False):
@@ -136,13 +192,19 @@ def normalization_wrt_reference_shape(images, group, diagonal, verbose=False):
     return reference_shape, normalized_images
 
 
-def compute_features(images, features, prefix='', verbose=False):
+def _compute_features(features, images):
+    for i in images:
+        yield features(i)
+
+
+def compute_features(images, features, prefix='', verbose=False, n_jobs=1,
+                     executor=None, chunk_size=None, cache=None):
     r"""
     Function that extracts features from a list of images.
 
     Parameters
     ----------
-    images : `list` of `menpo.image.Image`
+    images : `iterable` of `menpo.image.Image`
         The set of images.
     features : `callable`
         The features extraction function. Please refer to `menpo.feature` and
@@ -151,28 +213,49 @@ def compute_features(images, features, prefix='', verbose=False):
         The prefix of the printed information.
     verbose : `bool`, Optional
         Flag that controls information and progress printing.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes. If ``None``, then the number of CPUs
+        is used. If ``1``, then the images are processed sequentially. See
+        :map:`map_chunks`.
+    executor : `concurrent.futures.Executor` or ``None``, optional
+        An existing executor that processes the chunks of images instead of a
+        pool of `n_jobs` processes.
+    chunk_size : `int` or ``None``, optional
+        The number of images that are sent to a worker at once.
+    cache : :map:`PrecomputationCache` or ``None``, optional
+        If provided, then the feature images are loaded from this cache if
+        they have been computed before, otherwise they are computed and
+        stored in it. See :map:`CachedFeatures`.
 
     Returns
     -------
     feature_images : `list` of `menpo.image.Image`
         The list of feature images.
     """
-    wrap = partial(print_progress,
-                   prefix='{}Computing feature space'.format(prefix),
-                   end_with_newline=not prefix, verbose=verbose)
+    if cache is not None:
+        features = CachedFeatures(features, cache)
+    results = map_chunks(partial(_compute_features, features), images,
+                         n_jobs=n_jobs, executor=executor,
+                         chunk_size=chunk_size)
+    return list(_progress(results, _n_items(images),
+                          '{}Computing feature space'.format(prefix),
+                          not prefix, verbose))
 
-    return [features(i) for i in wrap(images)]
+
+def _scale_images(scale, images):
+    for i in images:
+        yield i.rescale(scale, return_transform=True)
 
 
 def scale_images(images, scale, prefix='', return_transforms=False,
-                 verbose=False):
+                 verbose=False, n_jobs=1, executor=None, chunk_size=None):
     r"""
     Function that rescales a list of images and optionally returns the scale
     transforms.
 
     Parameters
     ----------
-    images : `list` of `menpo.image.Image`
+    images : `iterable` of `menpo.image.Image`
         The set of images to scale.
     scale : `float` or `tuple` of `floats`
         The scale factor. If a tuple, the scale to apply to each dimension.
@@ -185,6 +268,15 @@ def scale_images(images, scale, prefix='', return_transforms=False,
         were used to perform the rescale for each image  is also returned.
     verbose : `bool`, optional
         Flag that controls information and progress printing.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes. If ``None``, then the number of CPUs
+        is used. If ``1``, then the images are processed sequentially. See
+        :map:`map_chunks`.
+    executor : `concurrent.futures.Executor` or ``None``, optional
+        An existing executor that processes the chunks of images instead of a
+        pool of `n_jobs` processes.
+    chunk_size : `int` or ``None``, optional
+        The number of images that are sent to a worker at once.
 
     Returns
     -------
@@ -194,28 +286,24 @@ def scale_images(images, scale, prefix='', return_transforms=False,
         The list of scale transforms that were used. It is returned only if
         `return_transforms` is ``True``.
     """
-    wrap = partial(print_progress,
-                   prefix='{}Scaling images'.format(prefix),
-                   end_with_newline=not prefix, verbose=verbose)
     if not np.allclose(scale, 1):
+        results = map_chunks(partial(_scale_images, scale), images,
+                             n_jobs=n_jobs, executor=executor,
+                             chunk_size=chunk_size)
         # initialise scaled images and transforms lists
         scaled_images = []
         scale_transforms = []
-        # for each image
-        for i in wrap(images):
-            if return_transforms:
-                # store scaled image and transform, if asked
-                sc_image, tr = i.rescale(scale, return_transform=True)
-                scaled_images.append(sc_image)
-                scale_transforms.append(tr)
-            else:
-                # store only scaled image
-                scaled_images.append(i.rescale(scale))
+        for sc_image, tr in _progress(results, _n_items(images),
+                                      '{}Scaling images'.format(prefix),
+                                      not prefix, verbose):
+            scaled_images.append(sc_image)
+            scale_transforms.append(tr)
         if return_transforms:
             return scaled_images, scale_transforms
         else:
             return scaled_images
     else:
+        images = list(images)
         if return_transforms:
             scale_transforms = [Scale(1., images[0].n_dims)] * len(images)
             return images, scale_transforms
@@ -223,16 +311,31 @@ def scale_images(images, scale, prefix='', return_transforms=False,
             return images
 
 
+def _warp_images(reference_frame, transform, images_and_shapes):
+    # Build a dummy transform, use set_target for efficiency
+    warp_transform = transform(reference_frame.landmarks['source'],
+                               reference_frame.landmarks['source'])
+    for i, s in images_and_shapes:
+        # Update Transform Target
+        warp_transform.set_target(s)
+        # warp images
+        warped_i = i.warp_to_mask(reference_frame.mask, warp_transform,
+                                  warp_landmarks=False)
+        # attach reference frame landmarks to images
+        warped_i.landmarks['source'] = reference_frame.landmarks['source']
+        yield warped_i
+
+
 def warp_images(images, shapes, reference_frame, transform, prefix='',
-                verbose=None):
+                verbose=None, n_jobs=1, executor=None, chunk_size=None):
     r"""
     Function that warps a list of images into the provided reference frame.
 
     Parameters
     ----------
-    images : `list` of `menpo.image.Image`
+    images : `iterable` of `menpo.image.Image`
         The set of images to warp.
-    shapes : `list` of `menpo.shape.PointCloud`
+    shapes : `iterable` of `menpo.shape.PointCloud`
         The set of shapes that correspond to the images.
     reference_frame : `menpo.image.BooleanImage`
         The reference frame to warp to.
@@ -244,42 +347,48 @@ def warp_images(images, shapes, reference_frame, transform, prefix='',
         The prefix of the printed information.
     verbose : `bool`, Optional
         Flag that controls information and progress printing.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes. If ``None``, then the number of CPUs
+        is used. If ``1``, then the images are processed sequentially. See
+        :map:`map_chunks`.
+    executor : `concurrent.futures.Executor` or ``None``, optional
+        An existing executor that processes the chunks of images instead of a
+        pool of `n_jobs` processes.
+    chunk_size : `int` or ``None``, optional
+        The number of images that are sent to a worker at once.
 
     Returns
     -------
     warped_images : `list` of `menpo.image.MaskedImage`
         The list of warped images.
     """
-    wrap = partial(print_progress,
-                   prefix='{}Warping images'.format(prefix),
-                   end_with_newline=not prefix, verbose=verbose)
+    results = map_chunks(partial(_warp_images, reference_frame, transform),
+                         zip(images, shapes), n_jobs=n_jobs,
+                         executor=executor, chunk_size=chunk_size)
+    return list(_progress(results, _n_items(images, shapes),
+                          '{}Warping images'.format(prefix), not prefix,
+                          verbose))
 
-    warped_images = []
-    # Build a dummy transform, use set_target for efficiency
-    warp_transform = transform(reference_frame.landmarks['source'],
-                               reference_frame.landmarks['source'])
-    for i, s in wrap(list(zip(images, shapes))):
-        # Update Transform Target
-        warp_transform.set_target(s)
-        # warp images
-        warped_i = i.warp_to_mask(reference_frame.mask, warp_transform,
-                                  warp_landmarks=False)
-        # attach reference frame landmarks to images
-        warped_i.landmarks['source'] = reference_frame.landmarks['source']
-        warped_images.append(warped_i)
-    return warped_images
+
+def _extract_patches(patch_shape, normalise_function, images_and_shapes):
+    for i, s in images_and_shapes:
+        parts = i.extract_patches(s, patch_shape=patch_shape,
+                                  as_single_array=True)
+        parts = normalise_function(parts)
+        yield Image(parts, copy=False)
 
 
 def extract_patches(images, shapes, patch_shape, normalise_function=no_op,
-                    prefix='', verbose=False):
+                    prefix='', verbose=False, n_jobs=1, executor=None,
+                    chunk_size=None):
     r"""
     Function that extracts patches around the landmarks of the provided images.
 
     Parameters
     ----------
-    images : `list` of `menpo.image.Image`
+    images : `iterable` of `menpo.image.Image`
         The set of images to warp.
-    shapes : `list` of `menpo.shape.PointCloud`
+    shapes : `iterable` of `menpo.shape.PointCloud`
         The set of shapes that correspond to the images.
     patch_shape : (`int`, `int`)
         The shape of the patches.
@@ -289,6 +398,15 @@ def extract_patches(images, shapes, patch_shape, normalise_function=no_op,
         The prefix of the printed information.
     verbose : `bool`, Optional
         Flag that controls information and progress printing.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes. If ``None``, then the number of CPUs
+        is used. If ``1``, then the images are processed sequentially. See
+        :map:`map_chunks`.
+    executor : `concurrent.futures.Executor` or ``None``, optional
+        An existing executor that processes the chunks of images instead of a
+        pool of `n_jobs` processes.
+    chunk_size : `int` or ``None``, optional
+        The number of images that are sent to a worker at once.
 
     Returns
     -------
@@ -296,17 +414,205 @@ def extract_patches(images, shapes, patch_shape, normalise_function=no_op,
         The list of images with the patches per image. Each output image has
         shape ``(n_center, n_offset, n_channels, patch_shape)``.
     """
-    wrap = partial(print_progress,
-                   prefix='{}Extracting patches'.format(prefix),
-                   end_with_newline=not prefix, verbose=verbose)
+    results = map_chunks(partial(_extract_patches, patch_shape,
+                                 normalise_function),
+                         zip(images, shapes), n_jobs=n_jobs,
+                         executor=executor, chunk_size=chunk_size)
+    return list(_progress(results, _n_items(images, shapes),
+                          '{}Extracting patches'.format(prefix), not prefix,
+                          verbose))
 
-    parts_images = []
-    for i, s in wrap(list(zip(images, shapes))):
-        parts = i.extract_patches(s, patch_shape=patch_shape,
-                                  as_single_array=True)
-        parts = normalise_function(parts)
-        parts_images.append(Image(parts, copy=False))
-    return parts_images
+
+def allocate_matrix(shape, dtype=np.float32, memmap_dir=None):
+    r"""
+    Allocates an uninitialised data matrix, optionally memory-mapped to a
+    temporary file.
+
+    Parameters
+    ----------
+    shape : `tuple` of `int`
+        The shape of the matrix.
+    dtype : `numpy.dtype`, optional
+        The data type of the matrix.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the matrix is stored in a temporary memory-mapped file
+        that is created within this directory, instead of in memory. The file
+        is deleted as soon as the matrix is released.
+
+    Returns
+    -------
+    matrix : `ndarray` or `numpy.memmap`
+        The allocated matrix.
+    """
+    if memmap_dir is None:
+        return np.empty(shape, dtype=dtype)
+    # The temporary file is already unlinked, thus its space is released
+    # when the memory map is released
+    with tempfile.TemporaryFile(dir=memmap_dir) as f:
+        return np.memmap(f, dtype=dtype, mode='w+', shape=shape)
+
+
+def images_to_matrix(images, n_images, dtype=np.float32, memmap_dir=None):
+    r"""
+    Function that vectorizes images into the rows of a preallocated data
+    matrix. The images are consumed one by one, thus if they are provided by
+    a generator, then they never exist all together in memory.
+
+    Parameters
+    ----------
+    images : `iterable` of `menpo.image.Image`
+        The images to vectorize. They must all have the same number of pixels
+        and channels.
+    n_images : `int`
+        The number of images.
+    dtype : `numpy.dtype`, optional
+        The data type of the matrix.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the matrix is stored in a temporary memory-mapped file
+        that is created within this directory, instead of in memory. The file
+        is deleted as soon as the matrix is released.
+
+    Returns
+    -------
+    matrix : ``(n_images, n_features)`` `ndarray` or `numpy.memmap`
+        The data matrix with the vectorized images as rows.
+    template : `menpo.image.Image`
+        The first image, which can be used for reconstructing the images
+        from the rows of the matrix with its ``from_vector`` method.
+
+    Raises
+    ------
+    ValueError
+        The number of images does not match n_images
+    """
+    matrix, template = None, None
+    k = -1
+    for k, i in enumerate(images):
+        vector = i.as_vector()
+        if matrix is None:
+            matrix = allocate_matrix((n_images, vector.size), dtype=dtype,
+                                     memmap_dir=memmap_dir)
+            template = i
+        matrix[k] = vector
+    if k + 1 != n_images:
+        raise ValueError('The number of images does not match n_images')
+    return matrix, template
+
+
+def warp_images_to_matrix(images, shapes, reference_frame, transform,
+                          dtype=np.float32, memmap_dir=None, prefix='',
+                          verbose=False, n_jobs=1, executor=None,
+                          chunk_size=None):
+    r"""
+    Function that warps a list of images into the provided reference frame and
+    writes the warped images straight into the rows of a preallocated data
+    matrix, as required for building a PCA model with
+    :map:`pca_from_matrix`. Contrary to :map:`warp_images`, the warped
+    images are not kept in a `list`, thus they only exist once in memory.
+
+    Parameters
+    ----------
+    images : `list` of `menpo.image.Image`
+        The set of images to warp.
+    shapes : `list` of `menpo.shape.PointCloud`
+        The set of shapes that correspond to the images.
+    reference_frame : `menpo.image.BooleanImage`
+        The reference frame to warp to.
+    transform : `menpo.transform.Transform`
+        Transform **from the reference frame back to the image**.
+    dtype : `numpy.dtype`, optional
+        The data type of the matrix.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the matrix is stored in a temporary memory-mapped file
+        that is created within this directory, instead of in memory. The file
+        is deleted as soon as the matrix is released.
+    prefix : `str`
+        The prefix of the printed information.
+    verbose : `bool`, Optional
+        Flag that controls information and progress printing.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes. If ``None``, then the number of CPUs
+        is used. If ``1``, then the images are processed sequentially. See
+        :map:`map_chunks`.
+    executor : `concurrent.futures.Executor` or ``None``, optional
+        An existing executor that processes the chunks of images instead of a
+        pool of `n_jobs` processes.
+    chunk_size : `int` or ``None``, optional
+        The number of images that are sent to a worker at once.
+
+    Returns
+    -------
+    matrix : ``(n_images, n_true_pixels * n_channels)`` `ndarray` or `numpy.memmap`
+        The data matrix with the vectorized warped images as rows.
+    template : `menpo.image.MaskedImage`
+        The first warped image.
+    """
+    n_images = len(images)
+    results = map_chunks(partial(_warp_images, reference_frame, transform),
+                         zip(images, shapes), n_jobs=n_jobs,
+                         executor=executor, chunk_size=chunk_size)
+    return images_to_matrix(
+        _progress(results, n_images, '{}Warping images'.format(prefix),
+                  not prefix, verbose),
+        n_images, dtype=dtype, memmap_dir=memmap_dir)
+
+
+def extract_patches_to_matrix(images, shapes, patch_shape,
+                              normalise_function=no_op, dtype=np.float32,
+                              memmap_dir=None, prefix='', verbose=False,
+                              n_jobs=1, executor=None, chunk_size=None):
+    r"""
+    Function that extracts patches around the landmarks of the provided images
+    and writes them straight into the rows of a preallocated data matrix, as
+    required for building a PCA model with :map:`pca_from_matrix`. See
+    :map:`extract_patches`.
+
+    Parameters
+    ----------
+    images : `list` of `menpo.image.Image`
+        The set of images.
+    shapes : `list` of `menpo.shape.PointCloud`
+        The set of shapes that correspond to the images.
+    patch_shape : (`int`, `int`)
+        The shape of the patches.
+    normalise_function : `callable`
+        A normalisation function to apply on the values of the patches.
+    dtype : `numpy.dtype`, optional
+        The data type of the matrix.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the matrix is stored in a temporary memory-mapped file
+        that is created within this directory, instead of in memory. The file
+        is deleted as soon as the matrix is released.
+    prefix : `str`
+        The prefix of the printed information.
+    verbose : `bool`, Optional
+        Flag that controls information and progress printing.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes. If ``None``, then the number of CPUs
+        is used. If ``1``, then the images are processed sequentially. See
+        :map:`map_chunks`.
+    executor : `concurrent.futures.Executor` or ``None``, optional
+        An existing executor that processes the chunks of images instead of a
+        pool of `n_jobs` processes.
+    chunk_size : `int` or ``None``, optional
+        The number of images that are sent to a worker at once.
+
+    Returns
+    -------
+    matrix : ``(n_images, n_features)`` `ndarray` or `numpy.memmap`
+        The data matrix with the vectorized patches of an image per row.
+    template : `menpo.image.Image`
+        The patches image of the first image.
+    """
+    n_images = len(images)
+    results = map_chunks(partial(_extract_patches, patch_shape,
+                                 normalise_function),
+                         zip(images, shapes), n_jobs=n_jobs,
+                         executor=executor, chunk_size=chunk_size)
+    return images_to_matrix(
+        _progress(results, n_images, '{}Extracting patches'.format(prefix),
+                  not prefix, verbose),
+        n_images, dtype=dtype, memmap_dir=memmap_dir)
 
 
 def build_reference_frame(landmarks, boundary=3, group='source'):
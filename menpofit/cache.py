@@ -0,0 +1,364 @@
+from __future__ import absolute_import
+from functools import partial
+import hashlib
+import os
+from types import CodeType, FunctionType, ModuleType
+
+import numpy as np
+
+from menpo.base import name_of_callable
+
+
+def hash_arrays(*items):
+    r"""
+    Computes a content hash of a sequence of items. Each item can be an
+    `ndarray`, ``None`` or any object with a stable `str` representation (e.g.
+    `str`, `int`, `float` or a `tuple` of those). The hash of an `ndarray`
+    depends on its `dtype`, shape and data.
+
+    Parameters
+    ----------
+    items : `ndarray` or `object`
+        The items to hash.
+
+    Returns
+    -------
+    key : `str`
+        The hexadecimal SHA-1 digest of the items.
+    """
+    h = hashlib.sha1()
+    for item in items:
+        if isinstance(item, np.ndarray):
+            item = np.ascontiguousarray(item)
+            h.update('ndarray:{}:{}:'.format(item.dtype.str,
+                                             item.shape).encode('utf-8'))
+            h.update(item.data)
+        else:
+            h.update('{}:{!r};'.format(type(item).__name__,
+                                       item).encode('utf-8'))
+    return h.hexdigest()
+
+
+class PrecomputationCache(object):
+    r"""
+    Content-addressed on-disk cache of precomputed arrays. Each entry is a
+    `dict` of `ndarray` objects stored under a key, which is normally a content
+    hash of all the inputs of the precomputation (see :map:`hash_arrays`).
+    The entries are stored with the compact menpofit format (see
+    :map:`export_compact`), thus their arrays are memory-mapped when they are
+    loaded.
+
+    The number of hits and misses of the cache is recorded in the `hits` and
+    `misses` attributes.
+
+    If a `max_size` is provided, then the least recently used entries are
+    removed whenever storing an entry makes the cache grow above it. An entry
+    is used when it is stored or loaded, thus the limit is shared among all the
+    processes that use the same directory. The number of removed entries is
+    recorded in the `evictions` attribute.
+
+    Parameters
+    ----------
+    cache_dir : `Path` or `str`
+        The directory in which the entries are stored. It is created if it
+        does not exist.
+    mmap_mode : ``{'c', 'r', None}``, optional
+        The mode with which the arrays of the loaded entries are
+        memory-mapped. See :map:`import_compact`.
+    max_size : `int` or ``None``, optional
+        The maximum total size of the entries in bytes. If ``None``, then the
+        size of the cache is unlimited.
+    """
+    def __init__(self, cache_dir, mmap_mode='c', max_size=None):
+        self.cache_dir = str(cache_dir)
+        self.mmap_mode = mmap_mode
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def path_of(self, key):
+        r"""
+        Returns the path of the file of an entry.
+
+        Parameters
+        ----------
+        key : `str`
+            The key of the entry.
+
+        Returns
+        -------
+        path : `str`
+            The path of the entry's file.
+        """
+        return os.path.join(self.cache_dir, '{}.mfit'.format(key))
+
+    def __contains__(self, key):
+        return os.path.exists(self.path_of(key))
+
+    def load(self, key):
+        r"""
+        Loads an entry of the cache and records a hit or a miss.
+
+        Parameters
+        ----------
+        key : `str`
+            The key of the entry.
+
+        Returns
+        -------
+        entry : `dict` of `ndarray` or ``None``
+            The entry, or ``None`` if the key is not in the cache or its file
+            cannot be read.
+        """
+        from menpofit.io import import_compact
+        entry = None
+        if key in self:
+            try:
+                entry = import_compact(self.path_of(key),
+                                       mmap_mode=self.mmap_mode)
+            except Exception:
+                # A damaged entry is treated as a miss and gets overwritten
+                entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if self.max_size is not None:
+                self._touch(self.path_of(key))
+        return entry
+
+    def save(self, key, entry):
+        r"""
+        Stores an entry in the cache. The entry is written to a temporary file
+        which is then renamed, thus other processes never load a partially
+        written entry.
+
+        Parameters
+        ----------
+        key : `str`
+            The key of the entry.
+        entry : `dict` of `ndarray`
+            The entry to store.
+        """
+        from menpofit.io import export_compact
+        path = self.path_of(key)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        export_compact(entry, tmp_path, overwrite=True, min_array_bytes=0)
+        os.rename(tmp_path, path)
+        if self.max_size is not None:
+            self._evict(keep=path)
+
+    def size(self):
+        r"""
+        Returns the total size of the entries of the cache.
+
+        Returns
+        -------
+        size : `int`
+            The size of the entries in bytes.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        r"""
+        Returns the last use time, size and path of each entry.
+        """
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.mfit'):
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Removed by another process in the meantime
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _touch(self, path):
+        r"""
+        Marks an entry as used by updating its modification time.
+        """
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _evict(self, keep=None):
+        r"""
+        Removes the least recently used entries, except for `keep`, until the
+        total size of the cache does not exceed `max_size`.
+        """
+        entries = self._entries()
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                # Removed by another process in the meantime
+                pass
+            total_size -= size
+
+    def clear(self):
+        r"""
+        Removes all the entries of the cache.
+        """
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.mfit'):
+                os.remove(os.path.join(self.cache_dir, filename))
+
+    def __str__(self):
+        return 'Precomputation cache at {} ({} hits, {} misses)'.format(
+            self.cache_dir, self.hits, self.misses)
+
+
+def _callable_items(c, _seen=None):
+    r"""
+    Returns the items that identify a callable and its parameters: the
+    function and arguments of a `functools.partial`, the module, name, code,
+    defaults and closure of a function, or the type and `repr` of any other
+    callable object. The code of a function is identified by its bytecode,
+    constants and names, along with the globals that it references, thus the
+    functions that it calls are identified recursively.
+    """
+    if _seen is None:
+        _seen = set()
+    if isinstance(c, partial):
+        items = ['partial'] + _callable_items(c.func, _seen)
+        for value in c.args:
+            items += _value_items(value, _seen)
+        for name, value in sorted((c.keywords or {}).items()):
+            items += [name] + _value_items(value, _seen)
+        return items
+    # Look through decorators, e.g. the ones of menpo.feature
+    while hasattr(c, '__wrapped__'):
+        c = c.__wrapped__
+    code = getattr(c, '__code__', None)
+    if code is None:
+        return [type(c).__module__, type(c).__name__, repr(c)]
+    items = [c.__module__, getattr(c, '__qualname__', c.__name__)]
+    if id(c) in _seen:
+        # A recursive reference, which is identified by the name alone
+        return items
+    _seen.add(id(c))
+    items += _code_items(code, getattr(c, '__globals__', {}), _seen)
+    items += [c.__defaults__, getattr(c, '__kwdefaults__', None)]
+    for cell in getattr(c, '__closure__', None) or ():
+        items += _value_items(cell.cell_contents, _seen)
+    return items
+
+
+def _code_items(code, func_globals, seen):
+    r"""
+    Returns the items that identify a code object: its bytecode, constants
+    (including nested code objects, e.g. of lambdas) and names, along with the
+    values of the globals that it references.
+    """
+    items = [code.co_code, code.co_names]
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            items += _code_items(const, func_globals, seen)
+        else:
+            items.append(const)
+    for name in code.co_names:
+        if name in func_globals:
+            items += [name] + _value_items(func_globals[name], seen)
+    return items
+
+
+def _value_items(value, seen):
+    r"""
+    Returns the items that identify a value referenced by a callable. Modules
+    and classes are identified by their name, whereas functions are identified
+    recursively. Other named callables, e.g. builtin, compiled or `numpy`
+    universal functions, are identified by their module and name.
+    """
+    if isinstance(value, ModuleType):
+        return ['module', value.__name__]
+    if (isinstance(value, (partial, FunctionType)) or
+            hasattr(value, '__wrapped__')):
+        return _callable_items(value, seen)
+    if callable(value) and hasattr(value, '__name__'):
+        return [type(value).__name__, getattr(value, '__module__', None),
+                getattr(value, '__qualname__', value.__name__)]
+    return [value]
+
+
+def _image_items(image):
+    r"""
+    Returns the items that identify the content of an image: its type,
+    pixels, mask and landmarks.
+    """
+    items = [type(image).__name__, image.pixels]
+    mask = getattr(image, 'mask', None)
+    if mask is not None:
+        items.append(mask.pixels)
+    for group in sorted(image.landmarks.keys()):
+        items += [group, image.landmarks[group].points]
+    return items
+
+
+class CachedFeatures(object):
+    r"""
+    Wraps a feature function, e.g. `menpo.feature.fast_dsift`, so that the
+    feature images are stored in a :map:`PrecomputationCache` and loaded from
+    it, instead of being recomputed, whenever the same function is applied on
+    the same image. It can be passed as the `holistic_features` of any model,
+    e.g. ``AAM(images, holistic_features=CachedFeatures(fast_dsift, cache))``,
+    or as the `cache` of :map:`compute_features`. Thus, models that are trained
+    with different hyper-parameters (e.g. scales, patch shapes or numbers of
+    components) on the same images only compute their features once. The
+    pixels of the loaded feature images are memory-mapped from the cache.
+    Only the training images are cached. The fitters of the models apply the
+    wrapped function directly on the fitted images, which are rarely seen
+    twice.
+
+    The entries are keyed by a content hash of the image (its pixels, mask and
+    landmarks, and therefore its normalisation to the reference shape) and of
+    the feature function (its module, name, code and parameters, including
+    the arguments of a `functools.partial` and the globals that it references,
+    e.g. the functions that a ``lambda`` calls) as well as the version of
+    menpo. Callable objects other than functions are identified by their
+    `repr`.
+
+    Parameters
+    ----------
+    features : `callable`
+        The feature function.
+    cache : :map:`PrecomputationCache`
+        The cache of the feature images. It can be limited to a maximum size.
+    """
+    def __init__(self, features, cache):
+        import menpo
+        self.features = features
+        self.cache = cache
+        self.__name__ = name_of_callable(features)
+        self._features_key = hash_arrays(menpo.__version__,
+                                         *_callable_items(features))
+
+    def __call__(self, image):
+        if isinstance(image, np.ndarray):
+            return self.features(image)
+        key = hash_arrays(self._features_key, *_image_items(image))
+        entry = self.cache.load(key)
+        if entry is not None:
+            return entry['image']
+        feature_image = self.features(image)
+        try:
+            self.cache.save(key, {'image': feature_image})
+        except (IOError, OSError):
+            # The cache only saves time, e.g. its directory may not exist on
+            # the machine on which a trained model is loaded
+            pass
+        return feature_image
+
+    def __str__(self):
+        return '{} cached at {}'.format(self.__name__, self.cache.cache_dir)
@@ -1,5 +1,6 @@
 import warnings
 import collections
+import multiprocessing
 from functools import partial
 import numpy as np
 
@@ -33,6 +34,68 @@ def check_diagonal(diagonal):
     return diagonal
 
 
+def check_n_jobs(n_jobs):
+    r"""
+    Checks the number of parallel jobs. If ``None``, then the number of CPUs
+    is returned.
+
+    Parameters
+    ----------
+    n_jobs : `int` or ``None``
+        The value to check.
+
+    Returns
+    -------
+    n_jobs : `int`
+        The number of jobs.
+
+    Raises
+    ------
+    ValueError
+        n_jobs must be a positive integer or None
+    """
+    if n_jobs is None:
+        return multiprocessing.cpu_count()
+    if n_jobs < 1:
+        raise ValueError("n_jobs must be a positive integer or None")
+    return n_jobs
+
+
+def check_random_state(random_state):
+    r"""
+    Checks the random number generator of a random procedure and returns its
+    functions that draw samples of the standard normal and the uniform
+    distributions.
+
+    Parameters
+    ----------
+    random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``
+        The seed of a new `numpy.random.RandomState` or a random number
+        generator, i.e. any object with a ``standard_normal`` method and a
+        ``random_sample`` or ``random`` method. If ``None``, then the global
+        random number generator of `numpy` is used, thus ``np.random.seed``
+        makes the procedure reproducible.
+
+    Returns
+    -------
+    standard_normal : `callable`
+        The function that returns an `ndarray` of standard normal samples
+        given its shape.
+    random_sample : `callable`
+        The function that returns an `ndarray` of uniform samples in
+        ``[0, 1)`` given its shape.
+    """
+    if random_state is None:
+        return np.random.standard_normal, np.random.random_sample
+    if not hasattr(random_state, 'standard_normal'):
+        random_state = np.random.RandomState(random_state)
+    # numpy.random.Generator names its uniform sampling function random
+    random_sample = getattr(random_state, 'random_sample', None)
+    if random_sample is None:
+        random_sample = random_state.random
+    return random_state.standard_normal, random_sample
+
+
 def check_landmark_trilist(image, transform, group=None):
     r"""
     Checks that the provided image has a triangulated shape (thus an isntance of
@@ -1,7 +1,7 @@
 from __future__ import division
 import numpy as np
 
-from menpofit.base import build_grid
+from menpofit.base import build_grid, expired
 from menpofit.fitter import raise_costs_warning
 from menpofit.result import ParametricIterativeResult
 
@@ -21,14 +21,38 @@ class GradientDescentCLMAlgorithm(object):
         The shape model object, e.g. :map:`OrthoPDM`.
     eps : `float`, optional
         Value for checking the convergence of the optimization.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting computations. The filters of
+        the experts and the precomputed Jacobians are cast to `dtype` once.
+        If ``None``, then double precision is used.
     """
-    def __init__(self, expert_ensemble, shape_model, eps=10**-5):
+    # The precomputed arrays that get cast to the algorithm's dtype
+    _cast_arrays = ('search_grid', 'rho2_inv_L', 'J', 'JJ', 'pinv_J',
+                    'inv_JJ_prior', 'kernel_grid')
+
+    def __init__(self, expert_ensemble, shape_model, eps=10**-5, dtype=None):
         # Set parameters
         self.expert_ensemble = expert_ensemble
         self.transform = shape_model
         self.eps = eps
+        self.dtype = np.dtype(np.float64 if dtype is None else dtype)
         # Perform pre-computations
         self._precompute()
+        if self.dtype != np.float64:
+            self._cast(self.dtype)
+
+    def _cast(self, dtype):
+        r"""
+        Casts the precomputed arrays and the filters of the experts to the
+        provided floating point type. The experts of the model are not
+        modified.
+        """
+        for name in self._cast_arrays:
+            value = getattr(self, name, None)
+            if value is not None:
+                setattr(self, name, value.astype(dtype))
+        if hasattr(self.expert_ensemble, 'astype'):
+            self.expert_ensemble = self.expert_ensemble.astype(dtype)
 
     def _precompute(self):
         # Import multivariate normal distribution from scipy
@@ -73,6 +97,9 @@ class ActiveShapeModel(GradientDescentCLMAlgorithm):
         The covariance of the Gaussian kernel.
     eps : `float`, optional
         Value for checking the convergence of the optimization.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting computations. If ``None``, then
+        double precision is used.
 
     References
     ----------
@@ -85,10 +112,11 @@ class ActiveShapeModel(GradientDescentCLMAlgorithm):
         Springer, pp. 25-37, 1998.
     """
     def __init__(self, expert_ensemble, shape_model, gaussian_covariance=10,
-                 eps=10**-5):
+                 eps=10**-5, dtype=None):
         self.gaussian_covariance = gaussian_covariance
         super(ActiveShapeModel, self).__init__(expert_ensemble=expert_ensemble,
-                                               shape_model=shape_model, eps=eps)
+                                               shape_model=shape_model, eps=eps,
+                                               dtype=dtype)
 
     def _precompute(self):
         # Call super method
@@ -104,7 +132,7 @@ class ActiveShapeModel(GradientDescentCLMAlgorithm):
                                        cov=self.gaussian_covariance)
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, map_inference=False):
+            return_costs=False, map_inference=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -131,6 +159,9 @@ class ActiveShapeModel(GradientDescentCLMAlgorithm):
         map_inference : `bool`, optional
             If ``True``, then the solution will be given after performing MAP
             inference.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -151,13 +182,15 @@ class ActiveShapeModel(GradientDescentCLMAlgorithm):
         eps = np.Inf
 
         # Expectation-Maximisation loop
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
 
             target = self.transform.target
             # Obtain all landmark positions l_i = (x_i, y_i) being considered
             # ie all pixel positions in each landmark's search space
-            candidate_landmarks = (target.points[:, None, None, None, :] +
-                                   self.search_grid)
+            candidate_landmarks = (
+                target.points.astype(self.dtype)[:, None, None, None, :] +
+                self.search_grid)
 
             # Compute responses
             responses = self.expert_ensemble.predict_probability(image, target)
@@ -224,6 +257,9 @@ class RegularisedLandmarkMeanShift(GradientDescentCLMAlgorithm):
         The covariance of the kernel.
     eps : `float`, optional
         Value for checking the convergence of the optimization.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting computations. If ``None``, then
+        double precision is used.
 
     References
     ----------
@@ -232,11 +268,11 @@ class RegularisedLandmarkMeanShift(GradientDescentCLMAlgorithm):
         Vision (IJCV), 91(2): 200-215, 2011.
     """
     def __init__(self, expert_ensemble, shape_model, kernel_covariance=10,
-                 eps=10**-5):
+                 eps=10**-5, dtype=None):
         self.kernel_covariance = kernel_covariance
         super(RegularisedLandmarkMeanShift, self).__init__(
                 expert_ensemble=expert_ensemble, shape_model=shape_model,
-                eps=eps)
+                eps=eps, dtype=dtype)
 
     def _precompute(self):
         # Call super method
@@ -247,7 +283,7 @@ class RegularisedLandmarkMeanShift(GradientDescentCLMAlgorithm):
         self.kernel_grid = mvn.pdf(self.search_grid)[None, None]
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, map_inference=False):
+            return_costs=False, map_inference=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -274,6 +310,9 @@ class RegularisedLandmarkMeanShift(GradientDescentCLMAlgorithm):
         map_inference : `bool`, optional
             If ``True``, then the solution will be given after performing MAP
             inference.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -294,13 +333,15 @@ class RegularisedLandmarkMeanShift(GradientDescentCLMAlgorithm):
         eps = np.Inf
 
         # Expectation-Maximisation loop
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
 
             target = self.transform.target
             # Obtain all landmark positions l_i = (x_i, y_i) being considered
             # ie all pixel positions in each landmark's search space
-            candidate_landmarks = (target.points[:, None, None, None, :] +
-                                   self.search_grid)
+            candidate_landmarks = (
+                target.points.astype(self.dtype)[:, None, None, None, :] +
+                self.search_grid)
 
             # Compute patch responses
             patch_responses = self.expert_ensemble.predict_probability(image,
@@ -88,6 +88,10 @@ class CLM(object):
         incremental fashion on image batches of size equal to the provided
         value. If ``None``, then the training is performed directly on the
         all the images.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes that rescale the training images and
+        compute their features. If ``None``, then the number of CPUs is used.
+        If ``1``, then the training is sequential.
 
     References
     ----------
@@ -107,7 +111,8 @@ class CLM(object):
                  context_shape=(34, 34), cosine_mask=True, sample_offsets=None,
                  shape_model_cls=OrthoPDM,
                  expert_ensemble_cls=CorrelationFilterExpertEnsemble,
-                 max_shape_components=None, verbose=False, batch_size=None):
+                 max_shape_components=None, verbose=False, batch_size=None,
+                 n_jobs=1):
         self.scales = checks.check_scales(scales)
         n_scales = len(scales)
         self.diagonal = checks.check_diagonal(diagonal)
@@ -130,7 +135,7 @@ class CLM(object):
 
         # Train CLM
         self._train(images, increment=False, group=group, verbose=verbose,
-                    batch_size=batch_size)
+                    batch_size=batch_size, n_jobs=checks.check_n_jobs(n_jobs))
 
     @property
     def _str_title(self):
@@ -146,7 +151,7 @@ class CLM(object):
         return len(self.scales)
 
     def _train(self, images, increment=False, group=None, verbose=False,
-               shape_forgetting_factor=1.0, batch_size=None):
+               shape_forgetting_factor=1.0, batch_size=None, n_jobs=1):
         # If batch_size is not None, then we may have a generator, else we
         # assume we have a list.
         if batch_size is not None:
@@ -182,13 +187,14 @@ class CLM(object):
             # Train each batch
             self._train_batch(image_batch, increment=increment, group=group,
                               shape_forgetting_factor=shape_forgetting_factor,
-                              verbose=verbose)
+                              verbose=verbose, n_jobs=n_jobs)
 
     def _train_batch(self, image_batch, increment=False, group=None,
-                     shape_forgetting_factor=1.0, verbose=False):
+                     shape_forgetting_factor=1.0, verbose=False, n_jobs=1):
         # normalize images
         image_batch = rescale_images_to_reference_shape(
-            image_batch, group, self.reference_shape, verbose=verbose)
+            image_batch, group, self.reference_shape, verbose=verbose,
+            n_jobs=n_jobs)
 
         # build models at each scale
         if verbose:
@@ -215,14 +221,16 @@ class CLM(object):
                 feature_images = compute_features(image_batch,
                                                   self.holistic_features[i],
                                                   prefix=prefix,
-                                                  verbose=verbose)
+                                                  verbose=verbose,
+                                                  n_jobs=n_jobs)
             # handle scales
             if self.scales[i] != 1:
                 # scale feature images only if scale is different than 1
                 scaled_images = scale_images(feature_images,
                                              self.scales[i],
                                              prefix=prefix,
-                                             verbose=verbose)
+                                             verbose=verbose,
+                                             n_jobs=n_jobs)
             else:
                 scaled_images = feature_images
 
@@ -275,7 +283,7 @@ class CLM(object):
             max_n_components=self.max_shape_components[scale_index])
 
     def increment(self, images, group=None, shape_forgetting_factor=1.0,
-                  verbose=False, batch_size=None):
+                  verbose=False, batch_size=None, n_jobs=1):
         r"""
         Method to increment the trained CLM with a new set of training images.
 
@@ -301,10 +309,15 @@ class CLM(object):
             incremental fashion on image batches of size equal to the provided
             value. If ``None``, then the training is performed directly on the
             all the images.
+        n_jobs : `int` or ``None``, optional
+            The number of worker processes that rescale the training images
+            and compute their features. If ``None``, then the number of CPUs
+            is used. If ``1``, then the training is sequential.
         """
         return self._train(images, increment=True, group=group, verbose=verbose,
                            shape_forgetting_factor=shape_forgetting_factor,
-                           batch_size=batch_size)
+                           batch_size=batch_size,
+                           n_jobs=checks.check_n_jobs(n_jobs))
 
     def shape_instance(self, shape_weights=None, scale_index=-1):
         r"""
@@ -72,9 +72,10 @@ class IncrementalCorrelationFilterThinWrapper(object):
         A : ``(N,)`` `ndarray`
             The current auto-correlation array, where
             ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``
-        B : ``(N, N)`` `ndarray`
+        B : ``(D, n_channels, n_channels)`` or ``(N, N)`` `ndarray`
             The current cross-correlation array, where
-            ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``
+            ``D = (patch_h+response_h-1) * (patch_w+response_w-1)`` and
+            ``N = D * n_channels``. Its shape depends on `icf_callable`.
         n_x : `int`
             The current number of images.
         Z : `list` or ``(n_images, n_channels, patch_h, patch_w)`` `ndarray`
@@ -90,9 +91,11 @@ class IncrementalCorrelationFilterThinWrapper(object):
         auto_correlation : ``(N,)`` `ndarray`
             The auto-correlation array, where
             ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``
-        cross_correlation : ``(N, N)`` `ndarray`
+        cross_correlation : ``(D, n_channels, n_channels)`` or ``(N, N)`` `ndarray`
             The cross-correlation array, where
-            ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``
+            ``D = (patch_h+response_h-1) * (patch_w+response_w-1)`` and
+            ``N = D * n_channels``. Its shape depends on the correlation
+            filter callable.
         """
         # Turn list of X into ndarray
         if isinstance(Z, list):
@@ -118,9 +121,11 @@ class IncrementalCorrelationFilterThinWrapper(object):
         auto_correlation : ``(N,)`` `ndarray`
             The auto-correlation array, where
             ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``
-        cross_correlation : ``(N, N)`` `ndarray`
+        cross_correlation : ``(D, n_channels, n_channels)`` or ``(N, N)`` `ndarray`
             The cross-correlation array, where
-            ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``
+            ``D = (patch_h+response_h-1) * (patch_w+response_w-1)`` and
+            ``N = D * n_channels``. Its shape depends on the correlation
+            filter callable.
         """
         # Turn list of X into ndarray
         if isinstance(X, list):
@@ -1,16 +1,19 @@
 from __future__ import division
+from copy import copy
 from functools import partial
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import tempfile
 import numpy as np
 from scipy.stats import multivariate_normal
 
 from menpo.feature import normalize_norm
-from menpo.shape import PointCloud
 from menpo.image import Image
 from menpo.base import name_of_callable
 
 from menpofit.base import build_grid
-from menpofit.math.fft_utils import (fft2, ifft2, fftshift, pad, crop,
-                                     fft_convolve2d_sum)
+from menpofit.math.fft_utils import (fft2, fftshift, rfft2, irfft2, pad,
+                                     crop, fft_convolve2d_sum)
 from menpofit.visualize import print_progress
 
 from .base import IncrementalCorrelationFilterThinWrapper, probability_map
@@ -20,6 +23,19 @@ channel_normalize_norm = partial(normalize_norm,  mode='per_channel',
                                  error_on_divide_by_zero=False)
 
 
+def _train_correlation_filter(args):
+    r"""
+    Trains (or increments) the correlation filter of a single expert. It is
+    defined at module level so that it can be executed by a process pool.
+    """
+    icf, patches, response, increment_args = args
+    if increment_args is None:
+        return icf.train(patches, response)
+    auto_correlation, cross_correlation, n_images = increment_args
+    return icf.increment(auto_correlation, cross_correlation, n_images,
+                         patches, response)
+
+
 class ExpertEnsemble(object):
     r"""
     Abstract class for defining an ensemble of patch experts that correspond
@@ -132,6 +148,28 @@ class ConvolutionBasedExpertEnsemble(ExpertEnsemble):
         """
         return self.patch_shape
 
+    def astype(self, dtype):
+        r"""
+        Returns a shallow copy of the ensemble whose filters are cast to the
+        complex type that corresponds to the provided floating point type,
+        e.g. ``np.complex64`` for ``np.float32``. Thus, the responses of the
+        experts on images with `dtype` pixels are computed with `dtype`.
+
+        Parameters
+        ----------
+        dtype : `numpy.dtype`
+            The floating point type.
+
+        Returns
+        -------
+        expert_ensemble : `type(self)`
+            The ensemble with the cast filters.
+        """
+        ensemble = copy(self)
+        ensemble.fft_padded_filters = self.fft_padded_filters.astype(
+            np.result_type(dtype, np.complex64))
+        return ensemble
+
     def increment(self, images, shapes, prefix='', verbose=False):
         r"""
         Increments the learned ensemble of convolution-based experts given a new
@@ -161,7 +199,7 @@ class ConvolutionBasedExpertEnsemble(ExpertEnsemble):
         """
         filter_images = []
         for fft_padded_filter in self.fft_padded_filters:
-            spatial_filter = np.real(ifft2(fft_padded_filter))
+            spatial_filter = irfft2(fft_padded_filter, self.padded_size)
             spatial_filter = crop(spatial_filter,
                                   self.patch_shape)[:, ::-1, ::-1]
             filter_images.append(Image(spatial_filter))
@@ -176,7 +214,7 @@ class ConvolutionBasedExpertEnsemble(ExpertEnsemble):
         """
         filter_images = []
         for fft_padded_filter in self.fft_padded_filters:
-            spatial_filter = np.real(ifft2(fft_padded_filter))
+            spatial_filter = irfft2(fft_padded_filter, self.padded_size)
             spatial_filter = crop(spatial_filter,
                                   self.patch_shape)[:, ::-1, ::-1]
             frequency_filter = np.abs(fftshift(fft2(spatial_filter)))
@@ -229,7 +267,8 @@ class ConvolutionBasedExpertEnsemble(ExpertEnsemble):
         patches = self._extract_patches(image, shape)
         # Predict responses
         return fft_convolve2d_sum(patches, self.fft_padded_filters,
-                                  fft_filter=True, axis=1)
+                                  fft_filter=True, axis=1,
+                                  fft_ext_shape=self.padded_size)
 
     def view_spatial_filter_images_widget(self, figure_size=(7, 7),
                                           style='coloured',
@@ -315,6 +354,21 @@ class CorrelationFilterExpertEnsemble(ConvolutionBasedExpertEnsemble):
         of the patch (no offset) and ``(1, 0)`` would be sampling the patch
         from 1 pixel up the first axis away from the centre. If ``None``,
         then no offsets are applied.
+    n_jobs : `int` or ``None``, optional
+        The number of experts that are trained in parallel. If ``None``, then
+        the number of CPUs is used. If ``1``, then the experts are trained
+        sequentially.
+    executor : ``{'thread', 'process'}``, optional
+        The kind of pool that trains the experts in parallel when
+        ``n_jobs != 1``. A thread pool avoids copying the patches of each
+        expert and is efficient because the ffts and the linear solvers of
+        the correlation filters release the GIL. A process pool requires the
+        `icf_cls` object to be picklable.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the ``(n_experts, n_images, n_channels, height,
+        width)`` array of the training patches is stored in a temporary
+        memory-mapped file that is created within this directory, instead of
+        in memory. The file is deleted as soon as the training is over.
     prefix : `str`, optional
         The prefix of the printed progress information.
     verbose : `bool`, optional
@@ -326,9 +380,12 @@ class CorrelationFilterExpertEnsemble(ConvolutionBasedExpertEnsemble):
                  patch_shape=(17, 17), context_shape=(34, 34),
                  response_covariance=3,
                  patch_normalisation=channel_normalize_norm,
-                 cosine_mask=True, sample_offsets=None, prefix='',
+                 cosine_mask=True, sample_offsets=None, n_jobs=1,
+                 executor='thread', memmap_dir=None, prefix='',
                  verbose=False):
         # TODO: check parameters?
+        if executor not in ('thread', 'process'):
+            raise ValueError("executor must be either 'thread' or 'process'")
         # Set parameters
         self._icf = icf_cls()
         self.patch_shape = patch_shape
@@ -337,6 +394,9 @@ class CorrelationFilterExpertEnsemble(ConvolutionBasedExpertEnsemble):
         self.patch_normalisation = patch_normalisation
         self.cosine_mask = cosine_mask
         self.sample_offsets = sample_offsets
+        self.n_jobs = n_jobs
+        self.executor = executor
+        self.memmap_dir = memmap_dir
 
         # Generate cosine mask
         self._cosine_mask = generate_cosine_mask(self.context_shape)
@@ -349,24 +409,36 @@ class CorrelationFilterExpertEnsemble(ConvolutionBasedExpertEnsemble):
         # Train ensemble of correlation filter experts
         self._train(images, shapes, verbose=verbose, prefix=prefix)
 
-    def _extract_patch(self, image, landmark):
-        # Extract patch from image
-        patch = image.extract_patches(
-            landmark, patch_shape=self.context_shape,
+    def _extract_context_patches(self, image, shape):
+        # Extract the context patches of all landmarks at once
+        patches = image.extract_patches(
+            shape, patch_shape=self.context_shape,
             sample_offsets=self.sample_offsets, as_single_array=True)
-        # Reshape patch
-        # patch: (offsets x ch) x h x w
-        patch = patch.reshape((-1,) + patch.shape[-2:])
-        # Normalise patch
-        patch = self.patch_normalisation(patch)
+        # Reshape patches
+        # patches: n_experts x (n_offsets x n_channels) x height x width
+        patches = patches.reshape((patches.shape[0], -1) + patches.shape[-2:])
+        # Normalise each patch
+        patches = np.array([self.patch_normalisation(p) for p in patches])
         if self.cosine_mask:
             # Apply cosine mask if required
-            patch = self._cosine_mask * patch
-        return patch
+            patches *= self._cosine_mask
+        return patches
+
+    def _allocate_patches(self, shape, dtype):
+        # Ensembles that were pickled by previous versions have no memmap_dir
+        memmap_dir = getattr(self, 'memmap_dir', None)
+        if memmap_dir is None:
+            return np.empty(shape, dtype=dtype), None
+        # The temporary file is deleted as soon as it gets closed
+        f = tempfile.TemporaryFile(dir=memmap_dir)
+        return np.memmap(f, dtype=dtype, mode='w+', shape=shape), f
 
     def _train(self, images, shapes, prefix='', verbose=False,
                increment=False):
-        # Define print_progress partial
+        # Define print_progress partials
+        wrap_patches = partial(print_progress,
+                               prefix='{}Extracting patches'.format(prefix),
+                               end_with_newline=False, verbose=verbose)
         wrap = partial(print_progress,
                        prefix='{}Training experts'
                               .format(prefix),
@@ -385,44 +457,63 @@ class CorrelationFilterExpertEnsemble(ConvolutionBasedExpertEnsemble):
             # Update number of images
             self.n_images += len(images)
 
+        # Extract the context patches of all the experts with a single call
+        # per image
+        # all_patches: n_experts x n_images x n_channels x height x width
+        all_patches, patches_file = None, None
+        for j, (image, shape) in enumerate(wrap_patches(
+                list(zip(images, shapes)))):
+            patches = self._extract_context_patches(image, shape)
+            if all_patches is None:
+                all_patches, patches_file = self._allocate_patches(
+                    (patches.shape[0], len(images)) + patches.shape[1:],
+                    patches.dtype)
+            all_patches[:, j] = patches
+
         # Obtain total number of experts
-        n_experts = shapes[0].n_points
+        n_experts = all_patches.shape[0]
 
         # Train ensemble of correlation filter experts
+        tasks = (
+            (self._icf, all_patches[i], self.response,
+             (self.auto_correlations[i], self.cross_correlations[i],
+              self.n_images) if increment else None)
+            for i in range(n_experts))
+        # Ensembles that were pickled by previous versions are trained
+        # sequentially
+        n_jobs = getattr(self, 'n_jobs', 1)
+        pool = None
+        if n_jobs != 1:
+            n_jobs = n_jobs or multiprocessing.cpu_count()
+            if getattr(self, 'executor', 'thread') == 'thread':
+                pool = ThreadPool(n_jobs)
+            else:
+                pool = multiprocessing.Pool(n_jobs)
+            experts = pool.imap(_train_correlation_filter, tasks)
+        else:
+            experts = (_train_correlation_filter(t) for t in tasks)
+
         fft_padded_filters = []
         auto_correlations = []
         cross_correlations = []
-        for i in wrap(range(n_experts)):
-            patches = []
-            for image, shape in zip(images, shapes):
-                # Select the appropriate landmark
-                landmark = PointCloud([shape.points[i]])
-                # Extract patch
-                patch = self._extract_patch(image, landmark)
-                # Add patch to the list
-                patches.append(patch)
-
-            if increment:
-                # Increment correlation filter
-                correlation_filter, auto_correlation, cross_correlation = (
-                    self._icf.increment(self.auto_correlations[i],
-                                        self.cross_correlations[i],
-                                        self.n_images,
-                                        patches,
-                                        self.response))
-            else:
-                # Train correlation filter
-                correlation_filter, auto_correlation, cross_correlation = (
-                    self._icf.train(patches, self.response))
-
-            # Pad filter with zeros
-            padded_filter = pad(correlation_filter, self.padded_size)
-            # Compute fft of padded filter
-            fft_padded_filter = fft2(padded_filter)
-            # Add fft padded filter to list
-            fft_padded_filters.append(fft_padded_filter)
-            auto_correlations.append(auto_correlation)
-            cross_correlations.append(cross_correlation)
+        try:
+            for (correlation_filter, auto_correlation,
+                 cross_correlation) in wrap(experts, n_items=n_experts):
+                # Pad filter with zeros
+                padded_filter = pad(correlation_filter, self.padded_size)
+                # Compute fft of padded filter (only the half spectrum is
+                # stored, since the filter is real)
+                fft_padded_filter = rfft2(padded_filter)
+                # Add fft padded filter to list
+                fft_padded_filters.append(fft_padded_filter)
+                auto_correlations.append(auto_correlation)
+                cross_correlations.append(cross_correlation)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if patches_file is not None:
+                patches_file.close()
 
         # Turn list into ndarray
         self.fft_padded_filters = np.asarray(fft_padded_filters)
@@ -21,13 +21,17 @@ class CLMFitter(MultiScaleParametricFitter):
         The trained CLM model.
     algorithms : `list` of `class`
         The list of algorithm objects that will perform the fitting per scale.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type to which the images are cast before fitting.
+        If ``None``, then the images are not cast.
     """
-    def __init__(self, clm, algorithms):
+    def __init__(self, clm, algorithms, dtype=None):
         self._model = clm
         # Call superclass
         super(CLMFitter, self).__init__(
             scales=clm.scales, reference_shape=clm.reference_shape,
-            holistic_features=clm.holistic_features, algorithms=algorithms)
+            holistic_features=clm.holistic_features, algorithms=algorithms,
+            dtype=dtype)
 
     @property
     def clm(self):
@@ -68,9 +72,16 @@ class GradientDescentCLMFitter(CLMFitter):
         components without trimming the unused ones. Also, the available
         components may have already been trimmed to `max_shape_components`
         during training.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting, e.g. ``np.float32``. The
+        filters of the experts and the Jacobians of the algorithms are cast to
+        `dtype` once, and the images are cast to `dtype` after feature
+        extraction. Note that the responses of the experts are computed in
+        single precision only with an fft backend that preserves it (see
+        :map:`set_fft_backend`). If ``None``, then double precision is used.
     """
     def __init__(self, clm, gd_algorithm_cls=RegularisedLandmarkMeanShift,
-                 n_shape=None):
+                 n_shape=None, dtype=None):
         # Store CLM trained model
         self._model = clm
 
@@ -78,13 +89,15 @@ class GradientDescentCLMFitter(CLMFitter):
         checks.set_models_components(clm.shape_models, n_shape)
 
         # Get list of algorithm objects per scale
+        kwargs = {} if dtype is None else {'dtype': dtype}
         algorithms = [gd_algorithm_cls(clm.expert_ensembles[i],
-                                       clm.shape_models[i])
+                                       clm.shape_models[i], **kwargs)
                       for i in range(clm.n_scales)]
 
         # Call superclass
         super(GradientDescentCLMFitter, self).__init__(clm=clm,
-                                                       algorithms=algorithms)
+                                                       algorithms=algorithms,
+                                                       dtype=dtype)
 
     def __str__(self):
         # Compute scale info strings
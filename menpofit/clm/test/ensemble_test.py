@@ -0,0 +1,58 @@
+import pickle
+import tempfile
+import shutil
+
+from numpy.testing import assert_allclose
+
+from menpofit.clm import CLM, CorrelationFilterExpertEnsemble
+from menpofit.test import helpers
+
+
+def setup_module():
+    global images, shapes
+    images = helpers.load_images()
+    shapes = [image.landmarks['PTS'] for image in images]
+
+
+def train_ensemble(**kwargs):
+    return CorrelationFilterExpertEnsemble(
+        images[:3], shapes[:3], patch_shape=(5, 5), context_shape=(8, 8),
+        **kwargs)
+
+
+def assert_same_ensembles(ensemble, expected):
+    assert_allclose(ensemble.fft_padded_filters, expected.fft_padded_filters)
+    assert_allclose(ensemble.auto_correlations, expected.auto_correlations)
+    assert_allclose(ensemble.cross_correlations, expected.cross_correlations)
+
+
+def test_ensemble_parallel_and_memmap_training():
+    expected = train_ensemble()
+    memmap_dir = tempfile.mkdtemp()
+    try:
+        for kwargs in [{'n_jobs': 2}, {'n_jobs': 2, 'executor': 'process'},
+                       {'memmap_dir': memmap_dir}]:
+            ensemble = train_ensemble(**kwargs)
+            assert_same_ensembles(ensemble, expected)
+            ensemble.increment(images[3:], shapes[3:])
+            expected_increment = pickle.loads(pickle.dumps(expected))
+            expected_increment.increment(images[3:], shapes[3:])
+            assert_same_ensembles(ensemble, expected_increment)
+    finally:
+        shutil.rmtree(memmap_dir)
+
+
+def test_clm_increment_legacy_ensembles():
+    clm = CLM(images[:2], group='PTS', diagonal=40, patch_shape=(5, 5),
+              context_shape=(8, 8))
+    expected = pickle.loads(pickle.dumps(clm))
+    expected.increment(images[2:], group='PTS')
+    # The ensembles of previous versions have no parallel training options
+    for ensemble in clm.expert_ensembles:
+        for name in ['n_jobs', 'executor', 'memmap_dir']:
+            delattr(ensemble, name)
+    clm = pickle.loads(pickle.dumps(clm))
+    clm.increment(images[2:], group='PTS')
+    for ensemble, expected_ensemble in zip(clm.expert_ensembles,
+                                           expected.expert_ensembles):
+        assert_same_ensembles(ensemble, expected_ensemble)
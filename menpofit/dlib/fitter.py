@@ -394,6 +394,59 @@ class DlibERT(MultiScaleNonParametricFitter):
                                    scale_transforms=scale_transforms,
                                    gt_shape=gt_shape)
 
+    def fit_from_shapes(self, images, initial_shapes, gt_shapes=None):
+        r"""
+        Fits the model to a batch of images. Note that it is not possible to
+        initialise the fitting process from a shape. Thus, this method raises a
+        warning and calls `fit_from_bbs` with the bounding boxes of the
+        provided `initial_shapes`.
+
+        Parameters
+        ----------
+        images : `list` of `menpo.image.Image` or subclass
+            The images to be fitted.
+        initial_shapes : `list` of `menpo.shape.PointCloud`
+            The initial shape estimate per image. Note that the shapes won't
+            actually be used, only their bounding boxes.
+        gt_shapes : `list` of `menpo.shape.PointCloud`, optional
+            The ground truth shape associated to each image.
+
+        Returns
+        -------
+        fitting_results : `list` of :map:`MultiScaleNonParametricIterativeResult`
+            The result of the fitting procedure per image.
+        """
+        warnings.warn('Fitting from an initial shape is not supported by '
+                      'Dlib - therefore we are falling back to the tightest '
+                      'bounding box from the given initial_shape')
+        tightest_bbs = [s.bounding_box() for s in initial_shapes]
+        return self.fit_from_bbs(images, tightest_bbs, gt_shapes=gt_shapes)
+
+    def fit_from_bbs(self, images, bounding_boxes, gt_shapes=None):
+        r"""
+        Fits the model to a batch of images given an initial bounding box per
+        image.
+
+        Parameters
+        ----------
+        images : `list` of `menpo.image.Image` or subclass
+            The images to be fitted.
+        bounding_boxes : `list` of `menpo.shape.PointDirectedGraph`
+            The initial bounding box per image from which the fitting procedure
+            will start.
+        gt_shapes : `list` of `menpo.shape.PointCloud`, optional
+            The ground truth shape associated to each image.
+
+        Returns
+        -------
+        fitting_results : `list` of :map:`MultiScaleNonParametricIterativeResult`
+            The result of the fitting procedure per image.
+        """
+        if gt_shapes is None:
+            gt_shapes = [None] * len(images)
+        return [self.fit_from_bb(i, bb, gt_shape=gt_s)
+                for i, bb, gt_s in zip(images, bounding_boxes, gt_shapes)]
+
     def __str__(self):
         if self.diagonal is not None:
             diagonal = self.diagonal
@@ -2,18 +2,21 @@ from __future__ import division
 from functools import partial
 import numpy as np
 import warnings
+from time import time
 
 from menpo.base import name_of_callable
 from menpo.shape import PointCloud
-from menpo.transform import (scale_about_centre, rotate_ccw_about_centre,
-                             Translation, Scale, AlignmentAffine,
-                             AlignmentSimilarity)
+from menpo.transform import (Scale, AlignmentAffine, AlignmentSimilarity,
+                             Similarity)
 
-from menpofit.base import MenpoFitCostsWarning
+from menpofit.base import MenpoFitCostsWarning, Deadline
+from menpofit.cache import CachedFeatures
+from menpofit.error import euclidean_bb_normalised_error
 import menpofit.checks as checks
 from menpofit.visualize import print_progress
 from menpofit.result import (MultiScaleNonParametricIterativeResult,
                              MultiScaleParametricIterativeResult)
+from menpofit.transform import batch_procrustes_alignment
 
 
 def raise_costs_warning(cls):
@@ -33,7 +36,8 @@ def raise_costs_warning(cls):
 
 def noisy_alignment_similarity_transform(source, target, noise_type='uniform',
                                          noise_percentage=0.1,
-                                         allow_alignment_rotation=False):
+                                         allow_alignment_rotation=False,
+                                         random_state=None):
     r"""
     Constructs and perturbs the optimal similarity transform between the source
     and target shapes by adding noise to its parameters.
@@ -56,41 +60,116 @@ def noisy_alignment_similarity_transform(source, target, noise_type='uniform',
     allow_alignment_rotation : `bool`, optional
         If ``False``, then the rotation is not considered when computing the
         optimal similarity transform between source and target.
+    random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the noise. If ``None``, then
+        the global random number generator of `numpy` is used.
 
     Returns
     -------
     noisy_alignment_similarity_transform : `menpo.transform.Similarity`
         The noisy Similarity Transform between source and target.
     """
+    h_matrix = noisy_alignment_similarity_h_matrices(
+        source.points, target.points[None], noise_type=noise_type,
+        noise_percentage=noise_percentage,
+        allow_alignment_rotation=allow_alignment_rotation,
+        random_state=random_state)[0]
+    return Similarity(h_matrix, skip_checks=True)
+
+
+def noisy_alignment_similarity_h_matrices(sources, targets,
+                                          noise_type='uniform',
+                                          noise_percentage=0.1,
+                                          allow_alignment_rotation=False,
+                                          random_state=None):
+    r"""
+    Constructs and perturbs the optimal similarity transforms between 2D
+    source and target shapes by adding noise to their parameters. This is the
+    vectorized version of :map:`noisy_alignment_similarity_transform`, i.e.
+    the noise of all the transforms is drawn at once and the transforms are
+    computed as a single array.
+
+    Parameters
+    ----------
+    sources : ``(n_points, 2)`` or ``(n_transforms, n_points, 2)`` `ndarray`
+        The source points used in the alignments, either shared by all the
+        transforms or one per target.
+    targets : ``(n_transforms, n_points, 2)`` `ndarray`
+        The target points used in the alignments.
+    noise_type : ``{'uniform', 'gaussian'}``, optional
+        The type of noise to be added.
+    noise_percentage : `float` in ``(0, 1)`` or `list` of `len` `3`, optional
+        The standard percentage of noise to be added. If `float`, then the same
+        amount of noise is applied to the scale, rotation and translation
+        parameters of the optimal similarity transforms. If `list` of
+        `float` it must have length 3, where the first, second and third elements
+        denote the amount of noise to be applied to the scale, rotation and
+        translation parameters, respectively.
+    allow_alignment_rotation : `bool`, optional
+        If ``False``, then the rotation is not considered when computing the
+        optimal similarity transforms between sources and targets.
+    random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the noise. If ``None``, then
+        the global random number generator of `numpy` is used.
+
+    Returns
+    -------
+    h_matrices : ``(n_transforms, 3, 3)`` `ndarray`
+        The homogeneous matrices of the noisy similarity transforms.
+    """
     if isinstance(noise_percentage, float):
         noise_percentage = [noise_percentage] * 3
     elif len(noise_percentage) == 1:
-        noise_percentage *= 3
-
-    similarity = AlignmentSimilarity(source, target,
-                                     rotation=allow_alignment_rotation)
-
-    if noise_type is 'gaussian':
-        s = noise_percentage[0] * (0.5 / 3) * np.asscalar(np.random.randn(1))
-        r = noise_percentage[1] * (180 / 3) * np.asscalar(np.random.randn(1))
-        t = noise_percentage[2] * (target.range() / 3) * np.random.randn(2)
-
-        s = scale_about_centre(target, 1 + s)
-        r = rotate_ccw_about_centre(target, r)
-        t = Translation(t, source.n_dims)
-    elif noise_type is 'uniform':
-        s = noise_percentage[0] * 0.5 * (2 * np.asscalar(np.random.randn(1)) - 1)
-        r = noise_percentage[1] * 180 * (2 * np.asscalar(np.random.rand(1)) - 1)
-        t = noise_percentage[2] * target.range() * (2 * np.random.rand(2) - 1)
-
-        s = scale_about_centre(target, 1. + s)
-        r = rotate_ccw_about_centre(target, r)
-        t = Translation(t, source.n_dims)
+        noise_percentage = list(noise_percentage) * 3
+    standard_normal, random_sample = checks.check_random_state(random_state)
+
+    targets = np.asarray(targets)
+    n_transforms = targets.shape[0]
+    # noise of the scale, rotation and translation parameters
+    if noise_type == 'gaussian':
+        noise = standard_normal((n_transforms, 4)) / 3
+    elif noise_type == 'uniform':
+        noise = 2 * random_sample((n_transforms, 4)) - 1
     else:
         raise ValueError('Unexpected noise type. '
                          'Supported values are {gaussian, uniform}')
-
-    return similarity.compose_after(t.compose_after(s.compose_after(r)))
+    scale = 1 + noise_percentage[0] * 0.5 * noise[:, 0]
+    theta = np.deg2rad(noise_percentage[1] * 180 * noise[:, 1])
+    target_centres = targets.mean(axis=1)
+    target_ranges = targets.max(axis=1) - targets.min(axis=1)
+    translation = noise_percentage[2] * target_ranges * noise[:, 2:]
+
+    # The noise is applied before the alignment: a rotation and a scaling
+    # about the centre of the target, followed by a translation
+    noise_h_matrices = np.zeros((n_transforms, 3, 3))
+    cos, sin = scale * np.cos(theta), scale * np.sin(theta)
+    noise_h_matrices[:, 0, 0], noise_h_matrices[:, 0, 1] = cos, -sin
+    noise_h_matrices[:, 1, 0], noise_h_matrices[:, 1, 1] = sin, cos
+    noise_h_matrices[:, :2, 2] = target_centres + translation - np.einsum(
+        'nij, nj -> ni', noise_h_matrices[:, :2, :2], target_centres)
+    noise_h_matrices[:, 2, 2] = 1
+
+    h_matrices = batch_procrustes_alignment(
+        sources, targets, rotation=allow_alignment_rotation)
+    return np.matmul(h_matrices, noise_h_matrices)
+
+
+def _apply_h_matrices(h_matrices, points):
+    # Applies each homogeneous transform to its own (or a shared) set of points
+    n_dims = h_matrices.shape[-1] - 1
+    return (np.matmul(points, h_matrices[:, :n_dims, :n_dims].swapaxes(1, 2)) +
+            h_matrices[:, None, :n_dims, n_dims])
+
+
+def _bounding_box_points(points):
+    # The corners of the bounding boxes of the points, in the same order as
+    # menpo.shape.bounding_box
+    min_p, max_p = points.min(axis=-2), points.max(axis=-2)
+    return np.stack((min_p,
+                     np.stack((max_p[..., 0], min_p[..., 1]), axis=-1),
+                     max_p,
+                     np.stack((min_p[..., 0], max_p[..., 1]), axis=-1)),
+                    axis=-2)
 
 
 def noisy_target_alignment_transform(source, target,
@@ -126,7 +205,8 @@ def noisy_target_alignment_transform(source, target,
 
 def noisy_shape_from_bounding_box(shape, bounding_box, noise_type='uniform',
                                   noise_percentage=0.05,
-                                  allow_alignment_rotation=False):
+                                  allow_alignment_rotation=False,
+                                  random_state=None):
     r"""
     Constructs and perturbs the optimal similarity transform between the bounding
     box of the source shape and the target bounding box, by adding noise to its
@@ -151,6 +231,9 @@ def noisy_shape_from_bounding_box(shape, bounding_box, noise_type='uniform',
     allow_alignment_rotation : `bool`, optional
         If ``False``, then the rotation is not considered when computing the
         optimal similarity transform between source and target.
+    random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the noise. If ``None``, then
+        the global random number generator of `numpy` is used.
 
     Returns
     -------
@@ -160,13 +243,65 @@ def noisy_shape_from_bounding_box(shape, bounding_box, noise_type='uniform',
     transform = noisy_alignment_similarity_transform(
             shape.bounding_box(), bounding_box, noise_type=noise_type,
             noise_percentage=noise_percentage,
-            allow_alignment_rotation=allow_alignment_rotation)
+            allow_alignment_rotation=allow_alignment_rotation,
+            random_state=random_state)
     return transform.apply(shape)
 
 
+def noisy_shapes_from_bounding_boxes(shapes, bounding_boxes,
+                                     noise_type='uniform',
+                                     noise_percentage=0.05,
+                                     allow_alignment_rotation=False,
+                                     random_state=None):
+    r"""
+    Constructs and perturbs the optimal similarity transforms between the
+    bounding boxes of the source shapes and the target bounding boxes, by
+    adding noise to their parameters. It returns the noisy versions of the
+    provided shapes. This is the vectorized version of
+    :map:`noisy_shape_from_bounding_box`, i.e. all the noisy shapes are
+    computed as a single array.
+
+    Parameters
+    ----------
+    shapes : ``(n_points, 2)`` or ``(n_shapes, n_points, 2)`` `ndarray`
+        The source points used in the alignments, either shared by all the
+        bounding boxes or one per bounding box. Note that the bounding boxes
+        of the shapes will be used.
+    bounding_boxes : ``(n_shapes, 4, 2)`` `ndarray`
+        The points of the target bounding boxes used in the alignments.
+    noise_type : ``{'uniform', 'gaussian'}``, optional
+        The type of noise to be added.
+    noise_percentage : `float` in ``(0, 1)`` or `list` of `len` `3`, optional
+        The standard percentage of noise to be added. If `float`, then the same
+        amount of noise is applied to the scale, rotation and translation
+        parameters of the optimal similarity transforms. If `list` of
+        `float` it must have length 3, where the first, second and third elements
+        denote the amount of noise to be applied to the scale, rotation and
+        translation parameters, respectively.
+    allow_alignment_rotation : `bool`, optional
+        If ``False``, then the rotation is not considered when computing the
+        optimal similarity transforms between sources and targets.
+    random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the noise. If ``None``, then
+        the global random number generator of `numpy` is used.
+
+    Returns
+    -------
+    noisy_shapes : ``(n_shapes, n_points, 2)`` `ndarray`
+        The points of the noisy shapes.
+    """
+    shapes = np.asarray(shapes)
+    h_matrices = noisy_alignment_similarity_h_matrices(
+        _bounding_box_points(shapes), bounding_boxes, noise_type=noise_type,
+        noise_percentage=noise_percentage,
+        allow_alignment_rotation=allow_alignment_rotation,
+        random_state=random_state)
+    return _apply_h_matrices(h_matrices, shapes)
+
+
 def noisy_shape_from_shape(reference_shape, shape, noise_type='uniform',
                            noise_percentage=0.05,
-                           allow_alignment_rotation=False):
+                           allow_alignment_rotation=False, random_state=None):
     r"""
     Constructs and perturbs the optimal similarity transform between the
     provided reference shape and the target shape, by adding noise to its
@@ -190,6 +325,9 @@ def noisy_shape_from_shape(reference_shape, shape, noise_type='uniform',
     allow_alignment_rotation : `bool`, optional
         If ``False``, then the rotation is not considered when computing the
         optimal similarity transform between source and target.
+    random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the noise. If ``None``, then
+        the global random number generator of `numpy` is used.
 
     Returns
     -------
@@ -199,7 +337,8 @@ def noisy_shape_from_shape(reference_shape, shape, noise_type='uniform',
     transform = noisy_alignment_similarity_transform(
             reference_shape, shape, noise_type=noise_type,
             noise_percentage=noise_percentage,
-            allow_alignment_rotation=allow_alignment_rotation)
+            allow_alignment_rotation=allow_alignment_rotation,
+            random_state=random_state)
     return transform.apply(reference_shape)
 
 
@@ -229,6 +368,34 @@ def align_shape_with_bounding_box(shape, bounding_box,
     return transform.apply(shape)
 
 
+def align_shape_with_bounding_boxes(shape, bounding_boxes, rotation=True):
+    r"""
+    Aligns the provided shape with each of the bounding boxes using a
+    similarity transform. This is the vectorized version of
+    :map:`align_shape_with_bounding_box` with the default
+    `menpo.transform.AlignmentSimilarity`, i.e. all the aligned shapes are
+    computed as a single array.
+
+    Parameters
+    ----------
+    shape : ``(n_points, n_dims)`` `ndarray`
+        The points of the shape used in the alignments.
+    bounding_boxes : ``(n_bounding_boxes, 4, n_dims)`` `ndarray`
+        The points of the bounding boxes used in the alignments.
+    rotation : `bool`, optional
+        If ``False``, then the rotation is not considered when computing the
+        similarity transforms.
+
+    Returns
+    -------
+    aligned_shapes : ``(n_bounding_boxes, n_points, n_dims)`` `ndarray`
+        The points of the aligned shapes.
+    """
+    h_matrices = batch_procrustes_alignment(
+        _bounding_box_points(shape), bounding_boxes, rotation=rotation)
+    return _apply_h_matrices(h_matrices, shape)
+
+
 class MultiScaleNonParametricFitter(object):
     r"""
     Class for defining a multi-scale fitter for a non-parametric fitting method,
@@ -248,12 +415,18 @@ class MultiScaleNonParametricFitter(object):
         They must provided in ascending order, i.e. from lowest to highest scale.
     algorithms : `list` of `class`
         The list of algorithm objects that will perform the fitting per scale.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type to which the images of all scales are cast
+        before fitting, e.g. ``np.float32``. If ``None``, then the images are
+        not cast.
     """
-    def __init__(self, scales, reference_shape, holistic_features, algorithms):
+    def __init__(self, scales, reference_shape, holistic_features, algorithms,
+                 dtype=None):
         self._scales = scales
         self._reference_shape = reference_shape
         self._holistic_features = holistic_features
         self.algorithms = algorithms
+        self._dtype = None if dtype is None else np.dtype(dtype)
 
     @property
     def scales(self):
@@ -295,7 +468,37 @@ class MultiScaleNonParametricFitter(object):
         """
         return self._holistic_features
 
-    def _prepare_image(self, image, initial_shape, gt_shape=None):
+    @property
+    def dtype(self):
+        r"""
+        The floating point type to which the images of all scales are cast
+        before fitting. If ``None``, then the images are not cast.
+
+        :type: `numpy.dtype` or ``None``
+        """
+        # fitters that were pickled before the dtype option have no attribute
+        return getattr(self, '_dtype', None)
+
+    def _result_scales(self, algorithm_results):
+        r"""
+        Returns the scale values that correspond to a list of per-scale fitting
+        results. If coarse scales were skipped (e.g. by a :map:`Tracker`), then
+        the results correspond to the finest scales.
+
+        Parameters
+        ----------
+        algorithm_results : `list` of :map:`NonParametricIterativeResult` or subclass
+            The list of fitting result per fitted scale.
+
+        Returns
+        -------
+        scales : `list` of `int` or `float`
+            The scale value of each result.
+        """
+        return self.scales[self.n_scales - len(algorithm_results):]
+
+    def _prepare_image(self, image, initial_shape, gt_shape=None,
+                       first_scale=0):
         r"""
         Function the performs pre-processing on the image to be fitted. This
         involves the following steps:
@@ -318,6 +521,10 @@ class MultiScaleNonParametricFitter(object):
             will start.
         gt_shape : `menpo.shape.PointCloud`, optional
             The ground truth shape associated to the image.
+        first_scale : `int`, optional
+            The index of the first scale to be prepared. The coarser scales
+            are skipped, i.e. their features are not computed and their
+            entries in the returned lists are ``None``.
 
         Returns
         -------
@@ -350,17 +557,22 @@ class MultiScaleNonParametricFitter(object):
         #        reference shape and features extraction
         #     2. Rescale image
         #     3. Save affine transform, scale transform and final image
-        images = []
-        affine_transforms = []
-        scale_transforms = []
-        for i in range(self.n_scales):
+        images = [None] * first_scale
+        affine_transforms = [None] * first_scale
+        scale_transforms = [None] * first_scale
+        for i in range(first_scale, self.n_scales):
             # Extract features
-            if (i == 0 or
+            if (i == first_scale or
                     self.holistic_features[i] != self.holistic_features[i - 1]):
                 # Compute features only if this is the first pass through
                 # the loop or the features at this scale are different from
                 # the features at the previous scale
-                feature_image = self.holistic_features[i](tmp_image)
+                features = self.holistic_features[i]
+                if isinstance(features, CachedFeatures):
+                    # The fitted images are rarely seen again, thus only the
+                    # features of the training images are cached
+                    features = features.features
+                feature_image = features(tmp_image)
 
                 # Until now, we have introduced an affine transform that
                 # consists of the image rescale to the reference shape,
@@ -374,7 +586,7 @@ class MultiScaleNonParametricFitter(object):
             else:
                 # If features are not extracted, then the affine transform
                 # should be identical with the one of the first (lowest) level.
-                affine_transforms.append(affine_transforms[0])
+                affine_transforms.append(affine_transforms[first_scale])
 
             # Rescale images according to scales
             if self.scales[i] != 1:
@@ -387,6 +599,12 @@ class MultiScaleNonParametricFitter(object):
                 scaled_image = feature_image
                 scale_transform = Scale(1., initial_shape.n_dims)
 
+            # Cast the image to the fitting dtype. Note that scaled_image is
+            # never the input image, thus it can be modified.
+            if (self.dtype is not None and
+                    scaled_image.pixels.dtype != self.dtype):
+                scaled_image.pixels = scaled_image.pixels.astype(self.dtype)
+
             # Add scale transform to list
             scale_transforms.append(scale_transform)
 
@@ -394,11 +612,13 @@ class MultiScaleNonParametricFitter(object):
             images.append(scaled_image)
 
         # Get initial shapes per level
-        initial_shapes = [i.landmarks['__initial_shape'] for i in images]
+        initial_shapes = [None if i is None else i.landmarks['__initial_shape']
+                          for i in images]
 
         # Get ground truth shapes per level
         if gt_shape:
-            gt_shapes = [i.landmarks['__gt_shape'] for i in images]
+            gt_shapes = [None if i is None else i.landmarks['__gt_shape']
+                         for i in images]
         else:
             gt_shapes = None
 
@@ -411,7 +631,8 @@ class MultiScaleNonParametricFitter(object):
                 scale_transforms)
 
     def _fit(self, images, initial_shape, affine_transforms, scale_transforms,
-             gt_shapes=None, max_iters=20, return_costs=False, **kwargs):
+             gt_shapes=None, max_iters=20, return_costs=False, first_scale=0,
+             deadline=None, **kwargs):
         r"""
         Function the applies the multi-scale fitting procedure on an image, given
         the initial shape.
@@ -442,6 +663,17 @@ class MultiScaleNonParametricFitter(object):
             computation increases the computational cost of the fitting. The
             additional computation cost depends on the fitting method. Only
             use this option for research purposes.*
+        first_scale : `int`, optional
+            The index of the first scale to be fitted. The coarser scales are
+            skipped, thus `initial_shape` must be defined in the coordinate
+            frame of `first_scale`.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. The remaining time is
+            shared equally by the remaining scales, thus the time that is not
+            used by a scale is given to the following ones. The iterations of
+            a scale stop once its share has run out, which is recorded in the
+            `stop_reason` of its result. If the deadline has passed, then the
+            remaining scales are not iterated at all.
         kwargs : `dict`, optional
             Additional keyword arguments that can be passed to specific
             implementations.
@@ -449,7 +681,7 @@ class MultiScaleNonParametricFitter(object):
         Returns
         -------
         algorithm_results : `list` of :map:`NonParametricIterativeResult` or subclass
-            The list of fitting result per scale.
+            The list of fitting result per fitted scale.
         """
         # Check max iters
         max_iters = checks.check_max_iters(max_iters, self.n_scales)
@@ -460,60 +692,221 @@ class MultiScaleNonParametricFitter(object):
 
         # Initialize list of algorithm results
         algorithm_results = []
-        for i in range(self.n_scales):
+        for i in range(first_scale, self.n_scales):
             # Handle ground truth shape
             if gt_shapes is not None:
                 gt_shape = gt_shapes[i]
 
+            # Give this scale its share of the remaining time
+            scale_deadline = None
+            if deadline is not None:
+                scale_deadline = deadline.share(self.n_scales - i)
+                kwargs['deadline'] = scale_deadline
+
             # Run algorithm
             algorithm_result = self.algorithms[i].run(images[i], shape,
                                                       gt_shape=gt_shape,
                                                       max_iters=max_iters[i],
                                                       return_costs=return_costs,
                                                       **kwargs)
+
+            # Record whether the iterations were stopped by the deadline
+            if scale_deadline is not None and scale_deadline.expired:
+                algorithm_result._stop_reason = (
+                    'time_budget' if deadline.check() else 'scale_time_share')
+
             # Add algorithm result to the list
             algorithm_results.append(algorithm_result)
 
             # Prepare this scale's final shape for the next scale
             if i < self.n_scales - 1:
                 # This should not be done for the last scale.
-                shape = algorithm_result.final_shape
-                if self.holistic_features[i + 1] != self.holistic_features[i]:
-                    # If the features function of the current scale is different
-                    # than the one of the next scale, this means that the affine
-                    # transform is different as well. Thus we need to do the
-                    # following composition:
-                    #
-                    #    S_{i+1} \circ A_{i+1} \circ inv(A_i) \circ inv(S_i)
-                    #
-                    # where:
-                    #    S_i : scaling transform of current scale
-                    #    S_{i+1} : scaling transform of next scale
-                    #    A_i : affine transform of current scale
-                    #    A_{i+1} : affine transform of next scale
-                    t1 = scale_transforms[i].compose_after(affine_transforms[i])
-                    t2 = affine_transforms[i + 1].pseudoinverse().compose_after(t1)
-                    transform = scale_transforms[i + 1].pseudoinverse().compose_after(t2)
-                    shape = transform.apply(shape)
-                elif (self.holistic_features[i + 1] == self.holistic_features[i] and
-                      self.scales[i] != self.scales[i + 1]):
-                    # If the features function of the current scale is the same
-                    # as the one of the next scale, this means that the affine
-                    # transform is the same as well, and thus can be omitted.
-                    # Given that the scale factors are different, we need to do
-                    # the # following composition:
-                    #
-                    #    S_{i+1} \circ inv(S_i)
-                    #
-                    # where:
-                    #    S_i : scaling transform of current scale
-                    #    S_{i+1} : scaling transform of next scale
-                    transform = scale_transforms[i + 1].pseudoinverse().compose_after(scale_transforms[i])
-                    shape = transform.apply(shape)
+                shape = self._shape_to_next_scale(
+                    algorithm_result.final_shape, i, affine_transforms,
+                    scale_transforms)
 
         # Return list of algorithm results
         return algorithm_results
 
+    def _fit_batch(self, images, initial_shapes, affine_transforms,
+                   scale_transforms, gt_shapes=None, max_iters=20,
+                   return_costs=False, deadline=None, **kwargs):
+        r"""
+        Function the applies the multi-scale fitting procedure on a batch of
+        images. Contrary to :meth:`_fit`, the loop is performed scale-major,
+        i.e. all the images are fitted at a scale before moving to the next
+        one. If the algorithm of a scale implements a ``run_batch`` method,
+        then it receives all the images of that scale at once. Otherwise,
+        its ``run`` method is called once per image.
+
+        Parameters
+        ----------
+        images : `list` of `list` of `menpo.image.Image`
+            The list of images per scale for each fitted image.
+        initial_shapes : `list` of `menpo.shape.PointCloud`
+            The initial shape of each fitted image at the first scale.
+        affine_transforms : `list` of `list` of `menpo.transform.Affine`
+            The list of affine transforms per scale for each fitted image.
+        scale_transforms : `list` of `list` of `menpo.shape.Scale`
+            The list of inverse scaling transforms per scale for each fitted
+            image.
+        gt_shapes : `list` of (`list` of `menpo.shape.PointCloud` or ``None``), optional
+            The list of ground truth shapes per scale for each fitted image.
+        max_iters : `int` or `list` of `int`, optional
+            The maximum number of iterations. If `int`, then it specifies the
+            maximum number of iterations over all scales. If `list` of `int`,
+            then specifies the maximum number of iterations per scale.
+        return_costs : `bool`, optional
+            If ``True``, then the cost function values will be computed
+            during the fitting procedure. Then these cost values will be
+            assigned to the returned `fitting_result`. *Note that the costs
+            computation increases the computational cost of the fitting. The
+            additional computation cost depends on the fitting method. Only
+            use this option for research purposes.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting of the whole batch. As in
+            :meth:`_fit`, the remaining time is shared equally by the
+            remaining scales and the iterations of a scale stop once its share
+            has run out, which is recorded in the `stop_reason` of the results
+            that were stopped. If the images of a scale are fitted one by one,
+            then the scale's remaining time is in turn shared equally by its
+            remaining images, so that the first images cannot use up the
+            time of the others.
+        kwargs : `dict`, optional
+            Additional keyword arguments that can be passed to specific
+            implementations.
+
+        Returns
+        -------
+        algorithm_results : `list` of `list` of :map:`NonParametricIterativeResult` or subclass
+            The list of fitting result per scale for each fitted image.
+        """
+        # Check max iters
+        max_iters = checks.check_max_iters(max_iters, self.n_scales)
+
+        n_images = len(images)
+        if gt_shapes is None:
+            gt_shapes = [None] * n_images
+
+        # Set initial shapes and initialize the per image lists of results
+        shapes = list(initial_shapes)
+        algorithm_results = [[] for _ in range(n_images)]
+        for i in range(self.n_scales):
+            # Gather this scale's images and ground truth shapes
+            scale_images = [ims[i] for ims in images]
+            scale_gt_shapes = [None if gt is None else gt[i]
+                               for gt in gt_shapes]
+
+            # Give this scale its share of the remaining time
+            scale_deadline = None
+            if deadline is not None:
+                scale_deadline = deadline.share(self.n_scales - i)
+                kwargs['deadline'] = scale_deadline
+
+            # Run algorithm on all images of this scale
+            algorithm = self.algorithms[i]
+            if hasattr(algorithm, 'run_batch'):
+                results = algorithm.run_batch(scale_images, shapes,
+                                              gt_shapes=scale_gt_shapes,
+                                              max_iters=max_iters[i],
+                                              return_costs=return_costs,
+                                              **kwargs)
+                stopped = [scale_deadline is not None and
+                           scale_deadline.expired] * n_images
+            else:
+                results, stopped = [], []
+                for j, (im, s, gt) in enumerate(zip(scale_images, shapes,
+                                                    scale_gt_shapes)):
+                    # Give this image its share of the scale's remaining time
+                    image_deadline = None
+                    if scale_deadline is not None:
+                        image_deadline = scale_deadline.share(n_images - j)
+                        kwargs['deadline'] = image_deadline
+                    results.append(algorithm.run(im, s, gt_shape=gt,
+                                                 max_iters=max_iters[i],
+                                                 return_costs=return_costs,
+                                                 **kwargs))
+                    stopped.append(image_deadline is not None and
+                                   image_deadline.expired)
+
+            # Record which results were stopped by the deadline
+            for algorithm_result, stop in zip(results, stopped):
+                if stop:
+                    algorithm_result._stop_reason = (
+                        'time_budget' if deadline.check() else
+                        'scale_time_share')
+
+            for j, algorithm_result in enumerate(results):
+                # Add algorithm result to the image's list
+                algorithm_results[j].append(algorithm_result)
+
+                # Prepare this scale's final shape for the next scale
+                if i < self.n_scales - 1:
+                    shapes[j] = self._shape_to_next_scale(
+                        algorithm_result.final_shape, i,
+                        affine_transforms[j], scale_transforms[j])
+
+        # Return list of algorithm results per image
+        return algorithm_results
+
+    def _shape_to_next_scale(self, shape, i, affine_transforms,
+                             scale_transforms):
+        r"""
+        Function that maps the final shape of scale `i` to the coordinate
+        frame of scale ``i + 1``.
+
+        Parameters
+        ----------
+        shape : `menpo.shape.PointCloud`
+            The final shape of scale `i`.
+        i : `int`
+            The index of the current scale.
+        affine_transforms : `list` of `menpo.transform.Affine`
+            The list of affine transforms per scale that are the inverses of the
+            transformations introduced by the rescale wrt the reference shape as
+            well as the feature extraction.
+        scale_transforms : `list` of `menpo.shape.Scale`
+            The list of inverse scaling transforms per scale.
+
+        Returns
+        -------
+        shape : `menpo.shape.PointCloud`
+            The shape in the coordinate frame of scale ``i + 1``.
+        """
+        if self.holistic_features[i + 1] != self.holistic_features[i]:
+            # If the features function of the current scale is different
+            # than the one of the next scale, this means that the affine
+            # transform is different as well. Thus we need to do the
+            # following composition:
+            #
+            #    S_{i+1} \circ A_{i+1} \circ inv(A_i) \circ inv(S_i)
+            #
+            # where:
+            #    S_i : scaling transform of current scale
+            #    S_{i+1} : scaling transform of next scale
+            #    A_i : affine transform of current scale
+            #    A_{i+1} : affine transform of next scale
+            t1 = scale_transforms[i].compose_after(affine_transforms[i])
+            t2 = affine_transforms[i + 1].pseudoinverse().compose_after(t1)
+            transform = scale_transforms[i + 1].pseudoinverse().compose_after(t2)
+            shape = transform.apply(shape)
+        elif self.scales[i] != self.scales[i + 1]:
+            # If the features function of the current scale is the same
+            # as the one of the next scale, this means that the affine
+            # transform is the same as well, and thus can be omitted.
+            # Given that the scale factors are different, we need to do
+            # the following composition:
+            #
+            #    S_{i+1} \circ inv(S_i)
+            #
+            # where:
+            #    S_i : scaling transform of current scale
+            #    S_{i+1} : scaling transform of next scale
+            transform = scale_transforms[i + 1].pseudoinverse().compose_after(
+                scale_transforms[i])
+            shape = transform.apply(shape)
+        return shape
+
     def _fitter_result(self, image, algorithm_results, affine_transforms,
                        scale_transforms, gt_shape=None):
         r"""
@@ -541,12 +934,13 @@ class MultiScaleNonParametricFitter(object):
             procedure.
         """
         return MultiScaleNonParametricIterativeResult(
-            results=algorithm_results, scales=self.scales,
+            results=algorithm_results,
+            scales=self._result_scales(algorithm_results),
             affine_transforms=affine_transforms,
             scale_transforms=scale_transforms, image=image, gt_shape=gt_shape)
 
     def fit_from_shape(self, image, initial_shape, max_iters=20, gt_shape=None,
-                       return_costs=False, **kwargs):
+                       return_costs=False, time_budget=None, **kwargs):
         r"""
         Fits the multi-scale fitter to an image given an initial shape.
 
@@ -570,6 +964,13 @@ class MultiScaleNonParametricFitter(object):
             computation increases the computational cost of the fitting. The
             additional computation cost depends on the fitting method. Only
             use this option for research purposes.*
+        time_budget : `float` or ``None``, optional
+            The wall-clock time budget of the fitting in seconds, which
+            includes the preparation of the image. The budget is shared by the
+            scales and the iterations stop once it has run out, even if
+            `max_iters` has not been reached. The scales that were stopped
+            early are recorded in the `early_stops` of the result. If
+            ``None``, then the fitting is only bounded by `max_iters`.
         kwargs : `dict`, optional
             Additional keyword arguments that can be passed to specific
             implementations.
@@ -580,6 +981,11 @@ class MultiScaleNonParametricFitter(object):
             The multi-scale fitting result containing the result of the fitting
             procedure.
         """
+        # Start the clock before the image is prepared
+        deadline = None
+        if time_budget is not None:
+            deadline = Deadline(time_budget)
+
         # Generate the list of images to be fitted, as well as the correctly
         # scaled initial and ground truth shapes per level. The function also
         # returns the lists of affine and scale transforms per level that are
@@ -599,7 +1005,8 @@ class MultiScaleNonParametricFitter(object):
                                       affine_transforms=affine_transforms,
                                       scale_transforms=scale_transforms,
                                       max_iters=max_iters, gt_shapes=gt_shapes,
-                                      return_costs=return_costs, **kwargs)
+                                      return_costs=return_costs,
+                                      deadline=deadline, **kwargs)
 
         # Return multi-scale fitting result
         return self._fitter_result(image=image,
@@ -609,7 +1016,7 @@ class MultiScaleNonParametricFitter(object):
                                    gt_shape=gt_shape)
 
     def fit_from_bb(self, image, bounding_box, max_iters=20, gt_shape=None,
-                    return_costs=False, **kwargs):
+                    return_costs=False, time_budget=None, **kwargs):
         r"""
         Fits the multi-scale fitter to an image given an initial bounding box.
 
@@ -634,6 +1041,13 @@ class MultiScaleNonParametricFitter(object):
             computation increases the computational cost of the fitting. The
             additional computation cost depends on the fitting method. Only
             use this option for research purposes.*
+        time_budget : `float` or ``None``, optional
+            The wall-clock time budget of the fitting in seconds, which
+            includes the preparation of the image. The budget is shared by the
+            scales and the iterations stop once it has run out, even if
+            `max_iters` has not been reached. The scales that were stopped
+            early are recorded in the `early_stops` of the result. If
+            ``None``, then the fitting is only bounded by `max_iters`.
         kwargs : `dict`, optional
             Additional keyword arguments that can be passed to specific
             implementations.
@@ -648,7 +1062,175 @@ class MultiScaleNonParametricFitter(object):
                                                       bounding_box)
         return self.fit_from_shape(image=image, initial_shape=initial_shape,
                                    max_iters=max_iters, gt_shape=gt_shape,
-                                   return_costs=return_costs, **kwargs)
+                                   return_costs=return_costs,
+                                   time_budget=time_budget, **kwargs)
+
+    def fit_from_shapes(self, images, initial_shapes, max_iters=20,
+                        gt_shapes=None, return_costs=False, time_budget=None,
+                        **kwargs):
+        r"""
+        Fits the multi-scale fitter to a batch of images given an initial
+        shape per image. The images are first prepared one by one and then
+        fitted scale by scale, so that the algorithm of each scale is applied
+        on all the images before moving to the next scale.
+
+        Note that only the algorithms that implement a ``run_batch`` method
+        fit all the images of a scale at once, i.e. the non-parametric and
+        the parametric appearance SDM algorithms. The rest of the algorithms,
+        e.g. the AAM, CLM and APS ones, are still applied one image at a
+        time, thus the results are the same as calling :meth:`fit_from_shape`
+        per image.
+
+        Parameters
+        ----------
+        images : `list` of `menpo.image.Image` or subclass
+            The images to be fitted.
+        initial_shapes : `list` of `menpo.shape.PointCloud`
+            The initial shape estimate per image from which the fitting
+            procedure will start.
+        max_iters : `int` or `list` of `int`, optional
+            The maximum number of iterations. If `int`, then it specifies the
+            maximum number of iterations over all scales. If `list` of `int`,
+            then specifies the maximum number of iterations per scale.
+        gt_shapes : `list` of `menpo.shape.PointCloud`, optional
+            The ground truth shape associated to each image.
+        return_costs : `bool`, optional
+            If ``True``, then the cost function values will be computed
+            during the fitting procedure. Then these cost values will be
+            assigned to the returned `fitting_result`. *Note that the costs
+            computation increases the computational cost of the fitting. The
+            additional computation cost depends on the fitting method. Only
+            use this option for research purposes.*
+        time_budget : `float` or ``None``, optional
+            The wall-clock time budget of the fitting of the whole batch in
+            seconds, which includes the preparation of the images. The budget
+            is shared by the scales and the iterations stop once it has run
+            out, even if `max_iters` has not been reached. The scales that
+            were stopped early are recorded in the `early_stops` of each
+            result. If ``None``, then the fitting is only bounded by
+            `max_iters`.
+        kwargs : `dict`, optional
+            Additional keyword arguments that can be passed to specific
+            implementations.
+
+        Returns
+        -------
+        fitting_results : `list` of :map:`MultiScaleNonParametricIterativeResult` or subclass
+            The multi-scale fitting result of each image, in the same order
+            as the provided images.
+
+        Raises
+        ------
+        ValueError
+            The number of images and initial shapes must be the same
+        ValueError
+            The number of images and ground truth shapes must be the same
+        """
+        n_images = len(images)
+        if len(initial_shapes) != n_images:
+            raise ValueError('The number of images and initial shapes must '
+                             'be the same')
+        if gt_shapes is None:
+            gt_shapes = [None] * n_images
+        elif len(gt_shapes) != n_images:
+            raise ValueError('The number of images and ground truth shapes '
+                             'must be the same')
+
+        # Start the clock before the images are prepared
+        deadline = None
+        if time_budget is not None:
+            deadline = Deadline(time_budget)
+
+        # Prepare all the images, see fit_from_shape
+        images_per_scale = []
+        scaled_initial_shapes = []
+        scaled_gt_shapes = []
+        affine_transforms = []
+        scale_transforms = []
+        for image, initial_shape, gt_shape in zip(images, initial_shapes,
+                                                  gt_shapes):
+            (ims, i_shapes, g_shapes, a_transforms,
+             s_transforms) = self._prepare_image(image, initial_shape,
+                                                 gt_shape=gt_shape)
+            images_per_scale.append(ims)
+            scaled_initial_shapes.append(i_shapes[0])
+            scaled_gt_shapes.append(g_shapes)
+            affine_transforms.append(a_transforms)
+            scale_transforms.append(s_transforms)
+
+        # Execute multi-scale fitting on the whole batch
+        algorithm_results = self._fit_batch(
+            images=images_per_scale, initial_shapes=scaled_initial_shapes,
+            affine_transforms=affine_transforms,
+            scale_transforms=scale_transforms, gt_shapes=scaled_gt_shapes,
+            max_iters=max_iters, return_costs=return_costs, deadline=deadline,
+            **kwargs)
+
+        # Return multi-scale fitting result per image
+        return [self._fitter_result(image=image, algorithm_results=results,
+                                    affine_transforms=a_transforms,
+                                    scale_transforms=s_transforms,
+                                    gt_shape=gt_shape)
+                for image, results, a_transforms, s_transforms, gt_shape in
+                zip(images, algorithm_results, affine_transforms,
+                    scale_transforms, gt_shapes)]
+
+    def fit_from_bbs(self, images, bounding_boxes, max_iters=20,
+                     gt_shapes=None, return_costs=False, time_budget=None,
+                     **kwargs):
+        r"""
+        Fits the multi-scale fitter to a batch of images given an initial
+        bounding box per image. Please see :meth:`fit_from_shapes` for details.
+
+        Parameters
+        ----------
+        images : `list` of `menpo.image.Image` or subclass
+            The images to be fitted.
+        bounding_boxes : `list` of `menpo.shape.PointDirectedGraph`
+            The initial bounding box per image from which the fitting
+            procedure will start. Note that the bounding boxes are used in
+            order to align the model's reference shape.
+        max_iters : `int` or `list` of `int`, optional
+            The maximum number of iterations. If `int`, then it specifies the
+            maximum number of iterations over all scales. If `list` of `int`,
+            then specifies the maximum number of iterations per scale.
+        gt_shapes : `list` of `menpo.shape.PointCloud`, optional
+            The ground truth shape associated to each image.
+        return_costs : `bool`, optional
+            If ``True``, then the cost function values will be computed
+            during the fitting procedure. Then these cost values will be
+            assigned to the returned `fitting_result`. *Note that the costs
+            computation increases the computational cost of the fitting. The
+            additional computation cost depends on the fitting method. Only
+            use this option for research purposes.*
+        time_budget : `float` or ``None``, optional
+            The wall-clock time budget of the fitting of the whole batch in
+            seconds, which includes the preparation of the images. The budget
+            is shared by the scales and the iterations stop once it has run
+            out, even if `max_iters` has not been reached. The scales that
+            were stopped early are recorded in the `early_stops` of each
+            result. If ``None``, then the fitting is only bounded by
+            `max_iters`.
+        kwargs : `dict`, optional
+            Additional keyword arguments that can be passed to specific
+            implementations.
+
+        Returns
+        -------
+        fitting_results : `list` of :map:`MultiScaleNonParametricIterativeResult` or subclass
+            The multi-scale fitting result of each image, in the same order
+            as the provided images.
+        """
+        aligned_shapes = align_shape_with_bounding_boxes(
+            self.reference_shape.points,
+            np.array([bb.points for bb in bounding_boxes]))
+        initial_shapes = [self.reference_shape.from_vector(s.ravel())
+                          for s in aligned_shapes]
+        return self.fit_from_shapes(images=images,
+                                    initial_shapes=initial_shapes,
+                                    max_iters=max_iters, gt_shapes=gt_shapes,
+                                    return_costs=return_costs,
+                                    time_budget=time_budget, **kwargs)
 
 
 class MultiScaleParametricFitter(MultiScaleNonParametricFitter):
@@ -677,11 +1259,17 @@ class MultiScaleParametricFitter(MultiScaleNonParametricFitter):
         They must provided in ascending order, i.e. from lowest to highest scale.
     algorithms : `list` of `class`
         The list of algorithm objects that will perform the fitting per scale.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type to which the images of all scales are cast
+        before fitting, e.g. ``np.float32``. If ``None``, then the images are
+        not cast.
     """
-    def __init__(self, scales, reference_shape, holistic_features, algorithms):
+    def __init__(self, scales, reference_shape, holistic_features, algorithms,
+                 dtype=None):
         super(MultiScaleParametricFitter, self).__init__(
             scales=scales, reference_shape=reference_shape,
-            holistic_features=holistic_features, algorithms=algorithms)
+            holistic_features=holistic_features, algorithms=algorithms,
+            dtype=dtype)
 
     def _fitter_result(self, image, algorithm_results, affine_transforms,
                        scale_transforms, gt_shape=None):
@@ -710,7 +1298,8 @@ class MultiScaleParametricFitter(MultiScaleNonParametricFitter):
             procedure.
         """
         return MultiScaleParametricIterativeResult(
-            results=algorithm_results, scales=self.scales,
+            results=algorithm_results,
+            scales=self._result_scales(algorithm_results),
             affine_transforms=affine_transforms,
             scale_transforms=scale_transforms, image=image, gt_shape=gt_shape)
 
@@ -722,6 +1311,11 @@ def generate_perturbations_from_gt(images, n_perturbations, perturb_func,
     Function that returns a callable that generates perturbations of the bounding
     boxes of the provided images.
 
+    If `perturb_func` is :map:`noisy_shape_from_bounding_box` (or a
+    `functools.partial` of it with keyword arguments only), then the
+    perturbations of all the images are generated at once by
+    :map:`noisy_shapes_from_bounding_boxes`.
+
     Parameters
     ----------
     images : `list` of `menpo.image.Image`
@@ -744,13 +1338,18 @@ def generate_perturbations_from_gt(images, n_perturbations, perturb_func,
     """
     if bb_group_glob is None:
         bb_generator = lambda im: [im.landmarks[gt_group].bounding_box()]
-        n_bbs = 1
     else:
         def bb_glob(im):
             return [v.bounding_box()
                     for _, v in im.landmarks.items_matching(bb_group_glob)]
         bb_generator = bb_glob
-        n_bbs = len(bb_glob(images[0]))
+
+    # The ground truth and the provided bounding boxes of each image are
+    # collected once, since they are consumed both by the batch perturbation
+    # and by the loop that attaches the perturbations to the images
+    image_bbs = [(im.landmarks[gt_group].bounding_box(), bb_generator(im))
+                 for im in images]
+    n_bbs = len(image_bbs[0][1])
 
     if n_bbs == 0:
         raise ValueError('Must provide a valid bounding box glob - no bounding '
@@ -767,13 +1366,26 @@ def generate_perturbations_from_gt(images, n_perturbations, perturb_func,
         msg = '- Generating {} new bounding boxes directly from the ' \
               'ground truth shape'.format(n_perturbations)
 
-    wrap = partial(print_progress, prefix=msg, verbose=verbose)
-    for im in wrap(images):
-        gt_s = im.landmarks[gt_group].bounding_box()
+    batch_kwargs = _noisy_shape_from_bounding_box_kwargs(perturb_func)
+    if batch_kwargs is not None:
+        # Perturb the bounding boxes of all the images at once, in the same
+        # order as they are consumed below
+        gt_bbs, bbs = [], []
+        for gt_s, bb_list in image_bbs:
+            for bb in bb_list:
+                gt_bbs.append(gt_s.points)
+                bbs.append(bb.points)
+        perturbed = iter(noisy_shapes_from_bounding_boxes(
+            np.repeat(gt_bbs, n_perturbations, axis=0),
+            np.repeat(bbs, n_perturbations, axis=0), **batch_kwargs))
+        perturb_func = lambda gt_s, bb: PointCloud(next(perturbed),
+                                                   copy=False)
 
+    wrap = partial(print_progress, prefix=msg, verbose=verbose)
+    for im, (gt_s, bb_list) in wrap(list(zip(images, image_bbs))):
         k = 0
         im_bounds = im.bounds()
-        for bb in bb_generator(im):
+        for bb in bb_list:
             for _ in range(n_perturbations):
                 p_s = perturb_func(gt_s, bb).bounding_box()
                 perturb_bbox_group = '__generated_bb_{}'.format(k)
@@ -788,3 +1400,71 @@ def generate_perturbations_from_gt(images, n_perturbations, perturb_func,
     generated_bb_func = lambda x: [v for k, v in x.landmarks.items_matching(
         '__generated_bb_*')]
     return generated_bb_func
+
+
+def _noisy_shape_from_bounding_box_kwargs(perturb_func):
+    # Returns the keyword arguments of the perturbation function if it is
+    # noisy_shape_from_bounding_box, possibly wrapped in partials with
+    # keyword arguments only, otherwise None
+    kwargs = {}
+    while isinstance(perturb_func, partial):
+        if perturb_func.args:
+            return None
+        kwargs = dict(perturb_func.keywords, **kwargs)
+        perturb_func = perturb_func.func
+    if perturb_func is noisy_shape_from_bounding_box:
+        return kwargs
+    return None
+
+
+def compare_fitting_precision(reference_fitter, fitter, images, initial_shapes,
+                              gt_shapes, max_iters=20,
+                              error_func=euclidean_bb_normalised_error):
+    r"""
+    Function that benchmarks the accuracy of a fitter against a reference
+    fitter on a set of images. It is mainly useful for measuring the effect of
+    fitting with reduced floating point precision, e.g. by comparing a fitter
+    constructed with ``dtype=np.float32`` against the same fitter in double
+    precision.
+
+    Parameters
+    ----------
+    reference_fitter : :map:`MultiScaleNonParametricFitter` or subclass
+        The reference fitter, e.g. a double precision fitter.
+    fitter : :map:`MultiScaleNonParametricFitter` or subclass
+        The fitter to be compared against the reference one.
+    images : `list` of `menpo.image.Image`
+        The reference set of images.
+    initial_shapes : `list` of `menpo.shape.PointCloud`
+        The initial shape per image.
+    gt_shapes : `list` of `menpo.shape.PointCloud`
+        The ground truth shape per image.
+    max_iters : `int` or `list` of `int`, optional
+        The maximum number of iterations of the fittings.
+    error_func : `callable`, optional
+        The function that computes the error of a final shape given the ground
+        truth shape.
+
+    Returns
+    -------
+    benchmark : `dict`
+        The benchmark with keys ``'reference_errors'`` and ``'errors'`` (the
+        `error_func` value of each final shape), ``'shape_differences'`` (the
+        maximum absolute difference in pixels between the final shapes of the
+        two fitters per image), as well as ``'reference_time'`` and
+        ``'time'`` (the total fitting time in seconds of each fitter).
+    """
+    benchmark = {}
+    final_shapes = []
+    for key, f in [('reference_', reference_fitter), ('', fitter)]:
+        start = time()
+        results = [f.fit_from_shape(image, initial_shape, max_iters=max_iters)
+                   for image, initial_shape in zip(images, initial_shapes)]
+        benchmark[key + 'time'] = time() - start
+        benchmark[key + 'errors'] = np.array(
+            [error_func(r.final_shape, gt_shape)
+             for r, gt_shape in zip(results, gt_shapes)])
+        final_shapes.append([r.final_shape.points for r in results])
+    benchmark['shape_differences'] = np.array(
+        [np.max(np.abs(a - b)) for a, b in zip(*final_shapes)])
+    return benchmark
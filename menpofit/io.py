@@ -1,6 +1,14 @@
 from __future__ import absolute_import  # or menpofit.math causes trouble!
+from io import BytesIO
 from math import ceil
+import json
+import os
+import pickle
+import struct
 import sys
+import warnings
+
+import numpy as np
 
 try:
     from urllib2 import urlopen  # Py2
@@ -19,6 +27,14 @@ MENPO_URL = 'http://static.menpo.org'
 # Compatible with this version of menpofit.
 MENPOFIT_BINARY_VERSION = 0
 
+# Magic bytes and version of the compact (memory-mappable) file format. The
+# version needs to be bumped every time the layout of the file changes.
+COMPACT_MAGIC = b'MENPOFIT'
+COMPACT_FORMAT_VERSION = 1
+
+# Arrays of the compact format are aligned to this number of bytes in the file
+_COMPACT_ALIGNMENT = 64
+
 
 def image_greyscale_crop_preprocess(image, pointcloud, crop_proportion=1.0):
     r"""
@@ -274,6 +290,234 @@ class PickleWrappedFitter(object):
         return result
 
 
+class _CompactPickler(pickle.Pickler):
+    r"""
+    Pickler that does not serialize the large `ndarray` objects of the object
+    graph. Instead, they are gathered in `self.arrays` and a reference to
+    their index is stored in the pickle.
+    """
+    def __init__(self, file, min_array_bytes):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.min_array_bytes = min_array_bytes
+        self.arrays = []
+        # Maps the id of an array to its index, so that an array that is
+        # referenced multiple times is stored once. Note that the arrays are
+        # kept alive by self.arrays, so their ids cannot be reused.
+        self._array_ids = {}
+
+    def persistent_id(self, obj):
+        if not isinstance(obj, np.ndarray) or obj.dtype.hasobject:
+            return None
+        # Arrays that are already memory-mapped are always stored externally,
+        # so that they are never copied into the pickle
+        if (type(obj) is not np.memmap and
+                (type(obj) is not np.ndarray or
+                 obj.nbytes < self.min_array_bytes)):
+            return None
+        index = self._array_ids.get(id(obj))
+        if index is None:
+            index = len(self.arrays)
+            self._array_ids[id(obj)] = index
+            self.arrays.append(obj)
+        return 'ndarray', index
+
+
+class _CompactUnpickler(pickle.Unpickler):
+    r"""
+    Unpickler that restores the externally stored arrays of a compact file,
+    by memory-mapping them from the file.
+    """
+    def __init__(self, file, path, arrays, mmap_mode):
+        pickle.Unpickler.__init__(self, file)
+        self.path = path
+        self.arrays = arrays
+        self.mmap_mode = mmap_mode
+        self._loaded = {}
+
+    def persistent_load(self, pid):
+        kind, index = pid
+        if kind != 'ndarray':
+            raise pickle.UnpicklingError(
+                'Unsupported persistent id {}'.format(kind))
+        array = self._loaded.get(index)
+        if array is None:
+            array = _load_compact_array(self.path, self.arrays[index],
+                                        self.mmap_mode)
+            self._loaded[index] = array
+        return array
+
+
+def _load_compact_array(path, info, mmap_mode):
+    dtype = np.dtype(info['dtype'])
+    shape = tuple(info['shape'])
+    if int(np.prod(shape)) == 0:
+        # Empty arrays cannot be memory-mapped
+        return np.empty(shape, dtype=dtype, order=info['order'])
+    array = np.memmap(path, dtype=dtype, mode=mmap_mode or 'r',
+                      offset=info['offset'], shape=shape, order=info['order'])
+    if mmap_mode is None:
+        # Read the array into memory and release the mapping
+        array = np.array(array)
+    return array
+
+
+def _aligned(offset):
+    return -(-offset // _COMPACT_ALIGNMENT) * _COMPACT_ALIGNMENT
+
+
+def export_compact(obj, path, overwrite=False, min_array_bytes=64 * 1024):
+    r"""
+    Exports a trained model or fitter (e.g. :map:`AAM`,
+    :map:`LucasKanadeAAMFitter`, :map:`CLM`, :map:`SupervisedDescentFitter`,
+    :map:`GenerativeAPS` or a :map:`PickleWrappedFitter`) to a file with the
+    compact menpofit format, that can be loaded with :map:`import_compact`.
+
+    The object graph is pickled, except for the large `ndarray` objects (e.g.
+    PCA components and means, regressors, FFT filters as well as the
+    precomputations of the fitters). These are stored uncompressed and aligned
+    after the pickle, so that they can be memory-mapped at load time. Note
+    that the fitters are stored after their construction, thus loading them
+    does not repeat their precomputations.
+
+    The file is laid out as follows:
+
+    1. The magic bytes ``b'MENPOFIT'``, followed by the format version and the
+       length of the header as little-endian ``uint32`` and ``uint64``.
+    2. A JSON header that describes the location of the pickle and the
+       ``dtype``, ``shape``, memory ``order`` and ``offset`` of each array.
+    3. The pickle of the object graph.
+    4. The raw data of the arrays.
+
+    Parameters
+    ----------
+    obj : `object`
+        The model or fitter to export.
+    path : `Path` or `str`
+        The path of the file to create.
+    overwrite : `bool`, optional
+        If ``True``, then an existing file at `path` is overwritten.
+    min_array_bytes : `int`, optional
+        The arrays with at least this number of bytes are stored separately
+        from the pickle, in order to be memory-mapped at load time.
+
+    Raises
+    ------
+    ValueError
+        File already exists and overwrite != True
+    """
+    path = str(path)
+    if not overwrite:
+        try:
+            open(path, 'rb').close()
+        except IOError:
+            pass
+        else:
+            raise ValueError('File already exists and overwrite != True '
+                             '({})'.format(path))
+
+    # Pickle the object graph and gather the arrays
+    buf = BytesIO()
+    pickler = _CompactPickler(buf, min_array_bytes)
+    pickler.dump(obj)
+    pickled = buf.getvalue()
+
+    # Store each array in its C or Fortran layout, so that it is never
+    # transposed on load
+    arrays, orders = [], []
+    for a in pickler.arrays:
+        order = 'F' if a.flags.f_contiguous and not a.flags.c_contiguous else 'C'
+        arrays.append(np.asarray(a, order=order))
+        orders.append(order)
+
+    # The header stores the offsets of the data, which depend on the length
+    # of the header. Thus, the header is padded to a fixed length that leaves
+    # enough room for the offsets to grow by a few digits.
+    def header_bytes(base):
+        offset = base + len(pickled)
+        info = []
+        for a, order in zip(arrays, orders):
+            offset = _aligned(offset)
+            info.append({'dtype': a.dtype.str, 'shape': list(a.shape),
+                         'order': order, 'offset': offset})
+            offset += a.nbytes
+        from menpofit import __version__
+        return json.dumps({'menpofit_version': __version__,
+                           'python_version': sys.version_info.major,
+                           'pickle_offset': base,
+                           'pickle_length': len(pickled),
+                           'arrays': info}).encode('utf-8'), info
+
+    prefix_length = len(COMPACT_MAGIC) + struct.calcsize('<IQ')
+    header, _ = header_bytes(0)
+    header_length = _aligned(len(header) + 20 * (len(arrays) + 1))
+    header, info = header_bytes(prefix_length + header_length)
+    header = header.ljust(header_length, b' ')
+
+    with open(path, 'wb') as f:
+        f.write(COMPACT_MAGIC)
+        f.write(struct.pack('<IQ', COMPACT_FORMAT_VERSION, header_length))
+        f.write(header)
+        f.write(pickled)
+        for a, a_info in zip(arrays, info):
+            f.write(b'\0' * (a_info['offset'] - f.tell()))
+            # write the buffer of the array, without copying it
+            f.write(np.ascontiguousarray(
+                a.T if a_info['order'] == 'F' else a).data)
+
+
+def import_compact(path, mmap_mode='c'):
+    r"""
+    Imports a model or fitter that was exported with :map:`export_compact`.
+
+    The large arrays of the object are memory-mapped from the file, thus the
+    import time barely depends on the size of the model. Moreover, the
+    processes of a host that import the same file share the memory pages of
+    the arrays.
+
+    Parameters
+    ----------
+    path : `Path` or `str`
+        The path of the file.
+    mmap_mode : ``{'c', 'r', None}``, optional
+        The mode with which the arrays are memory-mapped. With ``'r'``, the
+        arrays are read-only. With ``'c'`` (copy-on-write), the arrays are
+        read-only with respect to the file, but a process that writes to an
+        array gets a private copy of the modified pages, while all the other
+        pages remain shared. The workspace arrays that the fitters write into
+        while fitting are not stored in the file, but allocated on import,
+        thus ``'r'`` can be used for fitters too. If ``None``, then the arrays
+        are read into memory.
+
+    Returns
+    -------
+    obj : `object`
+        The imported model or fitter.
+
+    Raises
+    ------
+    ValueError
+        File is not a compact menpofit file
+    ValueError
+        Unsupported compact format version
+    """
+    if mmap_mode not in ('c', 'r', None):
+        raise ValueError("mmap_mode must be 'c', 'r' or None")
+    path = str(path)
+    with open(path, 'rb') as f:
+        if f.read(len(COMPACT_MAGIC)) != COMPACT_MAGIC:
+            raise ValueError('{} is not a compact menpofit file'.format(path))
+        prefix = f.read(struct.calcsize('<IQ'))
+        version, header_length = struct.unpack('<IQ', prefix)
+        if version > COMPACT_FORMAT_VERSION:
+            raise ValueError('Unsupported compact format version {} (the '
+                             'latest supported version is {})'.format(
+                                 version, COMPACT_FORMAT_VERSION))
+        header = json.loads(f.read(header_length).decode('utf-8'))
+        f.seek(header['pickle_offset'])
+        buf = BytesIO(f.read(header['pickle_length']))
+    return _CompactUnpickler(buf, path, header['arrays'], mmap_mode).load()
+
+
 def menpofit_data_dir_path():
     r"""
     Returns a path to the ./data directory, creating it if needed.
@@ -391,7 +635,28 @@ def download_file(url, destination, verbose=False):
     req.close()
 
 
-def load_fitter(name):
+def compact_path_of_fitter(name):
+    r"""
+    Returns a path to where the compact version (see :map:`export_compact`)
+    of a fitter with identifier ``name`` can be located on disk.
+
+    Parameters
+    ----------
+    name : `str`
+        The identifier of the fitter, e.g. `balanced_frontal_face_aam`
+
+    Returns
+    -------
+    path :  `Path`
+        A path to the compact version of this fitter on disk
+    """
+    filename = '{}_v{}_py{}_c{}.mfit'.format(
+        name, MENPOFIT_BINARY_VERSION, sys.version_info.major,
+        COMPACT_FORMAT_VERSION)
+    return menpofit_data_dir_path() / filename
+
+
+def load_fitter(name, compact=False):
     r"""
     Load a fitter with identifier ``name``, pulling it from a remote URL if
     needed.
@@ -400,12 +665,30 @@ def load_fitter(name):
     ----------
     name : `str`
         The identifier of the fitter, e.g. `balanced_frontal_face_aam`
+    compact : `bool`, optional
+        If ``True``, then the first time the fitter is loaded, its constructed
+        version is exported with the compact format (see
+        :map:`export_compact`) next to the downloaded pickle. All subsequent
+        loads import the compact file, which memory-maps the arrays of the
+        fitter and does not repeat its precomputations. If the fitter cannot
+        be exported (e.g. its features are ``lambda`` functions), then a
+        warning is raised and the fitter is still returned.
 
     Returns
     -------
     fitter : `Fitter`
         A pre-trained menpofit `Fitter` that is ready to use.
     """
+    if compact:
+        compact_path = compact_path_of_fitter(name)
+        if compact_path.exists():
+            try:
+                return import_compact(compact_path)
+            except Exception:
+                # Fall back to the pickle and recreate the compact file
+                print('Error loading compact fitter - purging damaged file: '
+                      '{}'.format(compact_path))
+                compact_path.unlink()
     path = path_of_fitter(name)
     if not path.exists():
         print('Downloading {} fitter'.format(name))
@@ -414,7 +697,7 @@ def load_fitter(name):
         download_file(url, path, verbose=True)
     # Load the pickle and immediately invoke it.
     try:
-        return import_pickle(path)()
+        fitter = import_pickle(path)()
     except Exception as e:
         # Hmm something went wrong, and we couldn't load this fitter.
         # Purge it so next time we will redownload.
@@ -422,3 +705,18 @@ def load_fitter(name):
         print('Please try running again')
         path.unlink()
         raise e
+    if compact:
+        # Export to a temporary file that is then renamed, so that other
+        # processes never import a partially written file
+        tmp_path = compact_path.parent / '{}.{}.tmp'.format(
+            compact_path.name, os.getpid())
+        try:
+            export_compact(fitter, tmp_path, overwrite=True)
+            os.rename(str(tmp_path), str(compact_path))
+        except Exception as e:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            warnings.warn('The {} fitter cannot be stored in the compact '
+                          'format, thus it will be loaded from its pickle '
+                          'again: {}'.format(name, e))
+    return fitter
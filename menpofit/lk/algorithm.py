@@ -1,6 +1,8 @@
 from scipy.linalg import norm
 import numpy as np
 
+from menpofit.base import expired
+
 from .result import LucasKanadeAlgorithmResult
 
 
@@ -70,7 +72,7 @@ class ForwardAdditive(LucasKanade):
     Forward Additive (FA) Lucas-Kanade algorithm.
     """
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False):
+            return_costs=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -94,6 +96,9 @@ class ForwardAdditive(LucasKanade):
             computation increases the computational cost of the fitting. The
             additional computation cost depends on the fitting method. Only
             use this option for research purposes.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -114,7 +119,8 @@ class ForwardAdditive(LucasKanade):
         eps = np.Inf
 
         # Forward Compositional Algorithm
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # warp image
             IWxp = image.warp_to_mask(self.template.mask, self.transform,
                                       warp_landmarks=False)
@@ -203,7 +209,7 @@ class ForwardCompositional(LucasKanade):
                                    dW_dp.shape[-1:])
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False):
+            return_costs=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -227,6 +233,9 @@ class ForwardCompositional(LucasKanade):
             computation increases the computational cost of the fitting. The
             additional computation cost depends on the fitting method. Only
             use this option for research purposes.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -247,7 +256,8 @@ class ForwardCompositional(LucasKanade):
         eps = np.Inf
 
         # Forward Compositional Algorithm
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # warp image
             IWxp = image.warp_to_mask(self.template.mask, self.transform,
                                       warp_landmarks=False)
@@ -334,7 +344,7 @@ class InverseCompositional(LucasKanade):
         self.H = self.residual.hessian(self.filtered_J, sdi2=J)
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False):
+            return_costs=False, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -358,6 +368,9 @@ class InverseCompositional(LucasKanade):
             computation increases the computational cost of the fitting. The
             additional computation cost depends on the fitting method. Only
             use this option for research purposes.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -378,7 +391,8 @@ class InverseCompositional(LucasKanade):
         eps = np.Inf
 
         # Baker-Matthews, Inverse Compositional Algorithm
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # warp image
             IWxp = image.warp_to_mask(self.template.mask, self.transform,
                                       warp_landmarks=False)
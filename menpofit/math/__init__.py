@@ -1,3 +1,5 @@
 from .regression import (IRLRegression, IIRLRegression, PCRRegression,
                          OptimalLinearRegression, OPPRegression)
 from .correlationfilter import mccf, imccf, mosse, imosse
+from .decomposition import (randomized_pca, pca_from_matrix,
+                            increment_pca_from_matrix)
@@ -1,9 +1,8 @@
 import numpy as np
-from numpy.fft import fft2, ifft2, ifftshift
-from scipy.sparse import spdiags, eye as speye
-from scipy.sparse.linalg import spsolve
+from numpy.fft import ifftshift
+from scipy.sparse import issparse
 
-from menpofit.math.fft_utils import pad, crop
+from menpofit.math.fft_utils import pad, crop, rfft2, irfft2, half_spectrum
 
 
 def mosse(X, y, l=0.01, boundary='constant', crop_filter=True):
@@ -30,12 +29,14 @@ def mosse(X, y, l=0.01, boundary='constant', crop_filter=True):
     f : ``(1, response_h, response_w)`` `ndarray`
         Minimum Output Sum od Squared Errors (MOSSE) filter associated to
         the training images.
-    sXY : ``(N,)`` `ndarray`
-        The auto-correlation array, where
-        ``N = (image_h+response_h-1) * (image_w+response_w-1) * n_channels``.
-    sXX : ``(N, N)`` `ndarray`
-        The cross-correlation array, where
-        ``N = (image_h+response_h-1) * (image_w+response_w-1) * n_channels``.
+    sXY : ``(n_channels, H, W // 2 + 1)`` `ndarray`
+        The auto-correlation array, which stores the half spectrum of
+        :map:`rfft2`, where ``H = image_h+response_h-1`` and
+        ``W = image_w+response_w-1``.
+    sXX : ``(n_channels, H, W // 2 + 1)`` `ndarray`
+        The cross-correlation array, which stores the half spectrum of
+        :map:`rfft2`, where ``H = image_h+response_h-1`` and
+        ``W = image_w+response_w-1``.
 
     References
     ----------
@@ -59,7 +60,7 @@ def mosse(X, y, l=0.01, boundary='constant', crop_filter=True):
     # extend desired response
     ext_y = pad(y, ext_shape)
     # fft of extended desired response
-    fft_ext_y = fft2(ext_y)
+    fft_ext_y = rfft2(ext_y)
 
     # auto and cross spectral energy matrices
     sXX = 0
@@ -69,7 +70,7 @@ def mosse(X, y, l=0.01, boundary='constant', crop_filter=True):
         # extend image
         ext_x = pad(x, ext_shape, boundary=boundary)
         # fft of extended image
-        fft_ext_x = fft2(ext_x)
+        fft_ext_x = rfft2(ext_x)
 
         # update auto and cross spectral energy matrices
         sXX += fft_ext_x.conj() * fft_ext_x
@@ -77,11 +78,9 @@ def mosse(X, y, l=0.01, boundary='constant', crop_filter=True):
 
     # compute desired correlation filter
     fft_ext_f = sXY / (sXX + l)
-    # reshape extended filter to extended image shape
-    fft_ext_f = fft_ext_f.reshape((k, ext_h, ext_w))
 
     # compute extended filter inverse fft
-    f = np.real(ifftshift(ifft2(fft_ext_f), axes=(-2, -1)))
+    f = ifftshift(irfft2(fft_ext_f, ext_shape), axes=(-2, -1))
 
     if crop_filter:
         # crop extended filter to match desired response shape
@@ -97,12 +96,16 @@ def imosse(A, B, n_ab, X, y, l=0.01, boundary='constant',
 
     Parameters
     ----------
-    A : ``(N,)`` `ndarray`
+    A : ``(n_channels, H, W // 2 + 1)`` `ndarray`
         The current auto-correlation array, where
-        ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``.
-    B : ``(N, N)`` `ndarray`
+        ``H = patch_h+response_h-1`` and ``W = patch_w+response_w-1``. The
+        full spectrum ``(n_channels, H, W)`` array, as returned by previous
+        versions of this function, is also supported.
+    B : ``(n_channels, H, W // 2 + 1)`` `ndarray`
         The current cross-correlation array, where
-        ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``.
+        ``H = patch_h+response_h-1`` and ``W = patch_w+response_w-1``. The
+        full spectrum ``(n_channels, H, W)`` array, as returned by previous
+        versions of this function, is also supported.
     n_ab : `int`
         The current number of images.
     X : ``(n_images, n_channels, image_h, image_w)`` `ndarray`
@@ -127,12 +130,14 @@ def imosse(A, B, n_ab, X, y, l=0.01, boundary='constant',
     f : ``(1, response_h, response_w)`` `ndarray`
         Minimum Output Sum od Squared Errors (MOSSE) filter associated to
         the training images.
-    sXY : ``(N,)`` `ndarray`
-        The auto-correlation array, where
-        ``N = (image_h+response_h-1) * (image_w+response_w-1) * n_channels``.
-    sXX : ``(N, N)`` `ndarray`
-        The cross-correlation array, where
-        ``N = (image_h+response_h-1) * (image_w+response_w-1) * n_channels``.
+    sXY : ``(n_channels, H, W // 2 + 1)`` `ndarray`
+        The auto-correlation array, which stores the half spectrum of
+        :map:`rfft2`, where ``H = image_h+response_h-1`` and
+        ``W = image_w+response_w-1``.
+    sXX : ``(n_channels, H, W // 2 + 1)`` `ndarray`
+        The cross-correlation array, which stores the half spectrum of
+        :map:`rfft2`, where ``H = image_h+response_h-1`` and
+        ``W = image_w+response_w-1``.
 
     References
     ----------
@@ -165,7 +170,7 @@ def imosse(A, B, n_ab, X, y, l=0.01, boundary='constant',
     # extend desired response
     ext_y = pad(y, ext_shape)
     # fft of extended desired response
-    fft_ext_y = fft2(ext_y)
+    fft_ext_y = rfft2(ext_y)
 
     # extend images
     ext_X = pad(X, ext_shape, boundary=boundary)
@@ -176,22 +181,21 @@ def imosse(A, B, n_ab, X, y, l=0.01, boundary='constant',
     # for each training image and desired response
     for ext_x in ext_X:
         # fft of extended image
-        fft_ext_x = fft2(ext_x)
+        fft_ext_x = rfft2(ext_x)
 
         # update auto and cross spectral energy matrices
         sXX += fft_ext_x.conj() * fft_ext_x
         sXY += fft_ext_x.conj() * fft_ext_y
 
-    # combine old and new auto and cross spectral energy matrices
-    sXY = nu_ab * A + nu_x * sXY
-    sXX = nu_ab * B + nu_x * sXX
+    # combine old and new auto and cross spectral energy matrices (which
+    # may be full spectra if they were computed by a previous version)
+    sXY = nu_ab * half_spectrum(A, ext_w) + nu_x * sXY
+    sXX = nu_ab * half_spectrum(B, ext_w) + nu_x * sXX
     # compute desired correlation filter
     fft_ext_f = sXY / (sXX + l)
-    # reshape extended filter to extended image shape
-    fft_ext_f = fft_ext_f.reshape((k, ext_h, ext_w))
 
     # compute filter inverse fft
-    f = np.real(ifftshift(ifft2(fft_ext_f), axes=(-2, -1)))
+    f = ifftshift(irfft2(fft_ext_f, ext_shape), axes=(-2, -1))
 
     if crop_filter:
         # crop extended filter to match desired response shape
@@ -200,6 +204,89 @@ def imosse(A, B, n_ab, X, y, l=0.01, boundary='constant',
     return f, sXY, sXX
 
 
+def _mccf_spectral_energies(ext_X, fft_ext_y):
+    r"""
+    Computes the spectral energy matrices of the Multi-Channel Correlation
+    Filter. Since the multi-channel problem decouples per frequency, the
+    auto-spectral energy is stored as a dense ``(n_channels, n_channels)``
+    matrix per frequency.
+
+    Parameters
+    ----------
+    ext_X : ``(n_images, n_channels, ext_h, ext_w)`` `ndarray`
+        The extended training images.
+    fft_ext_y : ``(1, ext_h, ext_w // 2 + 1)`` `ndarray`
+        The half spectrum of the extended desired response.
+
+    Returns
+    -------
+    sXY : ``(N,)`` `ndarray`
+        The cross-spectral energy vector, where ``N = D * n_channels`` and
+        ``D = ext_h * (ext_w // 2 + 1)``. It is stored channel by channel.
+    sXX : ``(D, n_channels, n_channels)`` `ndarray`
+        The auto-spectral energy matrix of each frequency.
+    """
+    n, k = ext_X.shape[:2]
+    # fft of extended images
+    # fft_ext_X: n_images x n_channels x ext_d
+    fft_ext_X = rfft2(ext_X).reshape((n, k, -1))
+    # cross spectral energy, i.e. conj(x_j) * y summed over the images
+    sXY = (fft_ext_X.conj().sum(axis=0) * fft_ext_y.reshape((1, -1))).ravel()
+    # auto spectral energy, i.e. conj(x_j) * x_l summed over the images,
+    # computed for all frequencies as a stack of matrix products
+    # fft_ext_X: ext_d x n_images x n_channels
+    fft_ext_X = np.ascontiguousarray(fft_ext_X.transpose((2, 0, 1)))
+    sXX = np.matmul(fft_ext_X.conj().transpose((0, 2, 1)), fft_ext_X)
+    return sXY, sXX
+
+
+def _mccf_half_spectrum_energies(A, B, ext_shape, k):
+    r"""
+    Converts the spectral energy matrices of the Multi-Channel Correlation
+    Filter that were computed over the full spectrum to the half spectrum
+    representation of :map:`rfft2`. The auto-spectral energy may be stored
+    either as an ``(N, N)`` `scipy.sparse` block matrix, where
+    ``N = ext_h * ext_w * k``, or as a dense ``(ext_h * ext_w, k, k)`` array.
+    Matrices that are already in the half spectrum representation are
+    returned unchanged.
+    """
+    ext_h, ext_w = ext_shape
+    ext_d = ext_h * ext_w
+    half_w = ext_w // 2 + 1
+    if issparse(B):
+        # each (j, l) block of the sparse matrix is diagonal
+        i = np.arange(ext_d)[:, None, None]
+        j = np.arange(k)[None, :, None]
+        l = np.arange(k)[None, None, :]
+        rows = np.broadcast_to(j * ext_d + i, (ext_d, k, k)).ravel()
+        cols = np.broadcast_to(l * ext_d + i, (ext_d, k, k)).ravel()
+        B = np.asarray(B.tocsr()[rows, cols]).reshape((ext_d, k, k))
+    if B.shape[0] == ext_d:
+        B = B.reshape((ext_h, ext_w, k, k))[:, :half_w].reshape((-1, k, k))
+    if A.shape[0] == ext_d * k:
+        A = A.reshape((k, ext_h, ext_w))[..., :half_w].ravel()
+    return A, B
+
+
+def _mccf_solve(sXX, sXY, l, ext_shape):
+    r"""
+    Solves the independent ``k x k`` linear systems (with regularization) of
+    the Multi-Channel Correlation Filter at once and returns the half
+    spectrum of the extended filter as a
+    ``(n_channels, ext_h, ext_w // 2 + 1)`` `ndarray`.
+    """
+    ext_d, k = sXX.shape[:2]
+    # add regularization to the diagonal of each system
+    sXX_l = sXX.copy()
+    sXX_l[:, np.arange(k), np.arange(k)] += l
+    # right hand sides
+    # sXY: ext_d x n_channels x 1
+    sXY = sXY.reshape((k, ext_d)).T[..., None]
+    fft_ext_f = np.linalg.solve(sXX_l, sXY)[..., 0]
+    # reshape extended filter to extended image shape
+    return fft_ext_f.T.reshape((k, ext_shape[0], -1))
+
+
 def mccf(X, y, l=0.01, boundary='constant', crop_filter=True):
     r"""
     Multi-Channel Correlation Filter (MCCF).
@@ -225,11 +312,13 @@ def mccf(X, y, l=0.01, boundary='constant', crop_filter=True):
         Multi-Channel Correlation Filter (MCCF) filter associated to the
         training images.
     sXY : ``(N,)`` `ndarray`
-        The auto-correlation array, where
-        ``N = (image_h+response_h-1) * (image_w+response_w-1) * n_channels``.
-    sXX : ``(N, N)`` `ndarray`
-        The cross-correlation array, where
-        ``N = (image_h+response_h-1) * (image_w+response_w-1) * n_channels``.
+        The auto-correlation array, where ``N = D * n_channels``,
+        ``D = (image_h+response_h-1) * ((image_w+response_w-1) // 2 + 1)``
+        is the number of frequencies of the half spectrum of :map:`rfft2`.
+    sXX : ``(D, n_channels, n_channels)`` `ndarray`
+        The cross-correlation array, which stores a
+        ``(n_channels, n_channels)`` matrix per frequency of the half
+        spectrum.
 
     References
     ----------
@@ -248,43 +337,24 @@ def mccf(X, y, l=0.01, boundary='constant', crop_filter=True):
     ext_h = hx + hy - 1
     ext_w = wx + wy - 1
     ext_shape = (ext_h, ext_w)
-    # extended dimensionality
-    ext_d = ext_h * ext_w
 
     # extend desired response
     ext_y = pad(y, ext_shape)
     # fft of extended desired response
-    fft_ext_y = fft2(ext_y)
+    fft_ext_y = rfft2(ext_y)
 
     # extend images
     ext_X = pad(X, ext_shape, boundary=boundary)
 
     # auto and cross spectral energy matrices
-    sXX = 0
-    sXY = 0
-    # for each training image and desired response
-    for ext_x in ext_X:
-        # fft of extended image
-        fft_ext_x = fft2(ext_x)
-
-        # store extended image fft as sparse diagonal matrix
-        diag_fft_x = spdiags(fft_ext_x.reshape((k, -1)),
-                             -np.arange(0, k) * ext_d, ext_d * k, ext_d).T
-        # vectorize extended desired response fft
-        diag_fft_y = fft_ext_y.ravel()
-
-        # update auto and cross spectral energy matrices
-        sXX += diag_fft_x.conj().T.dot(diag_fft_x)
-        sXY += diag_fft_x.conj().T.dot(diag_fft_y)
+    sXY, sXX = _mccf_spectral_energies(ext_X, fft_ext_y)
 
     # solve ext_d independent k x k linear systems (with regularization)
     # to obtain desired extended multi-channel correlation filter
-    fft_ext_f = spsolve(sXX + l * speye(sXX.shape[-1]), sXY)
-    # reshape extended filter to extended image shape
-    fft_ext_f = fft_ext_f.reshape((k, ext_h, ext_w))
+    fft_ext_f = _mccf_solve(sXX, sXY, l, ext_shape)
 
     # compute filter inverse fft
-    f = np.real(ifftshift(ifft2(fft_ext_f), axes=(-2, -1)))
+    f = ifftshift(irfft2(fft_ext_f, ext_shape), axes=(-2, -1))
 
     if crop_filter:
         # crop extended filter to match desired response shape
@@ -301,11 +371,15 @@ def imccf(A, B, n_ab, X, y, l=0.01, boundary='constant', crop_filter=True,
     Parameters
     ----------
     A : ``(N,)`` `ndarray`
-        The current auto-correlation array, where
-        ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``.
-    B : ``(N, N)`` `ndarray`
-        The current cross-correlation array, where
-        ``N = (patch_h+response_h-1) * (patch_w+response_w-1) * n_channels``.
+        The current auto-correlation array, where ``N = D * n_channels`` and
+        ``D = (patch_h+response_h-1) * ((patch_w+response_w-1) // 2 + 1)``
+        is the number of frequencies of the half spectrum of :map:`rfft2`.
+    B : ``(D, n_channels, n_channels)`` `ndarray`
+        The current cross-correlation array, which stores a
+        ``(n_channels, n_channels)`` matrix per frequency of the half
+        spectrum. The full spectrum arrays as well as the sparse block
+        matrix, as returned by previous versions of this function, are
+        converted to this representation.
     n_ab : `int`
         The current number of images.
     X : ``(n_images, n_channels, image_h, image_w)`` `ndarray`
@@ -331,11 +405,13 @@ def imccf(A, B, n_ab, X, y, l=0.01, boundary='constant', crop_filter=True,
         Multi-Channel Correlation Filter (MCCF) filter associated to the
         training images.
     sXY : ``(N,)`` `ndarray`
-        The auto-correlation array, where
-        ``N = (image_h+response_h-1) * (image_w+response_w-1) * n_channels``.
-    sXX : ``(N, N)`` `ndarray`
-        The cross-correlation array, where
-        ``N = (image_h+response_h-1) * (image_w+response_w-1) * n_channels``.
+        The auto-correlation array, where ``N = D * n_channels``,
+        ``D = (image_h+response_h-1) * ((image_w+response_w-1) // 2 + 1)``
+        is the number of frequencies of the half spectrum of :map:`rfft2`.
+    sXX : ``(D, n_channels, n_channels)`` `ndarray`
+        The cross-correlation array, which stores a
+        ``(n_channels, n_channels)`` matrix per frequency of the half
+        spectrum.
 
     References
     ----------
@@ -367,46 +443,29 @@ def imccf(A, B, n_ab, X, y, l=0.01, boundary='constant', crop_filter=True,
     ext_h = hz + hy - 1
     ext_w = wz + wy - 1
     ext_shape = (ext_h, ext_w)
-    # extended dimensionality
-    ext_d = ext_h * ext_w
 
     # extend desired response
     ext_y = pad(y, ext_shape)
     # fft of extended desired response
-    fft_ext_y = fft2(ext_y)
+    fft_ext_y = rfft2(ext_y)
 
     # extend images
     ext_X = pad(X, ext_shape, boundary=boundary)
 
     # auto and cross spectral energy matrices
-    sXX = 0
-    sXY = 0
-    # for each training image and desired response
-    for ext_x in ext_X:
-        # fft of extended image
-        fft_ext_x = fft2(ext_x)
-
-        # store extended image fft as sparse diagonal matrix
-        diag_fft_x = spdiags(fft_ext_x.reshape((k, -1)),
-                             -np.arange(0, k) * ext_d, ext_d * k, ext_d).T
-        # vectorize extended desired response fft
-        diag_fft_y = fft_ext_y.ravel()
-
-        # update auto and cross spectral energy matrices
-        sXX += diag_fft_x.conj().T.dot(diag_fft_x)
-        sXY += diag_fft_x.conj().T.dot(diag_fft_y)
+    sXY, sXX = _mccf_spectral_energies(ext_X, fft_ext_y)
 
     # combine old and new auto and cross spectral energy matrices
+    # (which may be full spectra if they were computed by a previous version)
+    A, B = _mccf_half_spectrum_energies(A, B, ext_shape, k)
     sXY = nu_ab * A + nu_x * sXY
     sXX = nu_ab * B + nu_x * sXX
     # solve ext_d independent k x k linear systems (with regularization)
     # to obtain desired extended multi-channel correlation filter
-    fft_ext_f = spsolve(sXX + l * speye(sXX.shape[-1]), sXY)
-    # reshape extended filter to extended image shape
-    fft_ext_f = fft_ext_f.reshape((k, ext_h, ext_w))
+    fft_ext_f = _mccf_solve(sXX, sXY, l, ext_shape)
 
     # compute filter inverse fft
-    f = np.real(ifftshift(ifft2(fft_ext_f), axes=(-2, -1)))
+    f = ifftshift(irfft2(fft_ext_f, ext_shape), axes=(-2, -1))
     if crop_filter:
         # crop extended filter to match desired response shape
         f = crop(f, y_shape)
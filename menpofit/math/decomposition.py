@@ -0,0 +1,199 @@
+import numpy as np
+
+from menpo.math import pca
+from menpo.model import PCAModel, PCAVectorModel
+
+from menpofit.checks import check_random_state
+
+
+def randomized_pca(X, n_components, centre=True, inplace=False,
+                   n_oversamples=10, n_power_iterations=2, random_state=None):
+    r"""
+    Apply a randomized truncated Principal Component Analysis (PCA) on the
+    data matrix `X` that only computes the `n_components` leading components.
+    The range of the data matrix is approximated by projecting it on
+    ``n_components + n_oversamples`` random directions, which is refined by
+    `n_power_iterations` power iterations [1]. Thus, the cost of the
+    decomposition is linear to the size of the data matrix and its memory
+    requirements depend on the number of components rather than the number
+    of samples.
+
+    The eigenvalues of the discarded components are not computed. Instead,
+    the residual variance of the data matrix is spread equally over them,
+    thus their sum and mean (i.e. the noise variance of the model) are exact.
+
+    Parameters
+    ----------
+    X : ``(n_samples, n_dims)`` `ndarray`
+        Data matrix.
+    n_components : `int`
+        The number of components to compute.
+    centre : `bool`, optional
+        Whether to centre the data matrix. If `False`, zero will be subtracted.
+    inplace : `bool`, optional
+        Whether to do the mean subtracting inplace or not.
+    n_oversamples : `int`, optional
+        The number of additional random directions that are used for
+        approximating the range of the data matrix. Larger values increase
+        the accuracy of the last components.
+    n_power_iterations : `int`, optional
+        The number of power iterations. Larger values increase the accuracy
+        when the eigenvalues decay slowly.
+    random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the random directions. If
+        ``None``, then the global random number generator of `numpy` is used,
+        thus ``np.random.seed`` makes the decomposition reproducible.
+
+    Returns
+    -------
+    U (eigenvectors) : ``(n_components, n_dims)`` `ndarray`
+        Eigenvectors of the data matrix.
+    l (eigenvalues) : ``(n_components,)`` `ndarray`
+        Positive eigenvalues of the data matrix.
+    m (mean vector) : ``(n_dims,)`` `ndarray`
+        Mean that was subtracted from the data matrix.
+    trimmed_l (trimmed eigenvalues) : ``(n_trimmed,)`` `ndarray`
+        The mean eigenvalue of the discarded components, once per component.
+
+    References
+    ----------
+    .. [1] N. Halko, P. G. Martinsson, J. A. Tropp. "Finding Structure with
+       Randomness: Probabilistic Algorithms for Constructing Approximate
+       Matrix Decompositions". SIAM Review, 2011.
+    """
+    n, d = X.shape
+    if centre:
+        m = np.mean(X, axis=0)
+    else:
+        m = np.zeros(d, dtype=X.dtype)
+    if inplace:
+        X -= m
+    else:
+        X = X - m
+    rank = min(n - 1 if centre else n, d)
+    n_components = min(n_components, rank)
+    n_directions = min(n_components + n_oversamples, rank)
+
+    standard_normal = check_random_state(random_state)[0]
+    omega = standard_normal((d, n_directions)).astype(X.dtype)
+    # Q: n x n_directions orthonormal basis of the approximate range of X
+    Q = np.linalg.qr(X.dot(omega))[0]
+    del omega
+    for _ in range(n_power_iterations):
+        Q = np.linalg.qr(X.T.dot(Q))[0]
+        Q = np.linalg.qr(X.dot(Q))[0]
+    # B: n_directions x d projection of X on the basis, thus X ~= Q B
+    B = Q.T.dot(X)
+    _, s, V = np.linalg.svd(B, full_matrices=False)
+    U = V[:n_components]
+    l = s[:n_components] ** 2 / (n - 1)
+
+    n_trimmed = rank - n_components
+    trimmed_l = np.zeros(0)
+    if n_trimmed > 0:
+        total_variance = np.einsum('ij,ij->', X, X) / (n - 1)
+        residual = max(total_variance - l.sum(), 0.)
+        trimmed_l = np.full(n_trimmed, residual / n_trimmed)
+    return U, l, m, trimmed_l
+
+
+def pca_from_matrix(data, template=None, max_n_components=None,
+                    randomized=False, n_oversamples=10, n_power_iterations=2,
+                    random_state=None):
+    r"""
+    Builds a `menpo.model.PCAModel` directly from a data matrix, e.g. the one
+    returned by :map:`warp_images_to_matrix`, instead of from a `list` of
+    images. Contrary to ``PCAModel(images)``, the samples are not copied
+    into a new data matrix, thus they only exist once in memory.
+
+    Note that the provided data matrix is centred in place and must not be
+    used after calling this function. If it is a ``float32`` matrix, then the
+    decomposition is computed in single precision, but the components and the
+    mean of the returned model are ``float64``.
+
+    If `randomized` is ``True`` and `max_n_components` is an `int`, then only
+    the requested number of components is computed with
+    :map:`randomized_pca`, instead of computing all of them and trimming the
+    model afterwards. The leading components are then approximated.
+
+    Parameters
+    ----------
+    data : ``(n_samples, n_features)`` `ndarray` or `numpy.memmap`
+        The data matrix with one vectorized sample per row.
+    template : `menpo.base.Vectorizable` or ``None``, optional
+        A sample that is used as the template of the model, i.e. its
+        ``from_vector`` method creates the mean and the instances of the
+        model. If ``None``, then a `menpo.model.PCAVectorModel` is returned.
+    max_n_components : `int` or `float` or ``None``, optional
+        The maximum number of components to keep in the model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized : `bool`, optional
+        Whether to compute an `int` number of components with
+        :map:`randomized_pca`. It has no effect otherwise.
+    n_oversamples : `int`, optional
+        The oversampling of the randomized decomposition. See
+        :map:`randomized_pca`.
+    n_power_iterations : `int`, optional
+        The number of power iterations of the randomized decomposition. See
+        :map:`randomized_pca`.
+    random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized
+        decomposition. If ``None``, then the global random number generator
+        of `numpy` is used.
+
+    Returns
+    -------
+    model : `menpo.model.PCAModel` or `menpo.model.PCAVectorModel`
+        The PCA model.
+    """
+    n_samples = data.shape[0]
+    trimmed_e_values = None
+    if (randomized and isinstance(max_n_components, (int, np.integer)) and
+            max_n_components < min(data.shape)):
+        e_vectors, e_values, mean, trimmed_e_values = randomized_pca(
+            data, max_n_components, centre=True, inplace=True,
+            n_oversamples=n_oversamples,
+            n_power_iterations=n_power_iterations, random_state=random_state)
+        max_n_components = None
+    else:
+        e_vectors, e_values, mean = pca(data, centre=True, inplace=True)
+    # Discard the components whose eigenvalues are within the rounding error
+    # of the decomposition at the precision of the data matrix
+    if e_values.size > 0:
+        tol = 10 * e_values[0] * np.finfo(data.dtype).eps
+        n_components = np.count_nonzero(e_values > tol)
+        e_vectors, e_values = e_vectors[:n_components], e_values[:n_components]
+    mean = mean.astype(np.float64)
+    if template is None:
+        model_cls = PCAVectorModel
+    else:
+        model_cls = PCAModel
+        mean = template.from_vector(mean)
+    model = model_cls.init_from_components(
+        e_vectors.astype(np.float64), e_values.astype(np.float64), mean,
+        n_samples, True, max_n_components=max_n_components)
+    if trimmed_e_values is not None:
+        # Keep the variance of the components that were never computed, so
+        # that the noise variance of the model is the same as with trimming
+        model._trimmed_eigenvalues = trimmed_e_values.astype(np.float64)
+    return model
+
+
+def increment_pca_from_matrix(model, data, forgetting_factor=1.0):
+    r"""
+    Increments a `menpo.model.PCAModel` with the samples of a data matrix,
+    e.g. the one returned by :map:`warp_images_to_matrix`, without converting
+    them back to a `list` of images.
+
+    Parameters
+    ----------
+    model : `menpo.model.PCAModel`
+        The PCA model to increment.
+    data : ``(n_samples, n_features)`` `ndarray` or `numpy.memmap`
+        The data matrix with one vectorized sample per row.
+    forgetting_factor : ``[0.0, 1.0]`` `float`, optional
+        Forgetting factor that weights the relative contribution of new
+        samples vs old samples. If ``1.0``, all samples are weighted equally.
+    """
+    PCAVectorModel.increment(model, data, forgetting_factor=forgetting_factor)
@@ -7,6 +7,7 @@ from menpo.feature.base import rebuild_feature_image
 
 try:
     # try importing pyfftw
+    from pyfftw.interfaces import numpy_fft as pyfftw_fft
     from pyfftw.interfaces.numpy_fft import fft2, ifft2, fftshift, ifftshift
 
     try:
@@ -18,6 +19,7 @@ try:
                       "will be used instead. Consequently, all algorithms "
                       "using ffts will be running at a slower speed.",
                       RuntimeWarning)
+        pyfftw_fft = None
         from numpy.fft import fft2, ifft2, fftshift, ifftshift
 except ImportError:
     warnings.warn("pyfftw is not installed on your system, numpy.fft will be "
@@ -25,8 +27,138 @@ except ImportError:
                   "will be running at a slower speed. Consider installing "
                   "pyfftw (pip install pyfftw) to speed up your ffts.",
                   ImportWarning)
+    pyfftw_fft = None
     from numpy.fft import fft2, ifft2, fftshift, ifftshift
 
+try:
+    # scipy.fft (scipy >= 1.4) can run the ffts on multiple workers
+    import scipy.fft as scipy_fft
+except ImportError:
+    scipy_fft = None
+
+
+# The library and the number of workers used by the real-input ffts
+_fft_backend = {'name': None, 'workers': None}
+
+
+def set_fft_backend(name=None, workers=None):
+    r"""
+    Sets the library that computes the real-input ffts (:map:`rfft2` and
+    :map:`irfft2`) of the correlation filters and the convolution-based
+    experts.
+
+    Parameters
+    ----------
+    name : ``{'pyfftw', 'scipy', 'numpy'}`` or ``None``, optional
+        The fft library. If ``None``, then the first available library of
+        ``'pyfftw'``, ``'scipy'`` (i.e. `scipy.fft`) and ``'numpy'`` is used.
+    workers : `int` or ``None``, optional
+        The number of threads that compute each fft. It is ignored by the
+        ``'numpy'`` backend. If ``None``, then a single thread is used.
+
+    Raises
+    ------
+    ValueError
+        Unknown fft backend
+    ValueError
+        The fft backend is not available on your system
+    """
+    if name is None:
+        if pyfftw_fft is not None:
+            name = 'pyfftw'
+        elif scipy_fft is not None:
+            name = 'scipy'
+        else:
+            name = 'numpy'
+    if name not in ('pyfftw', 'scipy', 'numpy'):
+        raise ValueError("Unknown fft backend '{}'. The supported backends "
+                         "are: 'pyfftw', 'scipy' and 'numpy'.".format(name))
+    if ((name == 'pyfftw' and pyfftw_fft is None) or
+            (name == 'scipy' and scipy_fft is None)):
+        raise ValueError("The fft backend '{}' is not available on your "
+                         "system.".format(name))
+    _fft_backend['name'] = name
+    _fft_backend['workers'] = workers
+
+
+def _real_fft_module():
+    name = _fft_backend['name']
+    workers = _fft_backend['workers']
+    if name == 'pyfftw':
+        return pyfftw_fft, {} if workers is None else {'threads': workers}
+    elif name == 'scipy':
+        return scipy_fft, {'workers': workers}
+    else:
+        return np.fft, {}
+
+
+def rfft2(x, s=None):
+    r"""
+    Computes the 2d fft of a real array over its last two axes. Due to the
+    Hermitian symmetry of the result, only the non-negative frequencies of the
+    last axis are returned.
+
+    Parameters
+    ----------
+    x : ``(..., height, width)`` `ndarray`
+        The real input array.
+    s : (`int`, `int`) or ``None``, optional
+        The shape of the transformed axes. If ``None``, then the shape of the
+        last two axes of `x` is used.
+
+    Returns
+    -------
+    fft_x : ``(..., height, width // 2 + 1)`` `ndarray`
+        The half spectrum of `x`.
+    """
+    fft_module, kwargs = _real_fft_module()
+    return fft_module.rfft2(x, s=s, **kwargs)
+
+
+def irfft2(fft_x, s):
+    r"""
+    Computes the inverse of :map:`rfft2`, i.e. the real 2d inverse fft of a
+    half spectrum over its last two axes.
+
+    Parameters
+    ----------
+    fft_x : ``(..., height, width // 2 + 1)`` `ndarray`
+        The half spectrum.
+    s : (`int`, `int`)
+        The shape of the real output over the transformed axes.
+
+    Returns
+    -------
+    x : ``(..., height, width)`` `ndarray`
+        The real inverse fft.
+    """
+    fft_module, kwargs = _real_fft_module()
+    return fft_module.irfft2(fft_x, s=tuple(int(d) for d in s), **kwargs)
+
+
+def half_spectrum(fft_x, width):
+    r"""
+    Returns the half spectrum of the fft of a real array, as returned by
+    :map:`rfft2`. If the provided spectrum is already a half spectrum, it is
+    returned unchanged.
+
+    Parameters
+    ----------
+    fft_x : ``(..., height, width)`` or ``(..., height, width // 2 + 1)`` `ndarray`
+        The full or half spectrum.
+    width : `int`
+        The width of the real array on the spatial domain.
+
+    Returns
+    -------
+    fft_x : ``(..., height, width // 2 + 1)`` `ndarray`
+        The half spectrum.
+    """
+    return fft_x[..., :width // 2 + 1]
+
+
+set_fft_backend()
+
 
 # TODO: Document me!
 def pad(pixels, ext_shape, boundary='constant'):
@@ -95,7 +227,8 @@ def ndconvolution(wrapped):
 
 # TODO: Document me!
 @ndconvolution
-def fft_convolve2d(x, f, mode='same', boundary='constant', fft_filter=False):
+def fft_convolve2d(x, f, mode='same', boundary='constant', fft_filter=False,
+                   fft_ext_shape=None):
     r"""
     Performs fast 2d convolution in the frequency domain convolving each image
     channel with its corresponding filter channel.
@@ -114,6 +247,11 @@ def fft_convolve2d(x, f, mode='same', boundary='constant', fft_filter=False):
         If `True`, the filter is assumed to be defined on the frequency
         domain. If `False` the filter is assumed to be defined on the
         spatial domain.
+    fft_ext_shape : (`int`, `int`) or ``None``, optional
+        The extended spatial shape of a filter that is defined on the
+        frequency domain. It is required if the filter is given as a half
+        spectrum (see :map:`rfft2`). If ``None``, then the filter is assumed
+        to be a full spectrum.
 
     Returns
     -------
@@ -123,14 +261,19 @@ def fft_convolve2d(x, f, mode='same', boundary='constant', fft_filter=False):
     """
     if fft_filter:
         # extended shape is filter shape
-        ext_shape = np.asarray(f.shape[-2:])
+        if fft_ext_shape is None:
+            fft_ext_shape = f.shape[-2:]
+        ext_shape = np.asarray(fft_ext_shape)
+        x_shape = np.asarray(x.shape[-2:])
+        f_shape = ((ext_shape + 1) / 1.5).astype(int)
+        f_half_shape = (f_shape / 2).astype(int)
 
         # extend image and filter
         ext_x = pad(x, ext_shape, boundary=boundary)
 
         # compute ffts of extended image
-        fft_ext_x = fft2(ext_x)
-        fft_ext_f = f
+        fft_ext_x = rfft2(ext_x)
+        fft_ext_f = half_spectrum(f, ext_shape[1])
     else:
         # extended shape
         x_shape = np.asarray(x.shape[-2:])
@@ -143,14 +286,14 @@ def fft_convolve2d(x, f, mode='same', boundary='constant', fft_filter=False):
         ext_f = pad(f, ext_shape)
 
         # compute ffts of extended image and extended filter
-        fft_ext_x = fft2(ext_x)
-        fft_ext_f = fft2(ext_f)
+        fft_ext_x = rfft2(ext_x)
+        fft_ext_f = rfft2(ext_f)
 
     # compute extended convolution in Fourier domain
     fft_ext_c = fft_ext_f * fft_ext_x
 
     # compute ifft of extended convolution
-    ext_c = np.real(ifftshift(ifft2(fft_ext_c), axes=(-2, -1)))
+    ext_c = ifftshift(irfft2(fft_ext_c, ext_shape), axes=(-2, -1))
 
     if mode is 'full':
         return ext_c
@@ -167,7 +310,8 @@ def fft_convolve2d(x, f, mode='same', boundary='constant', fft_filter=False):
 # TODO: Document me!
 @ndconvolution
 def fft_convolve2d_sum(x, f, mode='same', boundary='constant',
-                       fft_filter=False, axis=0, keepdims=True):
+                       fft_filter=False, axis=0, keepdims=True,
+                       fft_ext_shape=None):
     r"""
     Performs fast 2d convolution in the frequency domain convolving each image
     channel with its corresponding filter channel and summing across the
@@ -193,6 +337,12 @@ def fft_convolve2d_sum(x, f, mode='same', boundary='constant',
         If `True` the number of dimensions of the result is the same as the
         number of dimensions of the filter. If `False` the channel dimension
         is lost in the result.
+    fft_ext_shape : (`int`, `int`) or ``None``, optional
+        The extended spatial shape of a filter that is defined on the
+        frequency domain. It is required if the filter is given as a half
+        spectrum (see :map:`rfft2`). If ``None``, then the filter is assumed
+        to be a full spectrum.
+
     Returns
     -------
     c: ``(1, height, width)`` `ndarray`
@@ -200,19 +350,21 @@ def fft_convolve2d_sum(x, f, mode='same', boundary='constant',
         filter channel and summing across the channel axis.
     """
     if fft_filter:
-        fft_ext_f = f
-
         # extended shape is fft_ext_filter shape
+        if fft_ext_shape is None:
+            fft_ext_shape = f.shape[-2:]
+        ext_shape = np.asarray(fft_ext_shape)
         x_shape = np.asarray(x.shape[-2:])
-        f_shape = ((np.asarray(fft_ext_f.shape[-2:]) + 1) / 1.5).astype(int)
+        f_shape = ((ext_shape + 1) / 1.5).astype(int)
         f_half_shape = (f_shape / 2).astype(int)
-        ext_shape = np.asarray(f.shape[-2:])
+
+        fft_ext_f = half_spectrum(f, ext_shape[1])
 
         # extend image and filter
         ext_x = pad(x, ext_shape, boundary=boundary)
 
         # compute ffts of extended image
-        fft_ext_x = fft2(ext_x)
+        fft_ext_x = rfft2(ext_x)
     else:
         # extended shape
         x_shape = np.asarray(x.shape[-2:])
@@ -225,14 +377,14 @@ def fft_convolve2d_sum(x, f, mode='same', boundary='constant',
         ext_f = pad(f, ext_shape)
 
         # compute ffts of extended image and extended filter
-        fft_ext_x = fft2(ext_x)
-        fft_ext_f = fft2(ext_f)
+        fft_ext_x = rfft2(ext_x)
+        fft_ext_f = rfft2(ext_f)
 
     # compute extended convolution in Fourier domain
     fft_ext_c = np.sum(fft_ext_f * fft_ext_x, axis=axis, keepdims=keepdims)
 
     # compute ifft of extended convolution
-    ext_c = np.real(ifftshift(ifft2(fft_ext_c), axes=(-2, -1)))
+    ext_c = ifftshift(irfft2(fft_ext_c, ext_shape), axes=(-2, -1))
 
     if mode is 'full':
         return ext_c
@@ -1,8 +1,52 @@
+from copy import copy
+
 import numpy as np
 
 from menpo.math import pca
 
 
+def iterate_chunks(X, Y, chunk_size):
+    r"""
+    Generator that splits the provided feature and target vectors into chunks
+    of consecutive samples. Each chunk is copied into memory only when it is
+    requested, thus `X` and `Y` can be `numpy.memmap` arrays.
+
+    Parameters
+    ----------
+    X : ``(n_samples, n_features)`` `ndarray`
+        The array of feature vectors.
+    Y : ``(n_samples, n_dims)`` `ndarray`
+        The array of target vectors.
+    chunk_size : `int`
+        The number of samples per chunk.
+
+    Yields
+    ------
+    X_chunk : ``(chunk_size, n_features)`` `ndarray`
+        The feature vectors of the chunk.
+    Y_chunk : ``(chunk_size, n_dims)`` `ndarray`
+        The target vectors of the chunk.
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be a positive integer')
+    for i in range(0, X.shape[0], chunk_size):
+        yield (np.asarray(X[i:i + chunk_size]),
+               np.asarray(Y[i:i + chunk_size]))
+
+
+def _cast_arrays(regressor, names, dtype):
+    r"""
+    Returns a shallow copy of a regressor whose arrays with the provided
+    attribute names are cast to `dtype`.
+    """
+    regressor = copy(regressor)
+    for name in names:
+        value = getattr(regressor, name)
+        if value is not None:
+            setattr(regressor, name, value.astype(dtype))
+    return regressor
+
+
 class IRLRegression(object):
     r"""
     Class for training and applying Incremental Regularized Linear Regression.
@@ -24,7 +68,7 @@ class IRLRegression(object):
         self.V = None
         self.W = None
 
-    def train(self, X, Y):
+    def train(self, X, Y, chunk_size=None):
         r"""
         Train the regression model.
 
@@ -34,20 +78,72 @@ class IRLRegression(object):
             The array of feature vectors.
         Y : ``(n_dims, n_samples)`` `ndarray`
             The array of target vectors.
+        chunk_size : `int` or ``None``, optional
+            If `int`, then the samples are processed in chunks of
+            `chunk_size` samples, thus only a single chunk of `X` is loaded
+            in memory at a time. This is useful when `X` is a
+            `numpy.memmap`. If ``None``, then all the samples are processed
+            at once.
         """
-        if self.bias:
-            # add bias
-            X = np.hstack((X, np.ones((X.shape[0], 1))))
+        if chunk_size is None:
+            chunks = [(X, Y)]
+        else:
+            chunks = iterate_chunks(X, Y, chunk_size)
+        self.train_from_chunks(chunks)
+
+    def train_from_chunks(self, chunks):
+        r"""
+        Train the regression model from a stream of training data. The
+        matrices ``X^T X`` and ``X^T Y`` are accumulated chunk by chunk and
+        the regression is solved once all the chunks have been consumed.
+        Thus, the required memory depends on the number of features and not
+        on the number of samples. The chunks can have any floating point
+        type, since they are cast to double precision one at a time.
+
+        Parameters
+        ----------
+        chunks : `iterable` of (``(n_chunk_samples, n_features)`` `ndarray`, ``(n_chunk_samples, n_dims)`` `ndarray`)
+            The chunks of feature vectors and their corresponding target
+            vectors, e.g. a generator.
+
+        Raises
+        ------
+        ValueError
+            No training data was provided
+        """
+        XX = None
+        for X, Y in chunks:
+            # the products are accumulated in double precision, whatever the
+            # type of each chunk
+            n_samples, n_features = X.shape
+            if self.bias:
+                # add bias
+                X_b = np.empty((n_samples, n_features + 1))
+                X_b[:, :-1] = X
+                X_b[:, -1] = 1
+                X = X_b
+            else:
+                X = np.asarray(X, dtype=np.float64)
+            Y = np.asarray(Y, dtype=np.float64)
+            if XX is None:
+                XX = X.T.dot(X)
+                XY = X.T.dot(Y)
+                # allocate the matrix that stores the products of each chunk
+                XX_k = np.empty_like(XX)
+            else:
+                XX += np.dot(X.T, X, out=XX_k)
+                XY += X.T.dot(Y)
+        if XX is None:
+            raise ValueError('No training data was provided')
 
         # regularized linear regression
-        XX = X.T.dot(X)
         # ensure covariance is perfectly symmetric for inversion
         XX = (XX + XX.T) / 2.0
         if self.alpha:
             np.fill_diagonal(XX, self.alpha + np.diag(XX))
         if self.incrementable:
             self.V = np.linalg.inv(XX)
-        self.W = np.linalg.solve(XX, X.T.dot(Y))
+        self.W = np.linalg.solve(XX, XY)
 
     def increment(self, X, Y):
         r"""
@@ -72,6 +168,11 @@ class IRLRegression(object):
             # add bias
             X = np.hstack((X, np.ones((X.shape[0], 1))))
 
+        # the update is computed in double precision, but the model keeps the
+        # type to which it may have been cast (see astype)
+        dtype = self.W.dtype
+        W = self.W.astype(np.float64, copy=False)
+
         # incremental regularized linear regression
         U = X.dot(self.V).dot(X.T)
         if self.alpha:
@@ -79,7 +180,8 @@ class IRLRegression(object):
         U = np.linalg.inv(U)
         Q = self.V.dot(X.T).dot(U).dot(X)
         self.V = self.V - Q.dot(self.V)
-        self.W = self.W - Q.dot(self.W) + self.V.dot(X.T.dot(Y))
+        W = W - Q.dot(W) + self.V.dot(X.T.dot(Y))
+        self.W = W.astype(dtype, copy=False)
 
     def predict(self, x):
         r"""
@@ -96,12 +198,28 @@ class IRLRegression(object):
             The prediction vector.
         """
         if self.bias:
-            if len(x.shape) == 1:
-                x = np.hstack((x, np.ones(1)))
-            else:
-                x = np.hstack((x, np.ones((x.shape[0], 1))))
+            # apply the bias term separately, in order to avoid copying x
+            return np.dot(x, self.W[:-1]) + self.W[-1]
         return np.dot(x, self.W)
 
+    def astype(self, dtype):
+        r"""
+        Returns a copy of the regression model whose prediction arrays are
+        cast to `dtype`. The arrays that are only needed for incrementing the
+        model are not cast. Incrementing the returned model keeps `dtype`.
+
+        Parameters
+        ----------
+        dtype : `numpy.dtype`
+            The type of the prediction arrays, e.g. ``np.float32``.
+
+        Returns
+        -------
+        regressor : `object`
+            The cast regression model.
+        """
+        return _cast_arrays(self, ('W',), dtype)
+
 
 class IIRLRegression(IRLRegression):
     r"""
@@ -122,19 +240,26 @@ class IIRLRegression(IRLRegression):
         super(IIRLRegression, self).__init__(alpha=alpha, bias=False)
         self.alpha2 = alpha2
 
-    def train(self, X, Y):
+    def train_from_chunks(self, chunks):
         r"""
-        Train the regression model.
+        Train the regression model from a stream of training data. The
+        matrices ``Y^T Y`` and ``Y^T X`` are accumulated chunk by chunk and
+        the regression is solved once all the chunks have been consumed.
 
         Parameters
         ----------
-        X : ``(n_features, n_samples)`` `ndarray`
-            The array of feature vectors.
-        Y : ``(n_dims, n_samples)`` `ndarray`
-            The array of target vectors.
+        chunks : `iterable` of (``(n_chunk_samples, n_features)`` `ndarray`, ``(n_chunk_samples, n_dims)`` `ndarray`)
+            The chunks of feature vectors and their corresponding target
+            vectors, e.g. a generator.
+
+        Raises
+        ------
+        ValueError
+            No training data was provided
         """
         # regularized linear regression exchanging the roles of X and Y
-        super(IIRLRegression, self).train(Y, X)
+        super(IIRLRegression, self).train_from_chunks(
+            (Y, X) for X, Y in chunks)
         J = self.W
         # solve the original problem by computing the pseudo-inverse of the
         # previous solution
@@ -160,16 +285,17 @@ class IIRLRegression(IRLRegression):
         ValueError
             Model is not incrementable
         """
+        dtype = self.W.dtype
         # incremental least squares exchanging the roles of X and Y
         super(IIRLRegression, self).increment(Y, X)
-        J = self.W
+        J = self.W.astype(np.float64, copy=False)
         # solve the original problem by computing the pseudo-inverse of the
         # previous solution
         # Note that everything is transposed from the above exchanging of roles
         H = J.dot(J.T)
         if self.alpha2:
             np.fill_diagonal(H, self.alpha2 + np.diag(H))
-        self.W = np.linalg.solve(H, J)
+        self.W = np.linalg.solve(H, J).astype(dtype, copy=False)
 
     def predict(self, x):
         r"""
@@ -268,12 +394,30 @@ class PCRRegression(object):
         """
         if self.bias:
             if len(x.shape) == 1:
-                x = np.hstack((x, np.ones(1)))
+                x = np.hstack((x, np.ones(1, dtype=x.dtype)))
             else:
-                x = np.hstack((x, np.ones((x.shape[0], 1))))
+                x = np.hstack((x, np.ones((x.shape[0], 1), dtype=x.dtype)))
         x = np.dot(np.dot(x, self.V.T), self.V)
         return np.dot(x, self.R)
 
+    def astype(self, dtype):
+        r"""
+        Returns a copy of the regression model whose prediction arrays are
+        cast to `dtype`. The arrays that are only needed for incrementing the
+        model are not cast. Incrementing the returned model keeps `dtype`.
+
+        Parameters
+        ----------
+        dtype : `numpy.dtype`
+            The type of the prediction arrays, e.g. ``np.float32``.
+
+        Returns
+        -------
+        regressor : `object`
+            The cast regression model.
+        """
+        return _cast_arrays(self, ('R',), dtype)
+
 
 class OptimalLinearRegression(object):
     r"""
@@ -361,11 +505,29 @@ class OptimalLinearRegression(object):
         """
         if self.bias:
             if len(x.shape) == 1:
-                x = np.hstack((x, np.ones(1)))
+                x = np.hstack((x, np.ones(1, dtype=x.dtype)))
             else:
-                x = np.hstack((x, np.ones((x.shape[0], 1))))
+                x = np.hstack((x, np.ones((x.shape[0], 1), dtype=x.dtype)))
         return np.dot(x, self.R)
 
+    def astype(self, dtype):
+        r"""
+        Returns a copy of the regression model whose prediction arrays are
+        cast to `dtype`. The arrays that are only needed for incrementing the
+        model are not cast.
+
+        Parameters
+        ----------
+        dtype : `numpy.dtype`
+            The type of the prediction arrays, e.g. ``np.float32``.
+
+        Returns
+        -------
+        regressor : `object`
+            The cast regression model.
+        """
+        return _cast_arrays(self, ('R',), dtype)
+
 
 class OPPRegression(object):
     r"""
@@ -444,7 +606,25 @@ class OPPRegression(object):
         """
         if self.bias:
             if len(x.shape) == 1:
-                x = np.hstack((x, np.ones(1)))
+                x = np.hstack((x, np.ones(1, dtype=x.dtype)))
             else:
-                x = np.hstack((x, np.ones((x.shape[0], 1))))
+                x = np.hstack((x, np.ones((x.shape[0], 1), dtype=x.dtype)))
         return np.dot(x, self.R)
+
+    def astype(self, dtype):
+        r"""
+        Returns a copy of the regression model whose prediction arrays are
+        cast to `dtype`. The arrays that are only needed for incrementing the
+        model are not cast.
+
+        Parameters
+        ----------
+        dtype : `numpy.dtype`
+            The type of the prediction arrays, e.g. ``np.float32``.
+
+        Returns
+        -------
+        regressor : `object`
+            The cast regression model.
+        """
+        return _cast_arrays(self, ('R',), dtype)
@@ -0,0 +1,109 @@
+import numpy as np
+from numpy.testing import assert_allclose
+from scipy.sparse import bmat, diags
+
+from menpofit.math import mosse, imosse, mccf, imccf
+from menpofit.math.fft_utils import pad, crop
+
+
+rng = np.random.RandomState(0)
+X = rng.randn(6, 3, 9, 8)
+y = np.exp(-((np.arange(5)[:, None] - 2.) ** 2 +
+             (np.arange(5)[None] - 2.) ** 2) / 2.)[None]
+
+
+def full_spectrum_energies(X, y):
+    # the auto and cross spectral energies of all the frequencies of the full
+    # spectrum, i.e. a (k, k) auto-spectral matrix per frequency
+    n, k, hx, wx = X.shape
+    _, hy, wy = y.shape
+    ext_shape = (hx + hy - 1, wx + wy - 1)
+    fft_ext_y = np.fft.fft2(pad(y, ext_shape)).ravel()
+    fft_ext_X = np.fft.fft2(pad(X, ext_shape)).reshape((n, k, -1))
+    sXX = np.einsum('nid,njd->dij', fft_ext_X.conj(), fft_ext_X)
+    sXY = np.einsum('nid,d->di', fft_ext_X.conj(), fft_ext_y)
+    return sXY, sXX, ext_shape
+
+
+def reference_filter(sXY, sXX, l, ext_shape, y):
+    k = sXX.shape[-1]
+    fft_ext_f = np.linalg.solve(sXX + l * np.eye(k), sXY[..., None])[..., 0]
+    f = np.real(np.fft.ifftshift(np.fft.ifft2(
+        fft_ext_f.T.reshape((k,) + ext_shape)), axes=(-2, -1)))
+    return crop(f, y.shape[-2:])
+
+
+def test_mccf():
+    f, sXY, sXX = mccf(X, y, l=0.1)
+    sXY_ref, sXX_ref, ext_shape = full_spectrum_energies(X, y)
+    assert_allclose(f, reference_filter(sXY_ref, sXX_ref, 0.1, ext_shape, y),
+                    atol=1e-12)
+    # a (k, k) matrix per frequency of the half spectrum
+    assert sXX.shape == (13 * (12 // 2 + 1), 3, 3)
+    assert sXY.shape == (sXX.shape[0] * 3,)
+
+
+def reference_imccf(l):
+    # the spectral energies of the old and new images weighted by their
+    # number of samples
+    sXY_a, sXX_a, ext_shape = full_spectrum_energies(X[:4], y)
+    sXY_x, sXX_x, _ = full_spectrum_energies(X[4:], y)
+    return reference_filter(4. / 6 * sXY_a + 2. / 6 * sXY_x,
+                            4. / 6 * sXX_a + 2. / 6 * sXX_x, l, ext_shape, y)
+
+
+def test_imccf():
+    _, sXY, sXX = mccf(X[:4], y, l=0.1)
+    f_inc, _, _ = imccf(sXY, sXX, 4, X[4:], y, l=0.1)
+    assert_allclose(f_inc, reference_imccf(0.1), atol=1e-12)
+
+
+def test_imccf_legacy_sparse_state():
+    # the state of previous versions: full spectrum energies, with the auto
+    # spectral energy stored as a sparse (k * D, k * D) block matrix
+    sXY, sXX, _ = full_spectrum_energies(X[:4], y)
+    k = X.shape[1]
+    legacy_sXX = bmat([[diags(sXX[:, i, j]) for j in range(k)]
+                       for i in range(k)], format='csr')
+    legacy_sXY = sXY.T.ravel()
+    f_inc, _, _ = imccf(legacy_sXY, legacy_sXX, 4, X[4:], y, l=0.1)
+    assert_allclose(f_inc, reference_imccf(0.1), atol=1e-12)
+
+
+def reference_mosse_energies(X, y):
+    # the full spectrum energies of each channel
+    _, _, hx, wx = X.shape
+    _, hy, wy = y.shape
+    ext_shape = (hx + hy - 1, wx + wy - 1)
+    fft_ext_y = np.fft.fft2(pad(y, ext_shape))
+    fft_ext_X = np.fft.fft2(pad(X, ext_shape))
+    sXX = (fft_ext_X.conj() * fft_ext_X).sum(axis=0)
+    sXY = (fft_ext_X.conj() * fft_ext_y).sum(axis=0)
+    return sXY, sXX
+
+
+def reference_mosse_filter(sXY, sXX, l, y):
+    f = np.real(np.fft.ifftshift(np.fft.ifft2(sXY / (sXX + l)),
+                                 axes=(-2, -1)))
+    return crop(f, y.shape[-2:])
+
+
+def test_mosse():
+    f, sXY, sXX = mosse(X, y, l=0.1)
+    sXY_ref, sXX_ref = reference_mosse_energies(X, y)
+    assert_allclose(f, reference_mosse_filter(sXY_ref, sXX_ref, 0.1, y),
+                    atol=1e-12)
+    # the half spectrum of the energies is stored
+    assert sXX.shape == (3, 13, 12 // 2 + 1)
+    assert_allclose(sXX, sXX_ref[..., :12 // 2 + 1])
+
+
+def test_imosse_legacy_full_spectrum_state():
+    sXY_a, sXX_a = reference_mosse_energies(X[:4], y)
+    sXY_x, sXX_x = reference_mosse_energies(X[4:], y)
+    expected = reference_mosse_filter(4. / 6 * sXY_a + 2. / 6 * sXY_x,
+                                      4. / 6 * sXX_a + 2. / 6 * sXX_x, 0.1, y)
+    _, sXY, sXX = mosse(X[:4], y, l=0.1)
+    for A, B in [(sXY, sXX), (sXY_a, sXX_a)]:
+        f_inc, _, _ = imosse(A, B, 4, X[4:], y, l=0.1)
+        assert_allclose(f_inc, expected, atol=1e-12)
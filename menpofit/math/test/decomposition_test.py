@@ -0,0 +1,99 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+from menpo.model import PCAVectorModel
+
+from menpofit.math import (randomized_pca, pca_from_matrix,
+                           increment_pca_from_matrix)
+from menpofit.test.helpers import GeneratorLike
+
+
+rng = np.random.RandomState(0)
+# 40 samples of low rank data plus noise
+X = (rng.randn(40, 6).dot(rng.randn(6, 30)) * np.linspace(3, 1, 30) +
+     0.01 * rng.randn(40, 30))
+
+
+def assert_same_models(model, expected, rtol=1e-7, atol=0):
+    assert model.n_components == expected.n_components
+    assert_allclose(model.mean(), expected.mean(), rtol=rtol, atol=atol)
+    assert_allclose(model.eigenvalues, expected.eigenvalues, rtol=rtol,
+                    atol=atol)
+    # The components are defined up to their sign
+    assert_allclose(np.abs(model.components), np.abs(expected.components),
+                    rtol=rtol, atol=atol)
+    assert_allclose(model.noise_variance(), expected.noise_variance(),
+                    rtol=rtol, atol=atol)
+
+
+def test_pca_from_matrix():
+    expected = PCAVectorModel(X.copy())
+    assert_same_models(pca_from_matrix(X.copy()), expected)
+    # The matrix is centred in place
+    data = X.copy()
+    pca_from_matrix(data)
+    assert_allclose(data.mean(axis=0), 0, atol=1e-12)
+
+
+def test_pca_from_matrix_float32():
+    model = pca_from_matrix(X.astype(np.float32))
+    assert model.components.dtype == np.float64
+    expected = PCAVectorModel(X.copy())
+    # The rounding error of the trailing (noise) components is large
+    model.trim_components(6)
+    expected.trim_components(6)
+    assert_same_models(model, expected, rtol=1e-3, atol=1e-4)
+
+
+def test_pca_from_matrix_variance_ratio():
+    expected = PCAVectorModel(X.copy(), max_n_components=0.9)
+    assert_same_models(pca_from_matrix(X.copy(), max_n_components=0.9),
+                       expected)
+
+
+def test_increment_pca_from_matrix():
+    expected = PCAVectorModel(X[:20].copy())
+    expected.increment(X[20:].copy())
+    model = pca_from_matrix(X[:20].copy())
+    increment_pca_from_matrix(model, X[20:].copy())
+    assert_same_models(model, expected, atol=1e-10)
+
+
+def test_randomized_pca():
+    expected = PCAVectorModel(X.copy())
+    U, l, m, trimmed_l = randomized_pca(X, 4, random_state=0)
+    assert_allclose(m, expected.mean())
+    assert_allclose(l, expected.eigenvalues[:4])
+    assert_allclose(np.abs(U), np.abs(expected.components[:4]), atol=1e-8)
+    # The residual variance is spread over the components never computed
+    assert trimmed_l.shape == (expected.n_components - 4,)
+    assert_allclose(trimmed_l.sum(), expected.eigenvalues[4:].sum())
+
+
+def test_randomized_pca_random_state():
+    # Without refinement, the eigenvalues depend on the random directions
+    kwargs = {'n_oversamples': 0, 'n_power_iterations': 0}
+    expected = randomized_pca(X, 4, random_state=1, **kwargs)[1]
+    assert_allclose(randomized_pca(X, 4, random_state=np.random.RandomState(1),
+                                   **kwargs)[1], expected)
+    # ``None`` draws from the global random number generator of numpy
+    np.random.seed(1)
+    assert_allclose(randomized_pca(X, 4, **kwargs)[1], expected)
+    # Any object with the sampling methods of a generator can be used
+    assert_allclose(randomized_pca(X, 4, random_state=GeneratorLike(1),
+                                   **kwargs)[1], expected)
+    if hasattr(np.random, 'default_rng'):
+        randomized_pca(X, 4, random_state=np.random.default_rng(1), **kwargs)
+    np.random.seed(2)
+    assert not np.allclose(randomized_pca(X, 4, **kwargs)[1], expected)
+
+
+def test_pca_from_matrix_randomized():
+    expected = PCAVectorModel(X.copy(), max_n_components=4)
+    # The exact decomposition is used unless the randomized one is requested
+    assert_same_models(pca_from_matrix(X.copy(), max_n_components=4),
+                       expected)
+    model = pca_from_matrix(X.copy(), max_n_components=4, randomized=True,
+                            random_state=0)
+    assert_same_models(model, expected, atol=1e-8)
+    assert_allclose(model.original_variance(), expected.original_variance())
@@ -0,0 +1,66 @@
+import numpy as np
+from numpy.testing import assert_allclose
+from nose.tools import raises
+
+from menpofit.math import fft_utils
+from menpofit.math.fft_utils import (set_fft_backend, rfft2, irfft2, pad,
+                                     crop, fft_convolve2d, fft_convolve2d_sum)
+
+
+rng = np.random.RandomState(0)
+x = rng.randn(3, 12, 11)
+f = rng.randn(3, 7, 6)
+
+
+def available_backends():
+    backends = ['numpy']
+    if fft_utils.scipy_fft is not None:
+        backends.append('scipy')
+    if fft_utils.pyfftw_fft is not None:
+        backends.append('pyfftw')
+    return backends
+
+
+def reference_convolve2d(x, f):
+    # the convolution of each channel, computed with full spectrum ffts
+    x_shape = np.asarray(x.shape[-2:])
+    ext_shape = x_shape + np.asarray(f.shape[-2:]) // 2 - 1
+    fft_ext_x = np.fft.fft2(pad(x, ext_shape))
+    fft_ext_f = np.fft.fft2(pad(f, ext_shape))
+    ext_c = np.real(np.fft.ifftshift(np.fft.ifft2(fft_ext_f * fft_ext_x),
+                                     axes=(-2, -1)))
+    return crop(ext_c, x_shape), fft_ext_f, ext_shape
+
+
+def test_rfft2():
+    try:
+        for backend in available_backends():
+            set_fft_backend(backend, workers=2)
+            fft_x = rfft2(x)
+            assert_allclose(fft_x, np.fft.fft2(x)[..., :11 // 2 + 1])
+            assert_allclose(irfft2(fft_x, x.shape[-2:]), x)
+    finally:
+        set_fft_backend()
+
+
+def test_fft_convolve2d():
+    expected, fft_ext_f, ext_shape = reference_convolve2d(x, f)
+    assert_allclose(fft_convolve2d(x, f), expected)
+    assert_allclose(fft_convolve2d_sum(x, f, keepdims=False),
+                    expected.sum(axis=0))
+    # filters defined on the frequency domain, as full or half spectra
+    half_fft_ext_f = fft_ext_f[..., :ext_shape[1] // 2 + 1]
+    for fft_filter in [fft_ext_f, half_fft_ext_f]:
+        assert_allclose(fft_convolve2d_sum(x, fft_filter, fft_filter=True,
+                                           fft_ext_shape=ext_shape),
+                        expected.sum(axis=0, keepdims=True))
+        assert_allclose(fft_convolve2d(x, fft_filter, fft_filter=True,
+                                       fft_ext_shape=ext_shape), expected)
+    # full spectrum filters of previous versions have no extended shape
+    assert_allclose(fft_convolve2d_sum(x, fft_ext_f, fft_filter=True),
+                    expected.sum(axis=0, keepdims=True))
+
+
+@raises(ValueError)
+def test_set_fft_backend_unknown_raises_valueerror():
+    set_fft_backend('fftpack')
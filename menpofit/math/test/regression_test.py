@@ -0,0 +1,69 @@
+import numpy as np
+from numpy.testing import assert_allclose
+from nose.tools import raises
+
+from menpofit.math import IRLRegression, IIRLRegression
+from menpofit.math.regression import iterate_chunks
+
+
+rng = np.random.RandomState(0)
+X = rng.randn(200, 10)
+Y = X.dot(rng.randn(10, 3)) + 0.1 * rng.randn(200, 3) + 2
+
+
+def test_irlr_train_chunks():
+    for bias in [True, False]:
+        r = IRLRegression(alpha=0.1, bias=bias, incrementable=True)
+        r.train(X, Y)
+        r_chunks = IRLRegression(alpha=0.1, bias=bias, incrementable=True)
+        r_chunks.train(X, Y, chunk_size=32)
+        assert_allclose(r_chunks.W, r.W)
+        assert_allclose(r_chunks.V, r.V)
+
+
+def test_iirlr_train_chunks():
+    r = IIRLRegression(alpha=0.1, alpha2=0.1)
+    r.train(X, Y)
+    r_chunks = IIRLRegression(alpha=0.1, alpha2=0.1)
+    r_chunks.train_from_chunks(iterate_chunks(X, Y, 50))
+    assert_allclose(r_chunks.W, r.W)
+
+
+def test_irlr_train_chunks_mixed_dtypes():
+    for bias in [True, False]:
+        r = IRLRegression(alpha=0.1, bias=bias)
+        r.train(X, Y)
+        chunks = [(X[:100], Y[:100]),
+                  (X[100:].astype(np.float32), Y[100:].astype(np.float32))]
+        r_chunks = IRLRegression(alpha=0.1, bias=bias)
+        r_chunks.train_from_chunks(chunks)
+        assert r_chunks.W.dtype == np.float64
+        assert_allclose(r_chunks.W, r.W, rtol=1e-5)
+
+
+def test_irlr_predict():
+    r = IRLRegression(alpha=0.1, bias=True)
+    r.train(X, Y)
+    expected = np.hstack((X, np.ones((X.shape[0], 1)))).dot(r.W)
+    assert_allclose(r.predict(X), expected)
+    assert_allclose(r.predict(X[0]), expected[0])
+    r32 = r.astype(np.float32)
+    prediction = r32.predict(X.astype(np.float32))
+    assert prediction.dtype == np.float32
+    assert_allclose(prediction, expected, rtol=1e-4)
+
+
+def test_cast_regressions_increment_keep_dtype():
+    for bias in [True, False]:
+        r = IRLRegression(alpha=0.1, bias=bias, incrementable=True)
+        r.train(X[:100], Y[:100])
+        r32 = r.astype(np.float32)
+        r.increment(X[100:], Y[100:])
+        r32.increment(X[100:], Y[100:])
+        assert r32.W.dtype == np.float32
+        assert_allclose(r32.W, r.W, rtol=1e-4, atol=1e-6)
+
+
+@raises(ValueError)
+def test_irlr_train_no_chunks_raises_valueerror():
+    IRLRegression().train_from_chunks(iter([]))
@@ -1,9 +1,10 @@
 import numpy as np
 
 from menpo.base import Targetable, Vectorizable
-from menpo.model import MeanLinearModel, PCAModel
+from menpo.model import MeanLinearModel, PCAModel, PCAVectorModel
 from menpo.model.vectorizable import VectorizableBackedModel
-from menpo.shape import mean_pointcloud
+from menpo.shape import PointCloud, mean_pointcloud
+from menpo.transform import AlignmentAffine, AlignmentSimilarity
 
 from menpofit.builder import align_shapes
 from menpofit.differentiable import DP
@@ -365,6 +366,48 @@ class PDM(ModelInstance):
                                              -1, self.n_dims)
         return d_dp.swapaxes(0, 1)
 
+    def project_batch(self, shapes):
+        r"""
+        Projects a batch of shapes to the parameters of the model with a few
+        matrix operations. The result is the same as calling
+        ``set_target(shape)`` followed by ``as_vector()`` for each shape, but
+        the state of the model does not change.
+
+        Parameters
+        ----------
+        shapes : ``(n_shapes, n_points, n_dims)`` `ndarray`
+            The points of the shapes.
+
+        Returns
+        -------
+        parameters : ``(n_shapes, n_parameters)`` `ndarray`
+            The parameters of each shape.
+        """
+        shapes = np.asarray(shapes)
+        return PCAVectorModel.project_vectors(
+            self.model, shapes.reshape(shapes.shape[0], -1))
+
+    def instance_batch(self, parameters):
+        r"""
+        Generates the shapes of a batch of parameters with a few matrix
+        operations. The result is the same as calling
+        ``_from_vector_inplace(p)`` followed by ``target.points`` for each
+        parameters vector, but the state of the model does not change.
+
+        Parameters
+        ----------
+        parameters : ``(n_shapes, n_parameters)`` `ndarray`
+            The parameters of each shape.
+
+        Returns
+        -------
+        shapes : ``(n_shapes, n_points, n_dims)`` `ndarray`
+            The points of the shapes.
+        """
+        parameters = np.asarray(parameters)
+        instances = PCAVectorModel.instance_vectors(self.model, parameters)
+        return instances.reshape(parameters.shape[0], -1, self.n_dims)
+
     def increment(self, shapes, n_shapes=None, forgetting_factor=1.0,
                   max_n_components=None, verbose=False):
         r"""
@@ -541,6 +584,126 @@ class GlobalPDM(PDM):
         """
         self.global_transform._from_vector_inplace(global_weights)
 
+    def project_batch(self, shapes):
+        r"""
+        Projects a batch of shapes to the parameters of the model with a few
+        matrix operations. The result is the same as calling
+        ``set_target(shape)`` followed by ``as_vector()`` for each shape, but
+        the state of the model does not change.
+
+        The global transform must be an affine transform that is linear in its
+        parameters, e.g. :map:`DifferentiableAlignmentSimilarity` or
+        :map:`DifferentiableAlignmentAffine`. The alignments of these two
+        transforms are vectorized as well, whereas any other global transform
+        is aligned to one shape at a time.
+
+        Parameters
+        ----------
+        shapes : ``(n_shapes, n_points, n_dims)`` `ndarray`
+            The points of the shapes.
+
+        Returns
+        -------
+        parameters : ``(n_shapes, n_parameters)`` `ndarray`
+            The parameters of each shape.
+        """
+        shapes = np.asarray(shapes)
+        global_parameters, transform_parameters = \
+            self._global_parameters_batch(shapes)
+        # bring the shapes to the model space with the inverse of their
+        # global transforms and project them to recover the weights
+        linear, translation = self._global_affine_batch(transform_parameters)
+        projected = np.matmul(shapes - translation[:, None],
+                              np.linalg.inv(linear))
+        weights = PDM.project_batch(self, projected)
+        return np.hstack((global_parameters, weights))
+
+    def instance_batch(self, parameters):
+        r"""
+        Generates the shapes of a batch of parameters with a few matrix
+        operations. The result is the same as calling
+        ``_from_vector_inplace(p)`` followed by ``target.points`` for each
+        parameters vector, but the state of the model does not change.
+
+        The global transform must be an affine transform that is linear in its
+        parameters, e.g. :map:`DifferentiableAlignmentSimilarity` or
+        :map:`DifferentiableAlignmentAffine`.
+
+        Parameters
+        ----------
+        parameters : ``(n_shapes, n_parameters)`` `ndarray`
+            The parameters of each shape.
+
+        Returns
+        -------
+        shapes : ``(n_shapes, n_points, n_dims)`` `ndarray`
+            The points of the shapes.
+        """
+        parameters = np.asarray(parameters)
+        global_parameters = parameters[:, :self.n_global_parameters]
+        instances = PDM.instance_batch(
+            self, parameters[:, self.n_global_parameters:])
+        linear, translation = self._global_affine_batch(
+            self._global_transform_parameters_batch(global_parameters))
+        return np.matmul(instances, linear) + translation[:, None]
+
+    def _global_parameters_batch(self, shapes):
+        # Returns the global parameters of each shape and the parameters of
+        # the global transform, which are the same thing on a GlobalPDM
+        transform_parameters = self._align_global_transform_batch(shapes)
+        return transform_parameters, transform_parameters
+
+    def _global_transform_parameters_batch(self, global_parameters):
+        return global_parameters
+
+    def _align_global_transform_batch(self, targets):
+        # Returns the parameters of the global transform once aligned from its
+        # source to each target
+        global_transform = self.global_transform
+        source = global_transform.source.points
+        if (isinstance(global_transform, AlignmentSimilarity) and
+                self.n_dims == 2 and not global_transform.allow_mirror):
+            from menpofit.transform import batch_procrustes_alignment
+            h_matrices = batch_procrustes_alignment(source, targets)
+            # the parameters of a 2D similarity transform are [a, b, tx, ty]
+            # of h_matrix = [[1 + a, -b, tx], [b, 1 + a, ty], [0, 0, 1]]
+            return np.stack((h_matrices[:, 0, 0] - 1, h_matrices[:, 1, 0],
+                             h_matrices[:, 0, 2], h_matrices[:, 1, 2]), axis=1)
+        elif isinstance(global_transform, AlignmentAffine):
+            # the affine transform is linear in its parameters, thus its
+            # alignment is a linear least-squares problem
+            # (n_points * n_dims, n_global_params)
+            basis = global_transform.d_dp(source).transpose(0, 2, 1).reshape(
+                -1, self.n_global_parameters)
+            # (n_points * n_dims, n_shapes)
+            residuals = (targets - source).reshape(targets.shape[0], -1).T
+            return np.linalg.lstsq(basis, residuals, rcond=None)[0].T
+        # fall back to aligning the global transform to one target at a time
+        original_target = global_transform.target
+        transform_parameters = np.empty((targets.shape[0],
+                                         self.n_global_parameters))
+        for k, target in enumerate(targets):
+            global_transform.set_target(PointCloud(target, copy=False))
+            transform_parameters[k] = global_transform.as_vector()
+        global_transform.set_target(original_target)
+        return transform_parameters
+
+    def _global_affine_batch(self, transform_parameters):
+        # The global transform is affine and linear in its parameters, thus
+        # its translation and linear part are given by where it maps the
+        # origin and the unit vectors
+        basis = np.vstack((np.zeros(self.n_dims), np.eye(self.n_dims)))
+        # (n_dims + 1, n_global_params, n_dims)
+        dW_dp = self.global_transform.d_dp(basis)
+        # (n_shapes, n_dims + 1, n_dims)
+        mapped = basis + np.einsum('nj, ijk -> nik', transform_parameters,
+                                   dW_dp)
+        translation = mapped[:, 0]
+        # the rows of the linear part are the images of the unit vectors, so
+        # that points are transformed as np.matmul(points, linear)
+        linear = mapped[:, 1:] - translation[:, None]
+        return linear, translation
+
     def d_dp(self, points):
         r"""
         The derivative with respect to the parametrisation changes evaluated at
@@ -644,6 +807,19 @@ class OrthoPDM(GlobalPDM):
         new_target = self.similarity_model.instance(global_weights)
         self.global_transform.set_target(new_target)
 
+    def _global_parameters_batch(self, shapes):
+        similarity_weights = MeanLinearModel.project_vectors(
+            self.similarity_model, shapes.reshape(shapes.shape[0], -1))
+        return (similarity_weights,
+                self._global_transform_parameters_batch(similarity_weights))
+
+    def _global_transform_parameters_batch(self, global_parameters):
+        # the global transform is aligned to the similarity model instances
+        instances = MeanLinearModel.instance_vectors(self.similarity_model,
+                                                     global_parameters)
+        return self._align_global_transform_batch(
+            instances.reshape(global_parameters.shape[0], -1, self.n_dims))
+
     def _global_transform_d_dp(self, points):
         return self.similarity_model.components.reshape(
             self.n_global_parameters, -1, self.n_dims).swapaxes(0, 1)
@@ -0,0 +1,420 @@
+from __future__ import division
+from collections import deque
+from itertools import count, repeat, islice
+import multiprocessing
+import weakref
+
+from menpo.image import Image
+
+
+# The state that is used by the worker processes (e.g. the fitter). It is set
+# once per worker by the pool initializer.
+_worker_state = None
+
+# The states of the pools whose workers are forked, by pool key. A forked
+# worker finds its state here, thus it is never pickled. A state is kept for
+# as long as its pool exists, because the pool forks new workers whenever one
+# of its workers exits.
+_pool_states = {}
+_pool_keys = count()
+
+
+def _init_worker(key=None, state=None):
+    r"""
+    Initializer of the worker processes. A forked worker receives the `key`
+    of its pool's state, which it inherited from the parent process. A worker
+    that was not forked receives its own copy of the `state`.
+    """
+    global _worker_state
+    if key is not None:
+        _worker_state = _pool_states[key][0]
+    elif state is not None:
+        _worker_state = state
+
+
+def _pool_context():
+    r"""
+    Returns the multiprocessing context that starts the workers with
+    ``fork``, if the platform supports it, and whether it does.
+    """
+    if hasattr(multiprocessing, 'get_context'):
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError:
+            context = multiprocessing.get_context()
+    else:
+        # Python 2 only provides the platform's default start method
+        context = multiprocessing
+    is_forked = (not hasattr(context, 'get_start_method') or
+                 context.get_start_method() == 'fork')
+    return context, is_forked
+
+
+def start_worker_pool(n_workers, state):
+    r"""
+    Starts a pool of worker processes that share a read-only state, which the
+    tasks access through :map:`worker_state`. On platforms that support
+    ``fork``, the workers inherit the state from the parent process, thus it
+    is never pickled. The parent process keeps a reference to the state for
+    as long as the pool exists, so that the workers that replace exited ones
+    inherit it as well. Otherwise, the state is sent to each worker when it
+    is started.
+
+    Parameters
+    ----------
+    n_workers : `int`
+        The number of worker processes.
+    state : `object`
+        The state of the workers, e.g. a fitter or a model and its training
+        images.
+
+    Returns
+    -------
+    pool : `multiprocessing.pool.Pool`
+        The pool of workers. It must be closed by the caller.
+    """
+    context, is_forked = _pool_context()
+    if not is_forked:
+        return context.Pool(n_workers, _init_worker, (None, state))
+    # The workers inherit the state from the parent process. It is released
+    # once the pool is garbage collected.
+    key = next(_pool_keys)
+    _pool_states[key] = (state, None)
+    try:
+        pool = context.Pool(n_workers, _init_worker, (key,))
+    except Exception:
+        del _pool_states[key]
+        raise
+    _pool_states[key] = (state, weakref.ref(
+        pool, lambda _: _pool_states.pop(key, None)))
+    return pool
+
+
+def worker_state():
+    r"""
+    Returns the state of the current worker process, as provided to
+    :map:`start_worker_pool`.
+
+    Returns
+    -------
+    state : `object`
+        The state of the worker.
+    """
+    return _worker_state
+
+
+def _fit_task(args):
+    r"""
+    Function that is executed by a worker process in order to fit a single
+    image. The image copy attached to the result is dropped before the result
+    is sent back to the parent process, in order to avoid transferring the
+    pixels twice. This is the only image of the result, since the
+    multi-scale results only keep the shapes (and parameters) of their
+    scales, not the per-scale results and their images.
+    """
+    method, image, initial, gt_shape, kwargs = args
+    fit = getattr(_worker_state, method)
+    result = fit(image, initial, gt_shape=gt_shape, **kwargs)
+    result._image = None
+    return result
+
+
+def _fit_chunk(tasks):
+    r"""
+    Function that is executed by a worker process in order to fit a chunk of
+    images.
+    """
+    return [_fit_task(args) for args in tasks]
+
+
+def _apply_to_chunk(func, chunk):
+    r"""
+    Function that is executed by a worker in order to map a chunk of items.
+    """
+    return list(func(chunk))
+
+
+def map_chunks(func, items, n_jobs=1, executor=None, chunk_size=None):
+    r"""
+    Generator that maps a function over chunks of items, possibly in
+    parallel, and yields the results one by one in the order of the items.
+
+    The function receives an iterable of items and must return an iterable
+    with one result per item, which allows it to share some work between the
+    items of a chunk (e.g. building a transform once). The items are consumed
+    lazily chunk by chunk, thus they can be a generator, and at most two
+    chunks per worker are processed or waiting at any time.
+
+    Parameters
+    ----------
+    func : `callable`
+        The function that maps an iterable of items to an iterable of
+        results. If a process pool is used, it must be picklable, e.g. a
+        module-level function or a `functools.partial` of one.
+    items : `iterable`
+        The items to map.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes of the pool that is started for this
+        call. If ``None``, then the number of CPUs is used. If ``1`` and no
+        `executor` is provided, then the items are mapped sequentially, with
+        a single call to `func`.
+    executor : `concurrent.futures.Executor` or ``None``, optional
+        An existing executor (e.g. a ``ThreadPoolExecutor`` or a
+        ``ProcessPoolExecutor``) to which the chunks are submitted. If
+        provided, then `n_jobs` is ignored and no pool is started, thus an
+        executor can be reused by several calls.
+    chunk_size : `int` or ``None``, optional
+        The number of items per chunk. If ``None``, then the items are split
+        in about four chunks per worker if their number is known and in
+        chunks of ``16`` items otherwise.
+
+    Yields
+    ------
+    result : `object`
+        The result of each item.
+    """
+    if executor is not None:
+        n_workers = getattr(executor, '_max_workers', None) or 1
+    else:
+        n_workers = n_jobs or multiprocessing.cpu_count()
+        if n_workers < 1:
+            raise ValueError('n_jobs must be a positive integer or None')
+        if n_workers == 1:
+            # Sequential mapping, without any overhead
+            for result in func(items):
+                yield result
+            return
+
+    if chunk_size is None:
+        if hasattr(items, '__len__'):
+            chunk_size = max(-(-len(items) // (4 * n_workers)), 1)
+        else:
+            chunk_size = 16
+    items = iter(items)
+
+    pool = None
+    if executor is not None:
+        submit = executor.submit
+
+        def get(future):
+            return future.result()
+    else:
+        context, _ = _pool_context()
+        pool = context.Pool(n_workers)
+
+        def submit(*args):
+            return pool.apply_async(args[0], args[1:])
+
+        def get(async_result):
+            return async_result.get()
+
+    pending = deque()
+    try:
+        while True:
+            while len(pending) < 2 * n_workers:
+                chunk = list(islice(items, chunk_size))
+                if not chunk:
+                    break
+                pending.append(submit(_apply_to_chunk, func, chunk))
+            if not pending:
+                break
+            for result in get(pending.popleft()):
+                yield result
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+class ParallelFitter(object):
+    r"""
+    Class for fitting a batch of images with a pool of worker processes. The
+    worker processes are started once, at construction, and are reused for
+    all the subsequent calls.
+
+    On platforms that support ``fork``, the workers inherit the provided
+    fitter from the parent process, thus the fitter is never pickled. The
+    precomputed arrays of the fitter (e.g. the appearance components
+    ``A_m``, their pseudoinverse ``pinv_A_m``, the warp Jacobian ``dW_dp`` or
+    the regression matrices of the cascades) are only read during fitting,
+    so their memory pages are shared by all the workers and are not copied.
+    On platforms that do not support ``fork``, the fitter is sent once to each
+    worker when the pool is started.
+
+    Parameters
+    ----------
+    fitter : :map:`MultiScaleNonParametricFitter` or subclass
+        The trained fitter, e.g. :map:`LucasKanadeAAMFitter` or
+        :map:`SupervisedDescentFitter`.
+    n_workers : `int` or ``None``, optional
+        The number of worker processes. If ``None``, then the number of CPUs
+        is used.
+    chunksize : `int`, optional
+        The number of images that are sent to a worker at once. At most two
+        chunks per worker are submitted to the pool at any time.
+    """
+    def __init__(self, fitter, n_workers=None, chunksize=1):
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        if n_workers < 1:
+            raise ValueError('n_workers must be a positive integer')
+        self.fitter = fitter
+        self.n_workers = n_workers
+        self.chunksize = chunksize
+        self._pool = start_worker_pool(n_workers, fitter)
+
+    def _imap(self, method, images, initials, gt_shapes, kwargs):
+        if gt_shapes is None:
+            gt_shapes = repeat(None)
+        tasks = ((method, i, s, gt_s, kwargs)
+                 for i, s, gt_s in zip(images, initials, gt_shapes))
+        # At most two chunks of images per worker are processed or waiting
+        # at any time. The submitted images are kept in order to attach them
+        # to their results.
+        pending = deque()
+        while True:
+            while len(pending) < 2 * self.n_workers:
+                chunk = list(islice(tasks, self.chunksize))
+                if not chunk:
+                    break
+                pending.append((
+                    [task[1] for task in chunk],
+                    self._pool.apply_async(_fit_chunk, (chunk,))))
+            if not pending:
+                break
+            chunk_images, async_result = pending.popleft()
+            for image, result in zip(chunk_images, async_result.get()):
+                # Re-attach the copy of the image, as done by the result
+                # objects
+                result._image = Image(image.pixels)
+                yield result
+
+    def imap_fit_from_bbs(self, images, bounding_boxes, gt_shapes=None,
+                          **kwargs):
+        r"""
+        Fits the fitter to a batch of images given an initial bounding box per
+        image. The results are yielded as soon as they are available, in the
+        same order as the provided images.
+
+        Parameters
+        ----------
+        images : `iterable` of `menpo.image.Image` or subclass
+            The images to be fitted. It can be a generator, in which case the
+            images are consumed lazily, as the results are yielded. At most
+            two chunks of images per worker are being fitted or waiting for
+            a worker at any time.
+        bounding_boxes : `iterable` of `menpo.shape.PointDirectedGraph`
+            The initial bounding box per image.
+        gt_shapes : `iterable` of `menpo.shape.PointCloud` or ``None``, optional
+            The ground truth shape associated to each image.
+        kwargs : `dict`, optional
+            Additional keyword arguments that are passed to the fitter's
+            `fit_from_bb` method, e.g. `max_iters`.
+
+        Yields
+        ------
+        fitting_result : :map:`MultiScaleNonParametricIterativeResult` or subclass
+            The fitting result of each image.
+        """
+        return self._imap('fit_from_bb', images, bounding_boxes, gt_shapes,
+                          kwargs)
+
+    def imap_fit_from_shapes(self, images, initial_shapes, gt_shapes=None,
+                             **kwargs):
+        r"""
+        Fits the fitter to a batch of images given an initial shape per
+        image. The results are yielded as soon as they are available, in the
+        same order as the provided images.
+
+        Parameters
+        ----------
+        images : `iterable` of `menpo.image.Image` or subclass
+            The images to be fitted. It can be a generator, in which case the
+            images are consumed lazily, as the results are yielded. At most
+            two chunks of images per worker are being fitted or waiting for
+            a worker at any time.
+        initial_shapes : `iterable` of `menpo.shape.PointCloud`
+            The initial shape per image.
+        gt_shapes : `iterable` of `menpo.shape.PointCloud` or ``None``, optional
+            The ground truth shape associated to each image.
+        kwargs : `dict`, optional
+            Additional keyword arguments that are passed to the fitter's
+            `fit_from_shape` method, e.g. `max_iters`.
+
+        Yields
+        ------
+        fitting_result : :map:`MultiScaleNonParametricIterativeResult` or subclass
+            The fitting result of each image.
+        """
+        return self._imap('fit_from_shape', images, initial_shapes, gt_shapes,
+                          kwargs)
+
+    def fit_from_bbs(self, images, bounding_boxes, gt_shapes=None, **kwargs):
+        r"""
+        Fits the fitter to a batch of images given an initial bounding box per
+        image.
+
+        Parameters
+        ----------
+        images : `list` of `menpo.image.Image` or subclass
+            The images to be fitted.
+        bounding_boxes : `list` of `menpo.shape.PointDirectedGraph`
+            The initial bounding box per image.
+        gt_shapes : `list` of `menpo.shape.PointCloud` or ``None``, optional
+            The ground truth shape associated to each image.
+        kwargs : `dict`, optional
+            Additional keyword arguments that are passed to the fitter's
+            `fit_from_bb` method, e.g. `max_iters`.
+
+        Returns
+        -------
+        fitting_results : `list` of :map:`MultiScaleNonParametricIterativeResult` or subclass
+            The fitting result of each image, in the same order as the
+            provided images.
+        """
+        return list(self.imap_fit_from_bbs(images, bounding_boxes,
+                                           gt_shapes=gt_shapes, **kwargs))
+
+    def fit_from_shapes(self, images, initial_shapes, gt_shapes=None,
+                        **kwargs):
+        r"""
+        Fits the fitter to a batch of images given an initial shape per
+        image.
+
+        Parameters
+        ----------
+        images : `list` of `menpo.image.Image` or subclass
+            The images to be fitted.
+        initial_shapes : `list` of `menpo.shape.PointCloud`
+            The initial shape per image.
+        gt_shapes : `list` of `menpo.shape.PointCloud` or ``None``, optional
+            The ground truth shape associated to each image.
+        kwargs : `dict`, optional
+            Additional keyword arguments that are passed to the fitter's
+            `fit_from_shape` method, e.g. `max_iters`.
+
+        Returns
+        -------
+        fitting_results : `list` of :map:`MultiScaleNonParametricIterativeResult` or subclass
+            The fitting result of each image, in the same order as the
+            provided images.
+        """
+        return list(self.imap_fit_from_shapes(images, initial_shapes,
+                                              gt_shapes=gt_shapes, **kwargs))
+
+    def close(self):
+        r"""
+        Terminates the worker processes.
+        """
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __str__(self):
+        return '{} with {} workers'.format(type(self.fitter).__name__,
+                                           self.n_workers)
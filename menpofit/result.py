@@ -2,6 +2,7 @@ import numpy as np
 from collections import Iterable
 
 from menpo.image import Image
+from menpo.shape import PointCloud
 
 from menpofit.visualize import view_image_multiple_landmarks
 from menpofit.error import euclidean_bb_normalised_error
@@ -15,6 +16,15 @@ def _rescale_shapes_to_reference(shapes, affine_transform, scale_transform):
     return rescaled_shapes
 
 
+def _rescale_points_to_reference(points, affine_transform, scale_transform):
+    # points: n_shapes x n_points x n_dims
+    if points.shape[0] == 0:
+        return points
+    flat_points = points.reshape((-1, points.shape[-1]))
+    flat_points = affine_transform.apply(scale_transform.apply(flat_points))
+    return flat_points.reshape(points.shape)
+
+
 def _parse_iters(iters, n_shapes):
     if not (iters is None or isinstance(iters, int) or
                 isinstance(iters, list)):
@@ -664,6 +674,21 @@ class NonParametricIterativeResult(Result):
         """
         return self._n_iters
 
+    @property
+    def stop_reason(self):
+        r"""
+        Returns the reason for which the fitting process stopped before
+        converging or reaching the maximum number of iterations. It is
+        ``'time_budget'`` if the time budget of the fitting ran out and
+        ``'scale_time_share'`` if only the share of the time budget that was
+        given to this scale ran out. It is ``None`` if the fitting was not
+        stopped early.
+
+        :type: `str` or ``None``
+        """
+        # results that were pickled before time budgets have no attribute
+        return getattr(self, '_stop_reason', None)
+
     def to_result(self, pass_image=True, pass_initial_shape=True,
                   pass_gt_shape=True):
         r"""
@@ -2104,6 +2129,15 @@ class MultiScaleNonParametricIterativeResult(NonParametricIterativeResult):
     gt_shape : `menpo.shape.PointCloud` or ``None``, optional
         The ground truth shape associated with the image. If ``None``, then no
         ground truth shape is assigned.
+
+    Notes
+    -----
+    The result is lazy. The shapes of each scale are stored as a compact
+    ``(n_shapes, n_points, n_dims)`` `ndarray` in the coordinate frame of the
+    scale, together with the scale's transforms. The shapes in the original
+    image space (as well as the costs) are only computed the first time they
+    are accessed. Thus, reading the `final_shape` of the result does not
+    create a `menpo.shape.PointCloud` per iteration.
     """
     def __init__(self, results, scales, affine_transforms, scale_transforms,
                  image=None, gt_shape=None):
@@ -2116,46 +2150,122 @@ class MultiScaleNonParametricIterativeResult(NonParametricIterativeResult):
         if len(results) != len(scales):
             raise ValueError('results and scales must have equal length ({} '
                              '!= {})'.format(len(results), len(scales)))
-        # Get initial shape
-        initial_shape = None
-        if results[0].initial_shape is not None:
-            initial_shape = _rescale_shapes_to_reference(
-                shapes=[results[0].initial_shape],
-                affine_transform=affine_transforms[0],
-                scale_transform=scale_transforms[0])[0]
-        # Create shapes list and n_iters_per_scale
+        # Call the constructor of Result, since the shapes are not created
+        # here
+        super(NonParametricIterativeResult, self).__init__(
+            final_shape=None, image=image, initial_shape=None,
+            gt_shape=gt_shape)
+        # Store the points of the shapes per scale and n_iters_per_scale.
         # If the result object has an initial shape, then it has to be
-        # removed from the final shapes list
+        # removed from the shapes.
         n_iters_per_scale = []
-        shapes = []
-        for i in list(range(len(scales))):
-            n_iters_per_scale.append(results[i].n_iters)
-            if results[i].initial_shape is None:
-                shapes += _rescale_shapes_to_reference(
-                    shapes=results[i].shapes,
-                    affine_transform=affine_transforms[i],
-                    scale_transform=scale_transforms[i])
-            else:
-                shapes += _rescale_shapes_to_reference(
-                    shapes=results[i].shapes[1:],
-                    affine_transform=affine_transforms[i],
-                    scale_transform=scale_transforms[i])
-        # Call superclass
-        super(MultiScaleNonParametricIterativeResult, self).__init__(
-                shapes=shapes, initial_shape=initial_shape, image=image,
-                gt_shape=gt_shape)
+        self._scale_points = []
+        for r in results:
+            n_iters_per_scale.append(r.n_iters)
+            shapes = r.shapes
+            if r.initial_shape is not None:
+                shapes = shapes[1:]
+            self._scale_points.append(np.array([s.points for s in shapes]))
+        self._affine_transforms = list(affine_transforms)
+        self._scale_transforms = list(scale_transforms)
+        # The initial shape is rescaled once it is accessed
+        self._scale_initial_shape = results[0].initial_shape
+        self._shapes = None
+        self._n_iters = sum(p.shape[0] for p in self._scale_points)
         # Get attributes
         self._n_iters_per_scale = n_iters_per_scale
         self._n_scales = len(scales)
-        # Create costs list. We assume that if the costs of the first result
-        # object is None, then the costs property of all objects is None.
-        # Similarly, if the costs property of the the first object is not
-        # None, then the same stands for the rest.
+        # Store the costs lists per scale. We assume that if the costs of the
+        # first result object is None, then the costs property of all objects
+        # is None. Similarly, if the costs property of the the first object is
+        # not None, then the same stands for the rest.
         self._costs = None
+        self._scale_costs = None
         if results[0].costs is not None:
+            self._scale_costs = [r.costs for r in results]
+        # Store the scales whose iterations were stopped early
+        self._early_stops = [
+            {'scale': s, 'iteration': r.n_iters, 'reason': r.stop_reason}
+            for s, r in zip(scales, results) if r.stop_reason is not None]
+
+    @property
+    def final_shape(self):
+        r"""
+        Returns the final shape of the fitting process.
+
+        :type: `menpo.shape.PointCloud`
+        """
+        if self._final_shape is None:
+            # The final shape is the last shape of the last scale that has
+            # shapes
+            for points, affine_transform, scale_transform in reversed(list(
+                    zip(self._scale_points, self._affine_transforms,
+                        self._scale_transforms))):
+                if points.shape[0] > 0:
+                    points = _rescale_points_to_reference(
+                        points[-1:], affine_transform=affine_transform,
+                        scale_transform=scale_transform)
+                    self._final_shape = PointCloud(points[0], copy=False)
+                    break
+        return self._final_shape
+
+    @property
+    def initial_shape(self):
+        r"""
+        Returns the initial shape that was provided to the fitting method to
+        initialise the fitting process. In case the initial shape does not
+        exist, then ``None`` is returned.
+
+        :type: `menpo.shape.PointCloud` or ``None``
+        """
+        if (self._initial_shape is None and
+                getattr(self, '_scale_initial_shape', None) is not None):
+            self._initial_shape = _rescale_shapes_to_reference(
+                shapes=[self._scale_initial_shape],
+                affine_transform=self._affine_transforms[0],
+                scale_transform=self._scale_transforms[0])[0]
+        return self._initial_shape
+
+    @property
+    def shapes(self):
+        r"""
+        Returns the `list` of shapes obtained at each iteration of the fitting
+        process. The `list` includes the `initial_shape` (if it exists) and
+        `final_shape`.
+
+        :type: `list` of `menpo.shape.PointCloud`
+        """
+        if self._shapes is None:
+            shapes = []
+            for points, affine_transform, scale_transform in zip(
+                    self._scale_points, self._affine_transforms,
+                    self._scale_transforms):
+                points = _rescale_points_to_reference(
+                    points, affine_transform=affine_transform,
+                    scale_transform=scale_transform)
+                shapes += [PointCloud(p, copy=False) for p in points]
+            # Reuse the final shape, in case it has already been created
+            if self._final_shape is not None:
+                shapes[-1] = self._final_shape
+            if self.initial_shape is not None:
+                shapes = [self.initial_shape] + shapes
+            self._shapes = shapes
+        return self._shapes
+
+    @property
+    def costs(self):
+        r"""
+        Returns a `list` with the cost per iteration. It returns ``None`` if
+        the costs are not computed.
+
+        :type: `list` of `float` or ``None``
+        """
+        if (self._costs is None and
+                getattr(self, '_scale_costs', None) is not None):
             self._costs = []
-            for r in results:
-                self._costs += r.costs
+            for c in self._scale_costs:
+                self._costs += c
+        return self._costs
 
     @property
     def n_iters_per_scale(self):
@@ -2166,6 +2276,31 @@ class MultiScaleNonParametricIterativeResult(NonParametricIterativeResult):
         """
         return self._n_iters_per_scale
 
+    @property
+    def early_stops(self):
+        r"""
+        Returns the scales whose iterations were stopped before converging or
+        reaching the maximum number of iterations, e.g. because the time
+        budget of the fitting ran out. Each early stop is a `dict` with the
+        scale value (``'scale'``), the number of iterations that were
+        performed at that scale (``'iteration'``) and the reason
+        (``'reason'``, see :attr:`stop_reason`).
+
+        :type: `list` of `dict`
+        """
+        return getattr(self, '_early_stops', [])
+
+    @property
+    def stop_reason(self):
+        r"""
+        Returns the reason of the last early stop (see :attr:`early_stops`)
+        or ``None`` if no scale was stopped early.
+
+        :type: `str` or ``None``
+        """
+        early_stops = self.early_stops
+        return early_stops[-1]['reason'] if early_stops else None
+
     @property
     def n_scales(self):
         r"""
@@ -17,3 +17,4 @@ from .fullyparametric import (FullyParametricProjectOutNewton,
                               FullyParametricMeanTemplateNewton,
                               FullyParametricWeightsNewton,
                               FullyParametricProjectOutOPP)
+from .base import BatchedPatchFeatures
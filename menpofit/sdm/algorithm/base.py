@@ -2,9 +2,14 @@ from __future__ import division
 from functools import partial
 import numpy as np
 
+from menpo.feature import no_op
+from menpo.model import PCAVectorModel
+from menpo.shape import PointCloud
 from menpo.visualize import print_dynamic
 
+from menpofit.base import expired
 from menpofit.fitter import raise_costs_warning
+from menpofit.math import pca_from_matrix
 from menpofit.visualize import print_progress
 from menpofit.result import (NonParametricIterativeResult,
                              ParametricIterativeResult)
@@ -14,6 +19,11 @@ class BaseSupervisedDescentAlgorithm(object):
     r"""
     Abstract class for defining a Supervised Descent algorithm.
     """
+    # The number of samples per chunk with which the regressors that support
+    # streaming training (i.e. have a train_from_chunks method) are trained,
+    # so that the regression does not copy the whole matrix of features
+    _training_chunk_size = 4096
+
     @property
     def _multi_scale_fitter_result(self):
         raise NotImplementedError()
@@ -101,7 +111,11 @@ class BaseSupervisedDescentAlgorithm(object):
 
             if not increment:
                 r = self._regressor_cls()
-                r.train(features, delta_x)
+                if hasattr(r, 'train_from_chunks'):
+                    r.train(features, delta_x,
+                            chunk_size=self._training_chunk_size)
+                else:
+                    r.train(features, delta_x)
                 self.regressors.append(r)
             else:
                 self.regressors[k].increment(features, delta_x)
@@ -119,6 +133,17 @@ class BaseSupervisedDescentAlgorithm(object):
 
         return current_shapes
 
+    def _cast_regressors(self, dtype):
+        r"""
+        Casts the prediction arrays of the trained regressors to `dtype`.
+
+        Parameters
+        ----------
+        dtype : `numpy.dtype`
+            The type of the regressors, e.g. ``np.float32``.
+        """
+        self.regressors = [r.astype(dtype) for r in self.regressors]
+
     def _compute_delta_x(self, gt_shapes, current_shapes):
         raise NotImplementedError()
 
@@ -162,6 +187,69 @@ class BaseSupervisedDescentAlgorithm(object):
         raise NotImplementedError()
 
 
+class BatchedPatchFeatures(object):
+    r"""
+    Class for wrapping a features function that is able to compute the
+    features of a whole stack of patches at once. Given an
+    ``(n_patches, n_channels, height, width)`` `ndarray`, the wrapped function
+    must return an `ndarray` with the features of each patch along its first
+    axis. The patch features of the Supervised Descent algorithms are then
+    computed with a single call per image, instead of a call per patch.
+
+    Note that `menpo.feature.no_op` is always handled in this way, thus it
+    does not need to be wrapped.
+
+    Parameters
+    ----------
+    features_callable : `callable`
+        The function to be used for extracting features from a stack of
+        patches.
+    """
+    def __init__(self, features_callable):
+        self.features_callable = features_callable
+
+    def __call__(self, pixels):
+        return self.features_callable(pixels)
+
+
+def features_per_patches(patches, features_callable):
+    r"""
+    Method that extracts features from a stack of patches.
+
+    Parameters
+    ----------
+    patches : ``(n_patches, 1, n_channels, height, width)`` `ndarray`
+        The patches, as returned by `menpo.image.Image.extract_patches` with
+        ``as_single_array=True``.
+    features_callable : `callable`
+        The function to be used for extracting features. If it is
+        `menpo.feature.no_op` or a :map:`BatchedPatchFeatures`, then it is
+        applied to all the patches at once. Otherwise, it is applied to each
+        patch separately.
+
+    Returns
+    -------
+    features_per_patches : ``(n_patches, n_features)`` `ndarray`
+        The features of each patch.
+    """
+    n_patches = patches.shape[0]
+    # patches: n_patches x n_channels x height x width
+    patches = patches[:, 0]
+    if features_callable is no_op:
+        # the features are the patches themselves
+        return patches.reshape((n_patches, -1))
+    if isinstance(features_callable, BatchedPatchFeatures):
+        # compute the features of all the patches with a single call
+        return features_callable(patches).reshape((n_patches, -1))
+    # compute the features of the first patch in order to find their size
+    f = features_callable(patches[0]).ravel()
+    patch_features = np.empty((n_patches, f.shape[0]), dtype=f.dtype)
+    patch_features[0] = f
+    for j in range(1, n_patches):
+        patch_features[j] = features_callable(patches[j]).ravel()
+    return patch_features
+
+
 def features_per_patch(image, shape, patch_shape, features_callable):
     r"""
     Method that first extracts patches and then features from these patches.
@@ -184,8 +272,7 @@ def features_per_patch(image, shape, patch_shape, features_callable):
     """
     patches = image.extract_patches(shape, patch_shape=patch_shape,
                                     as_single_array=True)
-    patch_features = [features_callable(p[0]).ravel() for p in patches]
-    return np.hstack(patch_features)
+    return features_per_patches(patches, features_callable).ravel()
 
 
 def features_per_shapes(image, shapes, patch_shape, features_callable):
@@ -209,10 +296,12 @@ def features_per_shapes(image, shapes, patch_shape, features_callable):
     features_per_shapes : ``(n_shapes, n_features)`` `ndarray`
         The concatenated feature vector per shape.
     """
-    patch_features = [features_per_patch(image, s, patch_shape,
-                                         features_callable)
-                      for s in shapes]
-    return np.vstack(patch_features)
+    # extract the patches of all the shapes at once
+    points = PointCloud(np.vstack([s.points for s in shapes]), copy=False)
+    patches = image.extract_patches(points, patch_shape=patch_shape,
+                                    as_single_array=True)
+    patch_features = features_per_patches(patches, features_callable)
+    return patch_features.reshape((len(shapes), -1))
 
 
 def features_per_image(images, shapes, patch_shape, features_callable,
@@ -437,24 +526,13 @@ def compute_parametric_delta_x(gt_shapes, current_shapes, model):
     gt_params : ``(n_gt_shapes * n_current_shapes, n_parameters)`` `ndarray`
         The ground truth parameters vectors.
     """
-    # initialize current and delta parameters arrays
-    n_samples = len(gt_shapes) * len(current_shapes[0])
-    gt_params = np.empty((n_samples, model.n_parameters))
-    delta_params = np.empty_like(gt_params)
-
-    k = 0
-    for gt_s, c_s in zip(gt_shapes, current_shapes):
-        # Compute and cache ground truth parameters
-        model.set_target(gt_s)
-        c_gt_params = model.as_vector()
-        for s in c_s:
-            gt_params[k] = c_gt_params
-
-            model.set_target(s)
-            current_params = model.as_vector()
-            delta_params[k] = c_gt_params - current_params
-
-            k += 1
+    # project all the ground truth and current shapes at once
+    gt_params = model.project_batch(np.array([s.points for s in gt_shapes]))
+    current_params = model.project_batch(
+        np.array([s.points for c_s in current_shapes for s in c_s]))
+    # repeat the ground truth parameters for each of their current shapes
+    gt_params = np.repeat(gt_params, len(current_shapes[0]), axis=0)
+    delta_params = gt_params - current_params
 
     return delta_params, gt_params
 
@@ -481,25 +559,22 @@ def update_parametric_estimates(estimated_delta_x, delta_x, gt_x,
         A parametric model used to get the parameters of the ground truth shapes
         and current shapes.
     """
-    j = 0
-    for shapes in current_shapes:
-        for s in shapes:
-            # Estimate parameters
-            edx = estimated_delta_x[j]
-            # Current parameters
-            model.set_target(s)
-            cx = model.as_vector() + edx
-            model._from_vector_inplace(cx)
-
-            # Update current shape inplace
-            s._from_vector_inplace(model.target.as_vector().copy())
-
-            delta_x[j] = gt_x[j] - cx
-            j += 1
+    shapes = [s for c_s in current_shapes for s in c_s]
+    # Current parameters
+    cx = model.project_batch(np.array([s.points for s in shapes]))
+    cx += estimated_delta_x
+    # Update current shapes inplace
+    new_points = model.instance_batch(cx)
+    for s, points in zip(shapes, new_points):
+        s._from_vector_inplace(points.ravel())
+    delta_x[...] = gt_x - cx
 
 
 def build_appearance_model(images, gt_shapes, patch_shape, patch_features,
-                           appearance_model_cls, verbose=False, prefix=''):
+                           appearance_model_cls, verbose=False, prefix='',
+                           max_n_components=None, randomized=False,
+                           n_oversamples=10, n_power_iterations=2,
+                           random_state=None):
     r"""
     Method that builds a parametric patch-based appearance model.
 
@@ -522,6 +597,21 @@ def build_appearance_model(images, gt_shapes, patch_shape, patch_features,
         printed.
     prefix : `str`, optional
         The prefix used in the printed information.
+    max_n_components : `int` or `float` or ``None``, optional
+        The maximum number of components to keep in the model, or else the
+        ratio of variance to keep if `float`.
+    randomized : `bool`, optional
+        If ``True``, `max_n_components` is an `int` and `appearance_model_cls`
+        is `menpo.model.PCAVectorModel`, then only the requested number of
+        components is computed with :map:`randomized_pca`.
+    n_oversamples : `int`, optional
+        The oversampling of the randomized decomposition.
+    n_power_iterations : `int`, optional
+        The number of power iterations of the randomized decomposition.
+    random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized
+        decomposition. If ``None``, then the global random number generator
+        of `numpy` is used.
     """
     wrap = partial(print_progress,
                    prefix='{}Extracting ground truth patches'.format(prefix),
@@ -535,11 +625,20 @@ def build_appearance_model(images, gt_shapes, patch_shape, patch_features,
     gt_patches = np.array(gt_patches).reshape([n_images, -1])
     if verbose:
         print_dynamic('{}Building Appearance Model'.format(prefix))
-    return appearance_model_cls(gt_patches)
+    if (randomized and appearance_model_cls is PCAVectorModel and
+            isinstance(max_n_components, int)):
+        return pca_from_matrix(gt_patches, max_n_components=max_n_components,
+                               randomized=True, n_oversamples=n_oversamples,
+                               n_power_iterations=n_power_iterations,
+                               random_state=random_state)
+    appearance_model = appearance_model_cls(gt_patches)
+    if max_n_components is not None:
+        appearance_model.trim_components(max_n_components)
+    return appearance_model
 
 
 def fit_parametric_shape(image, initial_shape, parametric_algorithm,
-                         gt_shape=None, return_costs=False):
+                         gt_shape=None, return_costs=False, deadline=None):
     r"""
     Method that fits a parametric cascaded regression algorithm to an image.
 
@@ -560,6 +659,9 @@ def fit_parametric_shape(image, initial_shape, parametric_algorithm,
         returned `fitting_result`. *Note that this argument currently has no
         effect and will raise a warning if set to ``True``. This is because
         it is not possible to evaluate the cost function of this algorithm.*
+    deadline : :map:`Deadline` or ``None``, optional
+        The wall-clock deadline of the fitting. If provided, then the cascade
+        stops once it has passed.
 
     Returns
     -------
@@ -579,6 +681,9 @@ def fit_parametric_shape(image, initial_shape, parametric_algorithm,
 
     # Cascaded Regression loop
     for r in parametric_algorithm.regressors:
+        # the first cascade is always applied, thus the result has a shape
+        if shapes and expired(deadline):
+            break
         # compute regression features
         features = parametric_algorithm._compute_test_features(image,
                                                                current_shape)
@@ -601,7 +706,7 @@ def fit_parametric_shape(image, initial_shape, parametric_algorithm,
 
 
 def fit_non_parametric_shape(image, initial_shape, non_parametric_algorithm,
-                             gt_shape=None, return_costs=False):
+                             gt_shape=None, return_costs=False, deadline=None):
     r"""
     Method that fits a non-parametric cascaded regression algorithm to an image.
 
@@ -622,6 +727,9 @@ def fit_non_parametric_shape(image, initial_shape, non_parametric_algorithm,
         returned `fitting_result`. *Note that this argument currently has no
         effect and will raise a warning if set to ``True``. This is because
         it is not possible to evaluate the cost function of this algorithm.*
+    deadline : :map:`Deadline` or ``None``, optional
+        The wall-clock deadline of the fitting. If provided, then the cascade
+        stops once it has passed.
 
     Returns
     -------
@@ -638,6 +746,9 @@ def fit_non_parametric_shape(image, initial_shape, non_parametric_algorithm,
 
     # Cascaded Regression loop
     for r in non_parametric_algorithm.regressors:
+        # the first cascade is always applied, thus the result has a shape
+        if shapes and expired(deadline):
+            break
         # compute regression features
         features = non_parametric_algorithm._compute_test_features(image,
                                                                    current_shape)
@@ -654,3 +765,74 @@ def fit_non_parametric_shape(image, initial_shape, non_parametric_algorithm,
     return NonParametricIterativeResult(
             shapes=shapes, initial_shape=initial_shape, image=image,
             gt_shape=gt_shape)
+
+
+def fit_non_parametric_shapes(images, initial_shapes, non_parametric_algorithm,
+                              gt_shapes=None, return_costs=False,
+                              deadline=None):
+    r"""
+    Method that fits a non-parametric cascaded regression algorithm to a batch
+    of images. The features of all the images are stacked at each cascade
+    level, so that each regressor is applied only once for the whole batch.
+
+    Parameters
+    ----------
+    images : `list` of `menpo.image.Image`
+        The input images.
+    initial_shapes : `list` of `menpo.shape.PointCloud`
+        The initial estimation of the shape per image.
+    non_parametric_algorithm : `class`
+        A cascaded regression algorithm that does not use a parametric shape
+        model. Please refer to `menpofit.sdm.algorithm`.
+    gt_shapes : `list` of (`menpo.shape.PointCloud` or ``None``), optional
+        The ground truth shape that corresponds to each image.
+    return_costs : `bool`, optional
+        If ``True``, then the cost function values will be computed during
+        the fitting procedure. Then these cost values will be assigned to the
+        returned `fitting_result`. *Note that this argument currently has no
+        effect and will raise a warning if set to ``True``. This is because
+        it is not possible to evaluate the cost function of this algorithm.*
+    deadline : :map:`Deadline` or ``None``, optional
+        The wall-clock deadline of the fitting. If provided, then the cascade
+        of all the images stops once it has passed.
+
+    Returns
+    -------
+    fitting_results : `list` of :map:`NonParametricIterativeResult`
+        The final fitting result per image.
+    """
+    # costs warning
+    if return_costs:
+        raise_costs_warning(non_parametric_algorithm)
+
+    n_images = len(images)
+    if gt_shapes is None:
+        gt_shapes = [None] * n_images
+
+    # set current shapes as a single (n_images, n_points * 2) array
+    current_x = np.vstack([s.as_vector() for s in initial_shapes])
+    shapes = [[] for _ in range(n_images)]
+
+    # Cascaded Regression loop
+    for k, r in enumerate(non_parametric_algorithm.regressors):
+        # the first cascade is always applied, thus the results have a shape
+        if k > 0 and expired(deadline):
+            break
+        # compute regression features of all images
+        features = np.vstack([
+            non_parametric_algorithm._compute_test_features(
+                im, s.from_vector(x))
+            for im, s, x in zip(images, initial_shapes, current_x)])
+
+        # solve for increments on the shape vectors of all images at once
+        current_x = current_x + r.predict(features)
+
+        # update current shapes
+        for j, s in enumerate(initial_shapes):
+            shapes[j].append(s.from_vector(current_x[j]))
+
+    # return algorithm results
+    return [NonParametricIterativeResult(shapes=s, initial_shape=i_s,
+                                         image=im, gt_shape=gt_s)
+            for s, i_s, im, gt_s in zip(shapes, initial_shapes, images,
+                                        gt_shapes)]
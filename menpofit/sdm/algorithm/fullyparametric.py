@@ -28,13 +28,39 @@ class FullyParametricSDAlgorithm(BaseSupervisedDescentAlgorithm):
         choice is :map:`OrthoPDM`.
     appearance_model_cls : `menpo.model.PCAVectorModel` or `subclass`
         The class to be used for building the appearance model.
+    max_appearance_components : `int` or `float` or ``None``, optional
+        The maximum number of components of the appearance model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance model is built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`).
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, shape_model_cls=OrthoPDM,
-                 appearance_model_cls=PCAVectorModel):
+                 appearance_model_cls=PCAVectorModel,
+                 max_appearance_components=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(FullyParametricSDAlgorithm, self).__init__()
         self.regressors = []
         self.shape_model_cls = shape_model_cls
         self.appearance_model_cls = appearance_model_cls
+        self.max_appearance_components = max_appearance_components
+        self.randomized_pca = randomized_pca
+        self.pca_oversampling = pca_oversampling
+        self.pca_power_iterations = pca_power_iterations
+        self.pca_random_state = pca_random_state
         self.appearance_model = None
         self.shape_model = None
 
@@ -61,7 +87,12 @@ class FullyParametricSDAlgorithm(BaseSupervisedDescentAlgorithm):
         if self.appearance_model is None:
             self.appearance_model = build_appearance_model(
                 images, gt_shapes, self.patch_shape, self.patch_features,
-                self.appearance_model_cls, verbose=verbose, prefix=prefix)
+                self.appearance_model_cls, verbose=verbose, prefix=prefix,
+                max_n_components=self.max_appearance_components,
+                randomized=self.randomized_pca,
+                n_oversamples=self.pca_oversampling,
+                n_power_iterations=self.pca_power_iterations,
+                random_state=self.pca_random_state)
 
         wrap = partial(print_progress,
                        prefix='{}Extracting patches'.format(prefix),
@@ -91,7 +122,7 @@ class FullyParametricSDAlgorithm(BaseSupervisedDescentAlgorithm):
                               self._compute_error, prefix=prefix)
 
     def run(self, image, initial_shape, gt_shape=None, return_costs=False,
-            **kwargs):
+            deadline=None, **kwargs):
         r"""
         Run the algorithm to an image given an initial shape.
 
@@ -110,6 +141,9 @@ class FullyParametricSDAlgorithm(BaseSupervisedDescentAlgorithm):
             argument currently has no effect and will raise a warning if set
             to ``True``. This is because it is not possible to evaluate the
             cost function of this algorithm.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            cascade stops once it has passed.
 
         Returns
         -------
@@ -118,7 +152,8 @@ class FullyParametricSDAlgorithm(BaseSupervisedDescentAlgorithm):
         """
         return fit_parametric_shape(image, initial_shape, self,
                                     gt_shape=gt_shape,
-                                    return_costs=return_costs)
+                                    return_costs=return_costs,
+                                    deadline=deadline)
 
 
 class ParametricAppearanceProjectOut(FullyParametricSDAlgorithm):
@@ -179,15 +214,41 @@ class FullyParametricWeightsNewton(ParametricAppearanceWeights):
         The regularization parameter.
     bias : `bool`, optional
         Flag that controls whether to use a bias term.
+    max_appearance_components : `int` or `float` or ``None``, optional
+        The maximum number of components of the appearance model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance model is built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`).
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, patch_features=no_op, patch_shape=(17, 17),
                  n_iterations=3, shape_model_cls=OrthoPDM,
                  appearance_model_cls=PCAVectorModel,
                  compute_error=euclidean_bb_normalised_error,
-                 alpha=0, bias=True):
+                 alpha=0, bias=True,
+                 max_appearance_components=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(FullyParametricWeightsNewton, self).__init__(
             shape_model_cls=shape_model_cls,
-            appearance_model_cls=appearance_model_cls)
+            appearance_model_cls=appearance_model_cls,
+            max_appearance_components=max_appearance_components,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
         self._regressor_cls = partial(IRLRegression, alpha=alpha, bias=bias)
         self.patch_shape = patch_shape
@@ -223,15 +284,41 @@ class FullyParametricMeanTemplateNewton(ParametricAppearanceMeanTemplate):
         The regularization parameter.
     bias : `bool`, optional
         Flag that controls whether to use a bias term.
+    max_appearance_components : `int` or `float` or ``None``, optional
+        The maximum number of components of the appearance model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance model is built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`).
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, patch_features=no_op, patch_shape=(17, 17),
                  n_iterations=3, shape_model_cls=OrthoPDM,
                  appearance_model_cls=PCAVectorModel,
                  compute_error=euclidean_bb_normalised_error,
-                 alpha=0, bias=True):
+                 alpha=0, bias=True,
+                 max_appearance_components=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(FullyParametricMeanTemplateNewton, self).__init__(
             shape_model_cls=shape_model_cls,
-            appearance_model_cls=appearance_model_cls)
+            appearance_model_cls=appearance_model_cls,
+            max_appearance_components=max_appearance_components,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
         self._regressor_cls = partial(IRLRegression, alpha=alpha, bias=bias)
         self.patch_shape = patch_shape
@@ -267,15 +354,41 @@ class FullyParametricProjectOutNewton(ParametricAppearanceProjectOut):
         The regularization parameter.
     bias : `bool`, optional
         Flag that controls whether to use a bias term.
+    max_appearance_components : `int` or `float` or ``None``, optional
+        The maximum number of components of the appearance model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance model is built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`).
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, patch_features=no_op, patch_shape=(17, 17),
                  n_iterations=3, shape_model_cls=OrthoPDM,
                  appearance_model_cls=PCAVectorModel,
                  compute_error=euclidean_bb_normalised_error,
-                 alpha=0, bias=True):
+                 alpha=0, bias=True,
+                 max_appearance_components=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(FullyParametricProjectOutNewton, self).__init__(
             shape_model_cls=shape_model_cls,
-            appearance_model_cls=appearance_model_cls)
+            appearance_model_cls=appearance_model_cls,
+            max_appearance_components=max_appearance_components,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
         self._regressor_cls = partial(IRLRegression, alpha=alpha, bias=bias)
         self.patch_shape = patch_shape
@@ -313,15 +426,41 @@ class FullyParametricProjectOutGaussNewton(ParametricAppearanceProjectOut):
         Flag that controls whether to use a bias term.
     alpha2 : `float`, optional
         The regularization parameter of the Hessian matrix.
+    max_appearance_components : `int` or `float` or ``None``, optional
+        The maximum number of components of the appearance model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance model is built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`).
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, patch_features=no_op, patch_shape=(17, 17),
                  n_iterations=3, shape_model_cls=OrthoPDM,
                  appearance_model_cls=PCAVectorModel,
                  compute_error=euclidean_bb_normalised_error,
-                 alpha=0, bias=True, alpha2=0):
+                 alpha=0, bias=True, alpha2=0,
+                 max_appearance_components=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(FullyParametricProjectOutGaussNewton, self).__init__(
             shape_model_cls=shape_model_cls,
-            appearance_model_cls=appearance_model_cls)
+            appearance_model_cls=appearance_model_cls,
+            max_appearance_components=max_appearance_components,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
         self._regressor_cls = partial(IIRLRegression, alpha=alpha, bias=bias,
                                       alpha2=alpha2)
@@ -355,15 +494,41 @@ class FullyParametricProjectOutOPP(ParametricAppearanceProjectOut):
         each cascade.
     bias : `bool`, optional
         Flag that controls whether to use a bias term.
+    max_appearance_components : `int` or `float` or ``None``, optional
+        The maximum number of components of the appearance model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance model is built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`).
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, patch_features=no_op, patch_shape=(17, 17),
                  n_iterations=3, shape_model_cls=OrthoPDM,
                  appearance_model_cls=PCAVectorModel,
                  compute_error=euclidean_bb_normalised_error,
-                 bias=True):
+                 bias=True,
+                 max_appearance_components=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(FullyParametricProjectOutOPP, self).__init__(
             shape_model_cls=shape_model_cls,
-            appearance_model_cls=appearance_model_cls)
+            appearance_model_cls=appearance_model_cls,
+            max_appearance_components=max_appearance_components,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
         self._regressor_cls = partial(OPPRegression, bias=bias)
         self.patch_shape = patch_shape
@@ -10,7 +10,8 @@ from menpofit.math import (IIRLRegression, IRLRegression, PCRRegression,
 from .base import (BaseSupervisedDescentAlgorithm,
                    compute_non_parametric_delta_x, features_per_image,
                    features_per_patch, update_non_parametric_estimates,
-                   print_non_parametric_info, fit_non_parametric_shape)
+                   print_non_parametric_info, fit_non_parametric_shape,
+                   fit_non_parametric_shapes)
 
 
 class NonParametricSDAlgorithm(BaseSupervisedDescentAlgorithm):
@@ -46,7 +47,7 @@ class NonParametricSDAlgorithm(BaseSupervisedDescentAlgorithm):
                                   self.patch_shape, self.patch_features)
 
     def run(self, image, initial_shape, gt_shape=None, return_costs=False,
-            **kwargs):
+            deadline=None, **kwargs):
         r"""
         Run the algorithm to an image given an initial shape.
 
@@ -65,6 +66,9 @@ class NonParametricSDAlgorithm(BaseSupervisedDescentAlgorithm):
             argument currently has no effect and will raise a warning if set
             to ``True``. This is because it is not possible to evaluate the
             cost function of this algorithm.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            cascade stops once it has passed.
 
         Returns
         -------
@@ -73,7 +77,45 @@ class NonParametricSDAlgorithm(BaseSupervisedDescentAlgorithm):
         """
         return fit_non_parametric_shape(image, initial_shape, self,
                                         gt_shape=gt_shape,
-                                        return_costs=return_costs)
+                                        return_costs=return_costs,
+                                        deadline=deadline)
+
+    def run_batch(self, images, initial_shapes, gt_shapes=None,
+                  return_costs=False, deadline=None, **kwargs):
+        r"""
+        Run the algorithm to a batch of images given an initial shape per
+        image. The regression of each cascade level is performed once for
+        all the images.
+
+        Parameters
+        ----------
+        images : `list` of `menpo.image.Image` or subclass
+            The images to be fitted.
+        initial_shapes : `list` of `menpo.shape.PointCloud`
+            The initial shape per image from which the fitting procedure will
+            start.
+        gt_shapes : `list` of (`menpo.shape.PointCloud` or ``None``), optional
+            The ground truth shape associated to each image.
+        return_costs : `bool`, optional
+            If ``True``, then the cost function values will be computed
+            during the fitting procedure. Then these cost values will be
+            assigned to the returned `fitting_result`. *Note that this
+            argument currently has no effect and will raise a warning if set
+            to ``True``. This is because it is not possible to evaluate the
+            cost function of this algorithm.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            cascade of all the images stops once it has passed.
+
+        Returns
+        -------
+        fitting_results: `list` of :map:`NonParametricIterativeResult`
+            The result of the fitting procedure per image.
+        """
+        return fit_non_parametric_shapes(images, initial_shapes, self,
+                                         gt_shapes=gt_shapes,
+                                         return_costs=return_costs,
+                                         deadline=deadline)
 
     def _print_regression_info(self, template_shape, gt_shapes, n_perturbations,
                                delta_x, estimated_delta_x, level_index,
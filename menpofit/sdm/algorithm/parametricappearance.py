@@ -12,7 +12,8 @@ from menpofit.visualize import print_progress
 from .base import (BaseSupervisedDescentAlgorithm,
                    features_per_patch, update_non_parametric_estimates,
                    compute_non_parametric_delta_x, print_non_parametric_info,
-                   build_appearance_model, fit_non_parametric_shape)
+                   build_appearance_model, fit_non_parametric_shape,
+                   fit_non_parametric_shapes)
 
 
 class ParametricAppearanceSDAlgorithm(BaseSupervisedDescentAlgorithm):
@@ -24,11 +25,37 @@ class ParametricAppearanceSDAlgorithm(BaseSupervisedDescentAlgorithm):
     ----------
     appearance_model_cls : `menpo.model.PCAVectorModel` or `subclass`
         The class to be used for building the appearance model.
+    max_appearance_components : `int` or `float` or ``None``, optional
+        The maximum number of components of the appearance model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance model is built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`).
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
-    def __init__(self, appearance_model_cls=PCAVectorModel):
+    def __init__(self, appearance_model_cls=PCAVectorModel,
+                 max_appearance_components=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(ParametricAppearanceSDAlgorithm, self).__init__()
         self.regressors = []
         self.appearance_model_cls = appearance_model_cls
+        self.max_appearance_components = max_appearance_components
+        self.randomized_pca = randomized_pca
+        self.pca_oversampling = pca_oversampling
+        self.pca_power_iterations = pca_power_iterations
+        self.pca_random_state = pca_random_state
         self.appearance_model = None
 
     @property
@@ -50,7 +77,12 @@ class ParametricAppearanceSDAlgorithm(BaseSupervisedDescentAlgorithm):
         if self.appearance_model is None:
             self.appearance_model = build_appearance_model(
                 images, gt_shapes, self.patch_shape, self.patch_features,
-                self.appearance_model_cls, verbose=verbose, prefix=prefix)
+                self.appearance_model_cls, verbose=verbose, prefix=prefix,
+                max_n_components=self.max_appearance_components,
+                randomized=self.randomized_pca,
+                n_oversamples=self.pca_oversampling,
+                n_power_iterations=self.pca_power_iterations,
+                random_state=self.pca_random_state)
 
         wrap = partial(print_progress,
                        prefix='{}Extracting patches'.format(prefix),
@@ -73,7 +105,7 @@ class ParametricAppearanceSDAlgorithm(BaseSupervisedDescentAlgorithm):
         return self._compute_parametric_features(patch_feature)
 
     def run(self, image, initial_shape, gt_shape=None,
-            return_costs=False, **kwargs):
+            return_costs=False, deadline=None, **kwargs):
         r"""
         Run the algorithm to an image given an initial shape.
 
@@ -92,6 +124,9 @@ class ParametricAppearanceSDAlgorithm(BaseSupervisedDescentAlgorithm):
             argument currently has no effect and will raise a warning if set
             to ``True``. This is because it is not possible to evaluate the
             cost function of this algorithm.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            cascade stops once it has passed.
 
         Returns
         -------
@@ -100,7 +135,45 @@ class ParametricAppearanceSDAlgorithm(BaseSupervisedDescentAlgorithm):
         """
         return fit_non_parametric_shape(image, initial_shape, self,
                                         gt_shape=gt_shape,
-                                        return_costs=return_costs)
+                                        return_costs=return_costs,
+                                        deadline=deadline)
+
+    def run_batch(self, images, initial_shapes, gt_shapes=None,
+                  return_costs=False, deadline=None, **kwargs):
+        r"""
+        Run the algorithm to a batch of images given an initial shape per
+        image. The regression of each cascade level is performed once for
+        all the images.
+
+        Parameters
+        ----------
+        images : `list` of `menpo.image.Image` or subclass
+            The images to be fitted.
+        initial_shapes : `list` of `menpo.shape.PointCloud`
+            The initial shape per image from which the fitting procedure will
+            start.
+        gt_shapes : `list` of (`menpo.shape.PointCloud` or ``None``), optional
+            The ground truth shape associated to each image.
+        return_costs : `bool`, optional
+            If ``True``, then the cost function values will be computed
+            during the fitting procedure. Then these cost values will be
+            assigned to the returned `fitting_result`. *Note that this
+            argument currently has no effect and will raise a warning if set
+            to ``True``. This is because it is not possible to evaluate the
+            cost function of this algorithm.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            cascade of all the images stops once it has passed.
+
+        Returns
+        -------
+        fitting_results: `list` of :map:`NonParametricIterativeResult`
+            The result of the fitting procedure per image.
+        """
+        return fit_non_parametric_shapes(images, initial_shapes, self,
+                                         gt_shapes=gt_shapes,
+                                         return_costs=return_costs,
+                                         deadline=deadline)
 
     def _print_regression_info(self, template_shape, gt_shapes, n_perturbations,
                                delta_x, estimated_delta_x, level_index,
@@ -133,13 +206,39 @@ class ParametricAppearanceNewton(ParametricAppearanceSDAlgorithm):
         The regularization parameter.
     bias : `bool`, optional
         Flag that controls whether to use a bias term.
+    max_appearance_components : `int` or `float` or ``None``, optional
+        The maximum number of components of the appearance model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance model is built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`).
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, patch_features=no_op, patch_shape=(17, 17),
                  n_iterations=3, appearance_model_cls=PCAVectorModel,
                  compute_error=euclidean_bb_normalised_error,
-                 alpha=0, bias=True):
+                 alpha=0, bias=True,
+                 max_appearance_components=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(ParametricAppearanceNewton, self).__init__(
-            appearance_model_cls=appearance_model_cls)
+            appearance_model_cls=appearance_model_cls,
+            max_appearance_components=max_appearance_components,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
         self._regressor_cls = partial(IRLRegression, alpha=alpha, bias=bias)
         self.patch_shape = patch_shape
@@ -173,13 +272,39 @@ class ParametricAppearanceGaussNewton(ParametricAppearanceSDAlgorithm):
         Flag that controls whether to use a bias term.
     alpha2 : `float`, optional
         The regularization parameter of the Hessian matrix.
+    max_appearance_components : `int` or `float` or ``None``, optional
+        The maximum number of components of the appearance model, or else the
+        ratio of variance to keep if `float`. If ``None``, then all the
+        components are kept.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance model is built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`).
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
     """
     def __init__(self, patch_features=no_op, patch_shape=(17, 17),
                  n_iterations=3, appearance_model_cls=PCAVectorModel,
                  compute_error=euclidean_bb_normalised_error,
-                 alpha=0, bias=True, alpha2=0):
+                 alpha=0, bias=True, alpha2=0,
+                 max_appearance_components=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         super(ParametricAppearanceGaussNewton, self).__init__(
-            appearance_model_cls=appearance_model_cls)
+            appearance_model_cls=appearance_model_cls,
+            max_appearance_components=max_appearance_components,
+            randomized_pca=randomized_pca,
+            pca_oversampling=pca_oversampling,
+            pca_power_iterations=pca_power_iterations,
+            pca_random_state=pca_random_state)
 
         self._regressor_cls = partial(IIRLRegression, alpha=alpha, bias=bias,
                                       alpha2=alpha2)
@@ -61,7 +61,7 @@ class ParametricShapeSDAlgorithm(BaseSupervisedDescentAlgorithm):
                                   self.patch_shape, self.patch_features)
 
     def run(self, image, initial_shape, gt_shape=None, return_costs=False,
-            **kwargs):
+            deadline=None, **kwargs):
         r"""
         Run the algorithm to an image given an initial shape.
 
@@ -80,6 +80,9 @@ class ParametricShapeSDAlgorithm(BaseSupervisedDescentAlgorithm):
             argument currently has no effect and will raise a warning if set
             to ``True``. This is because it is not possible to evaluate the
             cost function of this algorithm.*
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            cascade stops once it has passed.
 
         Returns
         -------
@@ -88,7 +91,8 @@ class ParametricShapeSDAlgorithm(BaseSupervisedDescentAlgorithm):
         """
         return fit_parametric_shape(image, initial_shape, self,
                                     gt_shape=gt_shape,
-                                    return_costs=return_costs)
+                                    return_costs=return_costs,
+                                    deadline=deadline)
 
     def _print_regression_info(self, _, gt_shapes, n_perturbations,
                                delta_x, estimated_delta_x, level_index,
@@ -13,7 +13,7 @@ from menpofit.builder import (scale_images, rescale_images_to_reference_shape,
                               compute_features)
 from menpofit.fitter import (MultiScaleNonParametricFitter,
                              noisy_shape_from_bounding_box,
-                             align_shape_with_bounding_box,
+                             align_shape_with_bounding_boxes,
                              generate_perturbations_from_gt)
 import menpofit.checks as checks
 
@@ -135,6 +135,11 @@ class SupervisedDescentFitter(MultiScaleNonParametricFitter):
         all the images.
     verbose : `bool`, optional
         If ``True``, then the progress of the training will be printed.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting, e.g. ``np.float32``. The
+        regressors are trained in double precision and cast to `dtype` once
+        the training is finished, and the images are cast to `dtype` after
+        feature extraction. If ``None``, then double precision is used.
 
     References
     ----------
@@ -152,7 +157,7 @@ class SupervisedDescentFitter(MultiScaleNonParametricFitter):
                  patch_shape=(17, 17), scales=(0.5, 1.0), n_iterations=3,
                  n_perturbations=30,
                  perturb_from_gt_bounding_box=noisy_shape_from_bounding_box,
-                 batch_size=None, verbose=False):
+                 batch_size=None, verbose=False, dtype=None):
         if batch_size is not None:
             raise NotImplementedError('Training an SDM with a batch size '
                                       '(incrementally) is not implemented yet.')
@@ -168,7 +173,7 @@ class SupervisedDescentFitter(MultiScaleNonParametricFitter):
         # Call superclass
         super(SupervisedDescentFitter, self).__init__(
             scales=scales, reference_shape=reference_shape,
-            holistic_features=holistic_features, algorithms=[])
+            holistic_features=holistic_features, algorithms=[], dtype=dtype)
 
         # Set parameters
         self._sd_algorithm_cls = sd_algorithm_cls
@@ -187,6 +192,11 @@ class SupervisedDescentFitter(MultiScaleNonParametricFitter):
                     bounding_box_group_glob=bounding_box_group_glob,
                     verbose=verbose, batch_size=batch_size)
 
+        # The regressors are trained in double precision and cast once
+        if self.dtype is not None:
+            for a in self.algorithms:
+                a._cast_regressors(self.dtype)
+
     def _setup_algorithms(self):
         self.algorithms = [self._sd_algorithm_cls[j](
             patch_features=self.patch_features[j],
@@ -304,13 +314,17 @@ class SupervisedDescentFitter(MultiScaleNonParametricFitter):
                 wrap = partial(print_progress, prefix=msg,
                                end_with_newline=False, verbose=verbose)
                 # Extract perturbations at the very bottom level
-                for ii in wrap(scaled_images):
-                    c_shapes = []
-                    for bbox in generated_bb_func(ii):
-                        c_s = align_shape_with_bounding_box(
-                            self.reference_shape, bbox)
-                        c_shapes.append(c_s)
-                    current_shapes.append(c_shapes)
+                bboxes = [generated_bb_func(ii) for ii in wrap(scaled_images)]
+                # and align the reference shape with all of them at once
+                aligned_shapes = iter(align_shape_with_bounding_boxes(
+                    self.reference_shape.points,
+                    np.array([b.points for i_bboxes in bboxes
+                              for b in i_bboxes])))
+                for i_bboxes in bboxes:
+                    current_shapes.append(
+                        [self.reference_shape.from_vector(
+                            next(aligned_shapes).ravel())
+                         for _ in i_bboxes])
             else:
                 # At the rest of the scales, extract the current shapes that
                 # were attached to the images
@@ -425,7 +439,8 @@ class SupervisedDescentFitter(MultiScaleNonParametricFitter):
             procedure.
         """
         return self.algorithms[0]._multi_scale_fitter_result(
-            results=algorithm_results, scales=self.scales,
+            results=algorithm_results,
+            scales=self._result_scales(algorithm_results),
             affine_transforms=affine_transforms,
             scale_transforms=scale_transforms, image=image, gt_shape=gt_shape)
 
@@ -543,6 +558,11 @@ class SDM(SupervisedDescentFitter):
         all the images.
     verbose : `bool`, optional
         If ``True``, then the progress of the training will be printed.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting, e.g. ``np.float32``. The
+        regressors are trained in double precision and cast to `dtype` once
+        the training is finished, and the images are cast to `dtype` after
+        feature extraction. If ``None``, then double precision is used.
 
     References
     ----------
@@ -555,7 +575,7 @@ class SDM(SupervisedDescentFitter):
                  patch_features=no_op, patch_shape=(17, 17), scales=(0.5, 1.0),
                  n_iterations=3, n_perturbations=30,
                  perturb_from_gt_bounding_box=noisy_shape_from_bounding_box,
-                 batch_size=None, verbose=False):
+                 batch_size=None, verbose=False, dtype=None):
         super(SDM, self).__init__(
                 images, group=group,
                 bounding_box_group_glob=bounding_box_group_glob,
@@ -566,7 +586,7 @@ class SDM(SupervisedDescentFitter):
                 diagonal=diagonal, scales=scales, n_iterations=n_iterations,
                 n_perturbations=n_perturbations,
                 perturb_from_gt_bounding_box=perturb_from_gt_bounding_box,
-                batch_size=batch_size, verbose=verbose)
+                batch_size=batch_size, verbose=verbose, dtype=dtype)
 
 
 class RegularizedSDM(SupervisedDescentFitter):
@@ -635,6 +655,11 @@ class RegularizedSDM(SupervisedDescentFitter):
         all the images.
     verbose : `bool`, optional
         If ``True``, then the progress of the training will be printed.
+    dtype : `numpy.dtype` or ``None``, optional
+        The floating point type of the fitting, e.g. ``np.float32``. The
+        regressors are trained in double precision and cast to `dtype` once
+        the training is finished, and the images are cast to `dtype` after
+        feature extraction. If ``None``, then double precision is used.
 
     References
     ----------
@@ -648,7 +673,7 @@ class RegularizedSDM(SupervisedDescentFitter):
                  patch_shape=(17, 17), scales=(0.5, 1.0), n_iterations=6,
                  n_perturbations=30,
                  perturb_from_gt_bounding_box=noisy_shape_from_bounding_box,
-                 batch_size=None, verbose=False):
+                 batch_size=None, verbose=False, dtype=None):
         super(RegularizedSDM, self).__init__(
             images, group=group,
             bounding_box_group_glob=bounding_box_group_glob,
@@ -658,4 +683,4 @@ class RegularizedSDM(SupervisedDescentFitter):
             patch_shape=patch_shape, diagonal=diagonal, scales=scales,
             n_iterations=n_iterations, n_perturbations=n_perturbations,
             perturb_from_gt_bounding_box=perturb_from_gt_bounding_box,
-            batch_size=batch_size, verbose=verbose)
+            batch_size=batch_size, verbose=verbose, dtype=dtype)
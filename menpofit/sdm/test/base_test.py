@@ -0,0 +1,51 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+import menpo.io as mio
+from menpo.feature import no_op, igo
+from menpo.shape import PointCloud
+
+from menpofit.sdm import BatchedPatchFeatures
+from menpofit.sdm.algorithm.base import (features_per_patch,
+                                         features_per_shapes,
+                                         features_per_image)
+
+
+def setup_module():
+    global image, shapes
+    image = mio.import_builtin_asset.takeo_ppm()
+    image = image.rescale_landmarks_to_diagonal_range(80)
+    shape = image.landmarks['PTS']
+    rng = np.random.RandomState(0)
+    shapes = [PointCloud(shape.points + rng.randn(*shape.points.shape))
+              for _ in range(3)]
+
+
+def squared(pixels):
+    return pixels ** 2
+
+
+def per_patch_features(image, shape, patch_shape, features_callable):
+    patches = image.extract_patches(shape, patch_shape=patch_shape,
+                                    as_single_array=True)
+    return np.hstack([features_callable(p[0]).ravel() for p in patches])
+
+
+def test_features_per_shapes():
+    for features, batched_features in [(no_op, no_op), (igo, igo),
+                                       (squared,
+                                        BatchedPatchFeatures(squared))]:
+        expected = np.array([per_patch_features(image, s, (7, 7), features)
+                             for s in shapes])
+        assert_allclose(features_per_shapes(image, shapes, (7, 7),
+                                            batched_features), expected)
+        assert_allclose(features_per_patch(image, shapes[0], (7, 7),
+                                           batched_features), expected[0])
+
+
+def test_features_per_image():
+    features = features_per_image([image, image], [shapes, shapes[:2]],
+                                  (5, 5), igo)
+    expected = [per_patch_features(image, s, (5, 5), igo)
+                for s in shapes + shapes[:2]]
+    assert_allclose(features, expected)
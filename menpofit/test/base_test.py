@@ -0,0 +1,27 @@
+import time
+
+from menpofit.base import Deadline, expired
+
+
+def test_deadline_expires():
+    deadline = Deadline(0.05)
+    assert not deadline.check()
+    assert 0 < deadline.remaining <= 0.05
+    time.sleep(0.06)
+    assert deadline.check()
+    assert deadline.expired
+    assert deadline.remaining == 0
+
+
+def test_deadline_share():
+    deadline = Deadline(10.)
+    share = deadline.share(4)
+    assert share.remaining <= 2.5
+    assert share.remaining > 2.
+    assert Deadline(0.).share(2).check()
+
+
+def test_expired():
+    assert not expired(None)
+    assert expired(Deadline(0.))
+    assert not expired(Deadline(10.))
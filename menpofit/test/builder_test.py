@@ -0,0 +1,141 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+from numpy.testing import assert_allclose
+from nose.tools import raises
+
+from menpo.feature import gradient
+
+from menpofit.builder import (compute_reference_shape, compute_features,
+                              scale_images, warp_images, extract_patches,
+                              rescale_images_to_reference_shape,
+                              build_reference_frame, images_to_matrix,
+                              warp_images_to_matrix,
+                              extract_patches_to_matrix)
+from menpofit.test import helpers
+from menpofit.transform import DifferentiablePiecewiseAffine
+
+
+def setup_module():
+    global images, shapes, reference_shape, executor
+    images = helpers.load_images()
+    shapes = [i.landmarks['PTS'] for i in images]
+    reference_shape = compute_reference_shape(shapes, 40)
+    executor = ThreadPoolExecutor(2)
+
+
+def teardown_module():
+    executor.shutdown()
+
+
+def assert_same_images(images, expected):
+    assert len(images) == len(expected)
+    for image, expected_image in zip(images, expected):
+        assert type(image) is type(expected_image)
+        assert_allclose(image.pixels, expected_image.pixels)
+
+
+def parallel_options():
+    # process pools with and without an explicit chunk size, a generator of
+    # images and an existing executor
+    return [dict(n_jobs=2), dict(n_jobs=2, chunk_size=1),
+            dict(n_jobs=None), dict(executor=executor)]
+
+
+def test_compute_features():
+    expected = compute_features(images, gradient)
+    for kwargs in parallel_options():
+        assert_same_images(compute_features(iter(images), gradient, **kwargs),
+                           expected)
+
+
+def test_compute_features_progress_of_generators():
+    stdout = sys.stdout
+    sys.stdout = output = StringIO()
+    try:
+        features = compute_features(iter(images), gradient, verbose=True)
+    finally:
+        sys.stdout = stdout
+    assert len(features) == len(images)
+    # The number of images is not known, thus only the count is printed
+    assert '({} done) - done.'.format(len(images)) in output.getvalue()
+
+
+def test_scale_images():
+    expected, expected_transforms = scale_images(images, 0.5,
+                                                 return_transforms=True)
+    for kwargs in parallel_options():
+        scaled, transforms = scale_images(iter(images), 0.5,
+                                          return_transforms=True, **kwargs)
+        assert_same_images(scaled, expected)
+        for t, expected_t in zip(transforms, expected_transforms):
+            assert_allclose(t.h_matrix, expected_t.h_matrix)
+
+
+def test_rescale_images_to_reference_shape():
+    expected = rescale_images_to_reference_shape(images, 'PTS',
+                                                 reference_shape)
+    for kwargs in parallel_options():
+        assert_same_images(rescale_images_to_reference_shape(
+            iter(images), 'PTS', reference_shape, **kwargs), expected)
+
+
+def test_warp_images():
+    reference_frame = build_reference_frame(reference_shape)
+    expected = warp_images(images, shapes, reference_frame,
+                           DifferentiablePiecewiseAffine)
+    for kwargs in parallel_options():
+        warped = warp_images(iter(images), iter(shapes), reference_frame,
+                             DifferentiablePiecewiseAffine, **kwargs)
+        assert_same_images(warped, expected)
+        for image in warped:
+            assert_allclose(image.landmarks['source'].points,
+                            reference_frame.landmarks['source'].points)
+
+
+def test_extract_patches():
+    expected = extract_patches(images, shapes, (5, 5))
+    for kwargs in parallel_options():
+        assert_same_images(extract_patches(iter(images), iter(shapes), (5, 5),
+                                           **kwargs), expected)
+
+
+def test_warp_images_to_matrix():
+    reference_frame = build_reference_frame(reference_shape)
+    expected = warp_images(images, shapes, reference_frame,
+                           DifferentiablePiecewiseAffine)
+    expected = np.array([i.as_vector() for i in expected])
+    matrix, template = warp_images_to_matrix(
+        images, shapes, reference_frame, DifferentiablePiecewiseAffine,
+        dtype=np.float64)
+    assert_allclose(matrix, expected)
+    assert template.n_true_pixels() * template.n_channels == \
+        matrix.shape[1]
+    memmap_dir = tempfile.mkdtemp()
+    try:
+        matrix, _ = warp_images_to_matrix(
+            images, shapes, reference_frame, DifferentiablePiecewiseAffine,
+            memmap_dir=memmap_dir, n_jobs=2)
+        assert isinstance(matrix, np.memmap)
+        assert matrix.dtype == np.float32
+        assert_allclose(matrix, expected, rtol=1e-5, atol=1e-6)
+        del matrix
+    finally:
+        shutil.rmtree(memmap_dir)
+
+
+def test_extract_patches_to_matrix():
+    expected = extract_patches(images, shapes, (5, 5))
+    matrix, template = extract_patches_to_matrix(images, shapes, (5, 5),
+                                                 dtype=np.float64)
+    assert_allclose(matrix, np.array([i.as_vector() for i in expected]))
+    assert template.pixels.shape == expected[0].pixels.shape
+
+
+@raises(ValueError)
+def test_images_to_matrix_raises_valueerror():
+    images_to_matrix(images, len(images) + 1)
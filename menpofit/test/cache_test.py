@@ -0,0 +1,177 @@
+from copy import deepcopy
+from functools import partial
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+from menpo.feature import no_op, igo, es
+from menpo.shape import PointCloud
+
+from menpofit.aam import (HolisticAAM, LucasKanadeAAMFitter,
+                          ProjectOutInverseCompositional,
+                          WibergInverseCompositional)
+from menpofit.cache import PrecomputationCache, CachedFeatures, hash_arrays
+from menpofit.test import helpers
+
+
+def setup_module():
+    global images, aam
+    images = helpers.load_images()
+    aam = helpers.holistic_aam()
+
+
+def setup_function():
+    global cache_dir
+    cache_dir = tempfile.mkdtemp()
+
+
+def teardown_function():
+    shutil.rmtree(cache_dir)
+
+
+def test_hash_arrays():
+    a = np.arange(6.)
+    assert hash_arrays(a, 'x', 1) == hash_arrays(a.copy(), 'x', 1)
+    assert hash_arrays(a) != hash_arrays(a.astype(np.float32))
+    assert hash_arrays(a) != hash_arrays(a.reshape((2, 3)))
+    assert hash_arrays(a, None) != hash_arrays(a, 'None')
+    assert hash_arrays(1) != hash_arrays(1.)
+
+
+def test_precomputation_cache_entries():
+    cache = PrecomputationCache(os.path.join(cache_dir, 'entries'))
+    entry = {'a': np.arange(5.), 'b': np.eye(3, dtype=np.float32)}
+    assert cache.load('key') is None
+    cache.save('key', entry)
+    assert 'key' in cache
+    loaded = cache.load('key')
+    for name in entry:
+        assert loaded[name].dtype == entry[name].dtype
+        assert_allclose(loaded[name], entry[name])
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.clear()
+    assert 'key' not in cache
+    assert cache.size() == 0
+
+
+def test_precomputation_cache_damaged_entry_is_a_miss():
+    cache = PrecomputationCache(cache_dir)
+    with open(cache.path_of('key'), 'wb') as f:
+        f.write(b'damaged')
+    assert cache.load('key') is None
+    assert cache.misses == 1
+
+
+def test_lk_fitter_precompute_cache():
+    bb = images[0].landmarks['PTS'].bounding_box()
+    for lk_algorithm in [ProjectOutInverseCompositional,
+                         WibergInverseCompositional]:
+        # The fitters set the active components of the models, thus each
+        # one gets its own copy of the AAM
+        expected = LucasKanadeAAMFitter(
+            deepcopy(aam), lk_algorithm_cls=lk_algorithm, n_shape=3,
+            n_appearance=3).fit_from_bb(images[0], bb, max_iters=5)
+        cache = PrecomputationCache(cache_dir)
+        fitters = [LucasKanadeAAMFitter(deepcopy(aam),
+                                        lk_algorithm_cls=lk_algorithm,
+                                        n_shape=3, n_appearance=3,
+                                        precompute_cache=cache)
+                   for _ in range(2)]
+        assert fitters[0].precompute_cache_hits == [False] * aam.n_scales
+        assert fitters[1].precompute_cache_hits == [True] * aam.n_scales
+        for fitter in fitters:
+            result = fitter.fit_from_bb(images[0], bb, max_iters=5)
+            assert_allclose(result.final_shape.points,
+                            expected.final_shape.points)
+        # The number of active components is part of the key
+        fitter = LucasKanadeAAMFitter(deepcopy(aam),
+                                      lk_algorithm_cls=lk_algorithm,
+                                      n_shape=2, n_appearance=3,
+                                      precompute_cache=cache)
+        assert fitter.precompute_cache_hits == [False] * aam.n_scales
+        cache.clear()
+
+
+def recursive_features(image, n=2):
+    return image if n == 0 else recursive_features(image, n - 1)
+
+
+def test_cached_features_key():
+    cache = PrecomputationCache(cache_dir)
+
+    def key(features):
+        return CachedFeatures(features, cache)._features_key
+
+    assert key(igo) == key(igo)
+    assert key(igo) != key(es)
+    # The functions that a lambda calls are part of the key
+    assert key(lambda image: igo(image)) == key(lambda image: igo(image))
+    assert key(lambda image: igo(image)) != key(lambda image: es(image))
+    assert key(lambda image: recursive_features(image)) != \
+        key(lambda image: igo(image))
+    assert key(partial(igo, double_angles=True)) != key(igo)
+
+
+def translated_landmarks(image, offset):
+    image = image.copy()
+    image.landmarks['PTS'] = PointCloud(image.landmarks['PTS'].points +
+                                        offset)
+    return image
+
+
+def test_cached_features_hits():
+    cache = PrecomputationCache(cache_dir)
+    for image in images:
+        CachedFeatures(igo, cache)(image)
+    assert (cache.hits, cache.misses) == (0, len(images))
+    for image in images:
+        feature_image = CachedFeatures(igo, cache)(image)
+        assert_allclose(feature_image.pixels, igo(image).pixels)
+        assert_allclose(feature_image.landmarks['PTS'].points,
+                        image.landmarks['PTS'].points)
+    assert (cache.hits, cache.misses) == (len(images), len(images))
+    # The landmarks are part of the key
+    CachedFeatures(igo, cache)(translated_landmarks(images[0], 1))
+    assert cache.misses == len(images) + 1
+
+
+def test_cached_features_max_size():
+    # Entries that only differ in their landmarks have the same size
+    image_copies = [translated_landmarks(images[0], i) for i in range(4)]
+    cache = PrecomputationCache(cache_dir)
+    CachedFeatures(no_op, cache)(image_copies[0])
+    entry_size = cache.size()
+    cache.clear()
+    cache = PrecomputationCache(cache_dir, max_size=int(2.5 * entry_size))
+    features = CachedFeatures(no_op, cache)
+    for image in image_copies:
+        features(image)
+    assert cache.evictions == 2
+    assert cache.size() == 2 * entry_size
+    # The least recently used entries are evicted
+    features(image_copies[3])
+    assert cache.hits == 1
+    features(image_copies[0])
+    assert cache.misses == 5
+
+
+def test_cached_features_are_not_used_when_fitting():
+    cache = PrecomputationCache(cache_dir)
+    kwargs = dict(group='PTS', diagonal=40, verbose=False)
+    cached_aam = HolisticAAM(images, holistic_features=CachedFeatures(
+        igo, cache), **kwargs)
+    # The features of the training images are computed once for all scales
+    assert (cache.hits, cache.misses) == (0, len(images))
+    size = cache.size()
+    expected_aam = HolisticAAM(images, holistic_features=igo, **kwargs)
+    bb = images[0].landmarks['PTS'].bounding_box()
+    result = LucasKanadeAAMFitter(cached_aam, n_shape=3, n_appearance=3
+                                  ).fit_from_bb(images[0], bb, max_iters=5)
+    expected = LucasKanadeAAMFitter(expected_aam, n_shape=3, n_appearance=3
+                                    ).fit_from_bb(images[0], bb, max_iters=5)
+    assert_allclose(result.final_shape.points, expected.final_shape.points)
+    assert (cache.hits, cache.misses) == (0, len(images))
+    assert cache.size() == size
@@ -0,0 +1,193 @@
+from functools import partial
+
+import numpy as np
+from numpy.testing import assert_allclose
+from nose.tools import raises
+
+import menpofit.base
+
+from menpofit.fitter import (align_shape_with_bounding_box,
+                             generate_perturbations_from_gt,
+                             noisy_shape_from_bounding_box,
+                             noisy_alignment_similarity_h_matrices)
+from menpofit.sdm import RegularizedSDM
+from menpofit.test import helpers
+
+
+def setup_module():
+    global images, aam_fitter, sdm
+    images = helpers.load_images()
+    aam_fitter = helpers.aam_fitter()
+    sdm = helpers.sdm()
+
+
+def assert_same_results(batch_results, results):
+    assert len(batch_results) == len(results)
+    for batch_result, result in zip(batch_results, results):
+        assert_allclose(batch_result.final_shape.points,
+                        result.final_shape.points)
+        assert len(batch_result.shapes) == len(result.shapes)
+
+
+def test_sdm_fit_from_shapes():
+    initial_shapes = [
+        align_shape_with_bounding_box(sdm.reference_shape,
+                                      im.landmarks['PTS'].bounding_box())
+        for im in images]
+    batch_results = sdm.fit_from_shapes(images, initial_shapes)
+    results = [sdm.fit_from_shape(im, s)
+               for im, s in zip(images, initial_shapes)]
+    assert_same_results(batch_results, results)
+
+
+def test_sdm_fit_from_bbs():
+    bbs = [im.landmarks['PTS'].bounding_box() for im in images]
+    gt_shapes = [im.landmarks['PTS'] for im in images]
+    batch_results = sdm.fit_from_bbs(images, bbs, gt_shapes=gt_shapes)
+    results = [sdm.fit_from_bb(im, bb, gt_shape=gt)
+               for im, bb, gt in zip(images, bbs, gt_shapes)]
+    assert_same_results(batch_results, results)
+    for batch_result, result in zip(batch_results, results):
+        assert_allclose(batch_result.final_error(), result.final_error())
+
+
+def test_aam_fit_from_bbs():
+    bbs = [im.landmarks['PTS'].bounding_box() for im in images]
+    batch_results = aam_fitter.fit_from_bbs(images, bbs, max_iters=5)
+    results = [aam_fitter.fit_from_bb(im, bb, max_iters=5)
+               for im, bb in zip(images, bbs)]
+    assert_same_results(batch_results, results)
+
+
+@raises(ValueError)
+def test_fit_from_shapes_raises_valueerror():
+    sdm.fit_from_shapes(images, [sdm.reference_shape])
+
+
+def test_fit_from_shapes_time_budget():
+    # Two cascades per scale, so that the second one can be skipped
+    np.random.seed(0)
+    sdm2 = RegularizedSDM(images, group='PTS', alpha=1.0, diagonal=40,
+                          patch_shape=(4, 4), n_iterations=[2, 2],
+                          n_perturbations=3)
+    initial_shapes = [
+        align_shape_with_bounding_box(sdm2.reference_shape,
+                                      im.landmarks['PTS'].bounding_box())
+        for im in images]
+    # A generous budget does not change the results
+    assert_same_results(sdm2.fit_from_shapes(images, initial_shapes,
+                                             time_budget=60.),
+                        sdm2.fit_from_shapes(images, initial_shapes))
+    # Without any time left, only the first cascade of each scale is applied
+    for result in sdm2.fit_from_shapes(images, initial_shapes,
+                                       time_budget=0.):
+        assert result.n_iters_per_scale == [1] * sdm2.n_scales
+        assert [s['reason'] for s in result.early_stops] == \
+            ['time_budget'] * sdm2.n_scales
+
+
+def test_aam_fit_from_bbs_time_budget():
+    bbs = [im.landmarks['PTS'].bounding_box() for im in images]
+    for result in aam_fitter.fit_from_bbs(images, bbs, max_iters=5,
+                                          time_budget=0.):
+        assert result.n_iters == 0
+        assert result.stop_reason == 'time_budget'
+    for result in aam_fitter.fit_from_bbs(images, bbs, max_iters=5,
+                                          time_budget=60.):
+        assert result.early_stops == []
+
+
+
+def test_aam_fit_from_bbs_shares_time_budget_per_image():
+    clock = [0.]
+    allowances = []
+
+    def run(algorithm_run, *args, **kwargs):
+        deadline = kwargs['deadline']
+        allowances.append(deadline.time - clock[0])
+        result = algorithm_run(*args, **kwargs)
+        # Each image takes a second to fit
+        clock[0] += 1.
+        return result
+
+    bbs = [im.landmarks['PTS'].bounding_box() for im in images]
+    base_clock = menpofit.base._clock
+    menpofit.base._clock = lambda: clock[0]
+    try:
+        for algorithm in aam_fitter.algorithms:
+            algorithm.run = partial(run, algorithm.run)
+        aam_fitter.fit_from_bbs(images, bbs, max_iters=5,
+                                time_budget=2. * len(images))
+    finally:
+        menpofit.base._clock = base_clock
+        for algorithm in aam_fitter.algorithms:
+            del algorithm.run
+    # The time of each scale is shared equally by its images, instead of
+    # being available to the first image
+    assert_allclose(allowances,
+                    [2. / aam_fitter.n_scales] * len(allowances))
+
+
+def generate_perturbations(perturb_func, n_perturbations=3):
+    # Two provided bounding boxes per image
+    perturbed_images = []
+    for image in images:
+        image = image.copy()
+        bb = image.landmarks['PTS'].bounding_box()
+        image.landmarks['box_0'] = bb
+        image.landmarks['box_1'] = bb.copy()
+        image.landmarks['box_1'].points += 2
+        perturbed_images.append(image)
+    np.random.seed(1)
+    generated_bb_func = generate_perturbations_from_gt(
+        perturbed_images, n_perturbations, perturb_func, gt_group='PTS',
+        bb_group_glob='box_*')
+    return [generated_bb_func(image) for image in perturbed_images]
+
+
+def test_generate_perturbations_from_gt():
+    # The perturbations of all the images are drawn at once, in the same order
+    # as when perturbing one bounding box at a time
+    batch_bbs = generate_perturbations(
+        partial(noisy_shape_from_bounding_box, noise_type='gaussian'))
+    bbs = generate_perturbations(
+        lambda shape, bb: noisy_shape_from_bounding_box(
+            shape, bb, noise_type='gaussian'))
+    for batch_image_bbs, image_bbs in zip(batch_bbs, bbs):
+        # The provided bounding boxes are kept after their perturbations
+        assert len(batch_image_bbs) == len(image_bbs) == 2 * (3 + 1)
+        for batch_bb, bb in zip(batch_image_bbs, image_bbs):
+            assert_allclose(batch_bb.points, bb.points)
+
+
+def test_uniform_noise_distribution():
+    # Without an alignment, the transforms are the noise alone
+    shape = images[0].landmarks['PTS'].points
+    for noise_percentage, scale_range in [([0.2, 0., 0.], 0.1),
+                                          (0.1, 0.05)]:
+        h_matrices = noisy_alignment_similarity_h_matrices(
+            shape, np.repeat(shape[None], 5000, axis=0),
+            noise_percentage=noise_percentage, random_state=0)
+        scales = np.sqrt(np.linalg.det(h_matrices[:, :2, :2]))
+        # The scale is uniform about 1, thus it is not biased towards
+        # shrinking the shapes
+        assert np.all(np.abs(scales - 1) <= scale_range)
+        assert abs(np.mean(scales) - 1) < 0.05 * scale_range
+        assert_allclose(np.var(scales), scale_range ** 2 / 3, rtol=0.1)
+
+
+def test_noise_random_state():
+    shape = images[0].landmarks['PTS'].points
+    targets = np.repeat(shape[None], 10, axis=0)
+    for noise_type in ['uniform', 'gaussian']:
+        expected = noisy_alignment_similarity_h_matrices(
+            shape, targets, noise_type=noise_type, random_state=0)
+        for random_state in [np.random.RandomState(0),
+                             helpers.GeneratorLike(0)]:
+            assert_allclose(noisy_alignment_similarity_h_matrices(
+                shape, targets, noise_type=noise_type,
+                random_state=random_state), expected)
+        # ``None`` draws from the global random number generator of numpy
+        np.random.seed(0)
+        assert_allclose(noisy_alignment_similarity_h_matrices(
+            shape, targets, noise_type=noise_type), expected)
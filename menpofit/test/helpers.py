@@ -0,0 +1,110 @@
+r"""
+The images and the small trained models that are shared by the tests. The
+models are trained once per test run, the first time that they are
+requested, thus the tests must not modify them. A test that needs to modify
+a model must work on a ``deepcopy`` of it.
+"""
+from functools import wraps
+
+import numpy as np
+
+import menpo.io as mio
+from menpo.feature import no_op
+
+from menpofit.aam import HolisticAAM, PatchAAM, LucasKanadeAAMFitter
+from menpofit.sdm import RegularizedSDM
+
+
+def _trained_once(build):
+    r"""
+    Decorator that builds the returned object on the first call and returns
+    the same object on all the subsequent calls.
+    """
+    built = []
+
+    @wraps(build)
+    def trained_once():
+        if not built:
+            built.append(build())
+        return built[0]
+    return trained_once
+
+
+class GeneratorLike(object):
+    r"""
+    Random number generator with the sampling methods of
+    ``numpy.random.Generator``, which draws uniform samples with ``random``
+    instead of ``random_sample``. It draws the same samples as a
+    ``numpy.random.RandomState`` with the same seed.
+    """
+    def __init__(self, seed):
+        self._random_state = np.random.RandomState(seed)
+
+    def standard_normal(self, size=None):
+        return self._random_state.standard_normal(size)
+
+    def random(self, size=None):
+        return self._random_state.random_sample(size)
+
+
+@_trained_once
+def _images():
+    images = []
+    for name in ['breakingbad.jpg', 'takeo.ppm', 'lenna.png', 'einstein.jpg']:
+        image = mio.import_builtin_asset(name)
+        image.landmarks['PTS'] = image.landmarks[image.landmarks.group_labels[0]]
+        image = image.crop_to_landmarks_proportion(0.2, group='PTS')
+        if image.n_channels == 3:
+            image = image.as_greyscale()
+        images.append(image.rescale_landmarks_to_diagonal_range(60,
+                                                                group='PTS'))
+    return images
+
+
+def load_images():
+    r"""
+    Returns four small greyscale builtin images with their landmarks in the
+    ``'PTS'`` group. The images are copies, thus they can be modified.
+    """
+    return [image.copy() for image in _images()]
+
+
+@_trained_once
+def holistic_aam():
+    r"""
+    Returns a :map:`HolisticAAM` trained on the images of :func:`load_images`
+    without features.
+    """
+    return HolisticAAM(_images(), group='PTS', diagonal=40,
+                       holistic_features=no_op, verbose=False)
+
+
+@_trained_once
+def patch_aam():
+    r"""
+    Returns a :map:`PatchAAM` trained on the images of :func:`load_images`
+    without features.
+    """
+    return PatchAAM(_images(), group='PTS', diagonal=40, patch_shape=(5, 5),
+                    holistic_features=no_op, verbose=False)
+
+
+@_trained_once
+def aam_fitter():
+    r"""
+    Returns a :map:`LucasKanadeAAMFitter` of :func:`holistic_aam` with three
+    shape and appearance components.
+    """
+    return LucasKanadeAAMFitter(holistic_aam(), n_shape=3, n_appearance=3)
+
+
+@_trained_once
+def sdm():
+    r"""
+    Returns a :map:`RegularizedSDM` trained on the images of
+    :func:`load_images`.
+    """
+    np.random.seed(0)
+    return RegularizedSDM(_images(), group='PTS', alpha=1.0, diagonal=40,
+                          patch_shape=(4, 4), n_iterations=2,
+                          n_perturbations=3)
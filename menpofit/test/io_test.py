@@ -0,0 +1,124 @@
+import os
+import pickle
+import shutil
+import tempfile
+import warnings
+
+from pathlib import Path
+
+import numpy as np
+from numpy.testing import assert_allclose
+from nose.tools import raises
+
+from menpofit.aam import (LucasKanadeAAMFitter,
+                          ProjectOutInverseCompositional,
+                          SimultaneousInverseCompositional,
+                          AlternatingForwardCompositional,
+                          WibergInverseCompositional)
+import menpofit.io
+from menpofit.io import export_compact, import_compact, load_fitter
+from menpofit.test import helpers
+
+
+def setup_module():
+    global images, aam, sdm, tmp_dir
+    images = helpers.load_images()
+    aam = helpers.holistic_aam()
+    sdm = helpers.sdm()
+    tmp_dir = tempfile.mkdtemp()
+
+
+def teardown_module():
+    shutil.rmtree(tmp_dir)
+
+
+def export_import(obj, mmap_mode):
+    path = os.path.join(tmp_dir, 'model.menpofit')
+    # store all the arrays externally, so that they all get memory-mapped
+    export_compact(obj, path, overwrite=True, min_array_bytes=0)
+    return import_compact(path, mmap_mode=mmap_mode)
+
+
+def test_compact_aam_fitters():
+    bb = images[0].landmarks['PTS'].bounding_box()
+    for lk_algorithm in [ProjectOutInverseCompositional,
+                         SimultaneousInverseCompositional,
+                         AlternatingForwardCompositional,
+                         WibergInverseCompositional]:
+        fitter = LucasKanadeAAMFitter(aam, lk_algorithm_cls=lk_algorithm,
+                                      n_shape=3, n_appearance=3)
+        expected = fitter.fit_from_bb(images[0], bb, max_iters=5)
+        for mmap_mode in ['r', 'c', None]:
+            loaded = export_import(fitter, mmap_mode)
+            # The workspaces are reallocated, thus a read-only import fits
+            for algorithm in loaded.algorithms:
+                assert not isinstance(algorithm._J_m, np.memmap)
+                assert algorithm._J_m.flags.writeable
+            result = loaded.fit_from_bb(images[0], bb, max_iters=5)
+            assert_allclose(result.final_shape.points,
+                            expected.final_shape.points)
+
+
+def test_compact_sdm():
+    bb = images[1].landmarks['PTS'].bounding_box()
+    expected = sdm.fit_from_bb(images[1], bb)
+    loaded = export_import(sdm, 'r')
+    result = loaded.fit_from_bb(images[1], bb)
+    assert_allclose(result.final_shape.points, expected.final_shape.points)
+
+
+def test_compact_model_arrays_are_mapped():
+    loaded = export_import(aam, 'r')
+    components = loaded.appearance_models[0]._components
+    assert isinstance(components, np.memmap)
+    assert_allclose(components, aam.appearance_models[0]._components)
+    loaded = export_import(aam, None)
+    assert not isinstance(loaded.appearance_models[0]._components, np.memmap)
+
+
+def test_lk_workspaces_are_not_pickled():
+    fitter = LucasKanadeAAMFitter(
+        aam, lk_algorithm_cls=SimultaneousInverseCompositional, n_shape=3,
+        n_appearance=3)
+    algorithm = fitter.algorithms[0]
+    state = algorithm.__getstate__()
+    for name in algorithm._workspace_arrays:
+        assert name not in state
+    loaded = pickle.loads(pickle.dumps(algorithm))
+    for name in algorithm._workspace_arrays:
+        assert getattr(loaded, name).shape == getattr(algorithm, name).shape
+
+
+@raises(ValueError)
+def test_import_compact_rejects_other_files():
+    path = os.path.join(tmp_dir, 'model.pkl')
+    with open(path, 'wb') as f:
+        pickle.dump(aam, f)
+    import_compact(path)
+
+
+def unpicklable_fitter():
+    # The pretrained fitters are pickled as functions that build them, thus
+    # the fitters can hold callables that cannot be pickled
+    return {'features': lambda image: image}
+
+
+def test_load_fitter_that_cannot_be_compact():
+    data_dir = Path(tmp_dir) / 'data'
+    data_dir.mkdir()
+    data_dir_path = menpofit.io.menpofit_data_dir_path
+    menpofit.io.menpofit_data_dir_path = lambda: data_dir
+    try:
+        with open(str(menpofit.io.path_of_fitter('test')), 'wb') as f:
+            pickle.dump(unpicklable_fitter, f)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            fitter = load_fitter('test', compact=True)
+        assert len(w) == 1
+        assert fitter['features'](1) == 1
+        # Neither a compact nor a temporary file is left behind
+        assert [p.name for p in data_dir.iterdir()] == [
+            menpofit.io.path_of_fitter('test').name]
+    finally:
+        menpofit.io.menpofit_data_dir_path = data_dir_path
+        shutil.rmtree(str(data_dir))
@@ -0,0 +1,107 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+import menpo.io as mio
+from menpo.shape import PointCloud
+from menpo.transform import Similarity
+
+from menpofit.modelinstance import PDM, GlobalPDM, OrthoPDM
+from menpofit.transform import (DifferentiableAlignmentSimilarity,
+                                DifferentiableAlignmentAffine,
+                                DifferentiablePiecewiseAffine,
+                                OrthoMDTransform, LinearOrthoMDTransform)
+
+
+def random_shapes(points, n_shapes, rng):
+    # Noisy shapes with a random similarity transform each
+    shapes = []
+    for _ in range(n_shapes):
+        similarity = Similarity.init_identity(2).from_vector(
+            np.hstack([rng.randn(2) * 0.1, rng.randn(2) * 10]))
+        shapes.append(similarity.apply(
+            PointCloud(points + rng.randn(*points.shape))))
+    return shapes
+
+
+def setup_module():
+    global shapes, test_shapes
+    rng = np.random.RandomState(0)
+    points = mio.import_builtin_asset('breakingbad.jpg').landmarks['PTS'].points
+    shapes = random_shapes(points, 10, rng)
+    test_shapes = random_shapes(points, 5, rng)
+
+
+def point_distribution_models():
+    yield PDM(shapes)
+    yield GlobalPDM(shapes, DifferentiableAlignmentSimilarity)
+    yield GlobalPDM(shapes, DifferentiableAlignmentAffine)
+    yield OrthoPDM(shapes)
+
+
+def project_one_by_one(model, shapes):
+    parameters = []
+    for shape in shapes:
+        model.set_target(shape)
+        parameters.append(model.as_vector())
+    return np.array(parameters)
+
+
+def instance_one_by_one(model, parameters):
+    instances = []
+    for p in parameters:
+        model._from_vector_inplace(p)
+        instances.append(model.target.points)
+    return np.array(instances)
+
+
+def test_pdm_project_batch():
+    points = np.array([s.points for s in test_shapes])
+    for model in point_distribution_models():
+        model.n_active_components = 4
+        p = model.as_vector()
+        parameters = model.project_batch(points)
+        # The state of the model does not change
+        assert_allclose(model.as_vector(), p)
+        assert_allclose(parameters, project_one_by_one(model, test_shapes),
+                        atol=1e-10)
+
+
+def test_pdm_instance_batch():
+    rng = np.random.RandomState(1)
+    for model in point_distribution_models():
+        model.n_active_components = 4
+        p = model.as_vector()
+        parameters = model.project_batch(
+            np.array([s.points for s in test_shapes]))
+        parameters += rng.randn(*parameters.shape) * 0.01
+        instances = model.instance_batch(parameters)
+        assert_allclose(model.as_vector(), p)
+        assert_allclose(instances, instance_one_by_one(model, parameters),
+                        atol=1e-10)
+
+
+def test_mdt_project_batch():
+    pdm = OrthoPDM(shapes)
+    transform = OrthoMDTransform(pdm, DifferentiablePiecewiseAffine,
+                                 source=pdm.model.mean())
+    points = np.array([s.points for s in test_shapes])
+    parameters = transform.project_batch(points)
+    assert_allclose(transform.instance_batch(parameters),
+                    pdm.instance_batch(parameters))
+    assert_allclose(parameters, project_one_by_one(transform, test_shapes),
+                    atol=1e-10)
+
+
+def test_linear_mdt_project_batch():
+    # Dense shapes whose first points are the sparse landmarks
+    dense_shapes = [PointCloud(np.vstack([s.points, s.points[:-1] +
+                                          np.diff(s.points, axis=0) / 2]))
+                    for s in shapes]
+    n_landmarks = shapes[0].n_points
+    model = OrthoPDM(dense_shapes).model
+    transform = LinearOrthoMDTransform(
+        model, PointCloud(model.mean().points[:n_landmarks]))
+    # Sparse shapes are densified before being projected
+    sparse_points = np.array([s.points for s in test_shapes])
+    assert_allclose(transform.project_batch(sparse_points),
+                    project_one_by_one(transform, test_shapes), atol=1e-10)
@@ -0,0 +1,113 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from numpy.testing import assert_allclose
+
+from menpo.image import Image
+
+from menpofit.parallel import (ParallelFitter, map_chunks, start_worker_pool,
+                               worker_state, _init_worker, _fit_task)
+from menpofit.test import helpers
+
+
+def setup_module():
+    global images, fitter
+    images = helpers.load_images()
+    fitter = helpers.aam_fitter()
+
+
+def square_chunk(chunk):
+    return [x ** 2 for x in chunk]
+
+
+def state_task(_):
+    time.sleep(0.05)
+    return os.getpid(), worker_state()
+
+
+def exit_task():
+    os._exit(0)
+
+
+def test_map_chunks():
+    expected = [x ** 2 for x in range(50)]
+    assert list(map_chunks(square_chunk, range(50))) == expected
+    assert list(map_chunks(square_chunk, iter(range(50)), n_jobs=2,
+                           chunk_size=3)) == expected
+    with ThreadPoolExecutor(2) as executor:
+        assert list(map_chunks(square_chunk, range(50),
+                               executor=executor)) == expected
+
+
+def test_worker_state_of_replaced_workers():
+    pool = start_worker_pool(2, 'state')
+    try:
+        # A worker exits, thus the pool starts a new one
+        pool.apply_async(exit_task)
+        time.sleep(0.5)
+        results = pool.map(state_task, range(8), chunksize=1)
+    finally:
+        pool.terminate()
+        pool.join()
+    assert all(state == 'state' for _, state in results)
+
+
+def test_fit_task_drops_images():
+    bb = images[0].landmarks['PTS'].bounding_box()
+    _init_worker(state=fitter)
+    try:
+        result = _fit_task(('fit_from_bb', images[0], bb, None,
+                            {'max_iters': 2}))
+    finally:
+        _init_worker(state=None)
+
+    def assert_no_images(obj, seen):
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        assert not isinstance(obj, Image)
+        if isinstance(obj, dict):
+            obj = list(obj.values())
+        elif hasattr(obj, '__dict__'):
+            obj = list(vars(obj).values())
+        if isinstance(obj, (list, tuple)):
+            for o in obj:
+                assert_no_images(o, seen)
+
+    assert_no_images(result, set())
+
+
+def test_parallel_fitter():
+    bbs = [im.landmarks['PTS'].bounding_box() for im in images]
+    results = [fitter.fit_from_bb(im, bb, max_iters=5)
+               for im, bb in zip(images, bbs)]
+    with ParallelFitter(fitter, n_workers=2) as parallel_fitter:
+        parallel_results = parallel_fitter.fit_from_bbs(images, bbs,
+                                                        max_iters=5)
+    assert len(parallel_results) == len(results)
+    for parallel_result, result, image in zip(parallel_results, results,
+                                              images):
+        assert_allclose(parallel_result.final_shape.points,
+                        result.final_shape.points)
+        assert_allclose(parallel_result.image.pixels, image.pixels)
+
+
+def test_parallel_fitter_consumes_images_lazily():
+    consumed = []
+
+    def image_stream():
+        for _ in range(5):
+            for image in images:
+                consumed.append(image)
+                yield image
+
+    bbs = [im.landmarks['PTS'].bounding_box() for im in images] * 5
+    with ParallelFitter(fitter, n_workers=1) as parallel_fitter:
+        results = parallel_fitter.imap_fit_from_bbs(image_stream(), bbs,
+                                                    max_iters=1)
+        next(results)
+        # Only two images per worker have been submitted
+        assert len(consumed) == 2
+        assert len(list(results)) == len(bbs) - 1
+    assert len(consumed) == len(bbs)
@@ -0,0 +1,67 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+from menpo.shape import PointCloud
+from menpo.transform import Affine, Scale
+
+from menpofit.result import (NonParametricIterativeResult,
+                             MultiScaleNonParametricIterativeResult)
+
+
+def random_shapes(n_shapes, rng):
+    return [PointCloud(rng.randn(10, 2)) for _ in range(n_shapes)]
+
+
+def setup_module():
+    global results, affine_transforms, scale_transforms, initial_shape
+    rng = np.random.RandomState(0)
+    initial_shape = PointCloud(rng.randn(10, 2))
+    results = [
+        NonParametricIterativeResult(random_shapes(3, rng),
+                                     initial_shape=initial_shape,
+                                     costs=[3., 2., 1.]),
+        NonParametricIterativeResult(random_shapes(2, rng),
+                                     initial_shape=PointCloud(
+                                         rng.randn(10, 2)),
+                                     costs=[0.5, 0.25])]
+    affine_transforms = [Affine(np.array([[1.1, 0.2, 3.], [-0.1, 0.9, 1.],
+                                          [0., 0., 1.]])),
+                         Affine(np.array([[0.8, 0., -2.], [0.3, 1.2, 0.5],
+                                          [0., 0., 1.]]))]
+    scale_transforms = [Scale(2., n_dims=2), Scale(1., n_dims=2)]
+
+
+def rescale(shape, i):
+    return affine_transforms[i].apply(scale_transforms[i].apply(shape))
+
+
+def create_result():
+    return MultiScaleNonParametricIterativeResult(
+        results, [0.5, 1.], affine_transforms, scale_transforms)
+
+
+def test_multiscale_result_shapes():
+    result = create_result()
+    # The initial shapes of all the scales but the first are dropped
+    expected = ([rescale(initial_shape, 0)] +
+                [rescale(s, 0) for s in results[0].shapes[1:]] +
+                [rescale(s, 1) for s in results[1].shapes[1:]])
+    assert result.n_iters == 5
+    assert result.n_iters_per_scale == [3, 2]
+    assert len(result.shapes) == len(expected)
+    for shape, expected_shape in zip(result.shapes, expected):
+        assert_allclose(shape.points, expected_shape.points)
+    assert_allclose(result.initial_shape.points, expected[0].points)
+    assert_allclose(result.final_shape.points, expected[-1].points)
+    assert result.costs == [3., 2., 1., 0.5, 0.25]
+
+
+def test_multiscale_result_final_shape_is_lazy():
+    result = create_result()
+    final_shape = result.final_shape
+    assert result._shapes is None
+    assert_allclose(final_shape.points,
+                    rescale(results[1].final_shape, 1).points)
+    # The final shape is shared with the materialised shapes
+    assert result.shapes[-1] is final_shape
+    assert result.shapes is result.shapes
@@ -0,0 +1,111 @@
+import numpy as np
+from nose.tools import raises
+
+from menpo.image import Image
+from menpo.transform import Translation
+
+from menpofit.fitter import align_shape_with_bounding_box
+from menpofit.test import helpers
+from menpofit.tracking import Tracker
+
+
+def setup_module():
+    global images, fitter
+    images = helpers.load_images()
+    fitter = helpers.aam_fitter()
+
+
+def video(image, offsets, frame_shape=(160, 150)):
+    r"""
+    Returns frames in which the image is placed at the provided offsets, along
+    with the translated ground truth shapes.
+    """
+    frames, gt_shapes = [], []
+    for offset in offsets:
+        pixels = np.zeros((image.n_channels,) + frame_shape)
+        pixels[:, offset[0]:offset[0] + image.shape[0],
+               offset[1]:offset[1] + image.shape[1]] = image.pixels
+        frames.append(Image(pixels))
+        gt_shapes.append(Translation(offset).apply(image.landmarks['PTS']))
+    return frames, gt_shapes
+
+
+def initial_shape(gt_shape):
+    return align_shape_with_bounding_box(fitter.reference_shape,
+                                         gt_shape.bounding_box())
+
+
+def mean_error(result, gt_shape):
+    return np.mean(np.linalg.norm(result.final_shape.points -
+                                  gt_shape.points, axis=1))
+
+
+def test_tracker_warm_fits():
+    frames, gt_shapes = video(images[0], [(70, 50)] * 4)
+    tracker = Tracker(fitter, motion_threshold=0.05)
+    results = list(tracker.track_frames(frames,
+                                        initial_shape=initial_shape(
+                                            gt_shapes[0])))
+    assert (tracker.n_full_fits, tracker.n_warm_fits, tracker.n_drifts) == \
+        (1, 3, 0)
+    # The coarse scale is skipped once the shape stops moving
+    assert [r.n_scales for r in results] == [2, 2, 1, 1]
+    # The results of the crops are in frame coordinates
+    for result, gt_shape in zip(results, gt_shapes):
+        assert mean_error(result, gt_shape) < 1
+    assert tracker.shape is results[-1].final_shape
+    # Only a window around the shape is processed
+    min_w, max_w = tracker._window
+    assert np.all(min_w > 0) and np.all(max_w < frames[0].shape)
+
+
+def test_tracker_follows_motion():
+    frames, gt_shapes = video(images[0], [(70, 50), (72, 53), (75, 55),
+                                          (77, 58)])
+    tracker = Tracker(fitter)
+    results = list(tracker.track_frames(frames,
+                                        initial_shape=initial_shape(
+                                            gt_shapes[0])))
+    assert tracker.n_full_fits == 1
+    for result, gt_shape in zip(results, gt_shapes):
+        assert mean_error(result, gt_shape) < 1
+
+
+def test_tracker_refits_drifted_frames_from_detector():
+    frames, gt_shapes = video(images[0], [(70, 50)] * 3)
+    detections = []
+
+    def detector(frame):
+        detections.append(frame)
+        return gt_shapes[0].bounding_box()
+
+    tracker = Tracker(fitter, detector=detector,
+                      drift_func=lambda shape, result, frame: True)
+    results = list(tracker.track_frames(frames))
+    assert (tracker.n_full_fits, tracker.n_warm_fits, tracker.n_drifts) == \
+        (3, 0, 2)
+    assert len(detections) == 3
+    for result, gt_shape in zip(results, gt_shapes):
+        assert result.n_scales == fitter.n_scales
+        assert mean_error(result, gt_shape) < 1
+
+
+def test_tracker_reset():
+    frames, gt_shapes = video(images[0], [(70, 50)] * 2)
+    tracker = Tracker(fitter)
+    tracker.track(frames[0], initial_shape=initial_shape(gt_shapes[0]))
+    assert tracker.is_tracking
+    tracker.reset()
+    assert not tracker.is_tracking
+    assert tracker.shape is None
+
+
+@raises(ValueError)
+def test_tracker_requires_initial_shape_or_detector():
+    frames, _ = video(images[0], [(70, 50)])
+    Tracker(fitter).track(frames[0])
+
+
+@raises(ValueError)
+def test_tracker_n_warm_scales_raises_valueerror():
+    Tracker(fitter, n_warm_scales=0)
@@ -0,0 +1,304 @@
+from __future__ import division
+import numpy as np
+
+from menpo.transform import Translation
+
+
+def _diagonal(shape):
+    r"""
+    Returns the diagonal length of the bounding box of a shape.
+    """
+    min_b, max_b = shape.bounds()
+    return np.sqrt(np.sum((max_b - min_b) ** 2))
+
+
+class Tracker(object):
+    r"""
+    Class for tracking a shape through the frames of a video with a trained
+    multi-scale fitter. Contrary to calling ``fit_from_shape`` on each frame,
+    the tracker keeps state across frames:
+
+        1. The fitting of each frame is initialised from the final shape of
+           the previous frame.
+        2. Only a crop of the frame around that shape is processed, thus the
+           holistic features are not computed on the whole frame. The crop
+           window is reused by the following frames for as long as the shape
+           stays well within it.
+        3. If the shape moved by less than `motion_threshold` in the previous
+           frame, then the coarse scales are skipped and only the
+           `n_warm_scales` finest scales are fitted.
+        4. If the final shape of a frame has drifted, i.e. its scale or
+           position changed abruptly with respect to the previous frame, then
+           the frame is fitted again with the full pipeline, either from the
+           bounding box returned by the `detector` or from the previous shape.
+
+    Parameters
+    ----------
+    fitter : :map:`MultiScaleNonParametricFitter` or subclass
+        The trained fitter, e.g. :map:`LucasKanadeAAMFitter` or
+        :map:`SupervisedDescentFitter`.
+    n_warm_scales : `int`, optional
+        The number of finest scales that are fitted when the motion of the
+        previous frame is small.
+    motion_threshold : `float`, optional
+        The motion of a frame is the mean displacement of the points of its
+        final shape with respect to the previous frame, normalised by the
+        diagonal of the shape's bounding box. The coarse scales are skipped on
+        the next frame if the motion is not greater than this value.
+    crop_proportion : `float`, optional
+        The margin that is added around the shape's bounding box on each side
+        when computing the crop window, as a proportion of the bounding box
+        size.
+    max_scale_change : `float`, optional
+        A frame has drifted if the diagonal of its final shape changed by more
+        than this proportion with respect to the previous frame.
+    max_displacement : `float`, optional
+        A frame has drifted if the centre of its final shape moved by more
+        than this proportion of the diagonal of the previous shape.
+    detector : `callable` or ``None``, optional
+        A function that returns the bounding box (`menpo.shape.PointCloud`) of
+        the object in a frame, or ``None`` if the object is not detected. It
+        is used for initialising the first frame if no initial shape is
+        provided, as well as for the full fitting that follows a drift. If
+        ``None``, then the full fitting starts from the previous shape.
+    max_iters : `int` or `list` of `int`, optional
+        The maximum number of iterations of each fitting. If `int`, then it
+        specifies the maximum number of iterations over all scales. If `list`
+        of `int`, then specifies the maximum number of iterations per scale.
+    drift_func : `callable` or ``None``, optional
+        A function with signature ``drift_func(previous_shape, result,
+        frame)`` that returns whether the fitting `result` of a frame has
+        drifted, e.g. by thresholding its appearance reconstruction error.
+        It replaces the default test, which only uses `max_scale_change` and
+        `max_displacement`.
+    """
+    def __init__(self, fitter, n_warm_scales=1, motion_threshold=0.02,
+                 crop_proportion=0.5, max_scale_change=0.2,
+                 max_displacement=0.3, detector=None, max_iters=20,
+                 drift_func=None):
+        if n_warm_scales < 1:
+            raise ValueError('n_warm_scales must be a positive integer')
+        self.fitter = fitter
+        self.n_warm_scales = n_warm_scales
+        self.motion_threshold = motion_threshold
+        self.crop_proportion = crop_proportion
+        self.max_scale_change = max_scale_change
+        self.max_displacement = max_displacement
+        self.detector = detector
+        self.max_iters = max_iters
+        self.drift_func = drift_func
+        self.n_full_fits = 0
+        self.n_warm_fits = 0
+        self.n_drifts = 0
+        self.reset()
+
+    def reset(self):
+        r"""
+        Resets the state of the tracker, thus the next frame is fitted with
+        the full pipeline.
+        """
+        self._shape = None
+        self._motion = np.inf
+        self._window = None
+
+    @property
+    def is_tracking(self):
+        r"""
+        Whether the tracker has a shape from a previous frame.
+
+        :type: `bool`
+        """
+        return self._shape is not None
+
+    @property
+    def shape(self):
+        r"""
+        The final shape of the last tracked frame or ``None`` if the tracker
+        has been reset.
+
+        :type: `menpo.shape.PointCloud` or ``None``
+        """
+        return self._shape
+
+    def track(self, frame, initial_shape=None, gt_shape=None):
+        r"""
+        Fits the next frame of the video.
+
+        Parameters
+        ----------
+        frame : `menpo.image.Image` or subclass
+            The frame to be fitted.
+        initial_shape : `menpo.shape.PointCloud` or ``None``, optional
+            If provided, then the tracker is reset and the frame is fitted
+            with the full pipeline from this shape. It is required on the
+            first frame if there is no `detector`.
+        gt_shape : `menpo.shape.PointCloud`, optional
+            The ground truth shape associated to the frame.
+
+        Returns
+        -------
+        fitting_result : :map:`MultiScaleNonParametricIterativeResult` or subclass
+            The fitting result of the frame. If the coarse scales were
+            skipped, then it only contains the results of the fitted scales.
+
+        Raises
+        ------
+        ValueError
+            An initial shape is required when the tracker is not tracking
+            and there is no detector
+        """
+        if initial_shape is not None:
+            self.reset()
+            return self._full_fit(frame, initial_shape, gt_shape=gt_shape)
+        if not self.is_tracking:
+            return self._full_fit(frame, None, gt_shape=gt_shape)
+
+        previous_shape = self._shape
+        result = self._warm_fit(frame, previous_shape, gt_shape=gt_shape)
+        if self.drift_func is not None:
+            drifted = self.drift_func(previous_shape, result, frame)
+        else:
+            drifted = self._has_drifted(previous_shape, result.final_shape,
+                                        frame)
+        if drifted:
+            self.n_drifts += 1
+            self.reset()
+            return self._full_fit(frame, previous_shape, gt_shape=gt_shape)
+        self.n_warm_fits += 1
+        self._update(previous_shape, result.final_shape)
+        return result
+
+    def track_frames(self, frames, initial_shape=None, gt_shapes=None):
+        r"""
+        Generator that tracks a sequence of frames.
+
+        Parameters
+        ----------
+        frames : `iterable` of `menpo.image.Image`
+            The frames of the video.
+        initial_shape : `menpo.shape.PointCloud` or ``None``, optional
+            The initial shape of the first frame. See :meth:`track`.
+        gt_shapes : `iterable` of `menpo.shape.PointCloud` or ``None``, optional
+            The ground truth shape of each frame.
+
+        Yields
+        ------
+        fitting_result : :map:`MultiScaleNonParametricIterativeResult` or subclass
+            The fitting result of each frame.
+        """
+        if gt_shapes is None:
+            gt_shapes = iter(lambda: None, 0)
+        for k, (frame, gt_shape) in enumerate(zip(frames, gt_shapes)):
+            yield self.track(frame,
+                             initial_shape=initial_shape if k == 0 else None,
+                             gt_shape=gt_shape)
+
+    def _full_fit(self, frame, shape, gt_shape=None):
+        r"""
+        Fits a frame with the full pipeline of the fitter, starting from the
+        bounding box of the detector if there is one or from `shape`
+        otherwise.
+        """
+        bounding_box = None
+        if self.detector is not None:
+            bounding_box = self.detector(frame)
+        if bounding_box is not None:
+            result = self.fitter.fit_from_bb(frame, bounding_box,
+                                             max_iters=self.max_iters,
+                                             gt_shape=gt_shape)
+        elif shape is not None:
+            result = self.fitter.fit_from_shape(frame, shape,
+                                                max_iters=self.max_iters,
+                                                gt_shape=gt_shape)
+        else:
+            raise ValueError('An initial shape is required when the tracker '
+                             'is not tracking and there is no detector')
+        self.n_full_fits += 1
+        self._update(None, result.final_shape)
+        return result
+
+    def _warm_fit(self, frame, shape, gt_shape=None):
+        r"""
+        Fits a frame from the previous shape on the crop window, skipping the
+        coarse scales if the previous motion was small.
+        """
+        fitter = self.fitter
+        first_scale = 0
+        if self._motion <= self.motion_threshold:
+            first_scale = max(fitter.n_scales - self.n_warm_scales, 0)
+
+        # Fit the crop of the frame. The translation of the crop is composed
+        # with the affine transforms, thus the result is in frame coordinates.
+        min_indices, max_indices = self._crop_window(frame, shape)
+        crop = frame.crop(min_indices, max_indices)
+        to_crop = Translation(-min_indices)
+        to_frame = Translation(min_indices)
+        crop_gt_shape = None if gt_shape is None else to_crop.apply(gt_shape)
+        (images, initial_shapes, gt_shapes, affine_transforms,
+         scale_transforms) = fitter._prepare_image(
+            crop, to_crop.apply(shape), gt_shape=crop_gt_shape,
+            first_scale=first_scale)
+        algorithm_results = fitter._fit(
+            images=images, initial_shape=initial_shapes[first_scale],
+            affine_transforms=affine_transforms,
+            scale_transforms=scale_transforms, gt_shapes=gt_shapes,
+            max_iters=self.max_iters, first_scale=first_scale)
+        affine_transforms = [a.compose_before(to_frame)
+                             for a in affine_transforms[first_scale:]]
+        return fitter._fitter_result(
+            image=frame, algorithm_results=algorithm_results,
+            affine_transforms=affine_transforms,
+            scale_transforms=scale_transforms[first_scale:], gt_shape=gt_shape)
+
+    def _crop_window(self, frame, shape):
+        r"""
+        Returns the crop window of a frame. The previous window is reused if
+        the shape is still within it by at least half of the margin.
+        """
+        min_b, max_b = shape.bounds()
+        margin = self.crop_proportion * (max_b - min_b)
+        frame_shape = np.array(frame.shape)
+        if self._window is not None:
+            min_w, max_w = self._window
+            if (np.all(min_b - 0.5 * margin >= min_w) and
+                    np.all(max_b + 0.5 * margin <= max_w) and
+                    np.all(max_w <= frame_shape)):
+                return self._window
+        min_w = np.maximum(np.floor(min_b - margin), 0).astype(int)
+        max_w = np.minimum(np.ceil(max_b + margin), frame_shape).astype(int)
+        self._window = (min_w, max_w)
+        return self._window
+
+    def _has_drifted(self, previous_shape, shape, frame):
+        r"""
+        Whether the final shape of a frame has drifted with respect to the
+        shape of the previous frame.
+        """
+        if not np.all(np.isfinite(shape.points)):
+            return True
+        previous_diagonal = _diagonal(previous_shape)
+        scale_change = abs(_diagonal(shape) / previous_diagonal - 1)
+        displacement = (np.linalg.norm(shape.centre() -
+                                       previous_shape.centre()) /
+                        previous_diagonal)
+        centre = shape.centre()
+        inside = np.all(centre >= 0) and np.all(centre < frame.shape)
+        return (scale_change > self.max_scale_change or
+                displacement > self.max_displacement or not inside)
+
+    def _update(self, previous_shape, shape):
+        r"""
+        Stores the final shape of a frame and its motion.
+        """
+        if previous_shape is None:
+            self._motion = np.inf
+        else:
+            self._motion = (np.mean(np.linalg.norm(
+                shape.points - previous_shape.points, axis=1)) /
+                            _diagonal(previous_shape))
+        self._shape = shape
+
+    def __str__(self):
+        return ('Tracker with {} ({} full fits, {} warm fits, {} '
+                'drifts)'.format(type(self.fitter).__name__, self.n_full_fits,
+                                 self.n_warm_fits, self.n_drifts))
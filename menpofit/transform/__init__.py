@@ -1,7 +1,9 @@
 from .modeldriven import OrthoMDTransform, LinearOrthoMDTransform
 from .homogeneous import (DifferentiableAffine, DifferentiableSimilarity,
                           DifferentiableAlignmentSimilarity,
-                          DifferentiableAlignmentAffine)
-from .piecewiseaffine import DifferentiablePiecewiseAffine
+                          DifferentiableAlignmentAffine,
+                          batch_procrustes_alignment)
+from .piecewiseaffine import (DifferentiablePiecewiseAffine,
+                              barycentric_lookup, cached_barycentric_lookup)
 from .thinsplatesplines import DifferentiableThinPlateSplines
 from .rbf import DifferentiableR2LogR2RBF, DifferentiableR2LogRRBF
@@ -381,6 +381,69 @@ def similarity_d_dp(sim, points):
     return jac
 
 
+def batch_procrustes_alignment(source, targets, rotation=True):
+    r"""
+    Computes the Procrustes alignments of a source shape to many target shapes
+    at once. The results are the same as ``AlignmentSimilarity(source,
+    target, rotation=rotation)`` per target, i.e. the scale matches the norms
+    of the centred shapes and the rotation is optimal without reflections.
+
+    Parameters
+    ----------
+    source : ``(n_points, n_dims)`` or ``(n_targets, n_points, n_dims)`` `ndarray`
+        The source points, either shared by all the alignments or one per
+        target.
+    targets : ``(n_targets, n_points, n_dims)`` `ndarray`
+        The points of the targets.
+    rotation : `bool`, optional
+        If ``False``, then the rotation is not considered when computing the
+        alignments.
+
+    Returns
+    -------
+    h_matrices : ``(n_targets, n_dims + 1, n_dims + 1)`` `ndarray`
+        The homogeneous matrices of the similarity transforms.
+
+    Raises
+    ------
+    ValueError
+        Only the rotation of 2D alignments is currently supported.
+    """
+    targets = np.asarray(targets)
+    n_targets, _, n_dims = targets.shape
+    if rotation and n_dims != 2:
+        raise ValueError("Only the rotation of 2D alignments is currently "
+                         "supported.")
+    source = np.asarray(source)
+    source_centres = source.mean(axis=-2)
+    source = source - source_centres[..., None, :]
+    target_centres = targets.mean(axis=1)
+    targets = targets - target_centres[:, None]
+
+    # the scale matches the norm of the source to the norm of each target
+    source_norms = np.sqrt(np.sum(source ** 2, axis=(-2, -1)))
+    scale = np.sqrt(np.einsum('nij, nij -> n', targets, targets)) / source_norms
+    linear = scale[:, None, None] * np.eye(n_dims)
+    if rotation:
+        # optimal rotation angle of the centred source onto each target
+        dot = np.sum(source * targets, axis=(1, 2))
+        cross = np.sum(source[..., 0] * targets[..., 1] -
+                       source[..., 1] * targets[..., 0], axis=1)
+        norm = np.sqrt(dot ** 2 + cross ** 2)
+        cos, sin = scale * dot / norm, scale * cross / norm
+        linear[:, 0, 0], linear[:, 0, 1] = cos, -sin
+        linear[:, 1, 0], linear[:, 1, 1] = sin, cos
+
+    # x' = s R (x - c_source) + c_target
+    h_matrices = np.zeros((n_targets, n_dims + 1, n_dims + 1))
+    h_matrices[:, :n_dims, :n_dims] = linear
+    source_centres = np.broadcast_to(source_centres, (n_targets, n_dims))
+    h_matrices[:, :n_dims, n_dims] = target_centres - np.einsum(
+        'nij, nj -> ni', linear, source_centres)
+    h_matrices[:, n_dims, n_dims] = 1
+    return h_matrices
+
+
 def _apply_jacobian_mask(sim, jac, param_mask, row_index, points):
     # make a mask for a single points jacobian
     full_mask = np.zeros((sim.n_parameters, sim.n_dims), dtype=np.bool)
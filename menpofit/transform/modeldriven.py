@@ -40,6 +40,7 @@ class ModelDrivenTransform(Transform, Targetable, Vectorizable,
         # Assign attributes
         self.pdm = model
         self._cached_points, self.dW_dl = None, None
+        self._cached_invariants = None
         self.transform = transform_cls(source, self.target)
 
     @property
@@ -123,6 +124,44 @@ class ModelDrivenTransform(Transform, Targetable, Vectorizable,
         # update the transform
         self.transform.set_target(self.target)
 
+    def project_batch(self, shapes):
+        r"""
+        Projects a batch of shapes to the parameters of the transform with a
+        few matrix operations. The result is the same as calling
+        ``set_target(shape)`` followed by ``as_vector()`` for each shape, but
+        the state of the transform does not change.
+
+        Parameters
+        ----------
+        shapes : ``(n_shapes, n_points, n_dims)`` `ndarray`
+            The points of the shapes.
+
+        Returns
+        -------
+        parameters : ``(n_shapes, n_parameters)`` `ndarray`
+            The parameters of each shape.
+        """
+        return self.pdm.project_batch(shapes)
+
+    def instance_batch(self, parameters):
+        r"""
+        Generates the targets of a batch of parameters with a few matrix
+        operations. The result is the same as calling
+        ``_from_vector_inplace(p)`` followed by ``target.points`` for each
+        parameters vector, but the state of the transform does not change.
+
+        Parameters
+        ----------
+        parameters : ``(n_shapes, n_parameters)`` `ndarray`
+            The parameters of each shape.
+
+        Returns
+        -------
+        shapes : ``(n_shapes, n_points, n_dims)`` `ndarray`
+            The points of the targets.
+        """
+        return self.pdm.instance_batch(parameters)
+
     def compose_after_from_vector_inplace(self, delta):
         r"""
         Composes two transforms together based on the first order approximation
@@ -145,34 +184,8 @@ class ModelDrivenTransform(Transform, Targetable, Vectorizable,
             Fitting", Proceedings of IEEE Conference on Computer Vision and
             Pattern Recognition (CVPR), 2008.
         """
-        # the incremental warp is always evaluated at p=0, ie the mean shape
-        points = self.pdm.model.mean().points
-
-        # compute:
-        #   - dW/dp when p=0
-        #   - dW/dp when p!=0
-        #   - dW/dx when p!=0 evaluated at the source landmarks
-
-        # dW/dp when p=0 and when p!=0 are the same and simply given by
-        # the Jacobian of the model
-        # (n_points, n_params, n_dims)
-        dW_dp_0 = self.pdm.d_dp(points)
-        # (n_points, n_params, n_dims)
-        dW_dp = dW_dp_0
-
-        # (n_points, n_dims, n_dims)
-        dW_dx = self.transform.d_dx(points)
-
-        # (n_points, n_params, n_dims)
-        dW_dx_dW_dp_0 = np.einsum('ijk, ilk -> eilk', dW_dx, dW_dp_0)
-
-        # (n_params, n_params)
-        J = np.einsum('ijk, ilk -> jl', dW_dp, dW_dx_dW_dp_0)
-        # (n_params, n_params)
-        H = np.einsum('ijk, ilk -> jl', dW_dp, dW_dp)
-        # (n_params, n_params)
-        Jp = np.linalg.solve(H, J)
-        self._from_vector_inplace(self.as_vector() + np.dot(Jp, delta))
+        self._from_vector_inplace(self.as_vector() +
+                                  np.dot(self.Jp(), delta))
 
     @property
     def has_true_inverse(self):
@@ -212,7 +225,11 @@ class ModelDrivenTransform(Transform, Targetable, Vectorizable,
 
         This is done by chaining the derivative of points wrt the
         source landmarks on the transform (dW/dL) together with the Jacobian
-        of the linear model wrt its weights (dX/dp).
+        of the linear model wrt its weights (dX/dp). If the transform provides
+        its derivative in a triangle-indexed form (e.g.
+        :map:`DifferentiablePiecewiseAffine`), then only the 3 landmarks that
+        affect each point are chained, thus the time and memory of the
+        computation is ``O(n_points * 3 * n_parameters)``.
 
         Parameters
         ----------
@@ -224,28 +241,44 @@ class ModelDrivenTransform(Transform, Targetable, Vectorizable,
         d_dp : ``(n_points, n_parameters, n_dims)`` `ndarray`
             The Jacobian with respect to the parametrisation.
         """
+        indexed = hasattr(self.transform, 'd_dl_indexed')
         # check if re-computation of dW/dl can be avoided
-        if not np.array_equal(self._cached_points, points):
+        if (indexed != isinstance(self.dW_dl, tuple) or
+                not np.array_equal(self._cached_points, points)):
             # recompute dW/dl, the derivative each point wrt
             # the source landmarks
-            self.dW_dl = self.transform.d_dl(points)
+            if indexed:
+                self.dW_dl = self.transform.d_dl_indexed(points)
+            else:
+                self.dW_dl = self.transform.d_dl(points)
             # cache points
             self._cached_points = points
 
         # dX/dp is simply the Jacobian of the PDM
         dX_dp = self.pdm.d_dp(points)
 
-        # PREVIOUS
-        # dW_dX:  n_points x n_centres x n_dims
+        # dW_dl:  n_points x n_centres x n_dims
+        #         or (n_points x 3 vertices, n_points x 3 weights)
         # dX_dp:  n_centres x n_params x n_dims
 
-        # dW_dl:  n_points x (n_dims) x n_centres x n_dims
-        # dX_dp:  (n_points x n_dims) x n_params
-
-        # The following is equivalent to
-        # np.einsum('ild, lpd -> ipd', self.dW_dl, dX_dp)
-        dW_dp = np.tensordot(self.dW_dl, dX_dp, (1, 0))
-        dW_dp = dW_dp.diagonal(axis1=3, axis2=1)
+        if indexed:
+            # Gather the Jacobian of the PDM at the 3 vertices of each
+            # point's triangle and weight it by the derivative wrt each vertex
+            vertex_index, weights = self.dW_dl
+            dW_dp = dX_dp[vertex_index[:, 0]]
+            dW_dp *= weights[:, 0, None, None]
+            for k in range(1, vertex_index.shape[1]):
+                dW_dp_k = dX_dp[vertex_index[:, k]]
+                dW_dp_k *= weights[:, k, None, None]
+                dW_dp += dW_dp_k
+        else:
+            # The following is equivalent to
+            # np.einsum('ild, lpd -> ipd', self.dW_dl, dX_dp)
+            # but only builds the output, one dimension at a time
+            dW_dp = np.empty((self.dW_dl.shape[0],) + dX_dp.shape[1:],
+                             dtype=np.result_type(self.dW_dl, dX_dp))
+            for d in range(dX_dp.shape[-1]):
+                dW_dp[..., d] = self.dW_dl[..., d].dot(dX_dp[..., d])
 
         # dW_dp:  n_points x n_params x n_dims
 
@@ -255,6 +288,12 @@ class ModelDrivenTransform(Transform, Targetable, Vectorizable,
         r"""
         Compute the parameters' Jacobian, as shown in [1].
 
+        All the quantities that only depend on the mean shape of the model
+        are computed once and cached until the number of active components of
+        the model changes. If the Jacobians of the transforms wrt spatial
+        changes are constant across space, then the cost of each call does
+        not depend on the number of points.
+
         Returns
         -------
         Jp : ``(n_params, n_params)`` `ndarray`
@@ -267,36 +306,71 @@ class ModelDrivenTransform(Transform, Targetable, Vectorizable,
             Fitting", Proceedings of IEEE Conference on Computer Vision and
             Pattern Recognition (CVPR), 2008.
         """
-        # the incremental warp is always evaluated at p=0, ie the mean shape
-        points = self.pdm.model.mean().points
+        invariants = self._mean_invariants()
 
-        # compute:
-        #   - dW/dp when p=0
-        #   - dW/dp when p!=0
-        #   - dW/dx when p!=0 evaluated at the source landmarks
+        # dW/dx when p!=0 evaluated at the source landmarks
+        # (n_points, n_dims, n_dims)
+        dW_dx = self.transform.d_dx(invariants['points'])
+
+        if dW_dx.shape[0] == 1:
+            # dW/dx is constant across space, thus J is simply a weighted sum
+            # of the per-dimension Gram matrices of dW/dp
+            # (n_dims,)
+            dW_dx_k = dW_dx[0].sum(axis=0)
+            cached_dW_dx_k, Jp = invariants.get('Jp', (None, None))
+            if not np.array_equal(cached_dW_dx_k, dW_dx_k):
+                # (n_params, n_params)
+                J = np.einsum('k, kjl -> jl', dW_dx_k, invariants['G'])
+                # (n_params, n_params)
+                Jp = np.linalg.solve(invariants['H'], J)
+                invariants['Jp'] = (dW_dx_k, Jp)
+            return Jp
 
         # dW/dp when p=0 and when p!=0 are the same and simply given by
         # the Jacobian of the model
         # (n_points, n_params, n_dims)
-        dW_dp_0 = self.pdm.d_dp(points)
-        # (n_points, n_params, n_dims)
-        dW_dp = dW_dp_0
-
-        # (n_points, n_dims, n_dims)
-        dW_dx = self.transform.d_dx(points)
+        dW_dp = dW_dp_0 = invariants['dW_dp_0']
 
         # (n_points, n_params, n_dims)
-        dW_dx_dW_dp_0 = np.einsum('ijk, ilk -> eilk', dW_dx, dW_dp_0)
+        dW_dx_dW_dp_0 = np.einsum('ijk, ilk -> ilk', dW_dx, dW_dp_0)
 
         # (n_params, n_params)
         J = np.einsum('ijk, ilk -> jl', dW_dp, dW_dx_dW_dp_0)
         # (n_params, n_params)
-        H = np.einsum('ijk, ilk -> jl', dW_dp, dW_dp)
-        # (n_params, n_params)
-        Jp = np.linalg.solve(H, J)
+        Jp = np.linalg.solve(invariants['H'], J)
 
         return Jp
 
+    def _mean_invariants(self):
+        # The incremental warp is always evaluated at p=0, ie the mean shape,
+        # thus everything that only depends on the mean shape and the active
+        # components of the model is computed once. The cache is invalidated
+        # when the number of active components or the mean of the model (e.g.
+        # after an increment) changes.
+        model = self.pdm.model
+        key = (model.n_active_components, model.mean_vector)
+        if (self._cached_invariants is None or
+                self._cached_invariants[0][0] != key[0] or
+                self._cached_invariants[0][1] is not key[1]):
+            self._cached_invariants = (key, self._compute_mean_invariants())
+        return self._cached_invariants[1]
+
+    def _compute_mean_invariants(self):
+        # the incremental warp is always evaluated at p=0, ie the mean shape
+        points = self.pdm.model.mean().points
+
+        # dW/dp when p=0 and when p!=0 are the same and simply given by
+        # the Jacobian of the model
+        # (n_points, n_params, n_dims)
+        dW_dp_0 = self.pdm.d_dp(points)
+
+        # (n_dims, n_params, n_params)
+        G = np.einsum('ijk, ilk -> kjl', dW_dp_0, dW_dp_0)
+        # (n_params, n_params)
+        H = G.sum(axis=0)
+
+        return {'points': points, 'dW_dp_0': dW_dp_0, 'G': G, 'H': H}
+
 
 # noinspection PyMissingConstructor
 class GlobalMDTransform(ModelDrivenTransform):
@@ -352,48 +426,73 @@ class GlobalMDTransform(ModelDrivenTransform):
             Fitting", Proceedings of IEEE Conference on Computer Vision and
             Pattern Recognition (CVPR), 2008.
         """
-        # the incremental warp is always evaluated at p=0, ie the mean shape
-        points = self.pdm.model.mean().points
+        self._from_vector_inplace(self.as_vector() +
+                                  np.dot(self.Jp(), delta))
 
-        # compute:
-        #   - dW/dp when p=0
-        #   - dW/dp when p!=0
-        #   - dW/dx when p!=0 evaluated at the source landmarks
+    def Jp(self):
+        r"""
+        Compute the parameters' Jacobian, as shown in [1].
 
-        # dW/dq when p=0 and when p!=0 are the same and given by the
-        # Jacobian of the global transform evaluated at the mean of the
-        # model
-        # (n_points, n_global_params, n_dims)
-        dW_dq = self.pdm._global_transform_d_dp(points)
+        All the quantities that only depend on the mean shape of the model
+        are computed once and cached until the number of active components of
+        the model changes. If the Jacobians of the transforms wrt spatial
+        changes are constant across space, then the cost of each call does
+        not depend on the number of points.
 
-        # dW/db when p=0, is the Jacobian of the model
-        # (n_points, n_weights, n_dims)
-        dW_db_0 = PDM.d_dp(self.pdm, points)
+        Returns
+        -------
+        Jp : ``(n_params, n_params)`` `ndarray`
+            The parameters' Jacobian.
 
-        # dW/dp when p=0, is simply the concatenation of the previous
-        # two terms
-        # (n_points, n_params, n_dims)
-        dW_dp_0 = np.hstack((dW_dq, dW_db_0))
+        References
+        ----------
+        .. [1] G. Papandreou and P. Maragos, "Adaptive and Constrained
+            Algorithms for Inverse Compositional Active Appearance Model
+            Fitting", Proceedings of IEEE Conference on Computer Vision and
+            Pattern Recognition (CVPR), 2008.
+        """
+        invariants = self._mean_invariants()
+        points = invariants['points']
 
         # by application of the chain rule dW_db when p!=0,
         # is the Jacobian of the global transform wrt the points times
         # the Jacobian of the model: dX(S)/db = dX/dS *  dS/db
         # (n_points, n_dims, n_dims)
         dW_dS = self.pdm.global_transform.d_dx(points)
-        # (n_points, n_weights, n_dims)
-        dW_db = np.einsum('ilj, idj -> idj', dW_dS, dW_db_0)
-
-        # dW/dp is simply the concatenation of dW_dq with dW_db
-        # (n_points, n_params, n_dims)
-        dW_dp = np.hstack((dW_dq, dW_db))
 
         # dW/dx is the jacobian of the transform evaluated at the source
         # landmarks
         # (n_points, n_dims, n_dims)
         dW_dx = self.transform.d_dx(points)
 
+        if dW_dS.shape[0] == 1 and dW_dx.shape[0] == 1:
+            # both are constant across space, thus dW/dp is dW/dp when p=0
+            # with the model columns rescaled per dimension, and J and H are
+            # weighted sums of the per-dimension Gram matrices of dW/dp when
+            # p=0
+            G = invariants['G']
+            # (n_dims, n_params)
+            scale = np.ones(G.shape[:2])
+            scale[:, invariants['n_global']:] = dW_dS[0].sum(axis=0)[:, None]
+            # (n_dims,)
+            dW_dx_k = dW_dx[0].sum(axis=0)
+            # (n_params, n_params)
+            J = np.einsum('kj, k, kjl -> jl', scale, dW_dx_k, G)
+            # (n_params, n_params)
+            H = np.einsum('kj, kjl, kl -> jl', scale, G, scale)
+            # (n_params, n_params)
+            return np.linalg.solve(H, J)
+
+        # (n_points, n_weights, n_dims)
+        dW_db = np.einsum('ilj, idj -> idj', dW_dS, invariants['dW_db_0'])
+
+        # dW/dp is simply the concatenation of dW_dq with dW_db
         # (n_points, n_params, n_dims)
-        dW_dx_dW_dp_0 = np.einsum('ijk, ilk -> ilk', dW_dx, dW_dp_0)
+        dW_dp = np.hstack((invariants['dW_dq'], dW_db))
+
+        # (n_points, n_params, n_dims)
+        dW_dx_dW_dp_0 = np.einsum('ijk, ilk -> ilk', dW_dx,
+                                  invariants['dW_dp_0'])
 
         # (n_params, n_params)
         J = np.einsum('ijk, ilk -> jl', dW_dp, dW_dx_dW_dp_0)
@@ -402,32 +501,12 @@ class GlobalMDTransform(ModelDrivenTransform):
         # (n_params, n_params)
         Jp = np.linalg.solve(H, J)
 
-        self._from_vector_inplace(self.as_vector() + np.dot(Jp, delta))
-
-    def Jp(self):
-        r"""
-        Compute the parameters' Jacobian, as shown in [1].
-
-        Returns
-        -------
-        Jp : ``(n_params, n_params)`` `ndarray`
-            The parameters' Jacobian.
+        return Jp
 
-        References
-        ----------
-        .. [1] G. Papandreou and P. Maragos, "Adaptive and Constrained
-            Algorithms for Inverse Compositional Active Appearance Model
-            Fitting", Proceedings of IEEE Conference on Computer Vision and
-            Pattern Recognition (CVPR), 2008.
-        """
+    def _compute_mean_invariants(self):
         # the incremental warp is always evaluated at p=0, ie the mean shape
         points = self.pdm.model.mean().points
 
-        # compute:
-        #   - dW/dp when p=0
-        #   - dW/dp when p!=0
-        #   - dW/dx when p!=0 evaluated at the source landmarks
-
         # dW/dq when p=0 and when p!=0 are the same and given by the
         # Jacobian of the global transform evaluated at the mean of the
         # model
@@ -443,34 +522,11 @@ class GlobalMDTransform(ModelDrivenTransform):
         # (n_points, n_params, n_dims)
         dW_dp_0 = np.hstack((dW_dq, dW_db_0))
 
-        # by application of the chain rule dW_db when p!=0,
-        # is the Jacobian of the global transform wrt the points times
-        # the Jacobian of the model: dX(S)/db = dX/dS *  dS/db
-        # (n_points, n_dims, n_dims)
-        dW_dS = self.pdm.global_transform.d_dx(points)
-        # (n_points, n_weights, n_dims)
-        dW_db = np.einsum('ilj, idj -> idj', dW_dS, dW_db_0)
-
-        # dW/dp is simply the concatenation of dW_dq with dW_db
-        # (n_points, n_params, n_dims)
-        dW_dp = np.hstack((dW_dq, dW_db))
-
-        # dW/dx is the jacobian of the transform evaluated at the source
-        # landmarks
-        # (n_points, n_dims, n_dims)
-        dW_dx = self.transform.d_dx(points)
-
-        # (n_points, n_params, n_dims)
-        dW_dx_dW_dp_0 = np.einsum('ijk, ilk -> ilk', dW_dx, dW_dp_0)
-
-        # (n_params, n_params)
-        J = np.einsum('ijk, ilk -> jl', dW_dp, dW_dx_dW_dp_0)
-        # (n_params, n_params)
-        H = np.einsum('ijk, ilk -> jl', dW_dp, dW_dp)
-        # (n_params, n_params)
-        Jp = np.linalg.solve(H, J)
+        # (n_dims, n_params, n_params)
+        G = np.einsum('ijk, ilk -> kjl', dW_dp_0, dW_dp_0)
 
-        return Jp
+        return {'points': points, 'dW_dq': dW_dq, 'dW_db_0': dW_db_0,
+                'dW_dp_0': dW_dp_0, 'G': G, 'n_global': dW_dq.shape[1]}
 
 
 class OrthoMDTransform(GlobalMDTransform):
@@ -591,6 +647,31 @@ class LinearOrthoMDTransform(OrthoPDM, Transform):
             target = PointCloud(np.reshape(target, (-1, self.n_dims)))
         OrthoPDM.set_target(self, target)
 
+    def project_batch(self, shapes):
+        r"""
+        Projects a batch of shapes to the parameters of the transform with a
+        few matrix operations. The result is the same as calling
+        ``set_target(shape)`` followed by ``as_vector()`` for each shape, but
+        the state of the transform does not change.
+
+        Parameters
+        ----------
+        shapes : ``(n_shapes, n_points, n_dims)`` `ndarray`
+            The points of the sparse or dense shapes.
+
+        Returns
+        -------
+        parameters : ``(n_shapes, n_parameters)`` `ndarray`
+            The parameters of each shape.
+        """
+        shapes = np.asarray(shapes)
+        if shapes.shape[1] == self.n_landmarks:
+            # densify shapes
+            shapes = np.dot(np.dot(shapes.reshape(shapes.shape[0], -1),
+                                   self.pinv_V), self.W)
+            shapes = shapes.reshape(shapes.shape[0], -1, self.n_dims)
+        return OrthoPDM.project_batch(self, shapes)
+
     def _apply(self, _, **kwargs):
         return self.target.points[self.n_landmarks:]
 
@@ -1,7 +1,130 @@
+from collections import OrderedDict
 import numpy as np
 from menpo.transform import PiecewiseAffine
+from menpo.transform.piecewiseaffine.base import (alpha_beta,
+                                                  TriangleContainmentError)
+from menpofit.cache import hash_arrays
 from menpofit.differentiable import DL, DX
 
+# The most recently used lookup tables, shared by all the transforms
+_lookup_tables = OrderedDict()
+_max_lookup_tables = 16
+
+
+def barycentric_lookup(i, ij, ik, points):
+    r"""
+    Finds for each point the index of its containing triangle and its `alpha`
+    and `beta` barycentric coordinates in that triangle. Contrary to the
+    lookup of `menpo.transform.PiecewiseAffine`, which computes the
+    coordinates of every point in every triangle, only the points within the
+    bounding box of each triangle are considered, thus the memory of the
+    lookup does not grow with the number of triangles. The results are
+    identical, i.e. a point on an edge is assigned to the last triangle that
+    contains it.
+
+    Parameters
+    ----------
+    i : ``(2, n_tris)`` `ndarray`
+        The coordinate of the i'th point of each triangle.
+    ij : ``(2, n_tris)`` `ndarray`
+        The vector between the i'th point and the j'th point of each
+        triangle.
+    ik : ``(2, n_tris)`` `ndarray`
+        The vector between the i'th point and the k'th point of each
+        triangle.
+    points : ``(n_points, 2)`` `ndarray`
+        The points to look up.
+
+    Returns
+    -------
+    tri_index : ``(n_points,)`` `ndarray`
+        The index of the containing triangle of each point.
+    alpha : ``(n_points,)`` `ndarray`
+        The alpha of each point in its containing triangle.
+    beta : ``(n_points,)`` `ndarray`
+        The beta of each point in its containing triangle.
+
+    Raises
+    ------
+    TriangleContainmentError
+        All `points` must be contained in a source triangle. Check
+        `error.points_outside_source_domain` to handle this case.
+    """
+    n_points = points.shape[0]
+    tri_index = np.zeros(n_points, dtype=np.uint32)
+    alpha = np.zeros(n_points)
+    beta = np.zeros(n_points)
+    contained = np.zeros(n_points, dtype=np.bool)
+    vertices = np.stack([i, i + ij, i + ik])
+    min_b, max_b = vertices.min(axis=0), vertices.max(axis=0)
+    # Widen the bounding boxes so that no point that is contained up to the
+    # rounding error of alpha and beta is missed
+    tol = 1e-6 * (1 + np.abs(vertices).max())
+    min_b, max_b = min_b - tol, max_b + tol
+    for t in range(i.shape[1]):
+        candidates = np.nonzero(
+            (points[:, 0] >= min_b[0, t]) & (points[:, 0] <= max_b[0, t]) &
+            (points[:, 1] >= min_b[1, t]) & (points[:, 1] <= max_b[1, t]))[0]
+        if candidates.size == 0:
+            continue
+        a, b = alpha_beta(i[:, t:t + 1], ij[:, t:t + 1], ik[:, t:t + 1],
+                          points[candidates])
+        a, b = a[:, 0], b[:, 0]
+        inside = (a >= 0) & (b >= 0) & (a + b <= 1)
+        candidates = candidates[inside]
+        tri_index[candidates] = t
+        alpha[candidates] = a[inside]
+        beta[candidates] = b[inside]
+        contained[candidates] = True
+    if not np.all(contained):
+        raise TriangleContainmentError(~contained)
+    return tri_index, alpha, beta
+
+
+def cached_barycentric_lookup(i, ij, ik, points, source_key=None):
+    r"""
+    Returns the :map:`barycentric_lookup` of the points, which is cached for
+    the most recently used triangulations and points (e.g. the pixels of the
+    reference frame of a model at each scale). The returned arrays are
+    read-only, since they are shared by all the transforms.
+
+    Parameters
+    ----------
+    i : ``(2, n_tris)`` `ndarray`
+        The coordinate of the i'th point of each triangle.
+    ij : ``(2, n_tris)`` `ndarray`
+        The vector between the i'th point and the j'th point of each
+        triangle.
+    ik : ``(2, n_tris)`` `ndarray`
+        The vector between the i'th point and the k'th point of each
+        triangle.
+    points : ``(n_points, 2)`` `ndarray`
+        The points to look up.
+    source_key : `str` or ``None``, optional
+        The hash of `i`, `ij` and `ik`, if it is already known.
+
+    Returns
+    -------
+    tri_index : ``(n_points,)`` `ndarray`
+        The index of the containing triangle of each point.
+    alpha : ``(n_points,)`` `ndarray`
+        The alpha of each point in its containing triangle.
+    beta : ``(n_points,)`` `ndarray`
+        The beta of each point in its containing triangle.
+    """
+    if source_key is None:
+        source_key = hash_arrays(i, ij, ik)
+    key = hash_arrays(source_key, points)
+    lookup = _lookup_tables.pop(key, None)
+    if lookup is None:
+        lookup = barycentric_lookup(i, ij, ik, points)
+        for a in lookup:
+            a.flags.writeable = False
+        while len(_lookup_tables) >= _max_lookup_tables:
+            _lookup_tables.popitem(last=False)
+    _lookup_tables[key] = lookup
+    return lookup
+
 
 class DifferentiablePiecewiseAffine(PiecewiseAffine, DL, DX):
     r"""
@@ -16,12 +139,36 @@ class DifferentiablePiecewiseAffine(PiecewiseAffine, DL, DX):
 
     The transform can compute its own derivative with respect to spatial changes,
     as well as anchor landmark changes.
+
+    The triangle index and barycentric coordinates of the applied points
+    only depend on the source, thus they are looked up once per set of
+    points (e.g. the pixels of a reference frame) and cached across all the
+    transforms with the same source (see :map:`cached_barycentric_lookup`).
+    Then, applying the transform only interpolates the target vertices.
     """
 
-    def d_dl(self, points):
+    def index_alpha_beta(self, points):
+        if (self._applied_points is None or
+                not np.array_equal(points, self._applied_points)):
+            source_key = getattr(self, '_source_key', None)
+            if source_key is None:
+                source_key = hash_arrays(self.s, self.sij, self.sik)
+                self._source_key = source_key
+            # This must happen first in case the lookup throws a
+            # TriangleContainmentError
+            self._iab = cached_barycentric_lookup(
+                self.s, self.sij, self.sik, points, source_key=source_key)
+            self._applied_points = points
+        return self._iab
+
+    def d_dl_indexed(self, points):
         r"""
         The derivative of the warp with respect to spatial changes in anchor
-        landmark points or centres, evaluated at points.
+        landmark points, evaluated at points, in its triangle-indexed form.
+        Each point only depends on the 3 vertices of its containing triangle,
+        thus this form only stores the derivative with respect to those and
+        requires ``O(n_points * 3)`` memory rather than the
+        ``O(n_points * n_centres * n_dims)`` of :meth:`d_dl`.
 
         Parameters
         ----------
@@ -30,15 +177,14 @@ class DifferentiablePiecewiseAffine(PiecewiseAffine, DL, DX):
 
         Returns
         -------
-        d_dl : ``(n_points, n_centres, n_dims)`` `ndarray`
-            The Jacobian wrt landmark changes.
-
-            ``d_dl[i, k, m]`` is the scalar differential change that the
-            any dimension of the ``i``'th point experiences due to a first order
-            change in the ``m``'th dimension of the ``k``'th landmark point.
-
-            Note that at present this assumes that the change in every
-            dimension is equal.
+        vertex_index : ``(n_points, 3)`` `ndarray`
+            The indices of the landmarks that are the vertices of the
+            containing triangle of each point.
+        weights : ``(n_points, 3)`` `ndarray`
+            The derivative of each point with respect to each of its 3
+            vertices, i.e. ``d_dl[i, vertex_index[i, k], m] == weights[i, k]``
+            for every dimension ``m``, while every other entry of
+            :meth:`d_dl` is zero.
         """
         tri_index, alpha_i, beta_i = self.index_alpha_beta(points)
         # for the jacobian we only need
@@ -61,13 +207,39 @@ class DifferentiablePiecewiseAffine(PiecewiseAffine, DL, DX):
         gamma_ijk = np.hstack(((1 - alpha_i - beta_i)[:, None],
                                alpha_i[:, None],
                                beta_i[:, None]))
-        # the jacobian wrt source is of shape
-        # (n_sample_points, n_source_points, 2)
-        jac = np.zeros((points.shape[0], self.n_points, 2))
         # per sample point, find the source points for the ijk vertices of
-        # the containing triangle - only these points will get a non 0
+        # the containing triangle - only these points have a non 0
         # jacobian value
         ijk_per_point = self.trilist[tri_index]
+        return ijk_per_point, gamma_ijk
+
+    def d_dl(self, points):
+        r"""
+        The derivative of the warp with respect to spatial changes in anchor
+        landmark points or centres, evaluated at points.
+
+        Parameters
+        ----------
+        points : ``(n_points, n_dims)`` `ndarray`
+            The spatial points at which the derivative should be evaluated.
+
+        Returns
+        -------
+        d_dl : ``(n_points, n_centres, n_dims)`` `ndarray`
+            The Jacobian wrt landmark changes.
+
+            ``d_dl[i, k, m]`` is the scalar differential change that the
+            any dimension of the ``i``'th point experiences due to a first order
+            change in the ``m``'th dimension of the ``k``'th landmark point.
+
+            Note that at present this assumes that the change in every
+            dimension is equal. Only 3 centres per point are non-zero, see
+            :meth:`d_dl_indexed` for the compact form.
+        """
+        ijk_per_point, gamma_ijk = self.d_dl_indexed(points)
+        # the jacobian wrt source is of shape
+        # (n_sample_points, n_source_points, 2)
+        jac = np.zeros((points.shape[0], self.n_points, 2))
         # to index into the jacobian, we just need a linear iterator for the
         # first axis - literally [0, 1, ... , n_sample_points]. The
         # reshape is needed to make it broadcastable with the other indexing
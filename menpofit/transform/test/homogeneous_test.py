@@ -1,7 +1,10 @@
 import numpy as np
-from numpy.testing import assert_equal
+from numpy.testing import assert_equal, assert_allclose
 from nose.tools import raises
-from menpofit.transform import DifferentiableAffine, DifferentiableSimilarity
+from menpo.shape import PointCloud
+from menpo.transform import AlignmentSimilarity
+from menpofit.transform import (DifferentiableAffine, DifferentiableSimilarity,
+                                batch_procrustes_alignment)
 
 
 jac_solution2d = np.array(
@@ -273,3 +276,21 @@ def test_similarity_jacobian_2d_raises_dimensionalityerror():
     params = np.ones(4)
     t = DifferentiableSimilarity.init_identity(2).from_vector(params)
     t.d_dp(np.ones([2, 3]))
+
+
+def test_batch_procrustes_alignment():
+    rng = np.random.RandomState(0)
+    source = rng.randn(10, 2)
+    targets = rng.randn(5, 10, 2)
+    for rotation in [True, False]:
+        h_matrices = batch_procrustes_alignment(source, targets,
+                                                rotation=rotation)
+        for h_matrix, target in zip(h_matrices, targets):
+            t = AlignmentSimilarity(PointCloud(source), PointCloud(target),
+                                    rotation=rotation)
+            assert_allclose(h_matrix, t.h_matrix)
+
+
+@raises(ValueError)
+def test_batch_procrustes_alignment_3d_rotation_raises_valueerror():
+    batch_procrustes_alignment(np.ones([4, 3]), np.ones([2, 4, 3]))
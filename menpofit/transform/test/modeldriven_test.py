@@ -0,0 +1,131 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+import menpo.io as mio
+from menpo.shape import PointCloud
+
+from menpofit.modelinstance import PDM, GlobalPDM, OrthoPDM
+from menpofit.transform import (DifferentiablePiecewiseAffine,
+                                DifferentiableThinPlateSplines,
+                                DifferentiableAlignmentSimilarity,
+                                OrthoMDTransform)
+from menpofit.transform.modeldriven import (ModelDrivenTransform,
+                                            GlobalMDTransform)
+
+
+def setup_module():
+    global shapes, source, points
+    rng = np.random.RandomState(0)
+    mean = mio.import_builtin_asset('breakingbad.jpg').landmarks['PTS'].points
+    shapes = [PointCloud(mean + rng.randn(*mean.shape)) for _ in range(10)]
+    # The landmarks and the centroids of the triangles of a piecewise affine
+    # warp on the mean shape, thus all the points are in its domain
+    source = PDM(shapes).model.mean()
+    trilist = DifferentiablePiecewiseAffine(source, source).trilist
+    points = np.vstack([source.points, source.points[trilist].mean(axis=1)])
+
+
+def model_driven_transform(transform_cls, mdt_cls=ModelDrivenTransform,
+                           pdm=None):
+    if pdm is None:
+        pdm = PDM(shapes)
+    transform = mdt_cls(pdm, transform_cls, source=pdm.model.mean())
+    rng = np.random.RandomState(1)
+    transform.from_vector_inplace(rng.randn(transform.n_parameters))
+    return transform
+
+
+def dense_d_dp(transform):
+    # The chain rule with the dense Jacobian of the warp wrt the landmarks
+    return np.einsum('ild, lpd -> ipd', transform.transform.d_dl(points),
+                     transform.pdm.d_dp(points))
+
+
+def test_piecewise_affine_d_dl_indexed():
+    transform = DifferentiablePiecewiseAffine(source, shapes[0])
+    vertex_index, weights = transform.d_dl_indexed(points)
+    # The weights are the barycentric coordinates of the points
+    assert_allclose(weights.sum(axis=1), 1)
+    assert_allclose(np.einsum('ik, ikd -> id', weights,
+                              transform.target.points[vertex_index]),
+                    transform.apply(points))
+    # The dense Jacobian only has the weights of the 3 vertices
+    d_dl = transform.d_dl(points)
+    expected = np.zeros(d_dl.shape)
+    for k in range(3):
+        expected[np.arange(points.shape[0]), vertex_index[:, k]] = \
+            weights[:, k, None]
+    assert_allclose(d_dl, expected)
+
+
+def test_mdt_d_dp():
+    for transform_cls in [DifferentiablePiecewiseAffine,
+                          DifferentiableThinPlateSplines]:
+        transform = model_driven_transform(transform_cls)
+        assert_allclose(transform.d_dp(points), dense_d_dp(transform),
+                        atol=1e-12)
+        # The Jacobian of the warp is cached
+        assert_allclose(transform.d_dp(points), dense_d_dp(transform),
+                        atol=1e-12)
+
+
+def expected_jp(transform):
+    # The parameters' Jacobian computed from scratch on the mean shape
+    pdm = transform.pdm
+    mean_points = pdm.model.mean().points
+    dW_dx = transform.transform.d_dx(mean_points)
+    if isinstance(transform, GlobalMDTransform):
+        dW_dq = pdm._global_transform_d_dp(mean_points)
+        dW_db_0 = PDM.d_dp(pdm, mean_points)
+        dW_dp_0 = np.hstack((dW_dq, dW_db_0))
+        dW_dS = pdm.global_transform.d_dx(mean_points)
+        dW_db = np.einsum('ilj, idj -> idj', dW_dS, dW_db_0)
+        dW_dp = np.hstack((dW_dq, dW_db))
+    else:
+        dW_dp = dW_dp_0 = pdm.d_dp(mean_points)
+    dW_dx_dW_dp_0 = np.einsum('ijk, ilk -> ilk', dW_dx, dW_dp_0)
+    J = np.einsum('ijk, ilk -> jl', dW_dp, dW_dx_dW_dp_0)
+    H = np.einsum('ijk, ilk -> jl', dW_dp, dW_dp)
+    return np.linalg.solve(H, J)
+
+
+def model_driven_transforms():
+    for transform_cls in [DifferentiablePiecewiseAffine,
+                          DifferentiableThinPlateSplines]:
+        yield model_driven_transform(transform_cls)
+        yield model_driven_transform(
+            transform_cls, mdt_cls=GlobalMDTransform,
+            pdm=GlobalPDM(shapes, DifferentiableAlignmentSimilarity))
+        yield model_driven_transform(transform_cls, mdt_cls=OrthoMDTransform,
+                                     pdm=OrthoPDM(shapes))
+
+
+def test_mdt_jp():
+    rng = np.random.RandomState(2)
+    for transform in model_driven_transforms():
+        expected = expected_jp(transform)
+        assert_allclose(transform.Jp(), expected, atol=1e-10)
+        # The cached Jacobian is reused while the transform does not change
+        assert_allclose(transform.Jp(), expected, atol=1e-10)
+        delta = rng.randn(transform.n_parameters) * 0.1
+        p = transform.as_vector()
+        transform.compose_after_from_vector_inplace(delta)
+        assert_allclose(transform.as_vector(), p + expected.dot(delta),
+                        atol=1e-10)
+        # A new target changes the Jacobian of the warp
+        assert_allclose(transform.Jp(), expected_jp(transform), atol=1e-10)
+
+
+def test_mdt_mean_invariants_are_cached():
+    for transform in model_driven_transforms():
+        invariants = transform._mean_invariants()
+        assert transform._mean_invariants() is invariants
+        # Changing the active components invalidates the cache
+        transform.pdm.n_active_components = 3
+        assert transform._mean_invariants() is not invariants
+        assert_allclose(transform.Jp(), expected_jp(transform), atol=1e-10)
+        # and so does incrementing the model
+        invariants = transform._mean_invariants()
+        transform.pdm.increment(shapes[:5])
+        assert transform._mean_invariants() is not invariants
+        assert_allclose(transform.Jp(), expected_jp(transform), atol=1e-10)
@@ -0,0 +1,65 @@
+import numpy as np
+from numpy.testing import assert_allclose, assert_equal
+from nose.tools import raises
+
+from menpo.shape import PointCloud
+from menpo.transform import PiecewiseAffine
+from menpo.transform.piecewiseaffine.base import (index_alpha_beta,
+                                                  TriangleContainmentError)
+
+from menpofit.transform import (DifferentiablePiecewiseAffine,
+                                barycentric_lookup, cached_barycentric_lookup)
+
+
+rng = np.random.RandomState(0)
+# A perturbed 5 x 5 grid of vertices
+grid = np.mgrid[0:5, 0:5].reshape((2, -1)).T * 10.
+source = PointCloud(grid + rng.uniform(-2, 2, size=grid.shape))
+target = PointCloud(source.points + rng.randn(*grid.shape))
+# Integer pixels within the convex hull of the grid, thus some of them lie
+# on the edges or the vertices of the triangles
+pixels = np.mgrid[2:39, 2:39].reshape((2, -1)).T.astype(np.float64)
+points = np.vstack([pixels, source.points])
+
+
+def source_vectors(transform):
+    return transform.s, transform.sij, transform.sik
+
+
+def test_barycentric_lookup():
+    transform = DifferentiablePiecewiseAffine(source, target)
+    tri_index, alpha, beta = barycentric_lookup(
+        *(source_vectors(transform) + (points,)))
+    expected = index_alpha_beta(*(source_vectors(transform) + (points,)))
+    # The points on the edges are assigned to the same triangle as in menpo
+    assert_equal(tri_index, expected[0])
+    assert_allclose(alpha, expected[1])
+    assert_allclose(beta, expected[2])
+
+
+@raises(TriangleContainmentError)
+def test_barycentric_lookup_outside_points():
+    transform = DifferentiablePiecewiseAffine(source, target)
+    barycentric_lookup(*(source_vectors(transform) +
+                         (np.array([[20., 20.], [-50., 20.]]),)))
+
+
+def test_cached_barycentric_lookup():
+    transform = DifferentiablePiecewiseAffine(source, target)
+    lookup = cached_barycentric_lookup(
+        *(source_vectors(transform) + (points,)))
+    for a in lookup:
+        assert not a.flags.writeable
+    # The transforms with the same source share the table
+    other = DifferentiablePiecewiseAffine(source, PointCloud(grid))
+    for a, b in zip(other.index_alpha_beta(points), lookup):
+        assert a is b
+    assert cached_barycentric_lookup(
+        *(source_vectors(transform) + (points.copy(),)))[0] is lookup[0]
+    assert cached_barycentric_lookup(
+        *(source_vectors(transform) + (points[1:],)))[0] is not lookup[0]
+
+
+def test_piecewise_affine_apply():
+    result = DifferentiablePiecewiseAffine(source, target).apply(points)
+    assert_allclose(result, PiecewiseAffine(source, target).apply(points))
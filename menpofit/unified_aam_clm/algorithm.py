@@ -1,6 +1,6 @@
 import numpy as np
 
-from menpofit.base import build_grid
+from menpofit.base import build_grid, expired
 from menpofit.checks import check_model
 from menpofit.modelinstance import OrthoPDM
 
@@ -159,7 +159,7 @@ class ProjectOutRegularisedLandmarkMeanShift(UnifiedAlgorithm):
         self._inv_h_prior = np.linalg.inv(h + np.diag(self._j_prior))
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, prior=False, a=0.5):
+            return_costs=False, prior=False, a=0.5, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -190,6 +190,9 @@ class ProjectOutRegularisedLandmarkMeanShift(UnifiedAlgorithm):
         a : `float`, optional
             Ratio of the image noise variance and the shape noise variance.
             See [1] section 5 equations (25) & (26) and footnote 6.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -232,7 +235,8 @@ class ProjectOutRegularisedLandmarkMeanShift(UnifiedAlgorithm):
         if return_costs:
             costs = [cost_closure(e_aam, e_clm, a)]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # compute gauss-newton parameter updates
             if prior:
                 b = (self._j_prior * self.transform.as_vector() -
@@ -304,7 +308,7 @@ class AlternatingRegularisedLandmarkMeanShift(UnifiedAlgorithm):
         self._h_prior = np.diag(self._j_prior)
 
     def run(self, image, initial_shape, gt_shape=None, max_iters=20,
-            return_costs=False, prior=False, a=0.5):
+            return_costs=False, prior=False, a=0.5, deadline=None):
         r"""
         Execute the optimization algorithm.
 
@@ -335,6 +339,9 @@ class AlternatingRegularisedLandmarkMeanShift(UnifiedAlgorithm):
         a : `float`, optional
             Ratio of the image noise variance and the shape noise variance.
             See [1] section 5 equations (25) & (26) and footnote 6.
+        deadline : :map:`Deadline` or ``None``, optional
+            The wall-clock deadline of the fitting. If provided, then the
+            iterations stop once it has passed.
 
         Returns
         -------
@@ -384,7 +391,8 @@ class AlternatingRegularisedLandmarkMeanShift(UnifiedAlgorithm):
         if return_costs:
             costs = [cost_closure(e_aam, e_clm, a)]
 
-        while k < max_iters and eps > self.eps:
+        while (k < max_iters and eps > self.eps and
+               not expired(deadline)):
             # compute model gradient
             nabla_t = self.interface.gradient(self.template)
 
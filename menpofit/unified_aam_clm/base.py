@@ -10,10 +10,12 @@ from menpo.visualize import print_dynamic
 from menpofit import checks
 from menpofit.builder import (build_reference_frame, compute_reference_shape,
                               rescale_images_to_reference_shape,
-                              compute_features, scale_images, warp_images)
+                              compute_features, scale_images, warp_images,
+                              warp_images_to_matrix, images_to_matrix)
 from menpofit.aam.algorithm.lk import LucasKanadeStandardInterface
 from menpofit.clm import CorrelationFilterExpertEnsemble
 from menpofit.clm.expert.ensemble import ConvolutionBasedExpertEnsemble
+from menpofit.math import pca_from_matrix
 from menpofit.modelinstance import OrthoPDM
 from menpofit.transform import DifferentiablePiecewiseAffine, OrthoMDTransform
 
@@ -112,6 +114,35 @@ class UnifiedAAMCLM(object):
         the extracted patches.    
     verbose : `bool`, optional
         If ``True``, then the progress of building the model will be printed.
+    n_jobs : `int` or ``None``, optional
+        The number of worker processes that rescale the training images,
+        compute their features and warp them. If ``None``, then the number of
+        CPUs is used. If ``1``, then the training is sequential.
+    warp_to_matrix : `bool`, optional
+        If ``True``, then the training images are warped straight into the
+        rows of a preallocated ``float32`` data matrix per scale, on which
+        the PCA of the appearance model is computed, instead of being
+        vectorized into a second copy.
+    memmap_dir : `str` or ``None``, optional
+        If `str`, then the data matrices of ``warp_to_matrix`` are stored in
+        temporary memory-mapped files within this directory, instead of in
+        memory. It implies ``warp_to_matrix=True``.
+    randomized_pca : `bool`, optional
+        If ``True`` and `max_appearance_components` is an `int`, then the
+        appearance models are built with a randomized truncated PCA that only
+        computes the requested number of components (see
+        :map:`randomized_pca`). It is faster and needs less memory than the
+        exact PCA, but the components are approximated.
+    pca_oversampling : `int`, optional
+        The number of additional random directions used by the randomized
+        truncated PCA.
+    pca_power_iterations : `int`, optional
+        The number of power iterations of the randomized truncated PCA.
+        Larger values increase its accuracy at the cost of training time.
+    pca_random_state : `int` or `numpy.random.RandomState` or `numpy.random.Generator` or ``None``, optional
+        The seed or the random number generator of the randomized truncated
+        PCA. If ``None``, then the global random number generator of `numpy`
+        is used.
 
     References
     ----------
@@ -127,9 +158,13 @@ class UnifiedAAMCLM(object):
                  shape_model_cls=OrthoPDM, max_shape_components=None,
                  max_appearance_components=None, sigma=None, boundary=3,
                  response_covariance=2, patch_normalisation=no_op,
-                 cosine_mask=True, verbose=False):
+                 cosine_mask=True, verbose=False, n_jobs=1,
+                 warp_to_matrix=False, memmap_dir=None, randomized_pca=False,
+                 pca_oversampling=10, pca_power_iterations=2,
+                 pca_random_state=None):
         # Check parameters
         checks.check_diagonal(diagonal)
+        n_jobs = checks.check_n_jobs(n_jobs)
         scales = checks.check_scales(scales)
         n_scales = len(scales)
         holistic_features = checks.check_callable(holistic_features, n_scales)
@@ -150,6 +185,10 @@ class UnifiedAAMCLM(object):
         self.scales = scales
         self.max_shape_components = max_shape_components
         self.max_appearance_components = max_appearance_components
+        self.randomized_pca = randomized_pca
+        self.pca_oversampling = pca_oversampling
+        self.pca_power_iterations = pca_power_iterations
+        self.pca_random_state = pca_random_state
         self.reference_shape = reference_shape
         self.shape_model_cls = shape_model_cls
         self.sigma = sigma
@@ -162,18 +201,31 @@ class UnifiedAAMCLM(object):
         self.appearance_models = []
         self.expert_ensembles = []
         
-        self._train(images=images, group=group, verbose=verbose)
+        self._train(images=images, group=group, verbose=verbose,
+                    n_jobs=n_jobs,
+                    warp_to_matrix=warp_to_matrix or memmap_dir is not None,
+                    memmap_dir=memmap_dir)
 
     def _build_reference_frame(self, mean_shape):
         return build_reference_frame(mean_shape, boundary=self.boundary)
 
     def _warp_images(self, images, shapes, reference_shape, scale_index,
-                     prefix, verbose):
+                     prefix, verbose, n_jobs=1):
         reference_frame = build_reference_frame(reference_shape)
         return warp_images(images, shapes, reference_frame, self.transform,
-                           prefix=prefix, verbose=verbose)
+                           prefix=prefix, verbose=verbose, n_jobs=n_jobs)
+
+    def _warp_images_to_matrix(self, images, shapes, reference_shape,
+                               scale_index, prefix, verbose, n_jobs=1,
+                               memmap_dir=None):
+        reference_frame = build_reference_frame(reference_shape)
+        return warp_images_to_matrix(images, shapes, reference_frame,
+                                     self.transform, memmap_dir=memmap_dir,
+                                     prefix=prefix, verbose=verbose,
+                                     n_jobs=n_jobs)
   
-    def _train(self, images, group=None, verbose=False):
+    def _train(self, images, group=None, verbose=False, n_jobs=1,
+               warp_to_matrix=False, memmap_dir=None):
         checks.check_landmark_trilist(images[0], self.transform, group=group)
         self.reference_shape = compute_reference_shape(
             [i.landmarks[group] for i in images],
@@ -181,7 +233,8 @@ class UnifiedAAMCLM(object):
         
         # normalize images
         images = rescale_images_to_reference_shape(
-            images, group, self.reference_shape, verbose=verbose)
+            images, group, self.reference_shape, verbose=verbose,
+            n_jobs=n_jobs)
         if self.sigma:
             images = [fsmooth(i, self.sigma) for i in images]
 
@@ -211,13 +264,14 @@ class UnifiedAAMCLM(object):
                 feature_images = compute_features(images,
                                                   self.holistic_features[j],
                                                   prefix=scale_prefix,
-                                                  verbose=verbose)
+                                                  verbose=verbose,
+                                                  n_jobs=n_jobs)
             # handle scales
             if self.scales[j] != 1:
                 # Scale feature images only if scale is different than 1
                 scaled_images = scale_images(feature_images, self.scales[j],
                                              prefix=scale_prefix,
-                                             verbose=verbose)
+                                             verbose=verbose, n_jobs=n_jobs)
             else:
                 scaled_images = feature_images
 
@@ -237,20 +291,40 @@ class UnifiedAAMCLM(object):
             # reference frame.
             scaled_reference_shape = Scale(self.scales[j], n_dims=2).apply(
                 self.reference_shape)
-            warped_images = self._warp_images(scaled_images, scale_shapes,
-                                              scaled_reference_shape,
-                                              j, scale_prefix, verbose)
+            if warp_to_matrix:
+                warped_images, template = self._warp_images_to_matrix(
+                    scaled_images, scale_shapes, scaled_reference_shape, j,
+                    scale_prefix, verbose, n_jobs=n_jobs,
+                    memmap_dir=memmap_dir)
+            else:
+                warped_images = self._warp_images(scaled_images, scale_shapes,
+                                                  scaled_reference_shape,
+                                                  j, scale_prefix, verbose,
+                                                  n_jobs=n_jobs)
 
             # obtain appearance model
             if verbose:
                 print_dynamic('{}Building appearance model'.format(
                     scale_prefix))
 
-            appearance_model = PCAModel(warped_images)
+            max_components = self.max_appearance_components[j]
+            if warp_to_matrix or (self.randomized_pca and
+                                  isinstance(max_components, int)):
+                if not warp_to_matrix:
+                    # Only the capped components are computed, on a matrix
+                    warped_images, template = images_to_matrix(
+                        warped_images, len(warped_images), dtype=np.float64)
+                appearance_model = pca_from_matrix(
+                    warped_images, template, max_n_components=max_components,
+                    randomized=self.randomized_pca,
+                    n_oversamples=self.pca_oversampling,
+                    n_power_iterations=self.pca_power_iterations,
+                    random_state=self.pca_random_state)
+            else:
+                appearance_model = PCAModel(warped_images)
             # trim appearance model if required
-            if self.max_appearance_components[j] is not None:
-                appearance_model.trim_components(
-                    self.max_appearance_components[j])
+            if max_components is not None:
+                appearance_model.trim_components(max_components)
             # add appearance model to the list
             self.appearance_models.append(appearance_model)
 
@@ -180,7 +180,8 @@ class UnifiedAAMCLMFitter(MultiScaleParametricFitter):
             procedure.
         """
         return UnifiedAAMCLMResult(
-            results=algorithm_results, scales=self.scales,
+            results=algorithm_results,
+            scales=self._result_scales(algorithm_results),
             affine_transforms=affine_transforms,
             scale_transforms=scale_transforms, image=image, gt_shape=gt_shape)
 